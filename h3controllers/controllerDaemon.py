@@ -0,0 +1,315 @@
+# Copyright [2019] [FORTH-ICS]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import abc
+import sys
+import json
+import time
+import signal
+import logging
+import argparse
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pyh3lib
+
+from expiresAtController import Expire
+from readOnlyAfterController import MakeReadOnly
+
+POLICIES = {}
+
+def register_policy(cls):
+    """
+    Class decorator that makes a policy available to the daemon under its name.
+    """
+
+    POLICIES[cls.name] = cls
+    return cls
+
+class Policy(abc.ABC):
+    """
+    A controller policy. The candidates of a policy are consumed page by page,
+    where a page is an ``H3List`` carrying the ``done`` and ``nextOffset``
+    attributes, and the batches of each page are acted upon in parallel by the
+    daemon's workers. Policies run in parallel to each other.
+    """
+
+    name = None
+
+    @abc.abstractmethod
+    def list(self, h3, now, offset):
+        """
+        :param h3: the H3 instance
+        :param now: the time of the pass
+        :param offset: the number of entries to skip
+        :type h3: pyh3lib.H3
+        :type now: float
+        :type offset: int
+        :returns: the page of candidate objects found at offset
+        """
+
+    @abc.abstractmethod
+    def apply(self, h3, batch, now):
+        """
+        :param h3: the H3 instance
+        :param batch: candidate objects of a page
+        :param now: the time of the pass
+        :type h3: pyh3lib.H3
+        :type batch: list
+        :type now: float
+        :returns: the number of objects the policy acted upon
+        """
+
+    def advance(self, page, affected):
+        """
+        :returns: the offset of the next page
+        """
+
+        return page.nextOffset
+
+@register_policy
+class ExpiresAtPolicy(Policy):
+    """
+    Delete the objects whose ExpiresAt time has come.
+    """
+
+    name = 'ExpiresAt'
+
+    def list(self, h3, now, offset):
+        return h3.list_expired_objects(now, offset)
+
+    def apply(self, h3, batch, now):
+        return Expire(h3, batch)
+
+    def advance(self, page, affected):
+        # the removed objects left the index
+        return page.nextOffset - affected
+
+@register_policy
+class ReadOnlyAfterPolicy(Policy):
+    """
+    Make objects read only once ReadOnlyAfter seconds have passed since their
+    last modification.
+    """
+
+    name = 'ReadOnlyAfter'
+
+    def list(self, h3, now, offset):
+        return h3.list_read_only_due_objects(now, offset)
+
+    def apply(self, h3, batch, now):
+        return MakeReadOnly(h3, batch)
+
+    def advance(self, page, affected):
+        # the objects made read only left the index
+        return page.nextOffset - affected
+
+class Checkpoints(object):
+    """
+    The offset each unfinished policy has reached, persisted after every page
+    so that a restarted daemon resumes where it stopped.
+    """
+
+    def __init__(self, path=None):
+        self._path  = path
+        self._lock  = threading.Lock()
+        self._state = {}
+
+        if path and os.path.exists(path):
+            with open(path) as fp:
+                self._state = json.load(fp)
+
+    def get(self, policy):
+        with self._lock:
+            return self._state.get(policy, 0)
+
+    def set(self, policy, offset):
+        with self._lock:
+            if offset is None:
+                self._state.pop(policy, None)
+            else:
+                self._state[policy] = offset
+
+            if self._path:
+                # write a new file and swap it in, so that a crash can't leave a truncated one behind
+                with open(self._path + '.tmp', 'w') as fp:
+                    json.dump(self._state, fp)
+                    fp.flush()
+                    os.fsync(fp.fileno())
+                os.replace(self._path + '.tmp', self._path)
+
+class Daemon(object):
+    """
+    Run the registered policies on a schedule, spreading the policies and
+    their batches over pools of workers that own an H3 handle each.
+
+    :param storage_uri: backend storage URI
+    :param policies: the policy names to run
+    :param workers: the number of worker threads
+    :param batch_size: the number of objects handed to a policy at once
+    :param interval: the seconds between the start of consecutive passes
+    :param checkpoint: the file to keep the policy offsets in
+    :param metrics: the file to export the per-policy metrics to
+    :type storage_uri: string
+    :type policies: list
+    :type workers: int
+    :type batch_size: int
+    :type interval: float
+    :type checkpoint: string
+    :type metrics: string
+    """
+
+    def __init__(self, storage_uri, policies, workers=4, batch_size=100, interval=60, checkpoint=None, metrics=None):
+        self._storage_uri = storage_uri
+        self._policies    = [POLICIES[name]() for name in policies]
+        self._workers     = workers
+        self._batch_size  = batch_size
+        self._interval    = interval
+        self._checkpoints = Checkpoints(checkpoint)
+        self._metrics     = metrics
+        self._local       = threading.local()
+        self._stopping    = threading.Event()
+        self._totals      = {policy.name: {'scanned': 0, 'affected': 0, 'passes': 0} for policy in self._policies}
+
+    def _h3(self):
+        if not hasattr(self._local, 'h3'):
+            self._local.h3 = pyh3lib.H3(self._storage_uri)
+        return self._local.h3
+
+    def _run_policy(self, policy, now):
+        h3       = self._h3()
+        offset   = self._checkpoints.get(policy.name)
+        scanned  = 0
+        affected = 0
+        done     = False
+
+        while not done and not self._stopping.is_set():
+            page    = policy.list(h3, now, offset)
+            batches = [page[i:i + self._batch_size] for i in range(0, len(page), self._batch_size)]
+            changed = sum(self._batch_pool.map(lambda batch: policy.apply(self._h3(), batch, now), batches))
+
+            scanned  += len(page)
+            affected += changed
+            done      = page.done
+            offset    = policy.advance(page, changed)
+            self._checkpoints.set(policy.name, None if done else offset)
+
+        return scanned, affected
+
+    def run_pass(self, scheduled):
+        """
+        Run every policy once and export the metrics.
+
+        :param scheduled: the time the pass was due
+        :type scheduled: float
+        :returns: the per-policy metrics of the pass
+        """
+
+        now     = time.clock_gettime(time.CLOCK_REALTIME)
+        futures = {policy.name: self._policy_pool.submit(self._run_policy, policy, now) for policy in self._policies}
+
+        metrics = {}
+        for name, future in futures.items():
+            try:
+                (scanned, affected) = future.result()
+            except Exception as e:
+                logging.error(f'{name}: {e!r}')
+                scanned  = 0
+                affected = 0
+
+            finished = time.clock_gettime(time.CLOCK_REALTIME)
+            duration = finished - now
+
+            totals = self._totals[name]
+            totals['scanned']  += scanned
+            totals['affected'] += affected
+            totals['passes']   += 1
+
+            metrics[name] = {'scanned':    scanned,
+                             'affected':   affected,
+                             'duration':   duration,
+                             'throughput': scanned / duration if duration > 0 else 0.0,
+                             'lag':        finished - scheduled,
+                             'totals':     dict(totals)}
+
+            logging.info(f'{name}: scanned {scanned} affected {affected} in {duration:.3f}s (lag {finished - scheduled:.3f}s)')
+
+        if self._metrics:
+            with open(self._metrics + '.tmp', 'w') as fp:
+                json.dump({'timestamp': time.clock_gettime(time.CLOCK_REALTIME), 'policies': metrics}, fp, indent=2)
+            os.replace(self._metrics + '.tmp', self._metrics)
+
+        return metrics
+
+    def run(self, once=False):
+        """
+        Run passes until stopped, or just one.
+
+        :param once: run a single pass
+        :type once: bool
+        :returns: nothing
+        """
+
+        scheduled = time.clock_gettime(time.CLOCK_REALTIME)
+
+        # policies wait on their batches, so they can't share the same workers
+        with ThreadPoolExecutor(max_workers=max(len(self._policies), 1)) as self._policy_pool, \
+             ThreadPoolExecutor(max_workers=self._workers) as self._batch_pool:
+            while not self._stopping.is_set():
+                self.run_pass(scheduled)
+                if once:
+                    break
+
+                # don't try to catch up on missed passes
+                scheduled = max(scheduled + self._interval, time.clock_gettime(time.CLOCK_REALTIME))
+                self._stopping.wait(scheduled - time.clock_gettime(time.CLOCK_REALTIME))
+
+    def stop(self, *args):
+        self._stopping.set()
+
+def main(cmd=None):
+    parser = argparse.ArgumentParser(description='H3 Controller Daemon')
+    parser.add_argument('--storage', required=True, help=f'H3 storage URI')
+    parser.add_argument('--policy', action='append', choices=sorted(POLICIES), help='Policy to run (may be repeated, default is all)')
+    parser.add_argument('--workers', type=int, default=4, help='Number of worker threads')
+    parser.add_argument('--batch-size', type=int, default=100, help='Number of objects handled at once')
+    parser.add_argument('--interval', type=float, default=60, help='Seconds between passes')
+    parser.add_argument('--checkpoint', help='File to store the progress in')
+    parser.add_argument('--metrics', help='File to export the metrics to (JSON)')
+    parser.add_argument('--once', action='store_true', help='Run a single pass and exit')
+
+    args = parser.parse_args(cmd)
+    if args.workers < 1 or args.batch_size < 1 or args.interval < 0:
+        parser.print_help(sys.stderr)
+        sys.exit(1)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+
+    daemon = Daemon(args.storage,
+                    args.policy or sorted(POLICIES),
+                    workers=args.workers,
+                    batch_size=args.batch_size,
+                    interval=args.interval,
+                    checkpoint=args.checkpoint,
+                    metrics=args.metrics)
+
+    signal.signal(signal.SIGINT, daemon.stop)
+    signal.signal(signal.SIGTERM, daemon.stop)
+
+    daemon.run(once=args.once)
+
+if __name__ == '__main__':
+    main()
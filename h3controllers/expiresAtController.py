@@ -12,50 +12,60 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import sys
 import time 
 import argparse
-import struct
 
 import pyh3lib
 
+def Expire(h3, h3_objects):
+    """
+    Delete a batch of objects that are due for expiration.
+
+    :param h3: the H3 instance
+    :param h3_objects: (bucket name, object name) tuples as returned by ``list_expired_objects``
+    :type h3: pyh3lib.H3
+    :type h3_objects: list
+    :returns: the number of objects removed
+    """
+
+    removed = 0
+
+    for (h3_bucket, h3_object) in h3_objects:
+        try:
+            h3.delete_object(h3_bucket, h3_object)
+            removed += 1
+        except pyh3lib.H3NotExistsError:
+            continue
+
+    return removed
+
 def ExpiresAt(h3):
     """
     Delete all the objects that have the ExpiresAt attribute 
     and the time that is specified in the ExpiresAt has come.
 
-    :param now: the time, now
-    :type now: float
+    The objects are retrieved in batches from the library's expiry index,
+    so only the entries that are due are visited.
+
+    :param h3: the H3 instance
+    :type h3: pyh3lib.H3
     :returns: nothing
     """
 
     now = time.clock_gettime(time.CLOCK_REALTIME)
 
-    # list all the buckets 
-    for h3_bucket in h3.list_buckets():
-        done   = False
-        offset = 0
-        
-        # list all the objects that have the ExpiresAt attribute
-        while not done:
-            h3_objects = h3.list_objects_with_metadata(h3_bucket, "ExpiresAt", offset)
-
-            for h3_object in h3_objects:
-                # the h3_object contains the object's name
-                expire_at = h3.read_object_metadata(h3_bucket, h3_object, "ExpiresAt")
-
-                if expire_at != b'':
-                    # try to parse
-                    try:
-                        h3_object_remove_timestamp = struct.unpack('d', expire_at)
-                    except struct.error:
-                        continue
-
-                    # Check if we must remove the object
-                    if (now >= h3_object_remove_timestamp[0]) :
-                        h3.delete_object(h3_bucket, h3_object)
-            
-            done    = h3_objects.done
-            offset  = h3_objects.nextOffset
+    done   = False
+    offset = 0
+
+    # list the objects whose ExpiresAt time has come
+    while not done:
+        h3_objects = h3.list_expired_objects(now, offset)
+
+        # the removed objects left the index, so skip fewer entries next time
+        removed = Expire(h3, h3_objects)
+        done    = h3_objects.done
+        offset  = h3_objects.nextOffset - removed
 
 def main(cmd=None):
     parser = argparse.ArgumentParser(description='ExpiresAt Controller')
@@ -12,52 +12,60 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import sys
 import time 
 import argparse
-import struct
 
 import pyh3lib
 
+def MakeReadOnly(h3, h3_objects):
+    """
+    Set the permissions to read only in a batch of objects whose ReadOnlyAfter deadline has passed.
+
+    :param h3: the H3 instance
+    :param h3_objects: (bucket name, object name) tuples as returned by ``list_read_only_due_objects``
+    :type h3: pyh3lib.H3
+    :type h3_objects: list
+    :returns: the number of objects made read only
+    """
+
+    changed = 0
+
+    for (h3_bucket, h3_object) in h3_objects:
+        try:
+            h3.make_object_read_only(h3_bucket, h3_object)
+            changed += 1
+        except pyh3lib.H3NotExistsError:
+            continue
+
+    return changed
+
 def ReadOnlyAfter(h3):
     """
     Set's the permissions to read only in all objects that have the ReadOnlyAfter attribute and the "now" time exceeds
     the time that is specified in the ReadOnlyAfter plus the time from the last time that the object has been modified.
+
+    The objects are retrieved in batches from the library's deadline index,
+    so only the objects whose deadline has passed are visited.
     
-    :param now: the time, now
-    :type now: float
+    :param h3: the H3 instance
+    :type h3: pyh3lib.H3
     :returns: nothing
     """
 
     now = time.clock_gettime(time.CLOCK_REALTIME)
 
-    # list all the buckets 
-    for h3_bucket in h3.list_buckets():
-        done   = False
-        offset = 0
-        
-        # list all the objects that have the ExpiresAt attribute
-        while not done:
-            h3_objects = h3.list_objects_with_metadata(h3_bucket, "ReadOnlyAfter", offset)
-
-            for h3_object in h3_objects:
-                # the h3_object contains the object's name
-                read_only_after = h3.read_object_metadata(h3_bucket, h3_object, "ReadOnlyAfter")
-
-                if read_only_after != b'':
-                    # try to parse
-                    try:
-                        h3_object_remove_timestamp = struct.unpack('d', read_only_after)
-                    except struct.error:
-                        continue
-
-                    h3_object_info = h3.info_object(h3_bucket, h3_object)
-
-                    # Check if we must change the permissions of the object to read only
-                    if ((not h3_object_info.read_only) and (now >= (h3_object_info.last_modification + h3_object_remove_timestamp[0]))):
-                        h3.make_object_read_only(h3_bucket, h3_object)
-
-            done    = h3_objects.done
-            offset  = h3_objects.nextOffset
+    done   = False
+    offset = 0
+
+    # list the objects whose ReadOnlyAfter deadline has passed
+    while not done:
+        h3_objects = h3.list_read_only_due_objects(now, offset)
+
+        # the objects made read only left the index, so skip fewer entries next time
+        changed = MakeReadOnly(h3, h3_objects)
+        done    = h3_objects.done
+        offset  = h3_objects.nextOffset - changed
 
 def main(cmd=None):
     parser = argparse.ArgumentParser(description='ReadOnlyAfter Controller')
@@ -0,0 +1,36 @@
+# Copyright [2019] [FORTH-ICS]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import sys
+import pytest
+
+from pyh3lib import H3
+
+# the controllers are scripts that import each other by name
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+def pytest_addoption(parser):
+    parser.addoption('--storage', action='store', required=True, help="H3 storage URI")
+
+@pytest.fixture(scope='module')
+def storage_uri(request):
+    storage_uri = request.config.getoption('--storage')
+
+    assert storage_uri, 'You need to specify a storage URI with "--storage"'
+    return storage_uri
+
+@pytest.fixture(scope='module')
+def h3(storage_uri):
+    return H3(storage_uri)
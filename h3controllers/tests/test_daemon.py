@@ -0,0 +1,162 @@
+# Copyright [2019] [FORTH-ICS]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import time
+import struct
+import pytest
+
+import controllerDaemon
+
+from pyh3lib import H3List
+from controllerDaemon import Policy, Checkpoints, Daemon
+
+class PagedPolicy(Policy):
+    """Hand out a fixed list of candidates, three at a time."""
+
+    name = 'Paged'
+
+    def __init__(self):
+        self.items   = list(range(10))
+        self.listed  = []
+        self.applied = []
+        self.stop    = None
+
+    def list(self, h3, now, offset):
+        self.listed.append(offset)
+        return H3List(self.items[offset:offset + 3], done=(offset + 3 >= len(self.items)), nextOffset=offset + 3)
+
+    def apply(self, h3, batch, now):
+        self.applied.extend(batch)
+        if self.stop:
+            self.stop()
+        return 0
+
+def test_abstract_policy():
+    """Policies have to provide list and apply."""
+
+    class Incomplete(Policy):
+        name = 'Incomplete'
+
+        def list(self, h3, now, offset):
+            return H3List([], done=True, nextOffset=0)
+
+    with pytest.raises(TypeError):
+        Policy()
+    with pytest.raises(TypeError):
+        Incomplete()
+
+    assert PagedPolicy().list(None, 0, 9) == [9]
+
+def test_checkpoints(tmp_path):
+    """Offsets survive a restart and finished policies are dropped."""
+
+    path = str(tmp_path / 'checkpoints.json')
+
+    checkpoints = Checkpoints(path)
+    assert checkpoints.get('p1') == 0
+
+    checkpoints.set('p1', 10)
+    checkpoints.set('p2', 20)
+    assert Checkpoints(path).get('p1') == 10
+    assert Checkpoints(path).get('p2') == 20
+
+    checkpoints.set('p1', None)
+    assert Checkpoints(path).get('p1') == 0
+    assert Checkpoints(path).get('p2') == 20
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['checkpoints.json']
+
+    # offsets are kept in memory without a file
+    checkpoints = Checkpoints()
+    checkpoints.set('p1', 10)
+    assert checkpoints.get('p1') == 10
+
+def test_checkpoints_atomic(tmp_path, monkeypatch):
+    """A failed write leaves the previous checkpoint in place."""
+
+    path = str(tmp_path / 'checkpoints.json')
+
+    checkpoints = Checkpoints(path)
+    checkpoints.set('p1', 10)
+
+    def interrupted_dump(obj, fp):
+        fp.write('{"p1": ')
+        raise OSError('interrupted')
+
+    monkeypatch.setattr(controllerDaemon.json, 'dump', interrupted_dump)
+    with pytest.raises(OSError):
+        checkpoints.set('p1', 20)
+    monkeypatch.undo()
+
+    with open(path) as fp:
+        assert json.load(fp) == {'p1': 10}
+    assert Checkpoints(path).get('p1') == 10
+
+def test_daemon_resume(storage_uri, tmp_path, monkeypatch):
+    """A stopped daemon continues from its checkpoint when restarted."""
+
+    monkeypatch.setitem(controllerDaemon.POLICIES, PagedPolicy.name, PagedPolicy)
+    path = str(tmp_path / 'checkpoints.json')
+
+    # stop while handling the first page
+    daemon = Daemon(storage_uri, [PagedPolicy.name], workers=2, batch_size=2, checkpoint=path)
+    policy = daemon._policies[0]
+    policy.stop = daemon.stop
+    daemon.run(once=True)
+
+    assert policy.listed == [0]
+    assert sorted(policy.applied) == [0, 1, 2]
+    assert Checkpoints(path).get(PagedPolicy.name) == 3
+
+    daemon = Daemon(storage_uri, [PagedPolicy.name], workers=2, batch_size=2, checkpoint=path)
+    policy = daemon._policies[0]
+    daemon.run(once=True)
+
+    assert policy.listed == [3, 6, 9]
+    assert sorted(policy.applied) == list(range(3, 10))
+    with open(path) as fp:
+        assert json.load(fp) == {}
+
+def test_daemon_expires(h3, storage_uri, tmp_path):
+    """Due objects are removed in a pass and the metrics are exported."""
+
+    assert h3.list_buckets() == []
+
+    assert h3.create_bucket('b1')
+
+    now = time.clock_gettime(time.CLOCK_REALTIME)
+    for i in range(7):
+        h3.create_object('b1', f'due{i}', b'')
+        h3.create_object_metadata('b1', f'due{i}', 'ExpiresAt', struct.pack('d', now - 100 - i))
+    for i in range(3):
+        h3.create_object('b1', f'later{i}', b'')
+        h3.create_object_metadata('b1', f'later{i}', 'ExpiresAt', struct.pack('d', now + 3600))
+
+    metrics = str(tmp_path / 'metrics.json')
+    daemon = Daemon(storage_uri, ['ExpiresAt'], workers=3, batch_size=2, checkpoint=str(tmp_path / 'checkpoints.json'), metrics=metrics)
+    daemon.run(once=True)
+
+    assert sorted(h3.list_objects('b1')) == ['later0', 'later1', 'later2']
+    assert h3.list_expired_objects(now) == []
+
+    with open(metrics) as fp:
+        exported = json.load(fp)['policies']['ExpiresAt']
+    assert exported['scanned'] == 7
+    assert exported['affected'] == 7
+    assert exported['totals']['passes'] == 1
+
+    h3.purge_bucket('b1')
+
+    assert h3.delete_bucket('b1')
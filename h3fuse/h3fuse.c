@@ -12,6 +12,7 @@
 #include <sys/types.h>
 #include <sys/stat.h>
 #include <errno.h>
+#include <pthread.h>
 #include <glib.h>
 #include <fuse3/fuse.h>
 #include <h3lib/h3lib.h>
@@ -19,6 +20,10 @@
 #include "h3fuse_config.h"
 
 #define H3_FUSE_MAX_FILENAME	255	// This is restricted by KV_FS plugin in h3lib
+#define H3FS_PART_SIZE			1048576	// Matches the h3lib part size so that we transfer whole parts
+#define H3FS_READ_AHEAD			4		// Max number of parts to prefetch
+#define H3FS_PREFETCH_THREADS	4
+#define H3FS_ATTR_CACHE_SIZE	65536	// Max number of cached attributes before expired ones are purged
 
 #ifndef RENAME_NOREPLACE
 #define RENAME_NOREPLACE	(1 << 0)	/* Don't overwrite target */
@@ -41,18 +46,130 @@ typedef struct {
      char* storageUri;
      char* token;
      char* bucket;
+     unsigned int writeBuffer;
+     unsigned int readAhead;
 } H3FS_Config;
 
 typedef struct {
     H3_Handle handle;
     H3_Auth token;
     H3_Name bucket;
+    size_t writeBufferSize;
+    uint readAhead;
+    GThreadPool* prefetchPool;
+    double attrTimeout;
+    GHashTable* attrCache;
+    pthread_mutex_t attrLock;
+    char* storageUri;
+    pthread_key_t handleKey;		// The handle bound to each worker thread
+    pthread_mutex_t handleLock;
+    GPtrArray* handles;				// All handles created
+    GPtrArray* idleHandles;			// Handles released by exited threads
+    int sharedHandle;				// The store can't be opened twice, all threads use data.handle
+    GHashTable* nodes;				// The files open on each object
+    pthread_mutex_t nodeLock;
 }H3FS_PrivateData;
 
+// The attributes of a file, valid until expires (CLOCK_MONOTONIC)
+typedef struct {
+	struct stat st;
+	double expires;
+}H3FS_Attr;
+
+enum {
+	H3FS_BLOCK_EMPTY,
+	H3FS_BLOCK_LOADING,
+	H3FS_BLOCK_READY,
+	H3FS_BLOCK_FAILED
+};
+
+// A cached part of an open file
+typedef struct {
+	off_t offset;
+	size_t size;		// Less than H3FS_PART_SIZE only for the last part of the object
+	char* data;
+	char state;
+	uint64_t used;		// For LRU eviction
+}H3FS_Block;
+
+// The files open on an object, so that moving or deleting the object can take care of their buffered writes
+typedef struct {
+	char object[H3_OBJECT_NAME_SIZE+1];
+	GPtrArray* files;
+	gint generation;	// Advanced whenever the object is modified, so that all of its files drop their cached parts
+}H3FS_Node;
+
+// Per open file state, kept in fuse_file_info.fh
+typedef struct {
+    H3FS_Node* node;	// Changed only with the file's lock held, follows the object when it is renamed
+    pthread_mutex_t lock;
+    char* buffer;		// Sequential writes not yet stored
+    off_t offset;		// Object offset of the buffered data
+    size_t size;		// Size of the buffered data
+    pthread_cond_t loaded;	// Signaled when a block finishes loading
+    H3FS_Block* blocks;
+    uint nBlocks;
+    uint refs;			// Prefetches in flight
+    uint generation;	// Advanced on writes so that loads in flight are discarded
+    uint seen;			// The node generation the cached parts were loaded in
+    off_t nextRead;		// Where a sequential reader would continue from
+    uint window;		// Current read-ahead in parts
+    uint64_t clock;
+}H3FS_File;
+
+typedef struct {
+	H3FS_File* file;
+	H3FS_Block* block;
+}H3FS_Prefetch;
+
 extern FILE* stderr;
 
 static H3FS_PrivateData data;
 
+/*
+ * Backends such as Redis keep a connection per handle that may not be used by several threads at once, thus each thread
+ * serving FUSE requests (or prefetching) gets a handle of its own, kept for as long as the thread lives and then passed
+ * on to the next thread. Backends that can't be opened more than once per process (e.g. RocksDB, due to its lock file)
+ * are thread-safe on their own, so in that case all threads share the initial handle.
+ */
+static H3_Handle GetHandle(){
+	H3_Handle handle;
+
+	if(data.sharedHandle || !data.handles)
+		return data.handle;
+
+	if((handle = pthread_getspecific(data.handleKey)))
+		return handle;
+
+	pthread_mutex_lock(&data.handleLock);
+	if(data.idleHandles->len)
+		handle = g_ptr_array_remove_index_fast(data.idleHandles, data.idleHandles->len - 1);
+	pthread_mutex_unlock(&data.handleLock);
+
+	if(!handle){
+		if(!(handle = H3_Init(data.storageUri))){
+			fprintf(stderr, "Unable to open another handle to the store, sharing one among all threads\n");
+			data.sharedHandle = 1;
+			return data.handle;
+		}
+
+		pthread_mutex_lock(&data.handleLock);
+		g_ptr_array_add(data.handles, handle);
+		pthread_mutex_unlock(&data.handleLock);
+	}
+
+	pthread_setspecific(data.handleKey, handle);
+	return handle;
+}
+
+// Called on thread exit, hand the thread's handle to the next thread
+static void PutHandle(void* handle){
+	pthread_mutex_lock(&data.handleLock);
+	if(data.idleHandles)
+		g_ptr_array_add(data.idleHandles, handle);
+	pthread_mutex_unlock(&data.handleLock);
+}
+
 static inline H3_Name Cast2DirEntry(H3_Name dirEntry, int* isDir){
 	char* slash;
 
@@ -74,21 +191,481 @@ static inline H3_Name Cast2DirEntry(H3_Name dirEntry, int* isDir){
 	return dirEntry;
 }
 
+static H3FS_Node* FindNode(const char* object){
+	return object[0]?g_hash_table_lookup(data.nodes, object):NULL;
+}
+
+// Register an open file with the object it was opened on
+static int AttachFile(H3FS_File* file, const char* object){
+	H3FS_Node* node;
+
+	pthread_mutex_lock(&data.nodeLock);
+	if(!(node = FindNode(object)) && strlen(object) <= H3_OBJECT_NAME_SIZE && (node = calloc(1, sizeof(H3FS_Node)))){
+		strcpy(node->object, object);
+		node->files = g_ptr_array_new();
+		g_hash_table_insert(data.nodes, node->object, node);
+	}
+
+	if(node){
+		g_ptr_array_add(node->files, file);
+		file->node = node;
+	}
+	pthread_mutex_unlock(&data.nodeLock);
+
+	return node != NULL;
+}
+
+static void DetachFile(H3FS_File* file){
+	H3FS_Node* node;
+
+	pthread_mutex_lock(&data.nodeLock);
+	if((node = file->node)){
+		g_ptr_array_remove_fast(node->files, file);
+		if(!node->files->len){
+			g_hash_table_remove(data.nodes, node->object);
+			g_ptr_array_free(node->files, TRUE);
+			free(node);
+		}
+		file->node = NULL;
+	}
+	pthread_mutex_unlock(&data.nodeLock);
+}
+
+static H3FS_File* OpenFile(const char* path){
+	H3FS_File* file = calloc(1, sizeof(H3FS_File));
+
+	if(file){
+		pthread_mutex_init(&file->lock, NULL);
+		pthread_cond_init(&file->loaded, NULL);
+		if(data.writeBufferSize)
+			file->buffer = malloc(data.writeBufferSize);
+
+		// Room for the read-ahead window plus the part being read
+		if(data.readAhead){
+			file->nBlocks = data.readAhead + 1;
+			file->blocks = calloc(file->nBlocks, sizeof(H3FS_Block));
+		}
+
+		if((data.writeBufferSize && !file->buffer) || (data.readAhead && !file->blocks) || !AttachFile(file, &path[1])){
+			pthread_cond_destroy(&file->loaded);
+			pthread_mutex_destroy(&file->lock);
+			free(file->buffer);
+			free(file->blocks);
+			free(file);
+			file = NULL;
+		}
+	}
+
+	return file;
+}
+
+static void CloseFile(H3FS_File* file){
+	uint i;
+
+	// Wait for the prefetches to complete
+	pthread_mutex_lock(&file->lock);
+	while(file->refs)
+		pthread_cond_wait(&file->loaded, &file->lock);
+	pthread_mutex_unlock(&file->lock);
+
+	DetachFile(file);
+	for(i=0; i<file->nBlocks; i++)
+		free(file->blocks[i].data);
+
+	pthread_cond_destroy(&file->loaded);
+	pthread_mutex_destroy(&file->lock);
+	free(file->blocks);
+	free(file->buffer);
+	free(file);
+}
+
+// Drop the cached parts after the object has been modified, the caller must hold the file's lock
+static void InvalidateFile(H3FS_File* file){
+	uint i;
+
+	file->generation++;
+	for(i=0; i<file->nBlocks; i++){
+		if(file->blocks[i].state != H3FS_BLOCK_LOADING){
+			file->blocks[i].state = H3FS_BLOCK_EMPTY;
+			file->blocks[i].used = 0;
+		}
+	}
+}
+
+// Have every file open on an object drop its cached parts once the object is modified
+static void ChangeNode(H3FS_Node* node){
+	if(node)
+		g_atomic_int_inc(&node->generation);
+}
+
+static void ChangeObject(const char* object){
+	pthread_mutex_lock(&data.nodeLock);
+	ChangeNode(FindNode(object));
+	pthread_mutex_unlock(&data.nodeLock);
+}
+
+// Drop the cached parts if the object was modified through any file, the caller must hold the file's lock
+static void RefreshFile(H3FS_File* file){
+	uint generation = g_atomic_int_get(&file->node->generation);
+
+	if(file->seen != generation){
+		InvalidateFile(file);
+		file->seen = generation;
+	}
+}
+
+static H3FS_Block* FindBlock(H3FS_File* file, off_t offset){
+	uint i;
+
+	for(i=0; i<file->nBlocks; i++){
+		if(file->blocks[i].state != H3FS_BLOCK_EMPTY && file->blocks[i].offset == offset)
+			return &file->blocks[i];
+	}
+
+	return NULL;
+}
+
+// Claim the least recently used block not being loaded, the caller must hold the file's lock
+static H3FS_Block* ReserveBlock(H3FS_File* file, off_t offset){
+	H3FS_Block* block = NULL;
+	uint i;
+
+	for(i=0; i<file->nBlocks; i++){
+		if(file->blocks[i].state != H3FS_BLOCK_LOADING && (!block || file->blocks[i].used < block->used))
+			block = &file->blocks[i];
+	}
+
+	if(block && (block->data || (block->data = malloc(H3FS_PART_SIZE)))){
+		block->offset = offset;
+		block->size = 0;
+		block->state = H3FS_BLOCK_LOADING;
+		block->used = ++file->clock;
+		return block;
+	}
+
+	return NULL;
+}
+
+// Retrieve a reserved block, the caller must hold the file's lock which is released during the transfer
+static void LoadBlock(H3FS_File* file, H3FS_Block* block){
+	uint generation = file->generation;
+	void* buffer = block->data;
+	size_t size = H3FS_PART_SIZE;
+	char object[H3_OBJECT_NAME_SIZE+1];
+	H3_Status status;
+
+	// The object may be renamed once the lock is released
+	strcpy(object, file->node->object);
+	pthread_mutex_unlock(&file->lock);
+	status = H3_ReadObject(GetHandle(), &data.token, data.bucket, object, block->offset, &buffer, &size);
+	pthread_mutex_lock(&file->lock);
+
+	if(generation != file->generation)
+		block->state = H3FS_BLOCK_EMPTY;
+	else if(status == H3_SUCCESS || status == H3_CONTINUE){
+		block->size = size;
+		block->state = H3FS_BLOCK_READY;
+	}
+	else
+		block->state = H3FS_BLOCK_FAILED;
+
+	pthread_cond_broadcast(&file->loaded);
+}
+
+static void PrefetchWorker(gpointer item, gpointer userData){
+	H3FS_Prefetch* prefetch = (H3FS_Prefetch*)item;
+	H3FS_File* file = prefetch->file;
+
+	pthread_mutex_lock(&file->lock);
+	LoadBlock(file, prefetch->block);
+	file->refs--;
+	pthread_cond_broadcast(&file->loaded);
+	pthread_mutex_unlock(&file->lock);
+
+	free(prefetch);
+}
+
+// Queue the parts following a sequential read, the caller must hold the file's lock
+static void Prefetch(H3FS_File* file, off_t offset){
+	uint i;
+
+	for(i=0; i<file->window; i++, offset += H3FS_PART_SIZE){
+		H3FS_Block* block;
+		H3FS_Prefetch* prefetch;
+
+		if(FindBlock(file, offset))
+			continue;
+
+		if(!(block = ReserveBlock(file, offset)))
+			break;
+
+		if(!(prefetch = malloc(sizeof(H3FS_Prefetch)))){
+			block->state = H3FS_BLOCK_EMPTY;
+			break;
+		}
+
+		prefetch->file = file;
+		prefetch->block = block;
+		file->refs++;
+		g_thread_pool_push(data.prefetchPool, prefetch, NULL);
+	}
+}
+
+// Store any buffered writes, the caller must hold the file's lock
+static int FlushFile(H3FS_File* file){
+	int res = 0;
+
+	if(file->size){
+		switch(H3_WriteObject(GetHandle(), &data.token, data.bucket, file->node->object, file->buffer, file->size, file->offset)){
+			case H3_SUCCESS: 		res = 0; 				break;
+			case H3_NOT_EXISTS: 	res = -ENOENT; 			break;
+			case H3_NAME_TOO_LONG: 	res = -ENAMETOOLONG; 	break;
+			default: 				res = -EIO; 			break;
+		}
+
+		// The data are kept on failure so that a later flush may store them
+		if(!res){
+			file->size = 0;
+			ChangeNode(file->node);
+		}
+	}
+
+	return res;
+}
+
+static int SyncFile(struct fuse_file_info* fi){
+	int res = 0;
+	H3FS_File* file;
+
+	if(fi && (file = (H3FS_File*)fi->fh)){
+		pthread_mutex_lock(&file->lock);
+		res = FlushFile(file);
+		pthread_mutex_unlock(&file->lock);
+	}
+
+	return res;
+}
+
+// Flush and drop the cached parts of a file about to be modified by other means
+static int ModifyFile(struct fuse_file_info* fi){
+	int res = 0;
+	H3FS_File* file;
+
+	if(fi && (file = (H3FS_File*)fi->fh)){
+		pthread_mutex_lock(&file->lock);
+		res = FlushFile(file);
+		InvalidateFile(file);
+		pthread_mutex_unlock(&file->lock);
+	}
+
+	return res;
+}
+
+// Lock the files open on an object and store their buffered writes, the caller must hold data.nodeLock
+static int LockFiles(H3FS_Node* node, GPtrArray* locked){
+	int res = 0;
+	guint i;
+
+	for(i=0; node && i<node->files->len; i++){
+		H3FS_File* file = g_ptr_array_index(node->files, i);
+
+		pthread_mutex_lock(&file->lock);
+		g_ptr_array_add(locked, file);
+		if(!res)
+			res = FlushFile(file);
+	}
+
+	return res;
+}
+
+static void UnlockFiles(GPtrArray* locked){
+	guint i;
+
+	for(i=0; i<locked->len; i++)
+		pthread_mutex_unlock(&((H3FS_File*)g_ptr_array_index(locked, i))->lock);
+	g_ptr_array_free(locked, TRUE);
+}
+
+// Give a node taken out of data.nodes a new name, the caller must hold data.nodeLock and the locks of the node's files
+static void RenameNode(H3FS_Node* node, const char* object){
+	snprintf(node->object, sizeof(node->object), "%s", object);
+	g_hash_table_insert(data.nodes, node->object, node);
+}
+
+/*
+ * Move or exchange an object once the buffered writes of the files open on either name are stored, so that these are
+ * neither lost nor stored later under a name that no longer holds the object. The files then follow the object, e.g.
+ * those still open on a file that FUSE hides on unlink are flushed to the hidden name.
+ */
+static H3_Status RenameObject(H3_Name src, H3_Name dst, uint8_t swap, uint8_t noOverwrite){
+	H3FS_Node *srcNode, *dstNode;
+	GPtrArray* locked = g_ptr_array_new();
+	H3_Status status = H3_STORE_ERROR;
+	guint i;
+
+	pthread_mutex_lock(&data.nodeLock);
+	srcNode = FindNode(src);
+	dstNode = strcmp(src, dst)?FindNode(dst):NULL;
+	if(!LockFiles(srcNode, locked) && !LockFiles(dstNode, locked)){
+		if(!swap)
+			status = H3_MoveObject(GetHandle(), &data.token, data.bucket, src, dst, noOverwrite);
+		else
+			status = H3_ExchangeObject(GetHandle(), &data.token, data.bucket, src, dst);
+	}
+
+	// The files open on the replaced object see the moved one
+	if(status == H3_SUCCESS && !swap)
+		ChangeNode(dstNode);
+
+	if(status == H3_SUCCESS && swap){
+		if(srcNode)
+			g_hash_table_remove(data.nodes, srcNode->object);
+		if(dstNode)
+			g_hash_table_remove(data.nodes, dstNode->object);
+		if(srcNode)
+			RenameNode(srcNode, dst);
+		if(dstNode)
+			RenameNode(dstNode, src);
+	}
+	else if(status == H3_SUCCESS && srcNode){
+		g_hash_table_remove(data.nodes, srcNode->object);
+
+		// The files open on the replaced object now refer to the moved one
+		if(dstNode){
+			for(i=0; i<srcNode->files->len; i++){
+				H3FS_File* file = g_ptr_array_index(srcNode->files, i);
+				g_ptr_array_add(dstNode->files, file);
+				file->node = dstNode;
+			}
+			g_ptr_array_free(srcNode->files, TRUE);
+			free(srcNode);
+		}
+		else
+			RenameNode(srcNode, dst);
+	}
+
+	UnlockFiles(locked);
+	pthread_mutex_unlock(&data.nodeLock);
+
+	return status;
+}
+
+// Delete an object once the buffered writes of the files open on it are stored, so that they don't recreate it later
+static H3_Status DeleteObject(H3_Name object){
+	H3FS_Node* node;
+	GPtrArray* locked = g_ptr_array_new();
+	H3_Status status = H3_STORE_ERROR;
+
+	pthread_mutex_lock(&data.nodeLock);
+	if(!LockFiles((node = FindNode(object)), locked) && (status = H3_DeleteObject(GetHandle(), &data.token, data.bucket, object)) == H3_SUCCESS)
+		ChangeNode(node);
+	UnlockFiles(locked);
+	pthread_mutex_unlock(&data.nodeLock);
+
+	return status;
+}
+
+// Truncate an object once the buffered writes of the files open on it are stored
+static H3_Status TruncateObject(H3_Name object, size_t size){
+	H3FS_Node* node;
+	GPtrArray* locked = g_ptr_array_new();
+	H3_Status status = H3_STORE_ERROR;
+
+	pthread_mutex_lock(&data.nodeLock);
+	if(!LockFiles((node = FindNode(object)), locked))
+		status = H3_TruncateObject(GetHandle(), &data.token, data.bucket, object, size);
+	ChangeNode(node);
+	UnlockFiles(locked);
+	pthread_mutex_unlock(&data.nodeLock);
+
+	return status;
+}
+
+static double Now(){
+	struct timespec now;
+	clock_gettime(CLOCK_MONOTONIC, &now);
+	return now.tv_sec + now.tv_nsec / 1e9;
+}
+
+static gboolean IsExpired(gpointer key, gpointer value, gpointer now){
+	return ((H3FS_Attr*)value)->expires <= *(double*)now;
+}
+
+// Remember the attributes of a file for attr_timeout seconds
+static void CacheAttr(const char* path, struct stat* stbuf){
+	H3FS_Attr* attr;
+	double now = Now();
+
+	if(!data.attrCache || !(attr = malloc(sizeof(H3FS_Attr))))
+		return;
+
+	attr->st = *stbuf;
+	attr->expires = now + data.attrTimeout;
+
+	pthread_mutex_lock(&data.attrLock);
+	if(g_hash_table_size(data.attrCache) >= H3FS_ATTR_CACHE_SIZE){
+		g_hash_table_foreach_remove(data.attrCache, IsExpired, &now);
+		if(g_hash_table_size(data.attrCache) >= H3FS_ATTR_CACHE_SIZE)
+			g_hash_table_remove_all(data.attrCache);
+	}
+	g_hash_table_insert(data.attrCache, strdup(path), attr);
+	pthread_mutex_unlock(&data.attrLock);
+}
+
+static int LookupAttr(const char* path, struct stat* stbuf){
+	H3FS_Attr* attr;
+	int found = 0;
+
+	if(!data.attrCache)
+		return 0;
+
+	pthread_mutex_lock(&data.attrLock);
+	if((attr = g_hash_table_lookup(data.attrCache, path)) && attr->expires > Now()){
+		*stbuf = attr->st;
+		found = 1;
+	}
+	pthread_mutex_unlock(&data.attrLock);
+
+	return found;
+}
+
+// Forget the attributes of a path about to be modified, or of every path if NULL
+static void InvalidateAttr(const char* path){
+	if(!data.attrCache)
+		return;
+
+	pthread_mutex_lock(&data.attrLock);
+	if(path)
+		g_hash_table_remove(data.attrCache, path);
+	else
+		g_hash_table_remove_all(data.attrCache);
+	pthread_mutex_unlock(&data.attrLock);
+}
+
+static void FillStat(H3_ObjectInfo* info, struct stat* stbuf){
+	memset(stbuf, 0, sizeof(struct stat));
+	stbuf->st_mode = S_IFREG | info->mode;
+	stbuf->st_nlink = 1;
+	stbuf->st_size = info->size;
+	stbuf->st_atim = info->lastAccess;
+	stbuf->st_mtim = info->lastModification;
+	stbuf->st_ctim = info->lastChange;
+	stbuf->st_uid = info->uid;
+	stbuf->st_gid = info->gid;
+}
+
 static int GetObjectInfo(const char* path, struct stat* stbuf){
     int res = 0;
     H3_Name object = (H3_Name)&path[1];
     H3_ObjectInfo info;
 
-    switch(H3_InfoObject(data.handle, &data.token, data.bucket, object, &info)){
+    if(LookupAttr(path, stbuf))
+    	return 0;
+
+    switch(H3_InfoObject(GetHandle(), &data.token, data.bucket, object, &info)){
 		case H3_SUCCESS:
-			stbuf->st_mode = S_IFREG | info.mode;
-			stbuf->st_nlink = 1;
-			stbuf->st_size = info.size;
-			stbuf->st_atim = info.lastAccess;
-			stbuf->st_mtim = info.lastModification;
-			stbuf->st_ctim = info.lastChange;
-			stbuf->st_uid = info.uid;
-			stbuf->st_gid = info.gid;
+			FillStat(&info, stbuf);
+			CacheAttr(path, stbuf);
 			break;
 
 		case H3_INVALID_ARGS: 	res = -EINVAL; break;
@@ -108,7 +685,7 @@ static int GetObjectInfo(const char* path, struct stat* stbuf){
     	asprintf(&directory, "%s/", object);
 
     	// Either a fake one, i.e. mkdir lala, or
-    	if( H3_InfoObject(data.handle, &data.token, data.bucket, directory, &info) == H3_SUCCESS){
+    	if( H3_InfoObject(GetHandle(), &data.token, data.bucket, directory, &info) == H3_SUCCESS){
     		stbuf->st_mode = S_IFDIR | info.mode;
     		stbuf->st_nlink = 2;
     		stbuf->st_atim = info.lastAccess;
@@ -120,7 +697,7 @@ static int GetObjectInfo(const char* path, struct stat* stbuf){
     	}
 
     	// ...a real one, i.e. listing an externally populated bucket
-    	else if( H3_ListObjects(data.handle, &data.token, data.bucket, directory, 0, &objectNameArray, &nObjects) == H3_SUCCESS){
+    	else if( H3_ListObjects(GetHandle(), &data.token, data.bucket, directory, 0, &objectNameArray, &nObjects) == H3_SUCCESS){
     		if(nObjects){
     			stbuf->st_mode = S_IFDIR | 0755;
     			stbuf->st_nlink = 2;
@@ -142,6 +719,12 @@ static int H3FS_GetAttr(const char* path, struct stat* stbuf, struct fuse_file_i
         return 0;
     }
 
+    // Make buffered writes visible in the object's size
+    if(fi && fi->fh){
+    	SyncFile(fi);
+    	InvalidateAttr(path);
+    }
+
     return GetObjectInfo(path, stbuf);
 }
 
@@ -150,13 +733,15 @@ static int H3FS_MkNod(const char* path, mode_t mode, dev_t dev){
     H3_Name object = (H3_Name)&path[1];
     size_t length = strlen(object);
 
+    InvalidateAttr(path);
+
 	(void)dev;
 
 	if(!length || (!S_ISDIR(mode) && !S_ISREG(mode)) ){
 		return -EINVAL;
 	}
 
-	switch(H3_CreateObject(data.handle, &data.token, data.bucket, object, NULL, 0)){
+	switch(H3_CreateObject(GetHandle(), &data.token, data.bucket, object, NULL, 0)){
 		case H3_FAILURE:
 		case H3_INVALID_ARGS: 	res = -EINVAL; break;
 		case H3_EXISTS: 		res = -EEXIST; break;
@@ -165,7 +750,7 @@ static int H3FS_MkNod(const char* path, mode_t mode, dev_t dev){
 	}
 
 	H3_Attribute attrib = {.type = H3_ATTRIBUTE_PERMISSIONS, .mode = mode};
-	if(res == 0 && H3_SetObjectAttributes(data.handle, &data.token, data.bucket, object, attrib) != H3_SUCCESS){
+	if(res == 0 && H3_SetObjectAttributes(GetHandle(), &data.token, data.bucket, object, attrib) != H3_SUCCESS){
 		res = -EINVAL;
 	}
 
@@ -178,6 +763,8 @@ static int H3FS_MkDir(const char* path, mode_t mode){
     H3_Name object = (H3_Name)&path[1];
     size_t length = strlen(object);
 
+    InvalidateAttr(path);
+
     if(length){
     	H3_Status status;
         H3_Name objectNameArray;
@@ -185,12 +772,12 @@ static int H3FS_MkDir(const char* path, mode_t mode){
         uint32_t nObjects = 1;
 
         asprintf(&directory, "%s/", object);
-    	if((status = H3_ListObjects(data.handle, &data.token, data.bucket, directory, 0, &objectNameArray, &nObjects))  == H3_SUCCESS || status == H3_CONTINUE  ){
+    	if((status = H3_ListObjects(GetHandle(), &data.token, data.bucket, directory, 0, &objectNameArray, &nObjects))  == H3_SUCCESS || status == H3_CONTINUE  ){
     		if(!nObjects){
-    			if( (status = H3_CreateObject(data.handle, &data.token, data.bucket, directory, NULL, 0)) == H3_SUCCESS ){
+    			if( (status = H3_CreateObject(GetHandle(), &data.token, data.bucket, directory, NULL, 0)) == H3_SUCCESS ){
 
     				H3_Attribute attrib = {.type = H3_ATTRIBUTE_PERMISSIONS, .mode = mode};
-    				if(H3_SetObjectAttributes(data.handle, &data.token, data.bucket, directory, attrib) != H3_SUCCESS)
+    				if(H3_SetObjectAttributes(GetHandle(), &data.token, data.bucket, directory, attrib) != H3_SUCCESS)
     					res = -ENOSPC;
     			}
     			else if(status == H3_NAME_TOO_LONG){
@@ -221,10 +808,12 @@ static int H3FS_Unlink(const char* path){
     H3_Name object = (H3_Name)&path[1];
     size_t length = strlen(object);
 
+    InvalidateAttr(path);
+
     if(length){
     	if(object[length] == '/'){
     		H3_ObjectInfo objectInfo;
-    		switch ( H3_InfoObject(data.handle, &data.token, data.bucket, object, &objectInfo)){
+    		switch ( H3_InfoObject(GetHandle(), &data.token, data.bucket, object, &objectInfo)){
     			case H3_SUCCESS: 		res = -EISDIR; break;
 				case H3_NOT_EXISTS:  	res = -ENOENT; break;
 				case H3_NAME_TOO_LONG: 	res = -ENAMETOOLONG; break;
@@ -232,7 +821,7 @@ static int H3FS_Unlink(const char* path){
     		}
     	}
     	else
-    		switch(H3_DeleteObject(data.handle, &data.token, data.bucket, object)){
+    		switch(DeleteObject(object)){
     			case H3_SUCCESS:		res = 0; break;
 				case H3_NOT_EXISTS:  	res = -ENOENT; break;
 				case H3_NAME_TOO_LONG: 	res = -ENAMETOOLONG; break;
@@ -250,6 +839,8 @@ static int H3FS_RmDir(const char* path){
     H3_Name object = (H3_Name)&path[1];
     size_t length = strlen(object);
 
+    InvalidateAttr(path);
+
     if(length){
         H3_Status status;
 		H3_Name objectNameArray;
@@ -257,12 +848,12 @@ static int H3FS_RmDir(const char* path){
         uint32_t nObjects = 0;
 
         asprintf(&directory, "%s/", object);
-		if((status = H3_ListObjects(data.handle, &data.token, data.bucket, directory, 0, &objectNameArray, &nObjects)) == H3_SUCCESS || status == H3_CONTINUE ){
+		if((status = H3_ListObjects(GetHandle(), &data.token, data.bucket, directory, 0, &objectNameArray, &nObjects)) == H3_SUCCESS || status == H3_CONTINUE ){
 			if(!nObjects){
 				res = -ENOTDIR;
 			}
 			else if(nObjects == 1){
-				if(H3_DeleteObject(data.handle, &data.token, data.bucket, directory) != H3_SUCCESS)
+				if(H3_DeleteObject(GetHandle(), &data.token, data.bucket, directory) != H3_SUCCESS)
 					res = -EINVAL;
 			}
 			else{
@@ -288,7 +879,7 @@ int ExamineObject(H3_Name object, char* isDir, char* isEmpty){
     uint32_t nObjects = 0;
 
     asprintf(&directory, "%s/", object);
-	if( (status = H3_ListObjects(data.handle, &data.token, data.bucket, directory, 0, &objectNameArray, &nObjects)) == H3_SUCCESS || status == H3_CONTINUE){
+	if( (status = H3_ListObjects(GetHandle(), &data.token, data.bucket, directory, 0, &objectNameArray, &nObjects)) == H3_SUCCESS || status == H3_CONTINUE){
 		if(nObjects > 1){
 			*isDir = 1;
 			*isEmpty = 0;
@@ -348,22 +939,29 @@ static int H3FS_Rename(const char* srcPath, const char* dstPath, unsigned int fl
 		return -EINVAL;
 	}
 
+	// Moving a directory renames everything below it
+	if(srcDir){
+		InvalidateAttr(NULL);
+	}
+	else {
+		InvalidateAttr(srcPath);
+		InvalidateAttr(dstPath);
+	}
+
 	if(srcDir && !dstDir)	return -ENOTDIR;
 	if(!srcDir && dstDir)	return -EISDIR;
 	if(!dstEmpty)			return -ENOTEMPTY;
 
 	// Single file or empty 'directory'
 	if(!srcDir || srcEmpty){
-		if(!swap)
-			status = H3_MoveObject(data.handle, &data.token, data.bucket, srcObject, dstObject, noOverwrite);
-		else
-			status = H3_ExchangeObject(data.handle, &data.token, data.bucket, srcObject, dstObject);
+		status = RenameObject(srcObject, dstObject, swap, noOverwrite);
 
 		switch(status){
 			case H3_NOT_EXISTS: res = -ENOENT; break;
 			case H3_FAILURE: if(swap) res = -ENOENT; else res = -EBADF; break;
 			case H3_INVALID_ARGS: res = -EINVAL; break;
 			case H3_EXISTS: res = -EEXIST; break;
+			case H3_STORE_ERROR: res = -EIO; break;
 			default: break;
 		}
 	}
@@ -374,17 +972,14 @@ static int H3FS_Rename(const char* srcPath, const char* dstPath, unsigned int fl
 	    H3_Name objectNameArray;
 	    uint32_t offset = 0, nObjects = 0;
 	    while( (moveStatus == H3_SUCCESS) &&
-	    	   ((status = H3_ListObjects(data.handle, &data.token, data.bucket, srcObject, offset, &objectNameArray, &nObjects)) == H3_CONTINUE ||
+	    	   ((status = H3_ListObjects(GetHandle(), &data.token, data.bucket, srcObject, offset, &objectNameArray, &nObjects)) == H3_CONTINUE ||
 	    	    (status == H3_SUCCESS && nObjects)                                                                                                        ) ){
 
         	H3_Name src = objectNameArray;
         	char dst[H3_OBJECT_NAME_SIZE+1];
         	while(nObjects-- && moveStatus == H3_SUCCESS){
         		snprintf(dst, H3_OBJECT_NAME_SIZE, "%s%s", dstObject, &src[srcLength]);
-        		if(!swap)
-        			moveStatus = H3_MoveObject(data.handle, &data.token, data.bucket, src, dst, noOverwrite);
-        		else
-        			moveStatus = H3_ExchangeObject(data.handle, &data.token, data.bucket, src, dst);
+        		moveStatus = RenameObject(src, dst, swap, noOverwrite);
 
         		src = &src[strlen(src)];
         	}
@@ -405,6 +1000,8 @@ static int H3FS_ChMod(const char* path, mode_t mode, struct fuse_file_info* fi){
     H3_Name object = (H3_Name)&path[1];
     size_t length = strlen(object);
 
+    InvalidateAttr(path);
+
     if(length == 0){
     	res = -ENOENT;
     }
@@ -413,7 +1010,7 @@ static int H3FS_ChMod(const char* path, mode_t mode, struct fuse_file_info* fi){
     }
     else{
     	H3_Attribute attrib = {.type = H3_ATTRIBUTE_PERMISSIONS, .mode = mode};
-    	switch(H3_SetObjectAttributes(data.handle, &data.token, data.bucket, object, attrib)){
+    	switch(H3_SetObjectAttributes(GetHandle(), &data.token, data.bucket, object, attrib)){
 			case H3_SUCCESS:	res = 0; 		break;
 			case H3_NOT_EXISTS:	res = -ENOENT;	break;
 			case H3_FAILURE:	res = -EIO;		break;
@@ -443,12 +1040,14 @@ static int H3FS_ChOwn(const char* path, uid_t uid, gid_t gid, struct fuse_file_i
     H3_Name object = (H3_Name)&path[1];
     size_t length = strlen(object);
 
+    InvalidateAttr(path);
+
     if(length == 0){
     	return -ENOENT;
     }
 
 	H3_Attribute attrib = {.type = H3_ATTRIBUTE_OWNER, .uid = uid, .gid = gid};
-	switch(H3_SetObjectAttributes(data.handle, &data.token, data.bucket, object, attrib)){
+	switch(H3_SetObjectAttributes(GetHandle(), &data.token, data.bucket, object, attrib)){
 		case H3_SUCCESS:		res = 0; 				break;
 		case H3_NOT_EXISTS:		res = -ENOENT;			break;
 		case H3_FAILURE:		res = -EIO;				break;
@@ -478,8 +1077,10 @@ static int H3FS_Truncate(const char* path, off_t size, struct fuse_file_info* fi
     H3_Name object = (H3_Name)&path[1];
     size_t length = strlen(object);
 
+    InvalidateAttr(path);
+
     if(length){
-    	switch(H3_TruncateObject(data.handle, &data.token, data.bucket, object, size)){
+    	switch(TruncateObject(object, size)){
 			case H3_SUCCESS: 		res = 0; 				break;
 			case H3_NOT_EXISTS: 	res = -ENOENT; 			break;
 			case H3_NAME_TOO_LONG: 	res = -ENAMETOOLONG; 	break;
@@ -495,21 +1096,97 @@ static int H3FS_Truncate(const char* path, off_t size, struct fuse_file_info* fi
 }
 
 static int H3FS_Open(const char* path , struct fuse_file_info* fi){
+	H3FS_File* file = OpenFile(path);
+
+	if(!file)
+		return -ENOMEM;
+
+	fi->fh = (uint64_t)file;
     return 0;
 }
 
+// Serve as much of a read as possible from the cached parts, the caller must hold the file's lock
+static size_t ReadCached(H3FS_File* file, char* buffer, size_t size, off_t offset, char* eof){
+	off_t position = offset, end = offset + size;
+	off_t last = offset;
+
+	// Grow the read-ahead window while the reads are sequential
+	if(offset == file->nextRead)
+		file->window = file->window? (file->window * 2 < data.readAhead? file->window * 2 : data.readAhead) : 1;
+	else
+		file->window = 0;
+	file->nextRead = end;
+
+	RefreshFile(file);
+
+	*eof = 0;
+	while(position < end){
+		off_t blockOffset = position - position % H3FS_PART_SIZE;
+		H3FS_Block* block = FindBlock(file, blockOffset);
+
+		if(block && block->state == H3FS_BLOCK_LOADING){
+			pthread_cond_wait(&file->loaded, &file->lock);
+			continue;
+		}
+
+		// Random reads are not worth caching
+		if(!block && file->window && (block = ReserveBlock(file, blockOffset))){
+			LoadBlock(file, block);
+			continue;
+		}
+
+		if(!block || block->state != H3FS_BLOCK_READY)
+			break;
+
+		block->used = ++file->clock;
+		last = blockOffset;
+		if(position >= blockOffset + block->size){
+			*eof = 1;
+			break;
+		}
+
+		size_t chunk = blockOffset + block->size - position;
+		if(chunk > end - position)
+			chunk = end - position;
+
+		memcpy(&buffer[position - offset], &block->data[position - blockOffset], chunk);
+		position += chunk;
+	}
+
+	if(file->window && !*eof)
+		Prefetch(file, last + H3FS_PART_SIZE);
+
+	return position - offset;
+}
+
 static int H3FS_Read(const char* path, char* buffer, size_t size, off_t offset , struct fuse_file_info* fi){
     int res = 0;
     H3_Name object = (H3_Name)&path[1];
     size_t length = strlen(object);
+    H3FS_File* file = fi?(H3FS_File*)fi->fh:NULL;
 
     if (!length)
         return -ENOENT;
 
+    // Read our own writes
+    if((res = SyncFile(fi)))
+        return res;
+
+    if(file && file->blocks){
+        char eof;
+
+        pthread_mutex_lock(&file->lock);
+        res = ReadCached(file, buffer, size, offset, &eof);
+        pthread_mutex_unlock(&file->lock);
+
+        if(eof || res == size)
+            return res;
+    }
+
     do {
         void *buf = (void *)&(buffer[res]);
         size_t buf_size = size - res;
-        switch(H3_ReadObject(data.handle, &data.token, data.bucket, object, offset + res, &buf, &buf_size)){
+        switch(H3_ReadObject(GetHandle(), &data.token, data.bucket, object, offset + res, &buf, &buf_size)){
             case H3_SUCCESS:
                 res += buf_size;
                 return res;
@@ -533,10 +1210,54 @@ static int H3FS_Write(const char* path, const char* buffer, size_t size, off_t o
     int res = 0;
     H3_Name object = (H3_Name)&path[1];
     size_t length = strlen(object);
+    H3FS_File* file = fi?(H3FS_File*)fi->fh:NULL;
+
+    InvalidateAttr(path);
+
+    // Coalesce sequential writes into buffer sized, aligned, writes
+    if(length && file && file->buffer){
+        size_t written = 0;
+
+        pthread_mutex_lock(&file->lock);
+        InvalidateFile(file);
+        if(file->size && offset != file->offset + file->size)
+            res = FlushFile(file);
+
+        while(!res && written < size){
+            size_t remaining = size - written;
+
+            // Aligned whole buffers go straight through
+            if(!file->size && (offset + written) % data.writeBufferSize == 0 && remaining >= data.writeBufferSize){
+                size_t direct = remaining - remaining % data.writeBufferSize;
+                switch(H3_WriteObject(GetHandle(), &data.token, data.bucket, file->node->object, (void*)&buffer[written], direct, offset + written)){
+                    case H3_SUCCESS: written += direct; ChangeNode(file->node); break;
+                    default: res = -EIO; break;
+                }
+                continue;
+            }
+
+            if(!file->size)
+                file->offset = offset + written;
+
+            // Fill up to the next buffer boundary so that flushes stay aligned
+            size_t boundary = data.writeBufferSize - (file->offset + file->size) % data.writeBufferSize;
+            size_t chunk = remaining < boundary? remaining : boundary;
+            memcpy(&file->buffer[file->size], &buffer[written], chunk);
+            file->size += chunk;
+            written += chunk;
+
+            if(chunk == boundary)
+                res = FlushFile(file);
+        }
+        pthread_mutex_unlock(&file->lock);
+
+        return res?res:size;
+    }
 
     if(length){
-        switch(H3_WriteObject(data.handle, &data.token, data.bucket, object, (void*)buffer, size, offset)){
+        switch(H3_WriteObject(GetHandle(), &data.token, data.bucket, object, (void*)buffer, size, offset)){
             case H3_SUCCESS:
+                ChangeObject(object);
                 res = size;
                 break;
 
@@ -551,15 +1272,27 @@ static int H3FS_Write(const char* path, const char* buffer, size_t size, off_t o
 }
 
 static int H3FS_Flush(const char* path, struct fuse_file_info* fi){
-	return 0;
+	int res = SyncFile(fi);
+
+	InvalidateAttr(path);
+	return res;
 }
 
 static int H3FS_Release(const char* path, struct fuse_file_info* fi){
-	return 0;
+	int res = SyncFile(fi);
+	H3FS_File* file = (H3FS_File*)fi->fh;
+
+	InvalidateAttr(path);
+	if(file){
+		CloseFile(file);
+		fi->fh = 0;
+	}
+
+	return res;
 }
 
 static int H3FS_Fsync(const char* path, int isDatasync, struct fuse_file_info* fi){
-	return 0;
+	return SyncFile(fi);
 }
 
 static int H3FS_ReadDir(const char* path, void* buffer, fuse_fill_dir_t filler, off_t fuseOffset, struct fuse_file_info* fi, enum fuse_readdir_flags flags){
@@ -580,7 +1313,7 @@ static int H3FS_ReadDir(const char* path, void* buffer, fuse_fill_dir_t filler,
     H3_Name objectNameArray;
     H3_Status status;
     uint32_t h3Offset = 0;
-    while( (status = H3_ListObjects(data.handle, &data.token, data.bucket, directory, h3Offset, &objectNameArray, &nObjects)) == H3_CONTINUE || (status == H3_SUCCESS && nObjects)){
+    while( (status = H3_ListObjects(GetHandle(), &data.token, data.bucket, directory, h3Offset, &objectNameArray, &nObjects)) == H3_CONTINUE || (status == H3_SUCCESS && nObjects)){
     	h3Offset += nObjects;
     	g_ptr_array_add(objectArrays, objectNameArray);
 
@@ -594,9 +1327,6 @@ static int H3FS_ReadDir(const char* path, void* buffer, fuse_fill_dir_t filler,
     	}
     }
 
-    if (length)
-        free(directory);
-
     if(status != H3_SUCCESS){
     	res = -EINVAL;
     }
@@ -612,24 +1342,44 @@ static int H3FS_ReadDir(const char* path, void* buffer, fuse_fill_dir_t filler,
 
 		g_hash_table_iter_init (&iter, uniqueDirEntries);
 		while( g_hash_table_iter_next (&iter, &key, &value) ){
+			enum fuse_fill_dir_flags fillFlags = 0;
+
 			if(fuseOffset){
 				fuseOffset--;
 				continue;
 			}
 
 			if(strlen((char*)key)){
+				memset(&st, 0, sizeof(st));
 				if(value){
 					st.st_mode = S_IFDIR | 0755;
 					st.st_nlink = 2;
-					printf("Directory: %s\n", (char*)key);
 				}
 				else {
 					st.st_mode = S_IFREG | 0777;
 					st.st_nlink = 1;
-					printf("File: %s\n", (char*)key);
+
+					// Readdir-plus hands the kernel the complete attributes, sparing a lookup per entry.
+					// They are also cached for the getattr calls that typically follow a listing.
+					if(flags & FUSE_READDIR_PLUS){
+						char* entryPath = NULL;
+						H3_ObjectInfo info;
+
+						asprintf(&entryPath, "/%s%s", directory, (char*)key);
+						if(entryPath){
+							if(LookupAttr(entryPath, &st))
+								fillFlags = FUSE_FILL_DIR_PLUS;
+							else if(H3_InfoObject(GetHandle(), &data.token, data.bucket, &entryPath[1], &info) == H3_SUCCESS){
+								FillStat(&info, &st);
+								CacheAttr(entryPath, &st);
+								fillFlags = FUSE_FILL_DIR_PLUS;
+							}
+							free(entryPath);
+						}
+					}
 				}
 
-				if (filler(buffer, key, &st, 0, 0))
+				if (filler(buffer, key, &st, 0, fillFlags))
 					break;
 			}
 		}
@@ -638,7 +1388,8 @@ static int H3FS_ReadDir(const char* path, void* buffer, fuse_fill_dir_t filler,
     g_hash_table_destroy(uniqueDirEntries);
     g_ptr_array_free(objectArrays, TRUE);
 
-
+    if (length)
+        free(directory);
 
     return res;
 }
@@ -648,6 +1399,27 @@ static void* H3FS_Init(struct fuse_conn_info* conn, struct fuse_config* cfg){
     (void) cfg;
 //    conn->capable |= FUSE_CAP_NO_OPEN_SUPPORT;
 
+    // Our attribute cache honors the kernel's attr_timeout
+    data.attrTimeout = cfg->attr_timeout;
+    if(data.attrTimeout > 0){
+    	pthread_mutex_init(&data.attrLock, NULL);
+    	data.attrCache = g_hash_table_new_full(g_str_hash, g_str_equal, free, free);
+    }
+
+    // The initial handle serves the first thread to ask for one
+    pthread_mutex_init(&data.handleLock, NULL);
+    pthread_key_create(&data.handleKey, PutHandle);
+    data.handles = g_ptr_array_new();
+    data.idleHandles = g_ptr_array_new();
+    pthread_mutex_init(&data.nodeLock, NULL);
+    data.nodes = g_hash_table_new(g_str_hash, g_str_equal);
+    g_ptr_array_add(data.handles, data.handle);
+    g_ptr_array_add(data.idleHandles, data.handle);
+
+    // Threads are started here rather than in main() since fuse_main() may daemonize
+    if(data.readAhead)
+    	data.prefetchPool = g_thread_pool_new(PrefetchWorker, NULL, H3FS_PREFETCH_THREADS, FALSE, NULL);
+
     struct fuse_context* cxt = fuse_get_context();
     if(cxt) return cxt->private_data;
 
@@ -655,7 +1427,28 @@ static void* H3FS_Init(struct fuse_conn_info* conn, struct fuse_config* cfg){
 }
 
 static void H3FS_Destroy(void* privateData){
-	H3_Free(data.handle);
+	if(data.prefetchPool)
+		g_thread_pool_free(data.prefetchPool, FALSE, TRUE);
+	if(data.attrCache)
+		g_hash_table_destroy(data.attrCache);
+	if(data.nodes)
+		g_hash_table_destroy(data.nodes);
+
+	if(data.handles){
+		guint i;
+
+		pthread_mutex_lock(&data.handleLock);
+		g_ptr_array_free(data.idleHandles, TRUE);
+		data.idleHandles = NULL;
+		pthread_mutex_unlock(&data.handleLock);
+
+		for(i=0; i<data.handles->len; i++)
+			H3_Free(g_ptr_array_index(data.handles, i));
+		g_ptr_array_free(data.handles, TRUE);
+		data.handles = NULL;
+	}
+	else
+		H3_Free(data.handle);
 }
 
 static int H3FS_Access(const char* path, int mode){
@@ -677,15 +1470,15 @@ static int H3FS_Create(const char* path , mode_t mode, struct fuse_file_info* fi
     H3_Name object = (H3_Name)&path[1];
     size_t length = strlen(object);
 
-    (void) fi;
+    InvalidateAttr(path);
 
 	// A call to creat() is equivalent to calling open() with flags equal to O_CREAT|O_WRONLY|O_TRUNC
     if(length){
-    	switch((status = H3_CreateObject(data.handle, &data.token, data.bucket, object, NULL, 0))){
+    	switch((status = H3_CreateObject(GetHandle(), &data.token, data.bucket, object, NULL, 0))){
 			case H3_FAILURE:
 			case H3_INVALID_ARGS: res = -EINVAL; break;
 			case H3_EXISTS:
-				if((status = H3_TruncateObject(data.handle, &data.token, data.bucket, object, 0)) != H3_SUCCESS){
+				if((status = TruncateObject(object, 0)) != H3_SUCCESS){
 					res = -EINVAL;
 				}
 				break;
@@ -694,13 +1487,21 @@ static int H3FS_Create(const char* path , mode_t mode, struct fuse_file_info* fi
     	}
 
     	H3_Attribute attrib = {.type = H3_ATTRIBUTE_PERMISSIONS, .mode = mode};
-    	if(status == H3_SUCCESS && H3_SetObjectAttributes(data.handle, &data.token, data.bucket, object, attrib) != H3_SUCCESS){
+    	if(status == H3_SUCCESS && H3_SetObjectAttributes(GetHandle(), &data.token, data.bucket, object, attrib) != H3_SUCCESS){
     		res = -EINVAL;
     	}
     }
     else
     	res = -EISDIR;
 
+    if(!res){
+    	H3FS_File* file = OpenFile(path);
+    	if(file)
+    		fi->fh = (uint64_t)file;
+    	else
+    		res = -ENOMEM;
+    }
+
     return res;
 }
 
@@ -709,6 +1510,8 @@ static int H3FS_Utimens(const char *path, const struct timespec tv[2], struct fu
     H3_Name object = (H3_Name)&path[1];
     size_t length = strlen(object);
 
+    InvalidateAttr(path);
+
     if(length == 0){
         res = -ENOENT;
     }
@@ -717,7 +1520,7 @@ static int H3FS_Utimens(const char *path, const struct timespec tv[2], struct fu
     }
     else{
 
-        switch(H3_TouchObject(data.handle, &data.token, data.bucket, object, (struct timespec *)(tv != NULL ? &(tv[0]) : NULL), (struct timespec *)(tv != NULL ? &(tv[1]) : NULL))){
+        switch(H3_TouchObject(GetHandle(), &data.token, data.bucket, object, (struct timespec *)(tv != NULL ? &(tv[0]) : NULL), (struct timespec *)(tv != NULL ? &(tv[1]) : NULL))){
             case H3_SUCCESS:    res = 0;        break;
             case H3_NOT_EXISTS: res = -ENOENT;  break;
             case H3_FAILURE:    res = -EIO;     break;
@@ -767,11 +1570,13 @@ static ssize_t H3FS_CopyFileRange(const char* srcPath, struct fuse_file_info* sr
 		return -EISDIR;
 	}
 
-	(void) srcFi;
-	(void) dtsFi;
+	InvalidateAttr(dstPath);
+	if(SyncFile(srcFi) || ModifyFile(dtsFi)){
+		return -EIO;
+	}
 
-	switch(H3_WriteObjectCopy(data.handle, &data.token, data.bucket, srcObject, srcOffset, &size, dstObject, dstOffset)){
-		case H3_SUCCESS: res = size; break;
+	switch(H3_WriteObjectCopy(GetHandle(), &data.token, data.bucket, srcObject, srcOffset, &size, dstObject, dstOffset)){
+		case H3_SUCCESS: ChangeObject(dstObject); res = size; break;
 		case H3_NOT_EXISTS: res = -EBADF; break;
 		default: res = -EIO; break;
 	}
@@ -828,6 +1633,8 @@ static struct fuse_operations h3fsOperations = {
 static struct fuse_opt h3fsOptions[] = {
         H3FS_OPT("storage=%s",  storageUri,     0),
 		H3FS_OPT("bucket=%s",   bucket,    		0),
+		H3FS_OPT("write_buffer=%u", writeBuffer, 0),
+		H3FS_OPT("read_ahead=%u", readAhead, 0),
 
         FUSE_OPT_KEY("-V",                      KEY_VERSION),
         FUSE_OPT_KEY("--version",               KEY_VERSION),
@@ -842,7 +1649,9 @@ static int H3FS_OptionParser(void *data, const char *arg, int key, struct fuse_a
         case KEY_HELP:
                 fprintf(stderr,"h3fs options:\n"
                                "    -o storage=STRING      storage URI\n"
-                			   "    -o bucket=STRING       bucket name\n");
+                			   "    -o bucket=STRING       bucket name\n"
+                			   "    -o write_buffer=N      bytes of sequential writes to buffer per open file (default %d, 0 to disable)\n"
+                			   "    -o read_ahead=N        max parts to prefetch for sequential reads (default %d, 0 to disable)\n", H3FS_PART_SIZE, H3FS_READ_AHEAD);
                 fuse_opt_add_arg(outargs, "-h");
                 fuse_main(outargs->argc, outargs->argv, &h3fsOperations, NULL);
                 exit(1);
@@ -860,7 +1669,7 @@ static int H3FS_OptionParser(void *data, const char *arg, int key, struct fuse_a
 int main(int argc, char *argv[]) {
     int ret = 0;
     struct fuse_args args = FUSE_ARGS_INIT(argc, argv);
-    H3FS_Config conf = {0};
+    H3FS_Config conf = {.writeBuffer = H3FS_PART_SIZE, .readAhead = H3FS_READ_AHEAD};
     H3_BucketInfo info;
 
 
@@ -884,6 +1693,13 @@ int main(int argc, char *argv[]) {
 
     // H3lib cleanup will be handled by fuse.destroy
     data.bucket = strdup(conf.bucket);
+    data.writeBufferSize = conf.writeBuffer;
+    data.readAhead = conf.readAhead;
+
+    // Keep the kernel page cache across opens unless the object has changed in the meantime.
+    // Inserted first so that it may be overridden by the user, i.e. with -o noauto_cache
+    fuse_opt_insert_arg(&args, 1, "-oauto_cache");
+    data.storageUri = strdup(conf.storageUri);
     data.handle = H3_Init(conf.storageUri);
     if(H3_InfoBucket(data.handle, &data.token, data.bucket, &info, 0) == H3_SUCCESS){
         ret = fuse_main(args.argc, args.argv, &h3fsOperations, (void*)&data);
@@ -51,6 +51,8 @@ H3_Status ValidBucketName(KV_Operations* op, char* name){
  *
  */
 H3_Status H3_CreateBucket(H3_Handle handle, H3_Token token, H3_Name bucketName){
+    H3_TIME_OPERATION(handle, H3_OP_CREATE_BUCKET);
+
     H3_UserId userId;
     H3_BucketId bucketId;
     H3_BucketMetadata bucketMetadata;
@@ -149,6 +151,8 @@ H3_Status H3_CreateBucket(H3_Handle handle, H3_Token token, H3_Name bucketName){
  *
  */
 H3_Status H3_DeleteBucket(H3_Handle handle, H3_Token token, H3_Name bucketName){
+    H3_TIME_OPERATION(handle, H3_OP_DELETE_BUCKET);
+
     H3_UserId userId;
     H3_BucketId bucketId;
     KV_Value value = NULL;
@@ -249,6 +253,7 @@ H3_Status H3_DeleteBucket(H3_Handle handle, H3_Token token, H3_Name bucketName){
  *
  */
 H3_Status H3_ListBuckets(H3_Handle handle, H3_Token token, H3_Name* bucketNameArray, uint32_t* nBuckets){
+    H3_TIME_OPERATION(handle, H3_OP_LIST_BUCKETS);
 
     // Argument check
     if(!handle || !token  || !bucketNameArray || !nBuckets){
@@ -321,6 +326,8 @@ H3_Status H3_ListBuckets(H3_Handle handle, H3_Token token, H3_Name* bucketNameAr
  *
  */
 H3_Status H3_InfoBucket(H3_Handle handle, H3_Token token, H3_Name bucketName, H3_BucketInfo* bucketInfo, uint8_t getStats){
+    H3_TIME_OPERATION(handle, H3_OP_INFO_BUCKET);
+
     H3_UserId userId;
     H3_BucketId bucketId;
     KV_Value value = NULL;
@@ -369,7 +376,7 @@ H3_Status H3_InfoBucket(H3_Handle handle, H3_Token token, H3_Name bucketName, H3
                     KV_Key objId = keyBuffer;
 
                     value = NULL; size = 0;
-                    while(i < nKeys && (kvStatus = op->metadata_read(_handle, objId, 0, &value, &size)) == KV_SUCCESS){
+                    while(i < nKeys && (kvStatus = ReadObjectMetadata(ctx, objId, &value, &size)) == KV_SUCCESS){
                         H3_ObjectMetadata* objMeta = (H3_ObjectMetadata*)value;
                         if(objMeta->nParts){
                             bucketSize += objMeta->part[objMeta->nParts-1].offset + objMeta->part[objMeta->nParts-1].size;
@@ -436,6 +443,8 @@ H3_Status H3_InfoBucket(H3_Handle handle, H3_Token token, H3_Name bucketName, H3
  *
  */
 H3_Status H3_ForeachBucket(H3_Handle handle, H3_Token token, h3_name_iterator_cb function, void* userData){
+    H3_TIME_OPERATION(handle, H3_OP_FOREACH_BUCKET);
+
     H3_UserId userId;
     KV_Value value = NULL;
     size_t size = 0;
@@ -484,6 +493,8 @@ H3_Status H3_ForeachBucket(H3_Handle handle, H3_Token token, h3_name_iterator_cb
  *
  */
 H3_Status H3_SetBucketAttributes(H3_Handle handle, H3_Token token, H3_Name bucketName, H3_Attribute attrib){
+    H3_TIME_OPERATION(handle, H3_OP_SET_BUCKET_ATTRIBUTES);
+
     H3_UserId userId;
     H3_BucketId bucketId;
     KV_Value value = NULL;
@@ -552,6 +563,8 @@ H3_Status H3_SetBucketAttributes(H3_Handle handle, H3_Token token, H3_Name bucke
  *
  */
 H3_Status H3_PurgeBucket(H3_Handle handle, H3_Token token, H3_Name bucketName){
+    H3_TIME_OPERATION(handle, H3_OP_PURGE_BUCKET);
+
 	H3_UserId userId;
 	H3_BucketId bucketId;
 	KV_Value value = NULL;
@@ -0,0 +1,37 @@
+#https://gitlab.kitware.com/cmake/community/-/wikis/doc/tutorials/How-To-Find-Libraries
+
+# - Try to find liburing
+# Once done this will define
+#  URING_FOUND - System has liburing
+#  URING_INCLUDE_DIRS - The liburing include directories
+#  URING_LIBRARIES - The libraries needed to use liburing
+#  URING_DEFINITIONS - Compiler switches required for using liburing
+
+
+# Use pkg-config to detect include/library paths liburing
+find_package(PkgConfig)
+pkg_check_modules(PC_URING QUIET liburing)
+set(URING_DEFINITIONS ${PC_URING_CFLAGS_OTHER})
+
+
+# Dependencies use plural forms, the package itself uses the singular forms defined by find_path and find_library
+find_path(URING_INCLUDE_DIR liburing.h
+          HINTS ${PC_URING_INCLUDEDIR} ${PC_URING_INCLUDE_DIRS}
+          PATH_SUFFIXES include )
+
+find_library(URING_LIBRARIES uring
+             HINTS ${PC_URING_LIBDIR} ${PC_URING_LIBRARY_DIRS} )
+
+
+
+
+# Call the find_package_handle_standard_args() macro to set the _FOUND variable and print a success or failure message
+include(FindPackageHandleStandardArgs)
+find_package_handle_standard_args(uring  DEFAULT_MSG URING_LIBRARIES URING_INCLUDE_DIR)
+
+
+if(URING_FOUND)
+	message(STATUS "liburing found")
+else()
+	message(STATUS "liburing not found")
+endif()
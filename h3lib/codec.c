@@ -0,0 +1,328 @@
+// Copyright [2019] [FORTH-ICS]
+//
+// Licensed under the Apache License, Version 2.0 (the "License");
+// you may not use this file except in compliance with the License.
+// You may obtain a copy of the License at
+//
+//     http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS,
+// WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+// See the License for the specific language governing permissions and
+// limitations under the License.
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <limits.h>
+#include <glib.h>
+
+#ifdef H3LIB_USE_COMPRESSION
+#include <zstd.h>
+#endif
+
+#ifdef H3LIB_USE_LZ4
+#include <lz4.h>
+#endif
+
+#include "codec.h"
+#include "util.h"
+
+/*
+ * Compression shared by the stores that compress values themselves and the compression layer. Values are compressed
+ * as the policy of the bucket they belong to says, with zstd (when built with compression) or lz4 (when also found).
+ */
+
+#define KV_CODEC_DEFAULT_LEVEL 1
+#define KV_CODEC_DEFAULT_MIN_SIZE (4 * __1KByte)
+#define KV_CODEC_SAMPLE_CHUNKS 16
+#define KV_CODEC_SAMPLE_CHUNK_SIZE 256
+
+typedef enum {
+    KV_CODEC_COMPRESSION = 0, KV_CODEC_COMPRESSION_LEVEL, KV_CODEC_COMPRESSION_MIN_SIZE
+}KV_CodecOption;
+
+static const char* const CodecName[] = {"none", "zstd", "lz4", NULL};
+static const char* const CodecOptionName[] = {"compression", "compression_level", "compression_min_size", NULL};
+
+#ifdef H3LIB_USE_COMPRESSION
+
+// The compression state of a thread, made when first needed and reused from then on
+typedef struct {
+    ZSTD_CCtx* cctx;
+    ZSTD_DCtx* dctx;
+#ifdef H3LIB_USE_LZ4
+    void* lz4State;
+#endif
+}KV_CodecContext;
+
+static void FreeContext(gpointer data){
+    KV_CodecContext* context = (KV_CodecContext*)data;
+    ZSTD_freeCCtx(context->cctx);
+    ZSTD_freeDCtx(context->dctx);
+#ifdef H3LIB_USE_LZ4
+    free(context->lz4State);
+#endif
+    free(context);
+}
+
+static GPrivate contextKey = G_PRIVATE_INIT(FreeContext);
+
+// Each thread has compression contexts of its own, as they are costly to set up on every call
+static KV_CodecContext* GetContext(){
+    KV_CodecContext* context = g_private_get(&contextKey);
+
+    if(!context && (context = calloc(1, sizeof(KV_CodecContext)))){
+        if((context->cctx = ZSTD_createCCtx()) && (context->dctx = ZSTD_createDCtx())
+#ifdef H3LIB_USE_LZ4
+           && (context->lz4State = malloc(LZ4_sizeofState()))
+#endif
+          ){
+            g_private_set(&contextKey, context);
+        }
+        else {
+            FreeContext(context);
+            context = NULL;
+        }
+    }
+
+    return context;
+}
+
+#endif
+
+static int IsAvailable(KV_Codec codec){
+    switch(codec){
+        case KV_CODEC_NONE:
+            return 1;
+#ifdef H3LIB_USE_COMPRESSION
+        case KV_CODEC_ZSTD:
+            return 1;
+#endif
+#ifdef H3LIB_USE_LZ4
+        case KV_CODEC_LZ4:
+            return 1;
+#endif
+        default:
+            return 0;
+    }
+}
+
+static int SetPolicyOption(KV_CodecPolicy* policy, KV_CodecOption option, const char* value){
+    KV_Codec codec;
+
+    switch(option){
+        case KV_CODEC_COMPRESSION:
+            for(codec = 0; CodecName[codec] && strcmp(CodecName[codec], value); codec++);
+            if(!CodecName[codec] || !IsAvailable(codec)){
+                LogActivity(H3_ERROR_MSG, "ERROR: Compression %s not available\n", value);
+                return 0;
+            }
+            policy->codec = codec;
+            break;
+
+        case KV_CODEC_COMPRESSION_LEVEL:
+            policy->level = atoi(value);
+            break;
+
+        case KV_CODEC_COMPRESSION_MIN_SIZE:
+            policy->minSize = ParseSize(value);
+            break;
+    }
+
+    return 1;
+}
+
+/*
+ * Set the default policy from the URI query with options such as "compression_level=3", and the policies of buckets with
+ * options such as "compression_level.b1=9", the names of the options being prefixed as given, e.g. "part_compression".
+ * Without a "compression" option, the default policy uses the given codec.
+ */
+int InitCodecPolicies(KV_CodecPolicies* policies, const char* query, const char* prefix, KV_Codec codec){
+    KV_CodecPolicy defaults = {.bucket = NULL, .codec = codec, .level = KV_CODEC_DEFAULT_LEVEL, .minSize = KV_CODEC_DEFAULT_MIN_SIZE};
+    KV_CodecOption option;
+    char name[64];
+    char* value;
+    int done = 1;
+    uint32_t i;
+
+    policies->policy = NULL;
+    policies->nPolicies = 0;
+
+    for(option = 0; done && CodecOptionName[option]; option++){
+        snprintf(name, sizeof(name), "%s%s", prefix, CodecOptionName[option]);
+        if((value = GetQueryOption(query, name))){
+            done = SetPolicyOption(&defaults, option, value);
+            free(value);
+        }
+    }
+
+    if(!done || !(policies->policy = malloc(sizeof(KV_CodecPolicy))))
+        return 0;
+    policies->policy[0] = defaults;
+    policies->nPolicies = 1;
+
+    gchar** entry = g_strsplit(query? query : "", "&", 0);
+    for(i=0; done && entry[i]; i++){
+        char* bucket = strchr(entry[i], '.');
+        value = strchr(entry[i], '=');
+        if(!bucket || !value || value < bucket)
+            continue;
+
+        *bucket++ = '\0';
+        *value++ = '\0';
+        for(option = 0; CodecOptionName[option]; option++){
+            snprintf(name, sizeof(name), "%s%s", prefix, CodecOptionName[option]);
+            if(!strcmp(name, entry[i]))
+                break;
+        }
+        if(!CodecOptionName[option])
+            continue;
+
+        // A bucket's policy starts from the default one
+        if(!GetCodecPolicy(policies, bucket)->bucket){
+            KV_CodecPolicy* policy = realloc(policies->policy, (policies->nPolicies + 1) * sizeof(KV_CodecPolicy));
+            if(!policy){
+                done = 0;
+                break;
+            }
+            policies->policy = policy;
+            policy[policies->nPolicies] = defaults;
+            if(!(policy[policies->nPolicies].bucket = strdup(bucket))){
+                done = 0;
+                break;
+            }
+            policies->nPolicies++;
+        }
+
+        done = SetPolicyOption(GetCodecPolicy(policies, bucket), option, value);
+    }
+    g_strfreev(entry);
+
+    return done;
+}
+
+void FreeCodecPolicies(KV_CodecPolicies* policies){
+    uint32_t i;
+
+    for(i=1; i<policies->nPolicies; i++)
+        free(policies->policy[i].bucket);
+    free(policies->policy);
+    policies->policy = NULL;
+    policies->nPolicies = 0;
+}
+
+// The policy of a bucket, or the default one if it has none
+KV_CodecPolicy* GetCodecPolicy(KV_CodecPolicies* policies, const char* bucket){
+    uint32_t i;
+
+    for(i=1; bucket && i<policies->nPolicies; i++){
+        if(!strcmp(policies->policy[i].bucket, bucket))
+            return &policies->policy[i];
+    }
+
+    return &policies->policy[0];
+}
+
+/*
+ * Tell data that won't compress (e.g. already compressed or encrypted) by the byte distribution of a few chunks spread over it.
+ * The bytes of such data are close to uniformly distributed, so that the sum of the squared byte counts of a sample of n bytes
+ * is close to n^2/256 + n, while it is about n^2/k for data made of k different bytes. Samples within an eighth of the uniform
+ * case are taken as incompressible.
+ */
+int LooksIncompressible(const unsigned char* value, size_t size){
+    size_t stride = max(size / KV_CODEC_SAMPLE_CHUNKS, (size_t)KV_CODEC_SAMPLE_CHUNK_SIZE);
+    uint32_t count[256] = {0};
+    uint64_t n = 0, sum = 0;
+    size_t start, i;
+
+    for(start = 0; start < size; start += stride){
+        size_t end = min(start + KV_CODEC_SAMPLE_CHUNK_SIZE, size);
+        for(i=start; i<end; i++)
+            count[value[i]]++;
+        n += end - start;
+    }
+
+    for(i=0; i<256; i++)
+        sum += (uint64_t)count[i] * count[i];
+
+    return 256 * sum < n * n + n * n / 8 + 256 * n;
+}
+
+// Compress a value into a buffer as a policy says. Returns the compressed size, or 0 if it doesn't fit in the buffer or compression fails.
+size_t Compress(KV_CodecPolicy* policy, const void* value, size_t size, void* buffer, size_t capacity){
+    size_t compressedSize = 0;
+
+#ifdef H3LIB_USE_COMPRESSION
+    KV_CodecContext* context = GetContext();
+    if(!context)
+        return 0;
+
+    switch(policy->codec){
+        case KV_CODEC_ZSTD:
+            compressedSize = ZSTD_compressCCtx(context->cctx, buffer, capacity, value, size, policy->level);
+            if(ZSTD_isError(compressedSize))
+                compressedSize = 0;
+            break;
+
+#ifdef H3LIB_USE_LZ4
+        case KV_CODEC_LZ4:
+            if(size <= LZ4_MAX_INPUT_SIZE)
+                compressedSize = max(LZ4_compress_fast_extState(context->lz4State, value, buffer, size, min(capacity, (size_t)INT_MAX), policy->level), 0);
+            break;
+#endif
+
+        default:
+            break;
+    }
+#endif
+
+    return compressedSize;
+}
+
+// Decompress a value into a buffer, stopping when the buffer is full, so that only as much of the value as needed is
+// decompressed. Returns the decompressed size, or SIZE_MAX on failure.
+size_t Decompress(KV_Codec codec, const void* value, size_t size, void* buffer, size_t capacity){
+    size_t decompressedSize = SIZE_MAX;
+
+#ifdef H3LIB_USE_COMPRESSION
+    KV_CodecContext* context = GetContext();
+    if(!context)
+        return SIZE_MAX;
+
+    switch(codec){
+        case KV_CODEC_ZSTD: {
+            ZSTD_inBuffer input = {value, size, 0};
+            ZSTD_outBuffer output = {buffer, capacity, 0};
+            size_t result, progress;
+
+            ZSTD_DCtx_reset(context->dctx, ZSTD_reset_session_only);
+            do {
+                progress = input.pos + output.pos;
+                result = ZSTD_decompressStream(context->dctx, &output, &input);
+            } while(!ZSTD_isError(result) && result && output.pos < output.size && input.pos + output.pos > progress);
+
+            if(!ZSTD_isError(result))
+                decompressedSize = output.pos;
+            break;
+        }
+
+#ifdef H3LIB_USE_LZ4
+        case KV_CODEC_LZ4: {
+            int result = -1;
+            if(size <= INT_MAX)
+                result = LZ4_decompress_safe_partial(value, buffer, size, min(capacity, (size_t)INT_MAX), min(capacity, (size_t)INT_MAX));
+            if(result >= 0)
+                decompressedSize = result;
+            break;
+        }
+#endif
+
+        default:
+            break;
+    }
+#endif
+
+    return decompressedSize;
+}
@@ -0,0 +1,46 @@
+// Copyright [2019] [FORTH-ICS]
+//
+// Licensed under the Apache License, Version 2.0 (the "License");
+// you may not use this file except in compliance with the License.
+// You may obtain a copy of the License at
+//
+//     http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS,
+// WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+// See the License for the specific language governing permissions and
+// limitations under the License.
+
+#ifndef CODEC_H_
+#define CODEC_H_
+
+#include <stdint.h>
+#include <stddef.h>
+
+// The values of the codecs are stored along with compressed data, so they must not change
+typedef enum {
+    KV_CODEC_NONE = 0, KV_CODEC_ZSTD, KV_CODEC_LZ4, KV_NumOfCodecs
+}KV_Codec;
+
+// How the values of a bucket are compressed
+typedef struct {
+    char* bucket;           // NULL for the default policy
+    KV_Codec codec;
+    int level;              // For lz4, the acceleration
+    size_t minSize;         // Smaller values are kept raw
+}KV_CodecPolicy;
+
+typedef struct {
+    KV_CodecPolicy* policy; // The default policy, followed by those of specific buckets
+    uint32_t nPolicies;
+}KV_CodecPolicies;
+
+int InitCodecPolicies(KV_CodecPolicies* policies, const char* query, const char* prefix, KV_Codec codec);
+void FreeCodecPolicies(KV_CodecPolicies* policies);
+KV_CodecPolicy* GetCodecPolicy(KV_CodecPolicies* policies, const char* bucket);
+int LooksIncompressible(const unsigned char* value, size_t size);
+size_t Compress(KV_CodecPolicy* policy, const void* value, size_t size, void* buffer, size_t capacity);
+size_t Decompress(KV_Codec codec, const void* value, size_t size, void* buffer, size_t capacity);
+
+#endif /* CODEC_H_ */
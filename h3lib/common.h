@@ -50,10 +50,16 @@
 
 #define H3_BUCKET_BATCH_SIZE   10
 #define H3_PART_BATCH_SIZE   10
+#define H3_SEGMENT_BATCH_SIZE 16                                            // Parts written or read with a single call, if the store can
+#define H3_TIME_INDEX_BATCH_SIZE 1000                                       // Time index entries listed at a time
 
 #define H3_USERID_SIZE      128
 #define H3_MULIPARTID_SIZE  (UUID_STR_LEN + 1)
 
+#define H3_EXPIRES_AT_METADATA      "ExpiresAt"
+#define H3_READ_ONLY_AFTER_METADATA "ReadOnlyAfter"
+#define H3_TIME_INDEX_PREFIX        "##"                                    // Bucket names may not contain '#' so it can't clash with any other key
+
 
 typedef char H3_UserId[H3_USERID_SIZE+1];
 typedef char H3_BucketId[H3_BUCKET_NAME_SIZE+2];
@@ -61,6 +67,7 @@ typedef char H3_ObjectId[H3_BUCKET_NAME_SIZE + H3_OBJECT_NAME_SIZE + 1];
 typedef char H3_UUID[UUID_STR_LEN];
 typedef char H3_PartId[50];                                                 // '_' + UUID[36+1byte] + '#' + <part_number> + ['.' + <subpart_number>]
 typedef char H3_ObjectMetadataId[H3_BUCKET_NAME_SIZE + H3_OBJECT_NAME_SIZE + H3_METADATA_NAME_SIZE + 2]; // bucket_name + '#' + object_name + '#' + metadata_name
+typedef char H3_TimeIndexId[sizeof(H3_TIME_INDEX_PREFIX) + H3_METADATA_NAME_SIZE + H3_USERID_SIZE + 19 + sizeof(H3_ObjectId)]; // '##' + metadata_name + '#' + user_id + '#' + <timestamp> + '#' + object_id
 
 typedef enum {
     H3_STORE_FILESYSTEM = 0,    // Mounted filesystem
@@ -77,14 +84,37 @@ typedef enum {
 	MoveExchange	// Swap data with destination (must exist)
 }H3_MovePolicy;
 
+// A trace callback along with its data, replaced as a whole so that calls in progress never see a mix of two
+typedef struct H3_Tracer {
+    h3_trace_cb callback;
+    void* userData;
+    struct H3_Tracer* next;
+}H3_Tracer;
+
 typedef struct {
     H3_StoreType type;
 
     // Store specific
     KV_Handle handle;
     KV_Operations* operation;
+
+    // Statistics and tracing, if enabled
+    H3_Stats* stats;
+    H3_Tracer* tracer;          // Accessed atomically, as it may be replaced while calls are in progress
+    H3_Tracer* tracers;         // All tracers ever set, kept until the handle is freed since calls may still be using them
+    KV_Operations statsOperation;
+
+    // Compression of object data, if enabled
+    KV_Operations compressionOperation;
 }H3_Context;
 
+typedef struct {
+    H3_Context* ctx;
+    H3_Operation operation;
+    struct timespec start;
+    uint64_t bytes;
+}H3_Timer;
+
 typedef struct{
     uint nBuckets;
     H3_BucketId bucket[];
@@ -134,6 +164,8 @@ int GetBucketIndex(H3_UserMetadata* userMetadata, H3_Name bucketName);
 void GetObjectId(H3_Name bucketName, H3_Name objectName, H3_ObjectId id);
 void GetMultipartObjectId(H3_Name bucketName, H3_Name objectName, H3_ObjectId id);
 void GetObjectMetadataId(H3_ObjectMetadataId metadataId, H3_Name bucketName, H3_Name objectName, H3_Name metadataName);
+void GetTimeIndexId(H3_TimeIndexId indexId, H3_Name metadataName, H3_UserId userId, double* timestamp, H3_ObjectId objId);
+int IsTimeIndexed(H3_Name metadataName);
 char* GetBucketFromId(H3_ObjectId objId, H3_BucketId bucketId);
 void GetBucketAndObjectFromId(H3_Name* bucketName, H3_Name* objectName, H3_ObjectId id);
 void InitMode(H3_ObjectMetadata* objMeta);
@@ -146,8 +178,37 @@ int GrantObjectAccess(H3_UserId id, H3_ObjectMetadata* meta);
 int GrantMultipartAccess(H3_UserId id, H3_MultipartMetadata* meta);
 char* ConvertToOdrinary(H3_ObjectId id);
 H3_Status DeleteObject(H3_Context* ctx, H3_UserId userId, H3_ObjectId objId, char truncate);
-KV_Status WriteData(H3_Context* ctx, H3_ObjectMetadata* meta, KV_Value value, size_t size, off_t offset);
+KV_Status WriteData(H3_Context* ctx, H3_Name bucketName, H3_ObjectMetadata* meta, KV_Value value, size_t size, off_t offset);
 KV_Status ReadData(H3_Context* ctx, H3_ObjectMetadata* meta, KV_Value value, size_t* size, off_t offset);
 KV_Status CopyData(H3_Context* ctx, H3_UserId userId, H3_ObjectId srcObjId, H3_ObjectId dstObjId, off_t srcOffset, size_t* size, uint8_t noOverwrite, off_t dstOffset);
 H3_Status PurgeObjectMetadata(H3_Context* ctx, H3_UserId userId, H3_Name bucketName, H3_Name objectName);
-H3_Status CopyOrMoveObjectMetadata(H3_Context* ctx, H3_UserId userId, H3_Name bucketName, H3_Name srcObjectName, H3_Name dstObjectName, char move);
\ No newline at end of file
+KV_Status GetTimeIndexTimestamp(H3_Context* ctx, H3_Name bucketName, H3_Name objectName, H3_ObjectMetadata* objMeta, H3_Name metadataName, double* timestamp);
+KV_Status UpdateTimeIndex(H3_Context* ctx, H3_UserId userId, H3_Name bucketName, H3_Name objectName, H3_ObjectMetadata* objMeta, H3_Name metadataName, char insert);
+H3_Status ListTimeIndex(H3_Context* ctx, H3_UserId userId, H3_Name metadataName, struct timespec* timestamp, uint32_t offset, H3_Name* objectIdArray, uint32_t* nObjects, uint32_t* nextOffset);
+H3_Status CopyOrMoveObjectMetadata(H3_Context* ctx, H3_UserId userId, H3_Name bucketName, H3_Name srcObjectName, H3_Name dstObjectName, char move);
+KV_Value EncodeObjectMetadata(H3_ObjectMetadata* objMeta, size_t* size);
+H3_ObjectMetadata* DecodeObjectMetadata(KV_Value value, size_t valueSize, size_t* size);
+KV_Status ReadObjectMetadata(H3_Context* ctx, KV_Key key, KV_Value* value, size_t* size);
+KV_Status WriteObjectMetadata(H3_Context* ctx, KV_Key key, H3_ObjectMetadata* objMeta);
+KV_Status CreateObjectMetadata(H3_Context* ctx, KV_Key key, H3_ObjectMetadata* objMeta);
+int InstallStats(H3_Context* ctx, char collect);
+int InstallCompression(H3_Context* ctx, const char* query);
+void BeginTimer(H3_Timer* timer);
+void EndTimer(H3_Timer* timer);
+
+static inline H3_Timer StartTimer(H3_Handle handle, H3_Operation operation){
+    H3_Context* ctx = (H3_Context*)handle;
+    H3_Timer timer = {.ctx = ctx && (ctx->stats || __atomic_load_n(&ctx->tracer, __ATOMIC_ACQUIRE))? ctx : NULL, .operation = operation};
+    if(timer.ctx)
+        BeginTimer(&timer);
+    return timer;
+}
+
+static inline void StopTimer(H3_Timer* timer){
+    if(timer->ctx)
+        EndTimer(timer);
+}
+
+// Account for the calling API function when it returns, whichever the return path
+#define H3_TIME_OPERATION(handle, operation) H3_Timer _timer __attribute__((cleanup(StopTimer))) = StartTimer(handle, operation)
+
@@ -0,0 +1,347 @@
+// Copyright [2019] [FORTH-ICS]
+//
+// Licensed under the Apache License, Version 2.0 (the "License");
+// you may not use this file except in compliance with the License.
+// You may obtain a copy of the License at
+//
+//     http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS,
+// WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+// See the License for the specific language governing permissions and
+// limitations under the License.
+
+#include "common.h"
+#include "util.h"
+#include "codec.h"
+
+/*
+ * Parts are compressed by a KV_Operations table wrapped around the store's one (below the statistics one, so that
+ * statistics are of the data as the user sees it), which makes compression available with any store. Metadata is
+ * passed through as is.
+ *
+ * Parts written through the layer start with a header recording the codec, or none if the part was kept raw. Raw
+ * parts are read and updated in place, just after the header, while compressed ones are read whole and decompressed
+ * up to the end of the range asked for, and are rewritten whole on updates. Parts without a header, i.e. written
+ * before the layer was enabled, are taken as raw.
+ *
+ * Compressed parts are replaced rather than updated in place, so the store's batch primitives are not used.
+ */
+
+#define KV_COMPRESSION_MAGIC "\x89H3Z"
+
+typedef struct {
+    char magic[4];
+    uint8_t codec;
+    uint8_t reserved[3];
+    uint32_t size;                  // Of the data, for compressed parts
+    uint32_t compressedSize;        // Of what follows the header, for compressed parts
+}KV_CompressionHeader;
+
+typedef struct {
+    KV_Handle handle;
+    KV_Operations* operation;
+    KV_CodecPolicies policies;
+}KV_CompressionHandle;
+
+
+
+static KV_Handle KV_Compression_Init(const char* storageUri){
+    return NULL;
+}
+
+static void KV_Compression_Free(KV_Handle handle){
+    KV_CompressionHandle* _handle = (KV_CompressionHandle*)handle;
+    _handle->operation->free(_handle->handle);
+    FreeCodecPolicies(&_handle->policies);
+    free(_handle);
+}
+
+static KV_Status KV_Compression_Metadata_Read(KV_Handle handle, KV_Key key, off_t offset, KV_Value* value, size_t* size){
+    KV_CompressionHandle* _handle = (KV_CompressionHandle*)handle;
+    return _handle->operation->metadata_read(_handle->handle, key, offset, value, size);
+}
+
+static KV_Status KV_Compression_Metadata_Write(KV_Handle handle, KV_Key key, KV_Value value, size_t size){
+    KV_CompressionHandle* _handle = (KV_CompressionHandle*)handle;
+    return _handle->operation->metadata_write(_handle->handle, key, value, size);
+}
+
+static KV_Status KV_Compression_Metadata_Create(KV_Handle handle, KV_Key key, KV_Value value, size_t size){
+    KV_CompressionHandle* _handle = (KV_CompressionHandle*)handle;
+    return _handle->operation->metadata_create(_handle->handle, key, value, size);
+}
+
+static KV_Status KV_Compression_Metadata_Delete(KV_Handle handle, KV_Key key){
+    KV_CompressionHandle* _handle = (KV_CompressionHandle*)handle;
+    return _handle->operation->metadata_delete(_handle->handle, key);
+}
+
+static KV_Status KV_Compression_Metadata_Move(KV_Handle handle, KV_Key srcKey, KV_Key dstKey){
+    KV_CompressionHandle* _handle = (KV_CompressionHandle*)handle;
+    return _handle->operation->metadata_move(_handle->handle, srcKey, dstKey);
+}
+
+static KV_Status KV_Compression_Metadata_Exists(KV_Handle handle, KV_Key key){
+    KV_CompressionHandle* _handle = (KV_CompressionHandle*)handle;
+    return _handle->operation->metadata_exists(_handle->handle, key);
+}
+
+static KV_Status KV_Compression_List(KV_Handle handle, KV_Key prefix, uint8_t nTrim, KV_Key key, uint32_t offset, uint32_t* nKeys){
+    KV_CompressionHandle* _handle = (KV_CompressionHandle*)handle;
+    return _handle->operation->list(_handle->handle, prefix, nTrim, key, offset, nKeys);
+}
+
+static KV_Status KV_Compression_Exists(KV_Handle handle, KV_Key key){
+    KV_CompressionHandle* _handle = (KV_CompressionHandle*)handle;
+    return _handle->operation->exists(_handle->handle, key);
+}
+
+// Get the header of a part, telling whether it has one at all
+static KV_Status ReadHeader(KV_CompressionHandle* handle, KV_Key key, KV_CompressionHeader* header, char* hasHeader){
+    KV_Value value = (KV_Value)header;
+    size_t size = sizeof(KV_CompressionHeader);
+    KV_Status status;
+
+    if((status = handle->operation->read(handle->handle, key, 0, &value, &size)) == KV_SUCCESS)
+        *hasHeader = size == sizeof(KV_CompressionHeader) && !memcmp(header->magic, KV_COMPRESSION_MAGIC, sizeof(header->magic));
+
+    return status;
+}
+
+/*
+ * Prefix a part with a header, compressing it as the policy of the bucket being written to says, unless it is too small,
+ * looks incompressible or doesn't shrink by at least an eighth, in which case it is not worth decompressing. The result
+ * is to be freed.
+ */
+static KV_Value Encode(KV_CompressionHandle* handle, KV_Value value, size_t size, size_t* encodedSize, const char* bucket){
+    KV_CodecPolicy* policy = GetCodecPolicy(&handle->policies, bucket);
+    KV_Value buffer = malloc(sizeof(KV_CompressionHeader) + size);
+    KV_CompressionHeader header = {.magic = KV_COMPRESSION_MAGIC, .codec = KV_CODEC_NONE, .size = size, .compressedSize = size};
+    size_t compressedSize;
+
+    if(!buffer)
+        return NULL;
+
+    if(policy->codec != KV_CODEC_NONE && size >= policy->minSize && !LooksIncompressible(value, size) &&
+       (compressedSize = Compress(policy, value, size, &buffer[sizeof(KV_CompressionHeader)], size - size / 8))){
+        header.codec = policy->codec;
+        header.compressedSize = compressedSize;
+    }
+    else {
+        memcpy(&buffer[sizeof(KV_CompressionHeader)], value, size);
+    }
+
+    memcpy(buffer, &header, sizeof(KV_CompressionHeader));
+    *encodedSize = sizeof(KV_CompressionHeader) + header.compressedSize;
+    return buffer;
+}
+
+static KV_Status KV_Compression_Read(KV_Handle handle, KV_Key key, off_t offset, KV_Value* value, size_t* size){
+    KV_CompressionHandle* _handle = (KV_CompressionHandle*)handle;
+    KV_CompressionHeader header;
+    KV_Value compressed, buffer;
+    size_t compressedSize, end;
+    KV_Status status;
+    char hasHeader;
+
+    if(!IsPartKey(key))
+        return _handle->operation->read(_handle->handle, key, offset, value, size);
+
+    if((status = ReadHeader(_handle, key, &header, &hasHeader)) != KV_SUCCESS)
+        return status;
+
+    if(!hasHeader)
+        return _handle->operation->read(_handle->handle, key, offset, value, size);
+
+    if(header.codec == KV_CODEC_NONE)
+        return _handle->operation->read(_handle->handle, key, offset + sizeof(KV_CompressionHeader), value, size);
+
+    // Read as much as the header says follows it, so that a part cut short is caught rather than decompressed
+    compressedSize = header.compressedSize;
+    if(!(compressed = malloc(max(compressedSize, (size_t)1))))
+        return KV_FAILURE;
+    if((status = _handle->operation->read(_handle->handle, key, sizeof(KV_CompressionHeader), &compressed, &compressedSize)) != KV_SUCCESS){
+        free(compressed);
+        return status;
+    }
+
+    // Decompress up to the end of the range, straight into the caller's buffer if the range starts at the beginning
+
+    end = *value? min(offset + *size, (size_t)header.size) : header.size;
+    buffer = offset || !*value? malloc(max(end, (size_t)1)) : *value;
+    status = KV_FAILURE;
+    if(buffer && compressedSize == header.compressedSize && Decompress(header.codec, compressed, compressedSize, buffer, end) == end){
+        *size = end - min((size_t)offset, end);
+        if(buffer == *value){
+            buffer = NULL;
+        }
+        else if(!*value && !offset){
+            *value = buffer;
+            buffer = NULL;
+        }
+        else if(*value || (*value = malloc(max(*size, (size_t)1)))){
+            memcpy(*value, &buffer[min((size_t)offset, end)], *size);
+        }
+
+        if(*value)
+            status = KV_SUCCESS;
+    }
+
+    if(buffer != *value)
+        free(buffer);
+    free(compressed);
+
+    return status;
+}
+
+static KV_Status KV_Compression_Create(KV_Handle handle, KV_Key key, KV_Value value, size_t size, const char* bucket){
+    KV_CompressionHandle* _handle = (KV_CompressionHandle*)handle;
+    KV_Status status = KV_FAILURE;
+    size_t encodedSize;
+    KV_Value encoded;
+
+    if(!IsPartKey(key))
+        return _handle->operation->create(_handle->handle, key, value, size, bucket);
+
+    if((encoded = Encode(_handle, value, size, &encodedSize, bucket))){
+        status = _handle->operation->create(_handle->handle, key, encoded, encodedSize, bucket);
+        free(encoded);
+    }
+
+    return status;
+}
+
+static KV_Status KV_Compression_Write(KV_Handle handle, KV_Key key, KV_Value value, size_t size, const char* bucket){
+    KV_CompressionHandle* _handle = (KV_CompressionHandle*)handle;
+    KV_Status status = KV_FAILURE;
+    size_t encodedSize;
+    KV_Value encoded;
+
+    if(!IsPartKey(key))
+        return _handle->operation->write(_handle->handle, key, value, size, bucket);
+
+    if((encoded = Encode(_handle, value, size, &encodedSize, bucket))){
+        status = _handle->operation->write(_handle->handle, key, encoded, encodedSize, bucket);
+        free(encoded);
+    }
+
+    return status;
+}
+
+static KV_Status KV_Compression_Update(KV_Handle handle, KV_Key key, KV_Value value, off_t offset, size_t size, const char* bucket){
+    KV_CompressionHandle* _handle = (KV_CompressionHandle*)handle;
+    KV_CompressionHeader header;
+    KV_Value current = NULL;
+    size_t currentSize = 0;
+    KV_Status status;
+    char hasHeader;
+
+    if(!IsPartKey(key))
+        return _handle->operation->update(_handle->handle, key, value, offset, size, bucket);
+
+    if((status = ReadHeader(_handle, key, &header, &hasHeader)) == KV_SUCCESS && hasHeader && header.codec == KV_CODEC_NONE)
+        return _handle->operation->update(_handle->handle, key, value, offset + sizeof(KV_CompressionHeader), size, bucket);
+
+    if(status == KV_KEY_NOT_EXIST && !offset)
+        return KV_Compression_Write(handle, key, value, size, bucket);
+
+    // Compressed parts, and those from before compression was enabled, are rewritten whole
+    if(status == KV_SUCCESS && KV_Compression_Read(handle, key, 0, &current, &currentSize) != KV_SUCCESS)
+        return KV_FAILURE;
+    else if(status != KV_SUCCESS && status != KV_KEY_NOT_EXIST)
+        return status;
+
+    if(offset + size > currentSize){
+        if(!(current = ReAllocFreeOnFail(current, offset + size)))
+            return KV_FAILURE;
+        if(offset > currentSize)
+            memset(&current[currentSize], 0, offset - currentSize);
+        currentSize = offset + size;
+    }
+    memcpy(&current[offset], value, size);
+
+    status = KV_Compression_Write(handle, key, current, currentSize, bucket);
+    free(current);
+
+    return status;
+}
+
+static KV_Status KV_Compression_Copy(KV_Handle handle, KV_Key srcKey, KV_Key dstKey){
+    KV_CompressionHandle* _handle = (KV_CompressionHandle*)handle;
+    return _handle->operation->copy(_handle->handle, srcKey, dstKey);
+}
+
+static KV_Status KV_Compression_Move(KV_Handle handle, KV_Key srcKey, KV_Key dstKey){
+    KV_CompressionHandle* _handle = (KV_CompressionHandle*)handle;
+    return _handle->operation->move(_handle->handle, srcKey, dstKey);
+}
+
+static KV_Status KV_Compression_Delete(KV_Handle handle, KV_Key key){
+    KV_CompressionHandle* _handle = (KV_CompressionHandle*)handle;
+    return _handle->operation->delete(_handle->handle, key);
+}
+
+static KV_Status KV_Compression_Sync(KV_Handle handle){
+    KV_CompressionHandle* _handle = (KV_CompressionHandle*)handle;
+    return _handle->operation->sync(_handle->handle);
+}
+
+static const KV_Operations operationsCompression = {
+    .init = KV_Compression_Init,
+    .free = KV_Compression_Free,
+
+    .metadata_read = KV_Compression_Metadata_Read,
+    .metadata_write = KV_Compression_Metadata_Write,
+    .metadata_create = KV_Compression_Metadata_Create,
+    .metadata_delete = KV_Compression_Metadata_Delete,
+    .metadata_move = KV_Compression_Metadata_Move,
+    .metadata_exists = KV_Compression_Metadata_Exists,
+
+    .list = KV_Compression_List,
+    .exists = KV_Compression_Exists,
+    .read = KV_Compression_Read,
+    .multi_read = NULL,
+    .create = KV_Compression_Create,
+    .update = KV_Compression_Update,
+    .multi_update = NULL,
+    .write = KV_Compression_Write,
+    .copy = KV_Compression_Copy,
+    .move = KV_Compression_Move,
+    .delete = KV_Compression_Delete,
+    .sync = KV_Compression_Sync
+};
+
+
+/*
+ * Install the compression layer on a context, if the storage URI query sets any of the "part_compression" options.
+ * It must be installed before the statistics wrapper.
+ */
+int InstallCompression(H3_Context* ctx, const char* query){
+    KV_CompressionHandle* handle;
+
+    if(!query || !strstr(query, "part_compression"))
+        return TRUE;
+
+    if(!(handle = calloc(1, sizeof(KV_CompressionHandle))))
+        return FALSE;
+
+    if(!InitCodecPolicies(&handle->policies, query, "part_", KV_CODEC_NONE)){
+        FreeCodecPolicies(&handle->policies);
+        free(handle);
+        return FALSE;
+    }
+
+    handle->handle = ctx->handle;
+    handle->operation = ctx->operation;
+
+    ctx->handle = handle;
+    ctx->operation = &ctx->compressionOperation;
+
+    // The wrapper table is copied into the context, so that it carries the store's validator
+    ctx->compressionOperation = operationsCompression;
+    ctx->compressionOperation.validate_key = handle->operation->validate_key;
+
+    return TRUE;
+}
@@ -12,6 +12,8 @@
 // See the License for the specific language governing permissions and
 // limitations under the License.
 
+#include <inttypes.h>
+
 #include "common.h"
 #include "util.h"
 #include "url_parser.h"
@@ -91,6 +93,26 @@ void GetObjectMetadataId(H3_ObjectMetadataId metadataId, H3_Name bucketName, H3_
         snprintf(metadataId, sizeof(H3_ObjectMetadataId), "%s#", bucketName);
 }
 
+/*
+ * The time index entries are grouped per metadata and user and sorted by the timestamp. The timestamp is written as
+ * the big-endian hex dump of the (non-negative) double's bit pattern, which preserves its numerical order.
+ */
+void GetTimeIndexId(H3_TimeIndexId indexId, H3_Name metadataName, H3_UserId userId, double* timestamp, H3_ObjectId objId){
+    // Common usage
+    if (timestamp && objId) {
+        uint64_t bits;
+        memcpy(&bits, timestamp, sizeof(uint64_t));
+        snprintf(indexId, sizeof(H3_TimeIndexId), "%s%s#%s#%016" PRIx64 "#%s", H3_TIME_INDEX_PREFIX, metadataName, userId, bits, objId);
+    }
+    // Used for list time index
+    else
+        snprintf(indexId, sizeof(H3_TimeIndexId), "%s%s#%s#", H3_TIME_INDEX_PREFIX, metadataName, userId);
+}
+
+int IsTimeIndexed(H3_Name metadataName){
+    return !strcmp(metadataName, H3_EXPIRES_AT_METADATA) || !strcmp(metadataName, H3_READ_ONLY_AFTER_METADATA);
+}
+
 H3_Name GenerateDummyObjectName() {
     uuid_t uuid;
     H3_UUID uuidString;
@@ -253,6 +275,11 @@ int GrantMultipartAccess(H3_UserId id, H3_MultipartMetadata* meta){
 }
 
 /*! Initialize library
+ *
+ * Besides the store specific ones, the storage URI may carry the "stats" option (e.g. "file:///tmp/h3?stats=1")
+ * to collect call statistics, see H3_GetStats(), and the "part_compression" options to compress the data of
+ * objects with any store, see docs/configuration.rst.
+ *
  * @param[in] storageUri    The storage provider URI to be used with this instance
  * @result  The handle if connected to provider, NULL otherwise.
  */
@@ -263,6 +290,10 @@ H3_Handle H3_Init(const char* storageUri) {
         return NULL;
     }
     H3_StoreType storageType = H3_String2Type(url->scheme);
+    char* stats = GetQueryOption(url->query, "stats");
+    char enableStats = stats && strcmp(stats, "0") && strcmp(stats, "false");
+    free(stats);
+    char* query = url->query? strdup(url->query) : NULL;
     parsed_url_free(url);
 
     H3_Context* ctx = malloc(sizeof(H3_Context));
@@ -317,6 +348,7 @@ H3_Handle H3_Init(const char* storageUri) {
 			default:
 				LogActivity(H3_ERROR_MSG, "ERROR: Driver not recognized\n");
 				ctx->operation = NULL;
+				free(query);
 				return NULL;
 		}
 
@@ -326,9 +358,29 @@ H3_Handle H3_Init(const char* storageUri) {
 			ctx = NULL;
 			LogActivity(H3_ERROR_MSG, "ERROR: Failed to initialize storage\n");
 		}
-		else
+		else {
 			ctx->type = storageType;
+			ctx->stats = NULL;
+			ctx->tracer = NULL;
+			ctx->tracers = NULL;
+
+			// Statistics are installed last, so that they are of the data as the user sees it. The wrapper is there even
+			// if they are not collected, for tracing to be turned on without swapping the store under calls in progress.
+			if(!InstallCompression(ctx, query)){
+				ctx->operation->free(ctx->handle);
+				free(ctx);
+				ctx = NULL;
+				LogActivity(H3_ERROR_MSG, "ERROR: Failed to initialize compression\n");
+			}
+			else if(!InstallStats(ctx, enableStats)){
+				ctx->operation->free(ctx->handle);
+				free(ctx);
+				ctx = NULL;
+				LogActivity(H3_ERROR_MSG, "ERROR: Failed to initialize statistics\n");
+			}
+		}
     }
+    free(query);
 
     return (H3_Handle)ctx;
 }
@@ -341,7 +393,13 @@ H3_Handle H3_Init(const char* storageUri) {
  */
 void H3_Free(H3_Handle handle){
     H3_Context* ctx = (H3_Context*)handle;
+    H3_Tracer* tracer;
+
     ctx->operation->free(ctx->handle);
+    while((tracer = ctx->tracers)){
+        ctx->tracers = tracer->next;
+        free(tracer);
+    }
     free(ctx);
 };
 
@@ -30,6 +30,7 @@
 #define H3_BUCKET_NAME_SIZE    64   //!< Maximum number of characters allowed for a bucket
 #define H3_OBJECT_NAME_SIZE    512  //!< Maximum number of characters allowed for an object
 #define H3_METADATA_NAME_SIZE  64   //!< Maximum number of characters allowed for an object's metadata name
+#define H3_STATS_HISTOGRAM_SIZE 32  //!< Number of latency histogram buckets, bucket i counts latencies under 2^i microseconds
 /** @}*/
 
 
@@ -68,6 +69,76 @@ typedef enum {
     H3_NumOfAttributes              //!< Not an option, used for iteration purposes
 }H3_AttributeType;
 
+/*! \brief Store primitives accounted for in the statistics */
+typedef enum {
+    H3_KV_METADATA_READ = 0,    //!< Metadata read
+    H3_KV_METADATA_WRITE,       //!< Metadata write
+    H3_KV_METADATA_CREATE,      //!< Metadata create
+    H3_KV_METADATA_DELETE,      //!< Metadata delete
+    H3_KV_METADATA_MOVE,        //!< Metadata move
+    H3_KV_METADATA_EXISTS,      //!< Metadata existence check
+    H3_KV_LIST,                 //!< Key listing
+    H3_KV_EXISTS,               //!< Data existence check
+    H3_KV_READ,                 //!< Data read
+    H3_KV_CREATE,               //!< Data create
+    H3_KV_UPDATE,               //!< Data update
+    H3_KV_WRITE,                //!< Data write
+    H3_KV_COPY,                 //!< Data copy
+    H3_KV_MOVE,                 //!< Data move
+    H3_KV_DELETE,               //!< Data delete
+    H3_KV_SYNC,                 //!< Sync
+    H3_KV_MULTI_READ,           //!< Data read of many keys at once
+    H3_KV_MULTI_UPDATE,         //!< Data update of many keys at once
+    H3_NumOfKVOperations        //!< Not an option, used for iteration purposes
+}H3_KVOperation;
+
+/*! \brief API calls accounted for in the statistics */
+typedef enum {
+    H3_OP_LIST_BUCKETS = 0,
+    H3_OP_FOREACH_BUCKET,
+    H3_OP_INFO_BUCKET,
+    H3_OP_SET_BUCKET_ATTRIBUTES,
+    H3_OP_CREATE_BUCKET,
+    H3_OP_DELETE_BUCKET,
+    H3_OP_PURGE_BUCKET,
+    H3_OP_LIST_OBJECTS,
+    H3_OP_FOREACH_OBJECT,
+    H3_OP_INFO_OBJECT,
+    H3_OP_TOUCH_OBJECT,
+    H3_OP_SET_OBJECT_ATTRIBUTES,
+    H3_OP_CREATE_OBJECT,
+    H3_OP_CREATE_OBJECT_COPY,
+    H3_OP_CREATE_OBJECT_FROM_FILE,
+    H3_OP_CREATE_DUMMY_OBJECT,
+    H3_OP_WRITE_OBJECT,
+    H3_OP_WRITE_OBJECT_COPY,
+    H3_OP_WRITE_OBJECT_FROM_FILE,
+    H3_OP_READ_OBJECT,
+    H3_OP_READ_DUMMY_OBJECT,
+    H3_OP_READ_OBJECT_TO_FILE,
+    H3_OP_COPY_OBJECT,
+    H3_OP_MOVE_OBJECT,
+    H3_OP_EXCHANGE_OBJECT,
+    H3_OP_TRUNCATE_OBJECT,
+    H3_OP_DELETE_OBJECT,
+    H3_OP_CREATE_OBJECT_METADATA,
+    H3_OP_READ_OBJECT_METADATA,
+    H3_OP_DELETE_OBJECT_METADATA,
+    H3_OP_COPY_OBJECT_METADATA,
+    H3_OP_MOVE_OBJECT_METADATA,
+    H3_OP_LIST_OBJECTS_WITH_METADATA,
+    H3_OP_LIST_EXPIRED_OBJECTS,
+    H3_OP_LIST_READ_ONLY_DUE_OBJECTS,
+    H3_OP_LIST_MULTIPARTS,
+    H3_OP_CREATE_MULTIPART,
+    H3_OP_COMPLETE_MULTIPART,
+    H3_OP_ABORT_MULTIPART,
+    H3_OP_LIST_PARTS,
+    H3_OP_CREATE_PART,
+    H3_OP_CREATE_PART_COPY,
+    H3_NumOfOperations          //!< Not an option, used for iteration purposes
+}H3_Operation;
+
 /** @}*/
 
 /*! \brief User authentication info */
@@ -131,6 +202,46 @@ typedef struct {
 }H3_Attribute;
 
 
+/*! \brief Call statistics of an API call or store primitive */
+typedef struct {
+    uint64_t count;                                 //!< Number of calls
+    uint64_t failures;                              //!< Number of failed calls (store primitives only)
+    uint64_t bytes;                                 //!< Data moved to or from the store
+    uint64_t totalLatency;                          //!< Sum of latencies in nanoseconds
+    uint64_t maxLatency;                            //!< Maximum latency in nanoseconds
+    uint64_t histogram[H3_STATS_HISTOGRAM_SIZE];    //!< Latency distribution, in power of 2 microsecond buckets
+} H3_OperationStats;
+
+
+/*! \brief Handle statistics, collected if the storage URI includes the "stats" option */
+typedef struct {
+    H3_OperationStats kv[H3_NumOfKVOperations];     //!< Per store primitive
+    H3_OperationStats api[H3_NumOfOperations];      //!< Per API call, including the bytes moved by the store primitives it issued
+} H3_Stats;
+
+
+/*! \brief Trace event types */
+typedef enum {
+    H3_TRACE_CALL_START = 0,    //!< An API call started
+    H3_TRACE_CALL_END,          //!< An API call is about to return
+    H3_TRACE_KV                 //!< A store primitive issued by the API call in progress completed
+}H3_TraceEventType;
+
+
+/*! \brief Trace event, passed to the trace callback */
+typedef struct {
+    H3_TraceEventType type;         //!< Event type
+    H3_Operation operation;         //!< The API call (call events)
+    H3_KVOperation kvOperation;     //!< The store primitive (store events)
+    const char* key;                //!< The key, or source key, of the store primitive (store events)
+    uint64_t bytes;                 //!< Data moved to or from the store (end and store events)
+    uint64_t latency;               //!< Duration in nanoseconds (end and store events)
+    char failed;                    //!< The store primitive failed (store events)
+} H3_TraceEvent;
+
+typedef void (*h3_trace_cb)(const H3_TraceEvent* event, void* userData);   //!< User function to be invoked for each trace event
+
+
 /** \defgroup Functions
  *  @{
  */
@@ -148,6 +259,17 @@ void H3_Free(H3_Handle handle);
 /** @}*/
 
 
+/** \defgroup stats Statistics and tracing
+ *  @{
+ */
+H3_Status H3_GetStats(H3_Handle handle, H3_Stats* stats);
+H3_Status H3_ResetStats(H3_Handle handle);
+H3_Status H3_SetTraceCallback(H3_Handle handle, h3_trace_cb callback, void* userData);
+const char* H3_KVOperation2String(H3_KVOperation operation);
+const char* H3_Operation2String(H3_Operation operation);
+/** @}*/
+
+
 /** \defgroup bucket Bucket management
  *  @{
  */
@@ -189,6 +311,8 @@ H3_Status H3_DeleteObjectMetadata(H3_Handle handle, H3_Token token, H3_Name buck
 H3_Status H3_CopyObjectMetadata(H3_Handle handle, H3_Token token, H3_Name bucketName, H3_Name srcObjectName, H3_Name dstObjectName);
 H3_Status H3_MoveObjectMetadata(H3_Handle handle, H3_Token token, H3_Name bucketName, H3_Name srcObjectName, H3_Name dstObjectName);
 H3_Status H3_ListObjectsWithMetadata(H3_Handle handle, H3_Token token, H3_Name bucketName, H3_Name metadataName, uint32_t offset, H3_Name* objectNameArray, uint32_t* nObjects, uint32_t* next0ffset);
+H3_Status H3_ListExpiredObjects(H3_Handle handle, H3_Token token, struct timespec* timestamp, uint32_t offset, H3_Name* objectIdArray, uint32_t* nObjects, uint32_t* nextOffset);
+H3_Status H3_ListReadOnlyDueObjects(H3_Handle handle, H3_Token token, struct timespec* timestamp, uint32_t offset, H3_Name* objectIdArray, uint32_t* nObjects, uint32_t* nextOffset);
 /** @}*/
 
 
@@ -24,9 +24,10 @@
 #include <sys/stat.h>
 #include <fcntl.h>
 #include <assert.h>
-#include <ftw.h>
+#include <limits.h>
 #include <regex.h>
 #include <ctype.h>
+#include <dirent.h>
 
 #include "common.h"
 #include "kv_interface.h"
@@ -34,13 +35,25 @@
 #include "util.h"
 #include "url_parser.h"
 
+#ifdef H3LIB_USE_URING
+#include <liburing.h>
+#endif
+
 #define KV_FS_DIRECTORY_CHAR	0x7F	// In place of last slash to turn directory object into file object
+#define KV_FS_DATA_DIRECTORY	"#data"	// Bucket names may not contain '#' so it can't clash with any key
+#define KV_FS_FANOUT			256		// Part directories, named after the first two hex digits of the UUID
+#define KV_FS_URING_DEPTH		64		// Operations in flight per thread, when using io_uring
 
 typedef struct {
     char * metadata_root;
     char* root;
+    char* data_root;                    // Where parts go, NULL if along with the metadata
     int metadata_root_path_len;
     int root_path_len;
+    int root_fd;
+    int data_fd;                        // -1 if parts are along with the metadata
+    int fanout_fd[KV_FS_FANOUT];        // -1 until first used
+    char uring;                         // Whether batches may go through io_uring
 }KV_Filesystem_Handle;
 
 static void StripSlashes(char* path){
@@ -59,13 +72,13 @@ static void StripSlashes(char* path){
     }
 }
 
-static int DoMkdir(const char *path, mode_t mode) {
+static int DoMkdir(int dirFd, const char *path, mode_t mode) {
     struct stat st;
     int error = 0;
 
-    if (stat(path, &st) != 0) {
+    if (fstatat(dirFd, path, &st, 0) != 0) {
         /* Directory does not exist. EEXIST for race condition */
-        if (mkdir(path, mode) != 0 && errno != EEXIST)
+        if (mkdirat(dirFd, path, mode) != 0 && errno != EEXIST)
             error = 1;
     }
     else if (!S_ISDIR(st.st_mode)) {
@@ -76,8 +89,9 @@ static int DoMkdir(const char *path, mode_t mode) {
     return error;
 }
 
-static int MakePath(const char* fullKey, mode_t mode) {
-    char *pp, *sp, *copypath = strdup(fullKey);
+// The path is relative to dirFd, unless it is absolute (or dirFd is AT_FDCWD)
+static int MakePath(int dirFd, const char* path, mode_t mode) {
+    char *pp, *sp, *copypath = strdup(path);
     int error = 0;
 
     // The key is expected to end with a filename or '/'
@@ -87,7 +101,7 @@ static int MakePath(const char* fullKey, mode_t mode) {
     while(!error && (sp = strchr(pp, '/'))){
         if (sp != pp) {
             *sp = '\0';
-            error = DoMkdir(copypath, mode);
+            error = DoMkdir(dirFd, copypath, mode);
             *sp = '/';
         }
         pp = sp + 1;
@@ -97,23 +111,73 @@ static int MakePath(const char* fullKey, mode_t mode) {
     return !error;
 }
 
-static char* GetFullKey(KV_Filesystem_Handle* handle, KV_Key key){
-	int size = 0;
-	char* fullKey = NULL;
-	if(handle && key && (size = asprintf(&fullKey, "%s/%s", handle->root, key)) > 0){
-		if(fullKey[size-1] == '/'){
-			fullKey[size-1] = KV_FS_DIRECTORY_CHAR;
-		}
-	}
-	return fullKey;
+// Parts are spread over fanout directories under the data directory, so that none grows too large. These are opened
+// when first used, and kept open from then on. Only writers create them, so that lookups work on a read-only store,
+// failing with ENOENT if the directory is not there.
+static int GetFanoutDirectory(KV_Filesystem_Handle* handle, KV_Key key, char create){
+    char name[3] = {key[1], key[2], '\0'};
+    int index = (int)strtol(name, NULL, 16);
+    int fd = __atomic_load_n(&handle->fanout_fd[index], __ATOMIC_ACQUIRE);
+
+    if(fd == -1){
+        if(create && mkdirat(handle->data_fd, name, S_IRWXU | S_IRWXG | S_IRWXO) && errno != EEXIST)
+            return -1;
+
+        if((fd = openat(handle->data_fd, name, O_RDONLY | O_DIRECTORY | O_CLOEXEC)) == -1)
+            return -1;
+
+        // Another thread may have got there first
+        int current = -1;
+        if(!__atomic_compare_exchange_n(&handle->fanout_fd[index], &current, fd, 0, __ATOMIC_ACQ_REL, __ATOMIC_ACQUIRE)){
+            close(fd);
+            fd = current;
+        }
+    }
+
+    return fd;
 }
 
-static char* GetFullPrefix(KV_Filesystem_Handle* handle, KV_Key key){
-	char* fullKey = NULL;
-	if(handle && key){
-		asprintf(&fullKey, "%s/%s", handle->root, key);
-	}
-	return fullKey;
+// Get the directory a key is in and its name relative to it, so that no full path has to be built. The name is the
+// key itself, unless it needs the directory marker, in which case it is a copy to be freed with ReleaseName(). The
+// directory is created if the key is about to be written.
+static int Locate(KV_Filesystem_Handle* handle, KV_Key key, char** name, char create){
+    size_t size = strlen(key);
+
+    *name = key;
+    if(handle->data_fd != -1 && IsPartKey(key)){
+        return GetFanoutDirectory(handle, key, create);
+    }
+
+    if(size && key[size-1] == '/'){
+        if(!(*name = strdup(key)))
+            return -1;
+
+        (*name)[size-1] = KV_FS_DIRECTORY_CHAR;
+    }
+
+    return handle->root_fd;
+}
+
+static void ReleaseName(KV_Key key, char* name){
+    if(name != key)
+        free(name);
+}
+
+// Open a key to write to. Its parent directory is only made if it turns out to be missing, which
+// is never the case for parts.
+static int OpenForWriting(KV_Filesystem_Handle* handle, KV_Key key, int flags){
+    char* name;
+    int fd = -1, dirFd;
+
+    if((dirFd = Locate(handle, key, &name, 1)) != -1){
+        if((fd = openat(dirFd, name, flags, 0666)) == -1 && errno == ENOENT && strchr(name, '/')){
+            MakePath(dirFd, name, S_IRWXU | S_IRWXG | S_IRWXO);
+            fd = openat(dirFd, name, flags, 0666);
+        }
+        ReleaseName(key, name);
+    }
+
+    return fd;
 }
 
 static KV_Status Write(int fd, KV_Value value, off_t offset, size_t size){
@@ -121,23 +185,18 @@ static KV_Status Write(int fd, KV_Value value, off_t offset, size_t size){
 
     if(size){
         if(value){
-            if(lseek(fd, offset, SEEK_SET) != offset){
-                LogActivity(H3_ERROR_MSG, "Error create/write seeking in offset %" PRIu64 "\n",offset);
+            // Keep on for legitimate partial writes
+            ssize_t written = 0;
+            size_t remaining = size;
+            while(remaining && (written = pwrite(fd, &value[size - remaining], remaining, offset + size - remaining)) > 0){
+                remaining -= written;
             }
-            else{
-                // Use an attempt counter to allow for legitimate partial writes
-                int attempts = 2;
-                size_t writen, remaining = size;
-                while(--attempts && remaining){
-                    KV_Value buffer = &value[size - remaining];
-                    if((writen = write(fd, buffer, remaining)) == -1){
-                        break;
-                    }
-                    remaining -= writen;
-                }
 
-                if(!remaining)
-                    status = KV_SUCCESS;
+            if(!remaining){
+                status = KV_SUCCESS;
+            }
+            else {
+                LogActivity(H3_ERROR_MSG, "Error create/write in offset %" PRIu64 "\n", offset);
             }
         }
     }
@@ -151,6 +210,165 @@ static KV_Status Write(int fd, KV_Value value, off_t offset, size_t size){
 
 
 
+#ifdef H3LIB_USE_URING
+
+typedef enum {
+    KV_FS_OPEN_READ, KV_FS_OPEN_WRITE, KV_FS_READ, KV_FS_WRITE
+}KV_FS_Step;
+
+// A key to be read or written as part of a batch
+typedef struct {
+    KV_Key key;
+    char* name;
+    int dirFd;
+    int fd;
+    KV_Value value;
+    off_t offset;
+    size_t size;
+    int result;                         // Of the last step, -errno on failure
+}KV_FS_Request;
+
+static int uringAvailable = 1;          // Cleared when the kernel turns out not to support it
+
+static void FreeRing(gpointer ring){
+    io_uring_queue_exit((struct io_uring*)ring);
+    free(ring);
+}
+
+static GPrivate uringKey = G_PRIVATE_INIT(FreeRing);
+
+// Whether the kernel supports all the operations the batches use, as io_uring itself may be older than some of them
+static int SupportsOperations(struct io_uring* ring){
+    struct io_uring_probe* probe = io_uring_get_probe_ring(ring);
+    int supported = probe && io_uring_opcode_supported(probe, IORING_OP_OPENAT) &&
+                             io_uring_opcode_supported(probe, IORING_OP_READ) &&
+                             io_uring_opcode_supported(probe, IORING_OP_WRITE);
+
+    if(probe)
+        io_uring_free_probe(probe);
+
+    return supported;
+}
+
+// Each thread has a ring of its own, made when first needed. There is none if io_uring is not available, in which case
+// the batch is handled with ordinary calls.
+static struct io_uring* GetRing(){
+    struct io_uring* ring = g_private_get(&uringKey);
+    int error;
+
+    if(!ring && __atomic_load_n(&uringAvailable, __ATOMIC_RELAXED) && (ring = malloc(sizeof(struct io_uring)))){
+        if((error = io_uring_queue_init(KV_FS_URING_DEPTH, ring, 0)) == 0){
+            if(SupportsOperations(ring)){
+                g_private_set(&uringKey, ring);
+                return ring;
+            }
+
+            LogActivity(H3_INFO_MSG, "INFO: io_uring does not support the operations needed, using ordinary calls\n");
+            io_uring_queue_exit(ring);
+        }
+        else {
+            LogActivity(H3_INFO_MSG, "INFO: io_uring not available, using ordinary calls - %s\n", strerror(-error));
+        }
+
+        __atomic_store_n(&uringAvailable, 0, __ATOMIC_RELAXED);
+        free(ring);
+        ring = NULL;
+    }
+
+    return ring;
+}
+
+// Run a step for all requests, keeping up to KV_FS_URING_DEPTH of them in flight, and collect the results.
+// If submitting fails, the requests the kernel has not taken are failed, while those it has are still waited for, as
+// it may be using their buffers and the files they open would leak otherwise. Should anything be left in the queue, or
+// waiting fail too, the ring is dropped and the next batch gets a new one; a request has failed in either case, so the
+// caller does not go on to another step with it.
+static void RunStep(struct io_uring* ring, KV_FS_Request* requests, uint32_t nRequests, KV_FS_Step step){
+    uint32_t prepared = 0, completed = 0, taken, i;
+    struct io_uring_sqe* sqe;
+    struct io_uring_cqe* cqe;
+    unsigned head, count;
+    int error;
+
+    while(completed < nRequests){
+        while(prepared < nRequests && (sqe = io_uring_get_sqe(ring))){
+            KV_FS_Request* request = &requests[prepared++];
+            switch(step){
+                case KV_FS_OPEN_READ:
+                    io_uring_prep_openat(sqe, request->dirFd, request->name, O_RDONLY | O_CLOEXEC, 0); break;
+                case KV_FS_OPEN_WRITE:
+                    io_uring_prep_openat(sqe, request->dirFd, request->name, O_CREAT | O_WRONLY | O_CLOEXEC, 0666); break;
+                case KV_FS_READ:
+                    io_uring_prep_read(sqe, request->fd, request->value, request->size, request->offset); break;
+                case KV_FS_WRITE:
+                    io_uring_prep_write(sqe, request->fd, request->value, request->size, request->offset); break;
+            }
+            io_uring_sqe_set_data(sqe, request);
+            request->result = -EINPROGRESS;
+        }
+
+        if((error = io_uring_submit_and_wait(ring, 1)) < 0 && error != -EINTR){
+            LogActivity(H3_ERROR_MSG, "Submitting to io_uring failed - %s\n", strerror(-error));
+            taken = prepared - io_uring_sq_ready(ring);
+            for(i=taken; i<nRequests; i++){
+                requests[i].result = error;
+            }
+
+            while(completed < taken){
+                if((error = io_uring_wait_cqe(ring, &cqe)) == 0){
+                    ((KV_FS_Request*)io_uring_cqe_get_data(cqe))->result = cqe->res;
+                    io_uring_cqe_seen(ring, cqe);
+                    completed++;
+                }
+                else if(error != -EINTR && error != -EAGAIN){
+                    LogActivity(H3_ERROR_MSG, "Waiting on io_uring failed - %s\n", strerror(-error));
+                    break;
+                }
+            }
+
+            if(taken < prepared || completed < taken)
+                g_private_replace(&uringKey, NULL);
+
+            return;
+        }
+
+        count = 0;
+        io_uring_for_each_cqe(ring, head, cqe){
+            ((KV_FS_Request*)io_uring_cqe_get_data(cqe))->result = cqe->res;
+            count++;
+        }
+        io_uring_cq_advance(ring, count);
+        completed += count;
+    }
+}
+
+static KV_Status GetBatchStatus(KV_FS_Request* requests, uint32_t nRequests, const char* action){
+    uint32_t i;
+
+    for(i=0; i<nRequests; i++){
+        if(requests[i].result < 0){
+            switch(-requests[i].result){
+                case ENAMETOOLONG:
+                    return KV_KEY_TOO_LONG;
+
+                case ENOENT:
+                case EISDIR:
+                    return KV_KEY_NOT_EXIST;
+
+                default:
+                    LogActivity(H3_ERROR_MSG, "%s key %s failed - %s\n", action, requests[i].key, strerror(-requests[i].result));
+                    return KV_FAILURE;
+            }
+        }
+    }
+
+    return KV_SUCCESS;
+}
+
+#endif
+
+void KV_FS_Free(KV_Handle handle);
+
 KV_Handle KV_FS_Init(const char* storageUri) {
     struct parsed_url *url = parse_url(storageUri);
     if (url == NULL) {
@@ -168,19 +386,87 @@ KV_Handle KV_FS_Init(const char* storageUri) {
         path = strdup("/tmp/h3");
         LogActivity(H3_INFO_MSG, "WARNING: No path in URI. Using default: /tmp/h3\n");
     }
-    parsed_url_free(url);
 
     KV_Filesystem_Handle* handle = malloc(sizeof(KV_Filesystem_Handle));
     handle->root = path;
     StripSlashes(handle->root);
     handle->root_path_len = strlen(handle->root);
 
+    // Parts go to a directory of their own, so that listing the metadata doesn't go through them. It may be elsewhere
+    // (e.g. on another device), or else it is in the root, unless the root holds keys from before it was introduced.
+    handle->data_root = GetQueryOption(url->query, "data_path");
+
+    // Batches go through io_uring if available, unless turned off (e.g. to compare with ordinary calls)
+    char* uring = GetQueryOption(url->query, "uring");
+    handle->uring = !uring || (strcmp(uring, "0") && strcmp(uring, "false") && strcmp(uring, "off"));
+    free(uring);
+    parsed_url_free(url);
+
+    if(handle->data_root){
+        if(handle->data_root[0] != '/'){
+            LogActivity(H3_ERROR_MSG, "ERROR: Data path %s is not absolute\n", handle->data_root);
+            free(handle->data_root);
+            free(handle->root);
+            free(handle);
+            return NULL;
+        }
+        StripSlashes(handle->data_root);
+    }
+    else {
+        asprintf(&handle->data_root, "%s/%s", handle->root, KV_FS_DATA_DIRECTORY);
+
+        DIR* dir;
+        if(access(handle->data_root, F_OK) && (dir = opendir(handle->root))){
+            struct dirent* entry;
+            while((entry = readdir(dir)) && (!strcmp(entry->d_name, ".") || !strcmp(entry->d_name, "..")));
+            if(entry){
+                free(handle->data_root);
+                handle->data_root = NULL;
+            }
+            closedir(dir);
+        }
+    }
+
+    // Keys are opened relative to their directory, so keep the directories open
+    char* directory;
+    asprintf(&directory, "%s/", handle->root);
+    MakePath(AT_FDCWD, directory, S_IRWXU | S_IRWXG | S_IRWXO);
+    free(directory);
+    handle->root_fd = open(handle->root, O_RDONLY | O_DIRECTORY | O_CLOEXEC);
+
+    handle->data_fd = -1;
+    if(handle->root_fd != -1 && handle->data_root){
+        asprintf(&directory, "%s/", handle->data_root);
+        MakePath(AT_FDCWD, directory, S_IRWXU | S_IRWXG | S_IRWXO);
+        free(directory);
+        handle->data_fd = open(handle->data_root, O_RDONLY | O_DIRECTORY | O_CLOEXEC);
+    }
+
+    for(int i=0; i<KV_FS_FANOUT; i++){
+        handle->fanout_fd[i] = -1;
+    }
+
+    if(handle->root_fd == -1 || (handle->data_root && handle->data_fd == -1)){
+        LogActivity(H3_ERROR_MSG, "ERROR: Failed to open %s - %s\n", handle->root_fd == -1? handle->root: handle->data_root, strerror(errno));
+        KV_FS_Free(handle);
+        return NULL;
+    }
+
     return (KV_Handle)handle;
 }
 
 void KV_FS_Free(KV_Handle handle) {
     KV_Filesystem_Handle* iHandle = (KV_Filesystem_Handle*) handle;
+    for(int i=0; i<KV_FS_FANOUT; i++){
+        if(iHandle->fanout_fd[i] != -1)
+            close(iHandle->fanout_fd[i]);
+    }
+    if(iHandle->data_fd != -1)
+        close(iHandle->data_fd);
+    if(iHandle->root_fd != -1)
+        close(iHandle->root_fd);
     free(iHandle->root);
+    free(iHandle->data_root);
     free(iHandle);
     return;
 }
@@ -207,161 +493,255 @@ KV_Status KV_FS_ValidateKey(KV_Key key){
 }
 
 
-KV_Status KV_FS_List(KV_Handle handle, KV_Key prefix, uint8_t nTrim, KV_Key buffer, uint32_t offset, uint32_t* nKeys){
-    KV_Filesystem_Handle* storeHandle = (KV_Filesystem_Handle*) handle;
-    char* fullPrefix = GetFullPrefix(storeHandle, prefix);
-    int status = KV_FAILURE;
-
-    uint32_t nRequiredKeys = *nKeys>0?*nKeys:UINT32_MAX;
-    uint32_t nMatchingKeys = 0;
-    size_t prefixLen = strlen(fullPrefix);
-    size_t rootLen = strlen(storeHandle->root) + nTrim + 1;
-    size_t remaining = KV_LIST_BUFFER_SIZE;
-
-    int CopyDirEntry(const char* fpath, const struct stat* sb, int typeflag, struct FTW* ftwbuf) {
-
-    	if(S_ISREG(sb->st_mode)){
-    		size_t rawSize = strlen(fpath);
-    		int isFakeDir = iscntrl(fpath[rawSize-1]);
-
-    		if(strncmp(fpath, fullPrefix, prefixLen) == 0 || (isFakeDir && fullPrefix[prefixLen-1] == '/' && strncmp(fpath, fullPrefix, prefixLen -1) == 0 )){
-    			LogActivity(H3_DEBUG_MSG, "'%s'\n", fpath);
-                if(offset)
-                    offset--;
-
-                else if( nMatchingKeys < nRequiredKeys ){
-                	size_t entrySize = rawSize - rootLen;
-
-                    if(remaining >= (entrySize + 1)) {
-                        memcpy(&buffer[KV_LIST_BUFFER_SIZE - remaining], &fpath[rootLen], entrySize);
-
-                        // Replace the directory marker with '/'
-                        if(isFakeDir){
-                        	buffer[KV_LIST_BUFFER_SIZE - remaining + entrySize - 1] = '/';
-                        }
-
-                        remaining -= (entrySize+1);
-                        nMatchingKeys++;
-                    }
-                    else
-                        return KV_CONTINUE;
-                }
-                else
-                    return KV_CONTINUE;
-    		}
-    	}
+typedef struct {
+    KV_Filesystem_Handle* handle;
+    uint8_t nTrim;
+    KV_Key buffer;
+    uint32_t offset;
+    uint32_t nRequiredKeys;
+    uint32_t nMatchingKeys;
+    size_t remaining;
+    const char* dataName;               // The data directory relative to the root, NULL if not in it
+    char key[PATH_MAX];                 // The key of the directory being walked, i.e. ending with '/'
+}KV_FS_ListState;
 
-        return 0;
+typedef struct {
+    char* name;                         // As in the key, i.e. ending with '/' for directories and directory objects
+    char isDirectory;
+}KV_FS_ListEntry;
+
+// Entries are sorted as the keys they hold, i.e. a directory as its name followed by '/', before its contents
+static int CompareEntries(const void* a, const void* b){
+    const KV_FS_ListEntry* entryA = (const KV_FS_ListEntry*)a;
+    const KV_FS_ListEntry* entryB = (const KV_FS_ListEntry*)b;
+    int result = strcmp(entryA->name, entryB->name);
+    return result? result : entryA->isDirectory - entryB->isDirectory;
+}
+
+// Copy (or count) a key, unless it is to be skipped. Returns KV_CONTINUE once no more keys fit.
+static KV_Status ListKey(KV_FS_ListState* state, const char* key, size_t size){
+    if(state->offset){
+        state->offset--;
     }
+    else if(state->nMatchingKeys < state->nRequiredKeys){
+        if(state->buffer){
+            size_t entrySize = size - state->nTrim;
 
+            if(state->remaining < entrySize + 1)
+                return KV_CONTINUE;
 
-    int CountDirEntry(const char* fpath, const struct stat* sb, int typeflag, struct FTW* ftwbuf) {
-    	if(S_ISREG(sb->st_mode)){
-    		size_t rawSize = strlen(fpath);
-    		int isFakeDir = iscntrl(fpath[rawSize-1]);
+            memcpy(&state->buffer[KV_LIST_BUFFER_SIZE - state->remaining], &key[state->nTrim], entrySize);
+            state->remaining -= (entrySize + 1);
+        }
+        state->nMatchingKeys++;
+    }
+    else
+        return KV_CONTINUE;
 
-    		if(strncmp(fpath, fullPrefix, prefixLen) == 0 || (isFakeDir && fullPrefix[prefixLen-1] == '/')){
-                if(offset)
-                    offset--;
-                else if (nMatchingKeys < nRequiredKeys)
-                    nMatchingKeys++;
-                else
-                    return KV_CONTINUE;
+    return KV_SUCCESS;
+}
 
-    		}
-    	}
+// List the keys under a directory in order, walking its subdirectories as they come. Only the entries of the
+// directory starting with the given name prefix are considered.
+static KV_Status ListDirectory(KV_FS_ListState* state, int dirFd, const char* namePrefix){
+    size_t keyLen = strlen(state->key), namePrefixLen = strlen(namePrefix);
+    KV_FS_ListEntry* entries = NULL;
+    uint32_t nEntries = 0, capacity = 0, i;
+    KV_Status status = KV_SUCCESS;
+    struct dirent* dirEntry;
+    struct stat st;
+    DIR* dir;
 
-        return 0;
+    if(!(dir = fdopendir(dirFd))){
+        close(dirFd);
+        return KV_FAILURE;
     }
 
-    if(buffer){
-    	memset(buffer, 0, KV_LIST_BUFFER_SIZE);
-        status = nftw(storeHandle->root, CopyDirEntry, 10, FTW_DEPTH|FTW_MOUNT|FTW_PHYS);
+    while(status == KV_SUCCESS && (dirEntry = readdir(dir))){
+        const char* name = dirEntry->d_name;
+        size_t nameLen = strlen(name);
+        unsigned char type = dirEntry->d_type;
+
+        if(!strcmp(name, ".") || !strcmp(name, "..") || strncmp(name, namePrefix, namePrefixLen))
+            continue;
+
+        if(type == DT_UNKNOWN)
+            type = fstatat(dirfd(dir), name, &st, AT_SYMLINK_NOFOLLOW)? DT_UNKNOWN : S_ISDIR(st.st_mode)? DT_DIR : S_ISREG(st.st_mode)? DT_REG : DT_UNKNOWN;
+
+        // Symbolic links and the like are not keys
+        if(type != DT_DIR && type != DT_REG)
+            continue;
+
+        if(type == DT_DIR && state->dataName && !strncmp(state->key, state->dataName, keyLen) && !strcmp(&state->dataName[keyLen], name))
+            continue;
+
+        if(keyLen + nameLen + 2 > sizeof(state->key)){
+            status = KV_KEY_TOO_LONG;
+        }
+        else if(nEntries == capacity && !(entries = ReAllocFreeOnFail(entries, (capacity = capacity? capacity * 2 : 64) * sizeof(KV_FS_ListEntry)))){
+            nEntries = 0;
+            status = KV_FAILURE;
+        }
+        else if(!(entries[nEntries].name = malloc(nameLen + 2))){
+            status = KV_FAILURE;
+        }
+        else {
+            entries[nEntries].isDirectory = type == DT_DIR;
+            strcpy(entries[nEntries].name, name);
+            if(type == DT_DIR)
+                strcat(entries[nEntries].name, "/");
+            else if(name[nameLen - 1] == KV_FS_DIRECTORY_CHAR)
+                entries[nEntries].name[nameLen - 1] = '/';
+            nEntries++;
+        }
     }
-    else
-        status = nftw(storeHandle->root, CountDirEntry, 10, FTW_DEPTH|FTW_MOUNT|FTW_PHYS);
 
-    *nKeys = nMatchingKeys;
+    qsort(entries, nEntries, sizeof(KV_FS_ListEntry), CompareEntries);
 
-    if(status == 0)
-        status = KV_SUCCESS;
+    for(i=0; i<nEntries && status == KV_SUCCESS; i++){
+        size_t nameLen = strlen(entries[i].name);
 
-    else if (status < -0){
-    	if (errno == ENAMETOOLONG)
-    		status = KV_KEY_TOO_LONG;
-    	else{
-    		status = KV_FAILURE;
-    		LogActivity(H3_ERROR_MSG, "Listing from key %s failed - %s\n",fullPrefix, strerror(errno));
-    	}
+        memcpy(&state->key[keyLen], entries[i].name, nameLen + 1);
+        if(!entries[i].isDirectory){
+            status = ListKey(state, state->key, keyLen + nameLen);
+        }
+        else {
+            int subdirFd;
+
+            entries[i].name[nameLen - 1] = '\0';
+            if((subdirFd = openat(dirfd(dir), entries[i].name, O_RDONLY | O_DIRECTORY | O_NOFOLLOW | O_CLOEXEC)) != -1)
+                status = ListDirectory(state, subdirFd, "");
+            else if(errno != ENOENT)
+                status = KV_FAILURE;
+        }
     }
+    state->key[keyLen] = '\0';
 
-    return (KV_Status)status;
-}
+    for(i=0; i<nEntries; i++)
+        free(entries[i].name);
+    free(entries);
+    closedir(dir);
 
+    return status;
+}
 
-KV_Status KV_FS_Exists(KV_Handle handle, KV_Key key) {
+/*
+ * Only the directory the prefix points into is walked, in the order of the keys, so that the listing can stop as soon
+ * as enough keys are found.
+ */
+KV_Status KV_FS_List(KV_Handle handle, KV_Key prefix, uint8_t nTrim, KV_Key buffer, uint32_t offset, uint32_t* nKeys){
     KV_Filesystem_Handle* storeHandle = (KV_Filesystem_Handle*) handle;
-    char* fullKey = GetFullKey(storeHandle, key);
-    KV_Status status = KV_FAILURE;
+    KV_FS_ListState* state = malloc(sizeof(KV_FS_ListState));
+    KV_Status status = KV_SUCCESS;
+    size_t prefixLen = strlen(prefix);
+    const char* namePrefix = strrchr(prefix, '/');
+    int dirFd;
 
-    if(!fullKey){
+    if(!state)
         return KV_FAILURE;
+
+    if(prefixLen >= sizeof(state->key)){
+        free(state);
+        return KV_KEY_TOO_LONG;
     }
 
-    if(access(fullKey, F_OK) == 0)
+    state->handle = storeHandle;
+    state->nTrim = nTrim;
+    state->buffer = buffer;
+    state->offset = offset;
+    state->nRequiredKeys = *nKeys>0?*nKeys:UINT32_MAX;
+    state->nMatchingKeys = 0;
+    state->remaining = KV_LIST_BUFFER_SIZE;
+    state->dataName = NULL;
+    if(storeHandle->data_root && !strncmp(storeHandle->data_root, storeHandle->root, storeHandle->root_path_len) &&
+       storeHandle->data_root[storeHandle->root_path_len] == '/')
+        state->dataName = &storeHandle->data_root[storeHandle->root_path_len + 1];
+
+    namePrefix = namePrefix? namePrefix + 1 : prefix;
+    memcpy(state->key, prefix, namePrefix - prefix);
+    state->key[namePrefix - prefix] = '\0';
+
+    if(buffer)
+    	memset(buffer, 0, KV_LIST_BUFFER_SIZE);
+
+    // A directory object (e.g. "a/b/") is kept as a marked file next to its directory, and comes before its contents
+    if(prefixLen > 1 && prefix[prefixLen - 1] == '/'){
+        char* name;
+        if((dirFd = Locate(storeHandle, prefix, &name, 0)) != -1){
+            if(faccessat(dirFd, name, F_OK, 0) == 0)
+                status = ListKey(state, prefix, prefixLen);
+            ReleaseName(prefix, name);
+        }
+    }
+
+    if(status == KV_SUCCESS){
+        if((dirFd = openat(storeHandle->root_fd, state->key[0]? state->key : ".", O_RDONLY | O_DIRECTORY | O_CLOEXEC)) != -1)
+            status = ListDirectory(state, dirFd, namePrefix);
+        else if(errno != ENOENT && errno != ENOTDIR)
+            status = errno == ENAMETOOLONG? KV_KEY_TOO_LONG : KV_FAILURE;
+    }
+
+    if(status == KV_FAILURE)
+        LogActivity(H3_ERROR_MSG, "Listing from key %s failed - %s\n", prefix, strerror(errno));
+
+    *nKeys = state->nMatchingKeys;
+    free(state);
+
+    return status;
+}
+
+
+KV_Status KV_FS_Exists(KV_Handle handle, KV_Key key) {
+    KV_Filesystem_Handle* storeHandle = (KV_Filesystem_Handle*) handle;
+    KV_Status status = KV_FAILURE;
+    char* name;
+    int dirFd;
+
+    if((dirFd = Locate(storeHandle, key, &name, 0)) != -1 && faccessat(dirFd, name, F_OK, 0) == 0)
         status = KV_KEY_EXIST;
     else if(errno == ENOENT)
         status = KV_KEY_NOT_EXIST;
     else if(errno == ENAMETOOLONG)
         status = KV_KEY_TOO_LONG;
     else
-    	LogActivity(H3_ERROR_MSG, "Checking key %s failed - %s\n",fullKey, strerror(errno));
+    	LogActivity(H3_ERROR_MSG, "Checking key %s failed - %s\n",key, strerror(errno));
 
-    free(fullKey);
+    ReleaseName(key, name);
     return status;
 }
 
 KV_Status KV_FS_Read(KV_Handle handle, KV_Key key, off_t offset, KV_Value* value, size_t* size) {
     KV_Filesystem_Handle* storeHandle = (KV_Filesystem_Handle*) handle;
-    char* fullKey = GetFullKey(storeHandle, key);
     KV_Status status = KV_FAILURE;
     struct stat st;
     char freeOnError = 0;
+    char* name;
+    int dirFd, fd;
 
-    if(!fullKey){
-        return KV_FAILURE;
-    }
-
-    if(stat(fullKey, &st)!= -1 && S_ISREG(st.st_mode)){
-    	int fd;
+    if((dirFd = Locate(storeHandle, key, &name, 0)) != -1 && (fd = openat(dirFd, name, O_RDONLY)) != -1){
 
-		if( (fd = open(fullKey, O_RDONLY)) != -1){
-
-			// Check if we need to allocate the buffer
-			if(*value == NULL){
-				*size = st.st_size - offset;
-				*value = malloc(*size - offset);
-				freeOnError = 1;
-			}
+		// Check if we need to allocate the buffer, otherwise the read itself tells how much there is
+		if(*value == NULL && fstat(fd, &st) != -1){
+			*size = st.st_size > offset? st.st_size - offset : 0;
+			*value = malloc(*size);
+			freeOnError = 1;
+		}
 
-			// At this point we MUST have a buffer
-			if( *value ){
-				// Read the data
-				if(lseek(fd, offset, SEEK_SET) != offset){
-					LogActivity(H3_ERROR_MSG, "Error read seeking in offset %" PRIu64 "\n",offset);
-				}
-				else if((*size = read(fd, *value, *size)) != -1){
-					status = KV_SUCCESS;
-				}
-			}
-			close(fd);
+		// At this point we MUST have a buffer. Reading a directory fails with EISDIR.
+		ssize_t readSize;
+		if( *value && (readSize = pread(fd, *value, *size, offset)) != -1){
+			*size = readSize;
+			status = KV_SUCCESS;
 		}
+		close(fd);
     }
 
     if(status != KV_SUCCESS ){
 
-        if(freeOnError && *value)
+        if(freeOnError && *value){
         	free(*value);
+        	*value = NULL;
+        }
 
     	switch(errno){
 			case ENAMETOOLONG:
@@ -377,28 +757,21 @@ KV_Status KV_FS_Read(KV_Handle handle, KV_Key key, off_t offset, KV_Value* value
 
 			default:{
 //				status = KV_FAILURE;
-				LogActivity(H3_ERROR_MSG, "Reading from key %s failed - %s\n",fullKey, strerror(errno));
+				LogActivity(H3_ERROR_MSG, "Reading from key %s failed - %s\n",key, strerror(errno));
 			}
     	}
     }
 
-    free(fullKey);
+    ReleaseName(key, name);
     return status;
 }
 
-KV_Status KV_FS_Create(KV_Handle handle, KV_Key key, KV_Value value, size_t size){
+KV_Status KV_FS_Create(KV_Handle handle, KV_Key key, KV_Value value, size_t size, const char* bucket){
     KV_Filesystem_Handle* storeHandle = (KV_Filesystem_Handle*) handle;
-    char* fullKey = GetFullKey(storeHandle, key);
     KV_Status status = KV_FAILURE;
     int fd;
 
-    if(!fullKey){
-        return KV_FAILURE;
-    }
-
-    MakePath(fullKey, S_IRWXU | S_IRWXG | S_IRWXO);
-
-    if( (fd = open(fullKey,O_CREAT|O_EXCL|O_WRONLY,0666)) != -1){
+    if( (fd = OpenForWriting(storeHandle, key, O_CREAT|O_EXCL|O_WRONLY)) != -1){
         return Write(fd, value, 0, size);
     }
     else if( errno == EEXIST ){
@@ -408,26 +781,18 @@ KV_Status KV_FS_Create(KV_Handle handle, KV_Key key, KV_Value value, size_t size
     	status = KV_KEY_TOO_LONG;
     }
     else {
-        LogActivity(H3_ERROR_MSG, "Creating key %s failed - %s\n",fullKey, strerror(errno));
+        LogActivity(H3_ERROR_MSG, "Creating key %s failed - %s\n",key, strerror(errno));
     }
 
-    free(fullKey);
     return status;
 }
 
-KV_Status KV_FS_Update(KV_Handle handle, KV_Key key, KV_Value value, off_t offset, size_t size) {
+KV_Status KV_FS_Update(KV_Handle handle, KV_Key key, KV_Value value, off_t offset, size_t size, const char* bucket) {
     KV_Filesystem_Handle* storeHandle = (KV_Filesystem_Handle*) handle;
-    char* fullKey = GetFullKey(storeHandle, key);
     KV_Status status = KV_FAILURE;
     int fd;
 
-    if(!fullKey){
-        return KV_FAILURE;
-    }
-
-    MakePath(fullKey, S_IRWXU | S_IRWXG | S_IRWXO);
-
-    if( (fd = open(fullKey,O_CREAT|O_WRONLY,0666)) != -1){
+    if( (fd = OpenForWriting(storeHandle, key, O_CREAT|O_WRONLY)) != -1){
         return Write(fd, value, offset, size);
     }
     else if( errno == EEXIST ){
@@ -440,33 +805,151 @@ KV_Status KV_FS_Update(KV_Handle handle, KV_Key key, KV_Value value, off_t offse
         LogActivity(H3_ERROR_MSG, "Writing key %s failed - %s\n",key, strerror(errno));
     }
 
-    free(fullKey);
     return status;
 }
 
-KV_Status KV_FS_Write(KV_Handle handle, KV_Key key, KV_Value value, size_t size) {
-    return KV_FS_Update(handle, key, value, 0, size);
+// Values are replaced, so that a shorter value doesn't keep the tail of the previous one
+KV_Status KV_FS_Write(KV_Handle handle, KV_Key key, KV_Value value, size_t size, const char* bucket) {
+    KV_Filesystem_Handle* storeHandle = (KV_Filesystem_Handle*) handle;
+    KV_Status status = KV_FAILURE;
+    int fd;
+
+    if( (fd = OpenForWriting(storeHandle, key, O_CREAT|O_WRONLY|O_TRUNC)) != -1){
+        return Write(fd, value, 0, size);
+    }
+    else if(errno == ENAMETOOLONG){
+    	status = KV_KEY_TOO_LONG;
+    }
+    else {
+        LogActivity(H3_ERROR_MSG, "Writing key %s failed - %s\n",key, strerror(errno));
+    }
+
+    return status;
 }
 
-KV_Status KV_FS_Copy(KV_Handle handle, KV_Key src_key, KV_Key dest_key) {
+#ifdef H3LIB_USE_URING
+
+// The keys are opened together, and then read together
+KV_Status KV_FS_MultiRead(KV_Handle handle, KV_Key* keys, off_t* offsets, KV_Value* values, size_t* sizes, uint32_t nKeys) {
     KV_Filesystem_Handle* storeHandle = (KV_Filesystem_Handle*) handle;
-    char *srcFullKey, *dstFullKey;
-    KV_Status status = KV_FAILURE;
-    int srcFd = -1, dstFd = -1;
+    KV_Status status = KV_SUCCESS;
+    KV_FS_Request* requests;
+    struct io_uring* ring;
+    uint32_t i;
 
-    if(!(srcFullKey = GetFullKey(storeHandle, src_key))){
-        return KV_FAILURE;
+    if(!storeHandle->uring || !(ring = GetRing()) || !(requests = calloc(nKeys, sizeof(KV_FS_Request)))){
+        for(i=0; status == KV_SUCCESS && i<nKeys; i++)
+            status = KV_FS_Read(handle, keys[i], offsets[i], &values[i], &sizes[i]);
+
+        return status;
     }
 
-    if(!(dstFullKey = GetFullKey(storeHandle, dest_key))){
-        free(srcFullKey);
-        return KV_FAILURE;
+    for(i=0; i<nKeys; i++){
+        requests[i].key = keys[i];
+        requests[i].dirFd = Locate(storeHandle, keys[i], &requests[i].name, 0);
+        requests[i].result = requests[i].dirFd == -1? -errno : 0;
+        requests[i].fd = -1;
+        requests[i].value = values[i];
+        requests[i].offset = offsets[i];
+        requests[i].size = sizes[i];
+    }
+
+    if((status = GetBatchStatus(requests, nKeys, "Reading from")) == KV_SUCCESS){
+        RunStep(ring, requests, nKeys, KV_FS_OPEN_READ);
+        for(i=0; i<nKeys; i++){
+            if(requests[i].result >= 0)
+                requests[i].fd = requests[i].result;
+        }
+
+        if((status = GetBatchStatus(requests, nKeys, "Reading from")) == KV_SUCCESS){
+            RunStep(ring, requests, nKeys, KV_FS_READ);
+            if((status = GetBatchStatus(requests, nKeys, "Reading from")) == KV_SUCCESS){
+                for(i=0; i<nKeys; i++)
+                    sizes[i] = requests[i].result;
+            }
+        }
+    }
+
+    for(i=0; i<nKeys; i++){
+        if(requests[i].fd != -1)
+            close(requests[i].fd);
+        ReleaseName(keys[i], requests[i].name);
+    }
+    free(requests);
+
+    return status;
+}
+
+// The keys are opened together, and then written together. Keys whose parent directory is missing, or that
+// are partially written, are taken care of with ordinary calls.
+KV_Status KV_FS_MultiUpdate(KV_Handle handle, KV_Key* keys, KV_Value* values, off_t* offsets, size_t* sizes, uint32_t nKeys, const char* bucket) {
+    KV_Filesystem_Handle* storeHandle = (KV_Filesystem_Handle*) handle;
+    KV_Status status = KV_SUCCESS;
+    KV_FS_Request* requests;
+    struct io_uring* ring;
+    uint32_t i;
+
+    if(!storeHandle->uring || !(ring = GetRing()) || !(requests = calloc(nKeys, sizeof(KV_FS_Request)))){
+        for(i=0; status == KV_SUCCESS && i<nKeys; i++)
+            status = KV_FS_Update(handle, keys[i], values[i], offsets[i], sizes[i], bucket);
+
+        return status;
+    }
+
+    for(i=0; i<nKeys; i++){
+        requests[i].key = keys[i];
+        requests[i].dirFd = Locate(storeHandle, keys[i], &requests[i].name, 1);
+        requests[i].result = requests[i].dirFd == -1? -errno : 0;
+        requests[i].fd = -1;
+        requests[i].value = values[i];
+        requests[i].offset = offsets[i];
+        requests[i].size = sizes[i];
     }
 
-    MakePath(dstFullKey, S_IRWXU | S_IRWXG | S_IRWXO);
+    if((status = GetBatchStatus(requests, nKeys, "Writing")) == KV_SUCCESS){
+        RunStep(ring, requests, nKeys, KV_FS_OPEN_WRITE);
+        for(i=0; i<nKeys; i++){
+            if(requests[i].result >= 0)
+                requests[i].fd = requests[i].result;
+            else if(requests[i].result == -ENOENT && strchr(requests[i].name, '/'))
+                requests[i].result = (requests[i].fd = OpenForWriting(storeHandle, keys[i], O_CREAT|O_WRONLY)) == -1? -errno : 0;
+        }
+
+        if((status = GetBatchStatus(requests, nKeys, "Writing")) == KV_SUCCESS){
+            RunStep(ring, requests, nKeys, KV_FS_WRITE);
+            for(i=0; status == KV_SUCCESS && i<nKeys; i++){
+                if(requests[i].result >= 0 && (size_t)requests[i].result < requests[i].size){
+                    size_t written = requests[i].result;
+                    status = Write(requests[i].fd, &values[i][written], offsets[i] + written, sizes[i] - written);
+                    requests[i].fd = -1;
+                }
+            }
+
+            if(status == KV_SUCCESS)
+                status = GetBatchStatus(requests, nKeys, "Writing");
+        }
+    }
+
+    for(i=0; i<nKeys; i++){
+        if(requests[i].fd != -1)
+            close(requests[i].fd);
+        ReleaseName(keys[i], requests[i].name);
+    }
+    free(requests);
+
+    return status;
+}
+
+#endif
+
+KV_Status KV_FS_Copy(KV_Handle handle, KV_Key src_key, KV_Key dest_key) {
+    KV_Filesystem_Handle* storeHandle = (KV_Filesystem_Handle*) handle;
+    KV_Status status = KV_FAILURE;
+    int srcDirFd, srcFd = -1, dstFd = -1;
+    char* srcName;
 
-    if( (srcFd = open(srcFullKey, O_RDONLY)) != -1 ){
-        if( (dstFd = open(dstFullKey, O_CREAT|O_WRONLY|O_TRUNC, 0666)) != -1){
+    if( (srcDirFd = Locate(storeHandle, src_key, &srcName, 0)) != -1 && (srcFd = openat(srcDirFd, srcName, O_RDONLY)) != -1 ){
+        if( (dstFd = OpenForWriting(storeHandle, dest_key, O_CREAT|O_WRONLY|O_TRUNC)) != -1){
             ssize_t readSize, writeSize;
             char buffer[4096]; // 4K
 
@@ -491,55 +974,48 @@ KV_Status KV_FS_Copy(KV_Handle handle, KV_Key src_key, KV_Key dest_key) {
         LogActivity(H3_ERROR_MSG, "Copying key %s to %s failed - %s\n",src_key, dest_key, strerror(errno));
     }
 
-    free(srcFullKey);
-    free(dstFullKey);
+    ReleaseName(src_key, srcName);
 
     return status;
 }
 
 KV_Status KV_FS_Delete(KV_Handle handle, KV_Key key) {
     KV_Filesystem_Handle* storeHandle = (KV_Filesystem_Handle*) handle;
-    char* fullKey = GetFullKey(storeHandle, key);
     KV_Status status = KV_FAILURE;
+    char* name;
+    int dirFd;
 
-    if(fullKey){
-    	if(remove(fullKey) == 0){
-    		status = KV_SUCCESS;
-    	}
-    	else if(errno == ENOENT){
-    		status = KV_KEY_NOT_EXIST;
-    	}
-    	else if(errno == ENAMETOOLONG){
-    		status = KV_KEY_TOO_LONG;
-    	}
-    	else{
-    		LogActivity(H3_ERROR_MSG, "Deleting key %s failed - %s\n",key, strerror(errno));
-    	}
-
-    	free(fullKey);
+    // Like remove(), i.e. empty directories go too
+    if((dirFd = Locate(storeHandle, key, &name, 0)) != -1 &&
+       (unlinkat(dirFd, name, 0) == 0 || (errno == EISDIR && unlinkat(dirFd, name, AT_REMOVEDIR) == 0))){
+    	status = KV_SUCCESS;
+    }
+    else if(errno == ENOENT){
+    	status = KV_KEY_NOT_EXIST;
+    }
+    else if(errno == ENAMETOOLONG){
+    	status = KV_KEY_TOO_LONG;
+    }
+    else{
+    	LogActivity(H3_ERROR_MSG, "Deleting key %s failed - %s\n",key, strerror(errno));
     }
 
+    ReleaseName(key, name);
     return status;
 }
 
 
 KV_Status KV_FS_Move(KV_Handle handle, KV_Key src_key, KV_Key dest_key) {
     KV_Filesystem_Handle* storeHandle = (KV_Filesystem_Handle*) handle;
-    char *srcFullKey, *dstFullKey;
     KV_Status status = KV_FAILURE;
-
-    if(!(srcFullKey = GetFullKey(storeHandle, src_key))){
-        return KV_FAILURE;
-    }
-
-    if(!(dstFullKey = GetFullKey(storeHandle, dest_key))){
-        free(srcFullKey);
-        return KV_FAILURE;
-    }
-
-    MakePath(dstFullKey, S_IRWXU | S_IRWXG | S_IRWXO);
-
-    if( rename(srcFullKey, dstFullKey) != -1){
+    char *srcName, *dstName = NULL;
+    int srcDirFd, dstDirFd = -1;
+
+    if( (srcDirFd = Locate(storeHandle, src_key, &srcName, 0)) != -1 && (dstDirFd = Locate(storeHandle, dest_key, &dstName, 1)) != -1 &&
+        (renameat(srcDirFd, srcName, dstDirFd, dstName) != -1 ||
+         // Make the destination's parent directory, in case that is what was missing
+         (errno == ENOENT && strchr(dstName, '/') && MakePath(dstDirFd, dstName, S_IRWXU | S_IRWXG | S_IRWXO) &&
+          renameat(srcDirFd, srcName, dstDirFd, dstName) != -1)) ){
         status = KV_SUCCESS;
     }
     else if(errno == ENOENT){
@@ -552,8 +1028,8 @@ KV_Status KV_FS_Move(KV_Handle handle, KV_Key src_key, KV_Key dest_key) {
         LogActivity(H3_ERROR_MSG, "Moving key %s to %s failed - %s\n",src_key, dest_key, strerror(errno));
     }
 
-    free(srcFullKey);
-    free(dstFullKey);
+    ReleaseName(src_key, srcName);
+    ReleaseName(dest_key, dstName);
 
     return status;
 }
@@ -564,14 +1040,22 @@ KV_Status KV_FS_Sync(KV_Handle handle) {
 }
 
 
+static KV_Status KV_FS_Metadata_Write(KV_Handle handle, KV_Key key, KV_Value value, size_t size) {
+    return KV_FS_Write(handle, key, value, size, NULL);
+}
+
+static KV_Status KV_FS_Metadata_Create(KV_Handle handle, KV_Key key, KV_Value value, size_t size) {
+    return KV_FS_Create(handle, key, value, size, NULL);
+}
+
 KV_Operations operationsFilesystem = {
     .init = KV_FS_Init,
     .free = KV_FS_Free,
 	.validate_key = KV_FS_ValidateKey,
 
     .metadata_read = KV_FS_Read,
-    .metadata_write = KV_FS_Write,
-    .metadata_create = KV_FS_Create,
+    .metadata_write = KV_FS_Metadata_Write,
+    .metadata_create = KV_FS_Metadata_Create,
     .metadata_delete = KV_FS_Delete,
     .metadata_move = KV_FS_Move,
     .metadata_exists = KV_FS_Exists,
@@ -579,6 +1063,10 @@ KV_Operations operationsFilesystem = {
     .list = KV_FS_List,
     .exists = KV_FS_Exists,
     .read = KV_FS_Read,
+#ifdef H3LIB_USE_URING
+    .multi_read = KV_FS_MultiRead,
+    .multi_update = KV_FS_MultiUpdate,
+#endif
     .create = KV_FS_Create,
     .update = KV_FS_Update,
     .write = KV_FS_Write,
@@ -47,14 +47,28 @@ typedef struct KV_Operations {
 	 * Otherwise the backend will fill it with up to "size" data.
 	 *
 	 *
+	 * Function multi_read() is optional (NULL if the store doesn't have it) and reads
+	 * a number of keys at once, each from its own offset into its own caller supplied
+	 * buffer, with the sizes being in/out as for read(). It fails if any of the keys
+	 * fails to be read.
+	 *
+	 *
 	 * --- Write/Update Operations ---
-	 * Write operations create a key if doesn't exist or update its value otherwise. For
+	 * Write operations create a key if doesn't exist or replace its value otherwise. For
 	 * functions metadata_write() and write(), argument "size" indicates the size of the
 	 * caller supplied value, whereas argument "offset" (for updates) indicates the starting-position
 	 * within the current buffer associated with the key that will be replaced by value.
 	 * If the size of the buffer is smaller than the offset the buffer will be padded
 	 * with 0x00 to make the offset fit. Padding is applied even if the key is just created.
 	 *
+	 * Function multi_update() is optional (NULL if the store doesn't have it) and updates
+	 * a number of keys at once, each at its own offset with its own value. It fails if
+	 * any of the keys fails to be updated.
+	 *
+	 * Argument "bucket" of create(), write(), update() and multi_update() names the bucket
+	 * the data belongs to, for stores applying per-bucket policies (e.g. compression), or
+	 * is NULL if there is none.
+	 *
 	 *
 	 * --- Create Operations ---
 	 * Creates are identical to Writes but fail if key already exists.
@@ -66,7 +80,9 @@ typedef struct KV_Operations {
 	 * of matching entries wishing to retrieve and by the function to indicate the number
 	 * actually retrieved. Setting the number to 0x00 means to retrieve all the objects.
 	 * If the buffer pointer is NULL then we only count the number of matching keys.
-	 * The caller may also indicate the number of entries to be skipped.
+	 * The caller may also indicate the number of entries to be skipped. Keys are listed
+	 * in (bytewise) lexicographic order, so that the caller may stop at the first key
+	 * past a range.
 	 *
 	 *
 	 * --- Move/Copy Operations ---
@@ -87,9 +103,11 @@ typedef struct KV_Operations {
 	KV_Status (*list)(KV_Handle handle, KV_Key prefix, uint8_t nTrim, KV_Key key, uint32_t offset, uint32_t* nKeys);
 	KV_Status (*exists)(KV_Handle handle, KV_Key key);
 	KV_Status (*read)(KV_Handle handle, KV_Key key, off_t offset, KV_Value* value, size_t* size);
-	KV_Status (*create)(KV_Handle handle, KV_Key key, KV_Value value, size_t size);
-	KV_Status (*update)(KV_Handle handle, KV_Key key, KV_Value value, off_t offset, size_t size);
-	KV_Status (*write)(KV_Handle handle, KV_Key key, KV_Value value, size_t size);
+	KV_Status (*multi_read)(KV_Handle handle, KV_Key* keys, off_t* offsets, KV_Value* values, size_t* sizes, uint32_t nKeys);
+	KV_Status (*create)(KV_Handle handle, KV_Key key, KV_Value value, size_t size, const char* bucket);
+	KV_Status (*update)(KV_Handle handle, KV_Key key, KV_Value value, off_t offset, size_t size, const char* bucket);
+	KV_Status (*multi_update)(KV_Handle handle, KV_Key* keys, KV_Value* values, off_t* offsets, size_t* sizes, uint32_t nKeys, const char* bucket);
+	KV_Status (*write)(KV_Handle handle, KV_Key key, KV_Value value, size_t size, const char* bucket);
 	KV_Status (*copy)(KV_Handle handle, KV_Key srcKey, KV_Key dstKey);
 	KV_Status (*move)(KV_Handle handle, KV_Key srcKey, KV_Key dstKey);
 	KV_Status (*delete)(KV_Handle handle, KV_Key key);
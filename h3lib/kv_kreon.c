@@ -197,7 +197,7 @@ KV_Status KV_Kreon_Read(KV_Handle handle, KV_Key key, off_t offset, KV_Value* va
     return status;
 }
 
-KV_Status KV_Kreon_Update(KV_Handle handle, KV_Key key, KV_Value value, off_t offset, size_t size) {
+KV_Status KV_Kreon_Update(KV_Handle handle, KV_Key key, KV_Value value, off_t offset, size_t size, const char* bucket) {
     KV_Status status;
 
     KV_Value newValue;
@@ -245,7 +245,7 @@ KV_Status KV_Kreon_Update(KV_Handle handle, KV_Key key, KV_Value value, off_t of
     return status;
 }
 
-KV_Status KV_Kreon_Write(KV_Handle handle, KV_Key key, KV_Value value, size_t size) {
+KV_Status KV_Kreon_Write(KV_Handle handle, KV_Key key, KV_Value value, size_t size, const char* bucket) {
 
     // Convert key blob to string
     struct klc_key_value kreon_key_value;
@@ -276,11 +276,11 @@ KV_Status KV_Kreon_Delete(KV_Handle handle, KV_Key key) {
     return status;
 }
 
-KV_Status KV_Kreon_Create(KV_Handle handle, KV_Key key, KV_Value value, size_t size){
+KV_Status KV_Kreon_Create(KV_Handle handle, KV_Key key, KV_Value value, size_t size, const char* bucket){
     KV_Status status;
 
     if( (status = KV_Kreon_Exists(handle, key)) == KV_KEY_NOT_EXIST){
-         status = KV_Kreon_Write(handle, key, value, size);
+         status = KV_Kreon_Write(handle, key, value, size, bucket);
     }
 
     return status;
@@ -292,7 +292,7 @@ KV_Status KV_Kreon_Copy(KV_Handle handle, KV_Key src_key, KV_Key dest_key) {
     KV_Status status;
 
     if((status = KV_Kreon_Read(handle, src_key, 0, &value, &size)) == KV_SUCCESS){
-        status = KV_Kreon_Write(handle, dest_key, value, size);
+        status = KV_Kreon_Write(handle, dest_key, value, size, NULL);
     }
 
     return status;
@@ -304,7 +304,7 @@ KV_Status KV_Kreon_Move(KV_Handle handle, KV_Key src_key, KV_Key dest_key) {
     KV_Status status;
 
     if( (status = KV_Kreon_Read(handle, src_key, 0, &value, &size)) == KV_SUCCESS &&
-        (status = KV_Kreon_Write(handle, dest_key, value, size)) == KV_SUCCESS      ){
+        (status = KV_Kreon_Write(handle, dest_key, value, size, NULL)) == KV_SUCCESS      ){
         status = KV_Kreon_Delete(handle, src_key);
     }
 
@@ -315,14 +315,22 @@ KV_Status KV_Kreon_Sync(KV_Handle handle) {
     return KV_SUCCESS;
 }
 
+static KV_Status KV_Kreon_Metadata_Write(KV_Handle handle, KV_Key key, KV_Value value, size_t size) {
+    return KV_Kreon_Write(handle, key, value, size, NULL);
+}
+
+static KV_Status KV_Kreon_Metadata_Create(KV_Handle handle, KV_Key key, KV_Value value, size_t size) {
+    return KV_Kreon_Create(handle, key, value, size, NULL);
+}
+
 KV_Operations operationsKreon = {
     .init = KV_Kreon_Init,
     .free = KV_Kreon_Free,
     .validate_key = NULL,
 
     .metadata_read = KV_Kreon_Read,
-    .metadata_write = KV_Kreon_Write,
-    .metadata_create = KV_Kreon_Create,
+    .metadata_write = KV_Kreon_Metadata_Write,
+    .metadata_create = KV_Kreon_Metadata_Create,
     .metadata_delete = KV_Kreon_Delete,
     .metadata_move = KV_Kreon_Move,
     .metadata_exists = KV_Kreon_Exists,
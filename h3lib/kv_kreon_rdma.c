@@ -234,7 +234,7 @@ KV_Status KV_Kreon_RDMA_Read(KV_Handle handle, KV_Key key, off_t offset, KV_Valu
 	return status;
 }
 
-KV_Status KV_Kreon_RDMA_Update(KV_Handle handle, KV_Key key, KV_Value value, off_t offset, size_t size) {
+KV_Status KV_Kreon_RDMA_Update(KV_Handle handle, KV_Key key, KV_Value value, off_t offset, size_t size, const char* bucket) {
     KV_Status status;
 
     KV_Value currentValue;
@@ -284,7 +284,7 @@ KV_Status KV_Kreon_RDMA_Update(KV_Handle handle, KV_Key key, KV_Value value, off
     return status;
 }
 
-KV_Status KV_Kreon_RDMA_Write(KV_Handle handle, KV_Key key, KV_Value value, size_t size) {
+KV_Status KV_Kreon_RDMA_Write(KV_Handle handle, KV_Key key, KV_Value value, size_t size, const char* bucket) {
 
 	// Convert key blob to string
 	if(krc_put_compressed(strlen(key)+1, key, size, value) == KRC_SUCCESS)
@@ -306,12 +306,12 @@ KV_Status KV_Kreon_RDMA_Delete(KV_Handle handle, KV_Key key) {
 	return status;
 }
 
-KV_Status KV_Kreon_RDMA_Create(KV_Handle _handle, KV_Key key, KV_Value value, size_t size){
+KV_Status KV_Kreon_RDMA_Create(KV_Handle _handle, KV_Key key, KV_Value value, size_t size, const char* bucket){
 	KV_Status status;
 	KV_Kreon_RDMA_Handle* handle = (KV_Kreon_RDMA_Handle *)_handle;
 
 	if( (status = KV_Kreon_RDMA_Exists(handle, key)) == KV_KEY_NOT_EXIST){
-		 status = KV_Kreon_RDMA_Write(handle, key, value, size);
+		 status = KV_Kreon_RDMA_Write(handle, key, value, size, bucket);
 	}
 
 	return status;
@@ -324,7 +324,7 @@ KV_Status KV_Kreon_RDMA_Copy(KV_Handle _handle, KV_Key src_key, KV_Key dest_key)
 	KV_Kreon_RDMA_Handle* handle = (KV_Kreon_RDMA_Handle *)_handle;
 
 	if((status = KV_Kreon_RDMA_Read(handle, src_key, 0, &value, &size)) == KV_SUCCESS){
-		status = KV_Kreon_RDMA_Write(handle, dest_key, value, size);
+		status = KV_Kreon_RDMA_Write(handle, dest_key, value, size, NULL);
 	}
 
 	return status;
@@ -337,7 +337,7 @@ KV_Status KV_Kreon_RDMA_Move(KV_Handle _handle, KV_Key src_key, KV_Key dest_key)
 	KV_Kreon_RDMA_Handle* handle = (KV_Kreon_RDMA_Handle *)_handle;
 
 	if( (status = KV_Kreon_RDMA_Read(handle, src_key, 0, &value, &size)) == KV_SUCCESS &&
-		(status = KV_Kreon_RDMA_Write(handle, dest_key, value, size)) == KV_SUCCESS		){
+		(status = KV_Kreon_RDMA_Write(handle, dest_key, value, size, NULL)) == KV_SUCCESS		){
 		status = KV_Kreon_RDMA_Delete(handle, src_key);
 	}
 
@@ -348,14 +348,22 @@ KV_Status KV_Kreon_RDMA_Sync(KV_Handle handle) {
     return KV_SUCCESS;
 }
 
+static KV_Status KV_Kreon_RDMA_Metadata_Write(KV_Handle handle, KV_Key key, KV_Value value, size_t size) {
+    return KV_Kreon_RDMA_Write(handle, key, value, size, NULL);
+}
+
+static KV_Status KV_Kreon_RDMA_Metadata_Create(KV_Handle handle, KV_Key key, KV_Value value, size_t size) {
+    return KV_Kreon_RDMA_Create(handle, key, value, size, NULL);
+}
+
 KV_Operations operationsKreonRDMA = {
     .init = KV_Kreon_RDMA_Init,
     .free = KV_Kreon_RDMA_Free,
 	.validate_key = NULL,
 
     .metadata_read = KV_Kreon_RDMA_Read,
-    .metadata_write = KV_Kreon_RDMA_Write,
-    .metadata_create = KV_Kreon_RDMA_Create,
+    .metadata_write = KV_Kreon_RDMA_Metadata_Write,
+    .metadata_create = KV_Kreon_RDMA_Metadata_Create,
     .metadata_delete = KV_Kreon_RDMA_Delete,
     .metadata_move = KV_Kreon_RDMA_Move,
     .metadata_exists = KV_Kreon_RDMA_Exists,
@@ -16,6 +16,8 @@
 #include <stdio.h>
 #include <stdlib.h>
 #include <string.h>
+#include <stdarg.h>
+#include <glib.h>
 #include <hiredis/hiredis.h>
 
 #include "kv_interface.h"
@@ -24,59 +26,399 @@
 #include "url_parser.h"
 
 #ifdef H3LIB_USE_COMPRESSION
-
 #include <zstd.h>
+#include "codec.h"
+#endif
 
-// Return a compressed value. Free when done on success.
-KV_Status compress_value(void *value, uint32_t value_size, void **compressed_value, uint32_t *compressed_value_size) {
-    uint32_t compress_bound = ZSTD_compressBound(value_size);
-    *compressed_value = malloc(compress_bound);
+#define REDIS_DEFAULT_PORT 6379
+#define REDIS_INDEX_DELIMITERS "/$#"        // The name of the bucket a key belongs to ends at any of these
+#define REDIS_INDEX_MARKER "@index"         // Set once the indexes are built, user keys being '@' followed by a number
+#define REDIS_LIST_BATCH 1000
 
-    // The last argument to the function is the compression level, which can range from 1 (lowest) to 22 (highest).
-    *compressed_value_size = ZSTD_compress(*compressed_value, compress_bound, value, value_size, -1);
+#ifdef H3LIB_USE_COMPRESSION
+#define REDIS_VALUE_RAW 0x00                            // Value headers, raw being 0x00 so that values padded by SETRANGE are raw
+#define REDIS_VALUE_ZSTD 0x01
+#define REDIS_VALUE_LEGACY (ZSTD_MAGICNUMBER & 0xFF)    // Earlier versions kept values as plain zstd frames
+#endif
 
-    if (ZSTD_isError(*compressed_value_size)) {
-        LogActivity(H3_ERROR_MSG, "Failed to compress the value!");
-        free(*compressed_value);
-        *compressed_value = NULL;
-        *compressed_value_size = 0;
-        return KV_FAILURE;
+typedef struct {
+	redisContext* ctx;
+	GMutex lock;        // A context carries one request at a time
+}KV_Redis_Connection;
+
+// Connections to a logical database of a server, for threads sharing the handle to use in parallel
+typedef struct {
+	KV_Redis_Connection* connection;
+	uint32_t nConnections;
+	uint32_t next;      // Where to start looking for an idle connection
+}KV_Redis_Pool;
+
+typedef struct {
+	KV_Redis_Pool* metadata;                // On the first server
+	KV_Redis_Pool** data;                   // Per server, the first being the metadata pool if parts are kept along with the metadata
+	uint32_t nServers;
+#ifdef H3LIB_USE_COMPRESSION
+	KV_CodecPolicies policies;
+#endif
+}KV_Redis_Handle;
+
+// FNV-1a, so that a key maps to the same server whatever the platform or library version
+static uint32_t HashKey(KV_Key key) {
+    uint32_t hash = 2166136261u;
+    for (; *key; key++) {
+        hash ^= (unsigned char)*key;
+        hash *= 16777619u;
     }
+    return hash;
+}
 
-    return KV_SUCCESS;
+// Take an idle connection of the pool, or wait for one if all are busy
+static KV_Redis_Connection* Acquire(KV_Redis_Pool* pool) {
+    uint32_t start = __atomic_fetch_add(&pool->next, 1, __ATOMIC_RELAXED);
+    uint32_t i;
+
+    for (i = 0; i < pool->nConnections; i++) {
+        KV_Redis_Connection* connection = &pool->connection[(start + i) % pool->nConnections];
+        if (g_mutex_trylock(&connection->lock))
+            return connection;
+    }
+
+    KV_Redis_Connection* connection = &pool->connection[start % pool->nConnections];
+    g_mutex_lock(&connection->lock);
+    return connection;
+}
+
+// Metadata is on the first server, while parts are spread over all servers by the hash of their key
+static KV_Redis_Pool* GetPool(KV_Redis_Handle* storeHandle, KV_Key key) {
+    return IsPartKey(key)? storeHandle->data[HashKey(key) % storeHandle->nServers] : storeHandle->metadata;
+}
+
+// Send a command to the logical database the key belongs to
+static redisReply* CommandV(KV_Redis_Handle* storeHandle, KV_Key key, const char* format, va_list args) {
+    KV_Redis_Connection* connection = Acquire(GetPool(storeHandle, key));
+    redisReply* reply = redisvCommand(connection->ctx, format, args);
+    g_mutex_unlock(&connection->lock);
+
+    return reply;
+}
+
+static redisReply* Command(KV_Redis_Handle* storeHandle, KV_Key key, const char* format, ...) {
+    redisReply* reply;
+    va_list args;
+
+    va_start(args, format);
+    reply = CommandV(storeHandle, key, format, args);
+    va_end(args);
+
+    return reply;
+}
+
+/*
+ * Metadata keys are indexed per bucket, so that they can be listed in order and by prefix without going through
+ * the whole keyspace. The index of a key is a sorted set named after the part of the key before the first delimiter
+ * (i.e. the bucket, or nothing for bucket and time index keys) prefixed with '%', and holds the keys with a score
+ * of 0. Parts and keys without a delimiter (users) are not indexed.
+ */
+static size_t GetIndexLength(KV_Key key) {
+    size_t length = strcspn(key, REDIS_INDEX_DELIMITERS);
+    return key[length] && !IsPartKey(key)? length : SIZE_MAX;
+}
+
+// Send a command along with the update ("ZADD" or "ZREM") of the key's index, in a transaction. The reply is that of the command.
+static redisReply* IndexedCommand(KV_Redis_Handle* storeHandle, KV_Key key, const char* indexCommand, const char* format, ...) {
+    size_t length = GetIndexLength(key);
+    redisReply *reply = NULL, *execReply = NULL;
+    va_list args;
+    int i;
+
+    va_start(args, format);
+    if (length == SIZE_MAX) {
+        reply = CommandV(storeHandle, key, format, args);
+        va_end(args);
+        return reply;
+    }
+
+    KV_Redis_Connection* connection = Acquire(storeHandle->metadata);
+    if (redisAppendCommand(connection->ctx, "MULTI") == REDIS_OK &&
+        redisvAppendCommand(connection->ctx, format, args) == REDIS_OK &&
+        (!strcmp(indexCommand, "ZADD")? redisAppendCommand(connection->ctx, "ZADD %%%b 0 %s", key, length, key) :
+                                        redisAppendCommand(connection->ctx, "ZREM %%%b %s", key, length, key)) == REDIS_OK &&
+        redisAppendCommand(connection->ctx, "EXEC") == REDIS_OK) {
+
+        // The replies to MULTI and the queued commands are just acknowledgements
+        for (i = 0; i < 4 && redisGetReply(connection->ctx, (void**)&reply) == REDIS_OK; i++) {
+            if (i < 3)
+                freeReplyObject(reply);
+            else
+                execReply = reply;
+            reply = NULL;
+        }
+    }
+    g_mutex_unlock(&connection->lock);
+    va_end(args);
+
+    if (execReply && execReply->type == REDIS_REPLY_ARRAY && execReply->elements == 2) {
+        reply = execReply->element[0];
+        execReply->element[0] = NULL;
+    }
+    freeReplyObject(execReply);
+
+    return reply;
+}
+
+static void Disconnect(KV_Redis_Connection* connection) {
+    redisFree(connection->ctx);
+    g_mutex_clear(&connection->lock);
+}
+
+static int Connect(KV_Redis_Connection* connection, const char* host, int port, int db) {
+    connection->ctx = redisConnect(host, port);
+    if (!connection->ctx || connection->ctx->err) {
+        LogActivity(H3_ERROR_MSG, "Hiredis - %s:%d - %s\n", host, port, connection->ctx? connection->ctx->errstr : "Out of memory");
+        redisFree(connection->ctx);
+        return 0;
+    }
+    g_mutex_init(&connection->lock);
+
+    if (db) {
+        redisReply* reply = redisCommand(connection->ctx, "SELECT %d", db);
+        if (!reply || reply->type == REDIS_REPLY_ERROR) {
+            LogActivity(H3_ERROR_MSG, "Hiredis - Unable to select database %d\n", db);
+            freeReplyObject(reply);
+            Disconnect(connection);
+            return 0;
+        }
+        freeReplyObject(reply);
+    }
+
+    return 1;
+}
+
+static void FreePool(KV_Redis_Pool* pool) {
+    uint32_t i;
+
+    if (pool) {
+        for (i = 0; i < pool->nConnections; i++)
+            Disconnect(&pool->connection[i]);
+        free(pool->connection);
+        free(pool);
+    }
 }
 
-// Return a decompressed value. Free when done on success.
-KV_Status decompress_value(void *compressed_value, uint32_t compressed_value_size, void **value, uint32_t *value_size) {
-    uint32_t frameContentSize = ZSTD_getFrameContentSize(compressed_value, compressed_value_size);
-    // Check if returned ZSTD_CONTENTSIZE_ERROR (error occured) / ZSTD_CONTENTSIZE_UNKNOWN (size can't be determined)
-    if(frameContentSize == ZSTD_CONTENTSIZE_ERROR
-      || frameContentSize == ZSTD_CONTENTSIZE_UNKNOWN){
-        LogActivity(H3_ERROR_MSG, "Could not retrieve original size!");
+static KV_Redis_Pool* CreatePool(const char* host, int port, int db, uint32_t nConnections) {
+    KV_Redis_Pool* pool = calloc(1, sizeof(KV_Redis_Pool));
+    if (!pool || !(pool->connection = calloc(nConnections, sizeof(KV_Redis_Connection)))) {
+        free(pool);
+        return NULL;
+    }
+
+    for (; pool->nConnections < nConnections; pool->nConnections++) {
+        if (!Connect(&pool->connection[pool->nConnections], host, port, db)) {
+            FreePool(pool);
+            return NULL;
+        }
+    }
+
+    return pool;
+}
+
+// Index the keys of a store from before the indexes were introduced, once
+static int BuildIndex(KV_Redis_Handle* storeHandle) {
+    redisReply *reply, *keyReply;
+    char* cursor = strdup("0");
+    int done = 0;
+    size_t i;
+
+    if (!(reply = Command(storeHandle, REDIS_INDEX_MARKER, "EXISTS %s", REDIS_INDEX_MARKER)) || reply->type != REDIS_REPLY_INTEGER) {
+        freeReplyObject(reply);
+        free(cursor);
+        return 0;
+    }
+    done = reply->integer;
+    freeReplyObject(reply);
+
+    while (!done && (reply = Command(storeHandle, REDIS_INDEX_MARKER, "SCAN %s COUNT %d", cursor, REDIS_LIST_BATCH))) {
+        int failed = reply->type != REDIS_REPLY_ARRAY || reply->elements != 2;
+
+        for (i = 0; !failed && i < reply->element[1]->elements; i++) {
+            KV_Key key = reply->element[1]->element[i]->str;
+            size_t length = GetIndexLength(key);
+            if (length != SIZE_MAX) {
+                failed = !(keyReply = Command(storeHandle, key, "ZADD %%%b 0 %s", key, length, key));
+                freeReplyObject(keyReply);
+            }
+        }
+
+        if (!failed) {
+            free(cursor);
+            cursor = strdup(reply->element[0]->str);
+        }
+        freeReplyObject(reply);
+
+        if (failed)
+            break;
+
+        if (!strcmp(cursor, "0")) {
+            if ((reply = Command(storeHandle, REDIS_INDEX_MARKER, "SET %s 1", REDIS_INDEX_MARKER))) {
+                done = reply->type == REDIS_REPLY_STATUS;
+                freeReplyObject(reply);
+                LogActivity(H3_INFO_MSG, "INFO: Indexed the keys of the store\n");
+            }
+            break;
+        }
+    }
+    free(cursor);
+
+    return done;
+}
+
+#ifdef H3LIB_USE_COMPRESSION
+
+// Values are only ever compressed with zstd, as that is all the header of a value can tell
+static int SetPolicies(KV_Redis_Handle* storeHandle, const char* query) {
+    uint32_t i;
+
+    if (!InitCodecPolicies(&storeHandle->policies, query, "", KV_CODEC_ZSTD))
+        return 0;
+
+    for (i = 0; i < storeHandle->policies.nPolicies; i++) {
+        if (storeHandle->policies.policy[i].codec == KV_CODEC_LZ4) {
+            LogActivity(H3_ERROR_MSG, "Hiredis - Compression lz4 not supported\n");
+            return 0;
+        }
+    }
+
+    return 1;
+}
+
+/*
+ * Compress a part as the policy of the bucket being written to says, unless it is too small, looks incompressible or
+ * doesn't shrink by at least an eighth, in which case it is not worth decompressing. Metadata is always kept raw. The
+ * header of the value is returned, along with the data following it, which is either the value itself or a buffer to
+ * be freed.
+ */
+static unsigned char Encode(KV_Redis_Handle* storeHandle, KV_Key key, KV_Value value, size_t size, const char* bucket, KV_Value* data, size_t* dataSize) {
+    KV_CodecPolicy* policy = GetCodecPolicy(&storeHandle->policies, bucket);
+    KV_Value buffer;
+    size_t capacity = size - size / 8, compressedSize;
+
+    *data = value;
+    *dataSize = size;
+
+    if (!IsPartKey(key) || policy->codec == KV_CODEC_NONE || size < policy->minSize || LooksIncompressible(value, size) ||
+        !(buffer = malloc(capacity)))
+        return REDIS_VALUE_RAW;
+
+    // Compression fails if the data doesn't fit
+    if (!(compressedSize = Compress(policy, value, size, buffer, capacity))) {
+        free(buffer);
+        return REDIS_VALUE_RAW;
+    }
+
+    *data = buffer;
+    *dataSize = compressedSize;
+    return REDIS_VALUE_ZSTD;
+}
+
+// Get the data of a whole value, which is either within the value or, if decompressed, in a buffer to be freed
+static KV_Status Decode(const char* value, size_t size, KV_Value* data, size_t* dataSize, KV_Value* buffer) {
+    *buffer = NULL;
+
+    if (!size)
         return KV_FAILURE;
+
+    switch ((unsigned char)value[0]) {
+        case REDIS_VALUE_RAW:
+            *data = (KV_Value)value + 1;
+            *dataSize = size - 1;
+            return KV_SUCCESS;
+
+        case REDIS_VALUE_ZSTD:
+            value++;
+            size--;
+            break;
+
+        case REDIS_VALUE_LEGACY:
+            break;
+
+        default:
+            LogActivity(H3_ERROR_MSG, "Hiredis - Unknown value header 0x%02x\n", (unsigned char)value[0]);
+            return KV_FAILURE;
     }
 
-    *value = malloc(frameContentSize);
-    *value_size = ZSTD_decompress(*value, frameContentSize, compressed_value, compressed_value_size);
+    unsigned long long frameContentSize = ZSTD_getFrameContentSize(value, size);
+    if (frameContentSize == ZSTD_CONTENTSIZE_ERROR || frameContentSize == ZSTD_CONTENTSIZE_UNKNOWN) {
+        LogActivity(H3_ERROR_MSG, "Hiredis - Could not retrieve original size\n");
+        return KV_FAILURE;
+    }
 
-    if (ZSTD_isError(*value_size)) {
-        LogActivity(H3_ERROR_MSG, "Failed to decompress the value!");
-        free(*value);
-        *value = NULL;
-        *value_size = 0;
+    if (!(*buffer = malloc(max(frameContentSize, 1ULL))))
+        return KV_FAILURE;
+
+    if ((*dataSize = Decompress(KV_CODEC_ZSTD, value, size, *buffer, frameContentSize)) != frameContentSize) {
+        LogActivity(H3_ERROR_MSG, "Hiredis - Failed to decompress the value\n");
+        free(*buffer);
+        *buffer = NULL;
         return KV_FAILURE;
     }
 
+    *data = *buffer;
     return KV_SUCCESS;
 }
 
-#endif
+// Get the header of a value along with a range of its data (inclusive, -1 being the end) in one round trip
+static KV_Status GetRange(KV_Redis_Handle* storeHandle, KV_Key key, off_t first, off_t last, unsigned char* header, redisReply** reply) {
+    KV_Redis_Connection* connection = Acquire(GetPool(storeHandle, key));
+    redisReply* headerReply = NULL;
+    KV_Status status = KV_FAILURE;
 
-typedef struct {
-	redisContext* ctx;
-}KV_Redis_Handle;
+    *reply = NULL;
+    if (redisAppendCommand(connection->ctx, "GETRANGE %s 0 0", key) == REDIS_OK &&
+        redisAppendCommand(connection->ctx, "GETRANGE %s %lld %lld", key, (long long)first + 1, last < 0? -1LL : (long long)last + 1) == REDIS_OK &&
+        redisGetReply(connection->ctx, (void**)&headerReply) == REDIS_OK) {
+        redisGetReply(connection->ctx, (void**)reply);
+    }
+    g_mutex_unlock(&connection->lock);
+
+    if (headerReply && headerReply->type == REDIS_REPLY_STRING && *reply && (*reply)->type == REDIS_REPLY_STRING) {
+        // Values are never empty, having a header
+        if (headerReply->len) {
+            *header = headerReply->str[0];
+            status = KV_SUCCESS;
+        } else {
+            status = KV_KEY_NOT_EXIST;
+        }
+    }
+    freeReplyObject(headerReply);
 
+    if (status != KV_SUCCESS) {
+        freeReplyObject(*reply);
+        *reply = NULL;
+    }
+
+    return status;
+}
 
+#endif
+
+void KV_Redis_Free(KV_Handle handle);
+
+/*
+ * The storage URI may name several servers, each with its port or else the default one, e.g.
+ * "redis://h1,h2:6380,h3", to spread the parts over. The metadata is kept on the first server.
+ * The URI query may also set:
+ *  - pool      The connections per server and logical database (default 1)
+ *  - db        The database of the metadata (default 0)
+ *  - data_db   The database of the parts (default is the metadata one), so that listing the metadata doesn't
+ *              go through them
+ *
+ * When built with compression, parts are compressed with zstd as set by (all optional):
+ *  - compression           One of zstd (default) or none
+ *  - compression_level     The zstd level (default 1)
+ *  - compression_min_size  Smaller parts are kept raw (default 4K)
+ * Any of these may be set for a single bucket by suffixing it with a dot and the name of the bucket, e.g.
+ * "compression.archive=none". Parts that look incompressible or don't shrink enough are kept raw anyway.
+ */
 KV_Handle KV_Redis_Init(const char* storageUri) {
     struct parsed_url *url = parse_url(storageUri);
     if (url == NULL) {
@@ -84,116 +426,245 @@ KV_Handle KV_Redis_Init(const char* storageUri) {
         return NULL;
     }
 
-    char *host;
+    // A list of servers is split at the port delimiter of the first one, so put it back together
+    char *servers;
     if (url->host != NULL) {
-        host = strdup(url->host);
-        LogActivity(H3_INFO_MSG, "INFO: Host in URI: %s\n", host);
+        if (url->port != NULL)
+            asprintf(&servers, "%s:%s", url->host, url->port);
+        else
+            servers = strdup(url->host);
+        LogActivity(H3_INFO_MSG, "INFO: Host in URI: %s\n", servers);
     } else {
-        host = strdup("127.0.0.1");
+        servers = strdup("127.0.0.1");
         LogActivity(H3_INFO_MSG, "WARNING: No host in URI. Using default: 127.0.0.1\n");
     }
-    int port;
-    if (url->port != NULL) {
-        port = atoi(url->port);
-        if (port == 0) {
-            port = 6379;
-            LogActivity(H3_INFO_MSG, "WARNING: Unrecognized port in URI. Using default: 6379\n");
-        }
-    } else {
-        port = 6379;
-        LogActivity(H3_INFO_MSG, "WARNING: No port in URI. Using default: 6379\n");
+
+    char* value;
+    int db = 0, dataDb = -1;
+    uint32_t nConnections = 1;
+    if ((value = GetQueryOption(url->query, "db"))) {
+        db = atoi(value);
+        free(value);
+    }
+    if ((value = GetQueryOption(url->query, "data_db"))) {
+        dataDb = atoi(value);
+        free(value);
+    }
+    if ((value = GetQueryOption(url->query, "pool"))) {
+        if (atoi(value) > 0)
+            nConnections = atoi(value);
+        else
+            LogActivity(H3_INFO_MSG, "WARNING: Unrecognized pool size in URI. Using default: 1\n");
+        free(value);
     }
-    parsed_url_free(url);
 
-    KV_Redis_Handle* handle = malloc(sizeof(KV_Redis_Handle));
-    if (!handle)
+    KV_Redis_Handle* handle = calloc(1, sizeof(KV_Redis_Handle));
+    gchar** server = g_strsplit(servers, ",", 0);
+    free(servers);
+    if (!handle || !(handle->data = calloc(g_strv_length(server), sizeof(KV_Redis_Pool*)))) {
+        free(handle);
+        g_strfreev(server);
+        parsed_url_free(url);
         return NULL;
+    }
 
-    if (!(handle->ctx = redisConnect(host, port))) {
-        LogActivity(H3_ERROR_MSG, "Hiredis - %s\n", handle->ctx->errstr);
-        free(host);
-        free(handle);
+#ifdef H3LIB_USE_COMPRESSION
+    if (!SetPolicies(handle, url->query)) {
+        KV_Redis_Free(handle);
+        g_strfreev(server);
+        parsed_url_free(url);
         return NULL;
     }
+#endif
+    parsed_url_free(url);
+
+    for (; server[handle->nServers]; handle->nServers++) {
+        char* host = server[handle->nServers];
+        char* delimiter = strchr(host, ':');
+        int port = REDIS_DEFAULT_PORT;
+        if (delimiter) {
+            *delimiter = '\0';
+            if (!(port = atoi(delimiter + 1))) {
+                port = REDIS_DEFAULT_PORT;
+                LogActivity(H3_INFO_MSG, "WARNING: Unrecognized port in URI. Using default: 6379\n");
+            }
+        }
+
+        if (!handle->nServers && !(handle->metadata = CreatePool(host, port, db, nConnections)))
+            break;
+
+        if (!handle->nServers && (dataDb < 0 || dataDb == db))
+            handle->data[0] = handle->metadata;
+        else if (!(handle->data[handle->nServers] = CreatePool(host, port, dataDb < 0? db : dataDb, nConnections)))
+            break;
+    }
+
+    if (server[handle->nServers] || !BuildIndex(handle)) {
+        KV_Redis_Free(handle);
+        handle = NULL;
+    }
+    g_strfreev(server);
 
-    free(host);
     return (KV_Handle)handle;
 }
 
 void KV_Redis_Free(KV_Handle handle) {
 	KV_Redis_Handle* _handle = (KV_Redis_Handle*) handle;
-	redisFree(_handle->ctx);
+	uint32_t i;
+	for (i = 0; i < _handle->nServers; i++) {
+		if (_handle->data[i] != _handle->metadata)
+			FreePool(_handle->data[i]);
+	}
+	FreePool(_handle->metadata);
+	free(_handle->data);
+#ifdef H3LIB_USE_COMPRESSION
+	FreeCodecPolicies(&_handle->policies);
+#endif
     free(_handle);
     return;
 }
 
-KV_Status KV_Redis_List(KV_Handle handle, KV_Key prefix, uint8_t nTrim, KV_Key buffer, uint32_t offset, uint32_t* nKeys){
-	KV_Redis_Handle* storeHandle = (KV_Redis_Handle*) handle;
+static gint CompareKeys(gconstpointer a, gconstpointer b){
+    return strcmp(*(const char**)a, *(const char**)b);
+}
+
+// Go through the whole keyspace, for prefixes that don't belong to a single index. The matching keys are sorted, so that they are listed in order like indexed ones.
+static KV_Status ScanKeys(KV_Redis_Handle* storeHandle, KV_Key prefix, uint8_t nTrim, KV_Key buffer, uint32_t offset, uint32_t* nKeys){
 	KV_Status status = KV_SUCCESS;
     uint32_t nRequiredKeys = *nKeys>0?*nKeys:UINT32_MAX;
     uint32_t nMatchingKeys = 0;
     size_t remaining = KV_LIST_BUFFER_SIZE;
+    GPtrArray* keys = g_ptr_array_new_full(0, free);
+    guint i;
 
     redisReply* reply = NULL;
     char* cursor = strdup("0");
 
-    if(buffer)
-   	    memset(buffer, 0, KV_LIST_BUFFER_SIZE);
-
     do{
        	freeReplyObject(reply);
-       	if((reply = redisCommand(storeHandle->ctx, "SCAN %s MATCH %s*", cursor, prefix))){
+       	if((reply = Command(storeHandle, prefix, "SCAN %s MATCH %s*", cursor, prefix))){
             if (!reply->elements) break;
 
-       		int i;
+       		for(i=0; i<reply->element[1]->elements; i++)
+       			g_ptr_array_add(keys, strdup(reply->element[1]->element[i]->str));
 
-       		for(i=0; i<reply->element[1]->elements && status != KV_CONTINUE; i++){
+       		free(cursor);
+       		cursor = strdup(reply->element[0]->str);
+       	}
 
-       			if(offset)
-       				offset--;
+    }while(reply && strcmp(cursor, "0") != 0);
 
-       			else if( nMatchingKeys < nRequiredKeys ){
+    free(cursor);
+    if(reply){
+   	    freeReplyObject(reply);
 
-       				// Copy the keys if a buffer is provided...
-       				if(buffer){
-       					size_t entrySize = reply->element[1]->element[i]->len - nTrim;
-       					if(remaining >= (entrySize + 1) ){
-       						memcpy(&buffer[KV_LIST_BUFFER_SIZE - remaining], &reply->element[1]->element[i]->str[nTrim], entrySize);
-       						remaining -= (entrySize+1);
-       						nMatchingKeys++;
-       					}
-       					else
-       						status = KV_CONTINUE;
-       				}
+        g_ptr_array_sort(keys, CompareKeys);
+        if(buffer)
+       	    memset(buffer, 0, KV_LIST_BUFFER_SIZE);
 
-       				// ... otherwise just count them.
-       				else
-       					nMatchingKeys++;
-       			}
-       			else
-       				status = KV_CONTINUE;
-       		}
+        for(i=offset; i<keys->len && status != KV_CONTINUE; i++){
+            const char* key = g_ptr_array_index(keys, i);
 
-       		cursor = strdup(reply->element[0]->str);
-       	}
+            if( nMatchingKeys < nRequiredKeys ){
 
-    }while(reply && strcmp(cursor, "0") != 0 && status != KV_CONTINUE);
+                // Copy the keys if a buffer is provided...
+                if(buffer){
+                    size_t entrySize = strlen(key) - nTrim;
+                    if(remaining >= (entrySize + 1) ){
+                        memcpy(&buffer[KV_LIST_BUFFER_SIZE - remaining], &key[nTrim], entrySize);
+                        remaining -= (entrySize+1);
+                        nMatchingKeys++;
+                    }
+                    else
+                        status = KV_CONTINUE;
+                }
 
-    if(reply){
-   	    freeReplyObject(reply);
+                // ... otherwise just count them.
+                else
+                    nMatchingKeys++;
+            }
+            else
+                status = KV_CONTINUE;
+        }
    	    *nKeys = nMatchingKeys;
     } else
         status = KV_FAILURE;
 
+    g_ptr_array_free(keys, TRUE);
    return status;
 }
 
+KV_Status KV_Redis_List(KV_Handle handle, KV_Key prefix, uint8_t nTrim, KV_Key buffer, uint32_t offset, uint32_t* nKeys){
+	KV_Redis_Handle* storeHandle = (KV_Redis_Handle*) handle;
+	KV_Status status = KV_SUCCESS;
+    uint32_t nRequiredKeys = *nKeys>0?*nKeys:UINT32_MAX;
+    uint32_t nMatchingKeys = 0;
+    size_t remaining = KV_LIST_BUFFER_SIZE;
+    size_t length = GetIndexLength(prefix);
+    redisReply* reply;
+    size_t i;
+
+    if(length == SIZE_MAX)
+        return ScanKeys(storeHandle, prefix, nTrim, buffer, offset, nKeys);
+
+    // The keys between "prefix" and "prefix\xff", which no UTF-8 string contains
+    if(!buffer){
+        if(!(reply = Command(storeHandle, prefix, "ZLEXCOUNT %%%b [%s (%s\xff", prefix, length, prefix, prefix)))
+            return KV_FAILURE;
+
+        if(reply->type == REDIS_REPLY_INTEGER){
+            uint64_t nKeysLeft = reply->integer > offset? reply->integer - offset : 0;
+            nMatchingKeys = min(nKeysLeft, nRequiredKeys);
+            if(nKeysLeft > nRequiredKeys)
+                status = KV_CONTINUE;
+        }
+        else
+            status = KV_FAILURE;
+
+        freeReplyObject(reply);
+        *nKeys = nMatchingKeys;
+        return status;
+    }
+
+    memset(buffer, 0, KV_LIST_BUFFER_SIZE);
+    do{
+        if(!(reply = Command(storeHandle, prefix, "ZRANGEBYLEX %%%b [%s (%s\xff LIMIT %u %u", prefix, length, prefix, prefix, offset, REDIS_LIST_BATCH)))
+            return KV_FAILURE;
+
+        if(reply->type != REDIS_REPLY_ARRAY){
+            freeReplyObject(reply);
+            return KV_FAILURE;
+        }
+
+        for(i=0; i<reply->elements && status == KV_SUCCESS; i++){
+            size_t entrySize = reply->element[i]->len - nTrim;
+
+            if(nMatchingKeys < nRequiredKeys && remaining >= (entrySize + 1)){
+                memcpy(&buffer[KV_LIST_BUFFER_SIZE - remaining], &reply->element[i]->str[nTrim], entrySize);
+                remaining -= (entrySize+1);
+                nMatchingKeys++;
+                offset++;
+            }
+            else
+                status = KV_CONTINUE;
+        }
+
+        // A short batch is the last one
+        i = reply->elements;
+        freeReplyObject(reply);
+
+    }while(status == KV_SUCCESS && i == REDIS_LIST_BATCH);
+
+    *nKeys = nMatchingKeys;
+    return status;
+}
+
 KV_Status KV_Redis_Exists(KV_Handle handle, KV_Key key) {
 	KV_Redis_Handle* storeHandle = (KV_Redis_Handle*) handle;
     KV_Status status = KV_FAILURE;
     redisReply* reply = NULL;
 
-    if((reply = redisCommand(storeHandle->ctx, "EXISTS %s", key))){
+    if((reply = Command(storeHandle, key, "EXISTS %s", key))){
 
     	if(reply->integer == 0)
     		status = KV_KEY_NOT_EXIST;
@@ -212,16 +683,61 @@ KV_Status KV_Redis_Read(KV_Handle handle, KV_Key key, off_t offset, KV_Value* va
 	redisReply* reply = NULL;
 
 #ifdef H3LIB_USE_COMPRESSION
-    void *decompressed_value;
-    uint32_t decompressed_value_size;
+    unsigned char header = REDIS_VALUE_ZSTD;
+    KV_Value data = NULL, buffer = NULL;
+    size_t dataSize = 0;
+
+    // Unless the whole value is wanted get just the range, which is all it takes if the value is raw
+    if (offset || *value) {
+        if ((status = GetRange(storeHandle, key, offset, *value? offset + (off_t)*size - 1 : -1, &header, &reply)) != KV_SUCCESS)
+            return status;
+
+        status = KV_FAILURE;
+        if (header == REDIS_VALUE_RAW) {
+            data = (KV_Value)reply->str;
+            dataSize = reply->len;
+        } else {
+            freeReplyObject(reply);
+            reply = NULL;
+        }
+    }
+
+    // Otherwise get the whole value and skip to the offset
+    if (!data && (reply = Command(storeHandle, key, "GET %s", key))) {
+        if (reply->type == REDIS_REPLY_NIL) {
+            status = KV_KEY_NOT_EXIST;
+        } else if (reply->type == REDIS_REPLY_STRING && Decode(reply->str, reply->len, &data, &dataSize, &buffer) == KV_SUCCESS) {
+            data += min((size_t)offset, dataSize);
+            dataSize -= min((size_t)offset, dataSize);
+        }
+    }
+
+    if (data) {
+        if (*value == NULL) {
+            // A value decompressed whole is handed over as is
+            if (data == buffer) {
+                *value = buffer;
+                buffer = NULL;
+            } else {
+                *value = malloc(dataSize);
+            }
+            *size = dataSize;
+        }
 
-    reply = redisCommand(storeHandle->ctx, "GET %s", key);
+        if (*value) {
+            *size = min(dataSize, *size);
+            if (*value != data)
+                memcpy(*value, data, *size);
+            status = KV_SUCCESS;
+        }
+    }
+    free(buffer);
+    freeReplyObject(reply);
 #else
 	if(offset)
-		reply = redisCommand(storeHandle->ctx, "GETRANGE %s %d %d", key, offset, offset + *size);
+		reply = Command(storeHandle, key, "GETRANGE %s %d %d", key, offset, offset + *size);
 	else
-		reply = redisCommand(storeHandle->ctx, "GET %s", key);
-#endif
+		reply = Command(storeHandle, key, "GET %s", key);
 
 	if(reply){
 		switch(reply->type){
@@ -230,34 +746,6 @@ KV_Status KV_Redis_Read(KV_Handle handle, KV_Key key, off_t offset, KV_Value* va
 				break;
 
 			case REDIS_REPLY_STRING:
-#ifdef H3LIB_USE_COMPRESSION
-                // Get decompressed value.
-                if (decompress_value(reply->str, reply->len, &decompressed_value, &decompressed_value_size) == KV_SUCCESS &&
-                    decompressed_value_size >= offset) {
-                    if (*value == NULL) {
-                        *size = decompressed_value_size - offset;
-                    } else {
-                        *size = min(decompressed_value_size - offset, *size);
-                    }
-
-                    if (*value == NULL && offset == 0) {
-                        // No value malloced and no offset. Return decompressed value.
-                        *value = decompressed_value;
-                        status = KV_SUCCESS;
-                    } else {
-                        if (*value == NULL && offset != 0) {
-                            // We need to malloc a smaller value since there is an offset.
-                            *value = malloc(*size);
-                        }
-                        if (*value != NULL) {
-                            // Copy decompressed value in return value.
-                            memcpy(*value, ((char *)decompressed_value) + offset, *size);
-                            free(decompressed_value);
-                            status = KV_SUCCESS;
-                        }
-                    }
-                }
-#else
 				if(*value == NULL){
 					*value = malloc(reply->len);
 					*size = reply->len;
@@ -269,28 +757,28 @@ KV_Status KV_Redis_Read(KV_Handle handle, KV_Key key, off_t offset, KV_Value* va
 					status = KV_SUCCESS;
 				}
 				break;
-#endif
 		}
 		freeReplyObject(reply);
 	}
+#endif
 
     return status;
 }
 
-KV_Status KV_Redis_Create(KV_Handle handle, KV_Key key, KV_Value value, size_t size){
+KV_Status KV_Redis_Create(KV_Handle handle, KV_Key key, KV_Value value, size_t size, const char* bucket){
 	KV_Redis_Handle* storeHandle = (KV_Redis_Handle*) handle;
 	KV_Status status = KV_FAILURE;
 	redisReply* reply = NULL;
 
 #ifdef H3LIB_USE_COMPRESSION
-    void *compressed_value;
-    uint32_t compressed_value_size;
-    if (compress_value(value, size, &compressed_value, &compressed_value_size) == KV_FAILURE)
-        return KV_FAILURE;
-    reply = redisCommand(storeHandle->ctx, "SET %s %b NX", key, compressed_value, compressed_value_size);
-    free(compressed_value);
+    KV_Value data;
+    size_t dataSize;
+    unsigned char header = Encode(storeHandle, key, value, size, bucket, &data, &dataSize);
+    reply = IndexedCommand(storeHandle, key, "ZADD", "SET %s %b%b NX", key, &header, (size_t)1, data, dataSize);
+    if (data != value)
+        free(data);
 #else
-	reply = redisCommand(storeHandle->ctx, "SET %s %b NX", key, value, size);
+	reply = IndexedCommand(storeHandle, key, "ZADD", "SET %s %b NX", key, value, size);
 #endif
 
 	if(reply){
@@ -309,54 +797,51 @@ KV_Status KV_Redis_Create(KV_Handle handle, KV_Key key, KV_Value value, size_t s
 	return status;
 }
 
-KV_Status KV_Redis_Update(KV_Handle handle, KV_Key key, KV_Value value, off_t offset, size_t size) {
+KV_Status KV_Redis_Write(KV_Handle handle, KV_Key key, KV_Value value, size_t size, const char* bucket);
+
+KV_Status KV_Redis_Update(KV_Handle handle, KV_Key key, KV_Value value, off_t offset, size_t size, const char* bucket) {
     KV_Redis_Handle* storeHandle = (KV_Redis_Handle*) handle;
     KV_Status status = KV_FAILURE;
     redisReply* reply;
 
 #ifdef H3LIB_USE_COMPRESSION
-    if (offset) {
-        // Read.
-        KV_Value current_value = NULL;
-        size_t current_value_size = 0;
-        if (KV_Redis_Read(handle, key, 0, &current_value, &current_value_size) == KV_FAILURE)
+    // Raw values are patched in place, while compressed ones are rewritten whole, and missing ones written as new
+    if (!(reply = Command(storeHandle, key, "GETRANGE %s 0 0", key)))
+        return KV_FAILURE;
+    int exists = reply->type == REDIS_REPLY_STRING && reply->len;
+    unsigned char header = exists? reply->str[0] : REDIS_VALUE_RAW;
+    freeReplyObject(reply);
+
+    if (exists && header == REDIS_VALUE_RAW) {
+        reply = IndexedCommand(storeHandle, key, "ZADD", "SETRANGE %s %lld %b", key, (long long)offset + 1, value, size);
+    } else if (!exists && !offset) {
+        return KV_Redis_Write(handle, key, value, size, bucket);
+    } else {
+        KV_Value current = NULL;
+        size_t currentSize = 0;
+        if (exists && KV_Redis_Read(handle, key, 0, &current, &currentSize) != KV_SUCCESS)
             return KV_FAILURE;
 
-        // Modify.
-        if (offset + size > current_value_size) {
-            current_value = ReAllocFreeOnFail(current_value, offset + size);
-            if (current_value == NULL)
+        if (offset + size > currentSize) {
+            if (!(current = ReAllocFreeOnFail(current, offset + size)))
                 return KV_FAILURE;
-            current_value_size = offset + size;
+            if (offset > currentSize)
+                memset(current + currentSize, 0, offset - currentSize);
+            currentSize = offset + size;
         }
-        memcpy(current_value + offset, value, size);
+        memcpy(current + offset, value, size);
 
-        // Write.
-        void *compressed_value;
-        uint32_t compressed_value_size;
-        if (compress_value(current_value, current_value_size, &compressed_value, &compressed_value_size) == KV_FAILURE)
-            return KV_FAILURE;
-        reply = redisCommand(storeHandle->ctx, "SET %s %b", key, compressed_value, compressed_value_size);
-        free(compressed_value);
-        free(current_value);
-    } else {
-        void *compressed_value;
-        uint32_t compressed_value_size;
-        if (compress_value(value, size, &compressed_value, &compressed_value_size) == KV_FAILURE)
-            return KV_FAILURE;
-        reply = redisCommand(storeHandle->ctx, "SET %s %b", key, compressed_value, compressed_value_size);
-        free(compressed_value);
+        status = KV_Redis_Write(handle, key, current, currentSize, bucket);
+        free(current);
+        return status;
     }
 #else
-    if(offset)
-        reply = redisCommand(storeHandle->ctx, "SETRANGE %s %d %b", key, offset, value, size);
-    else
-        reply = redisCommand(storeHandle->ctx, "SET %s %b", key, value, size);
+    // Even at offset 0, as the rest of the value is kept
+    reply = IndexedCommand(storeHandle, key, "ZADD", "SETRANGE %s %lld %b", key, (long long)offset, value, size);
 #endif
 
     if(reply){
         switch(reply->type){
-            case REDIS_REPLY_STATUS:    // SET
             case REDIS_REPLY_INTEGER:     // SETRANGE
                 status = KV_SUCCESS;
                 break;
@@ -367,20 +852,20 @@ KV_Status KV_Redis_Update(KV_Handle handle, KV_Key key, KV_Value value, off_t of
     return status;
 }
 
-KV_Status KV_Redis_Write(KV_Handle handle, KV_Key key, KV_Value value, size_t size) {
+KV_Status KV_Redis_Write(KV_Handle handle, KV_Key key, KV_Value value, size_t size, const char* bucket) {
 	KV_Redis_Handle* storeHandle = (KV_Redis_Handle*) handle;
 	KV_Status status = KV_FAILURE;
 	redisReply* reply = NULL;
 
 #ifdef H3LIB_USE_COMPRESSION
-    void *compressed_value;
-    uint32_t compressed_value_size;
-    if (compress_value(value, size, &compressed_value, &compressed_value_size) == KV_FAILURE)
-        return KV_FAILURE;
-    reply = redisCommand(storeHandle->ctx, "SET %s %b", key, compressed_value, compressed_value_size);
-    free(compressed_value);
+    KV_Value data;
+    size_t dataSize;
+    unsigned char header = Encode(storeHandle, key, value, size, bucket, &data, &dataSize);
+    reply = IndexedCommand(storeHandle, key, "ZADD", "SET %s %b%b", key, &header, (size_t)1, data, dataSize);
+    if (data != value)
+        free(data);
 #else
-	reply = redisCommand(storeHandle->ctx, "SET %s %b", key, value, size);
+	reply = IndexedCommand(storeHandle, key, "ZADD", "SET %s %b", key, value, size);
 #endif
 
     if(reply){
@@ -401,9 +886,9 @@ KV_Status KV_Redis_Copy(KV_Handle handle, KV_Key src_key, KV_Key dest_key) {
     redisReply *setReply = NULL, *getReply = NULL;
 
     // NOTE: Command RESTORE does not work
-    if((getReply = redisCommand(storeHandle->ctx, "GET %s", src_key))){
+    if((getReply = Command(storeHandle, src_key, "GET %s", src_key))){
     	if(getReply->type == REDIS_REPLY_STRING){
-    		if((setReply = redisCommand(storeHandle->ctx, "SET %s %b", dest_key, getReply->str, getReply->len))){
+    		if((setReply = IndexedCommand(storeHandle, dest_key, "ZADD", "SET %s %b", dest_key, getReply->str, getReply->len))){
     			if(setReply->type == REDIS_REPLY_STATUS)
     				status = KV_SUCCESS;
 
@@ -424,7 +909,7 @@ KV_Status KV_Redis_Delete(KV_Handle handle, KV_Key key) {
     KV_Status status = KV_FAILURE;
     redisReply* reply = NULL;
 
-    if((reply = redisCommand(storeHandle->ctx, "DEL %s", key))){
+    if((reply = IndexedCommand(storeHandle, key, "ZREM", "DEL %s", key))){
 
     	if(reply->integer == 0)
     		status = KV_KEY_NOT_EXIST;
@@ -472,14 +957,22 @@ KV_Status KV_Redis_Sync(KV_Handle handle) {
 }
 
 
+static KV_Status KV_Redis_Metadata_Write(KV_Handle handle, KV_Key key, KV_Value value, size_t size) {
+    return KV_Redis_Write(handle, key, value, size, NULL);
+}
+
+static KV_Status KV_Redis_Metadata_Create(KV_Handle handle, KV_Key key, KV_Value value, size_t size) {
+    return KV_Redis_Create(handle, key, value, size, NULL);
+}
+
 KV_Operations operationsRedis = {
     .init = KV_Redis_Init,
     .free = KV_Redis_Free,
 	.validate_key = NULL,
 
     .metadata_read = KV_Redis_Read,
-    .metadata_write = KV_Redis_Write,
-    .metadata_create = KV_Redis_Create,
+    .metadata_write = KV_Redis_Metadata_Write,
+    .metadata_create = KV_Redis_Metadata_Create,
     .metadata_delete = KV_Redis_Delete,
     .metadata_move = KV_Redis_Move,
     .metadata_exists = KV_Redis_Exists,
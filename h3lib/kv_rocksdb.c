@@ -25,38 +25,212 @@
 
 #define ROCKSDB_KEY_BATCH_SIZE 4096
 
+#define ROCKSDB_METADATA_FAMILY 0
+#define ROCKSDB_DATA_FAMILY 1
+#define ROCKSDB_FAMILIES 2
+
 typedef struct {
     char* path;
     rocksdb_t* db;
     rocksdb_options_t* options;
     rocksdb_readoptions_t* readoptions;
     rocksdb_writeoptions_t* writeoptions;
+    rocksdb_column_family_handle_t* family[ROCKSDB_FAMILIES];   // The data family is NULL if parts are kept along with the metadata
 } KV_RocksDB_Handle;
 
-KV_Handle KV_RocksDb_Init(const char* storageUri) {
-    struct parsed_url *url = parse_url(storageUri);
-    if (url == NULL) {
-        LogActivity(H3_ERROR_MSG, "ERROR: Unrecognized storage URI\n");
+// The metadata go to the default family, so that databases created before the families were introduced can still be opened
+static const char* const FamilyName[ROCKSDB_FAMILIES] = {"default", "data"};
+static const char* const FamilyPrefix[ROCKSDB_FAMILIES] = {"metadata_", "data_"};
+static const char* const CompressionName[] = {"none", "snappy", "zlib", "bz2", "lz4", "lz4hc", "xpress", "zstd", NULL};
+
+static inline rocksdb_column_family_handle_t* Family(KV_RocksDB_Handle* handle, KV_Key key) {
+    return handle->family[ROCKSDB_DATA_FAMILY] && IsPartKey(key)? handle->family[ROCKSDB_DATA_FAMILY] : handle->family[ROCKSDB_METADATA_FAMILY];
+}
+
+/*
+ * Updates are stored as merge operands, each holding a patch to apply on the value:
+ * the offset where the data goes (in host byte order), followed by the data. The
+ * value is padded with 0x00 if the offset is past its end.
+ */
+typedef struct {
+    uint64_t offset;
+    char data[];
+} KV_RocksDB_Patch;
+
+static void ApplyPatch(char* buffer, size_t* bufferSize, const char* operand, size_t operandSize) {
+    const KV_RocksDB_Patch* patch = (const KV_RocksDB_Patch*)operand;
+    size_t size = operandSize - sizeof(KV_RocksDB_Patch);
+
+    if(patch->offset > *bufferSize)
+        memset(buffer + *bufferSize, 0, patch->offset - *bufferSize);
+
+    memcpy(buffer + patch->offset, patch->data, size);
+    *bufferSize = max(*bufferSize, patch->offset + size);
+}
+
+static char* PatchFullMerge(void* state, const char* key, size_t keySize,
+                            const char* existingValue, size_t existingValueSize,
+                            const char* const* operands, const size_t* operandSizes, int nOperands,
+                            unsigned char* success, size_t* newValueSize) {
+    size_t bufferSize = existingValue?existingValueSize:0;
+    int i;
+
+    // Find out the final size, so that we allocate once
+    size_t valueSize = bufferSize;
+    for(i=0; i<nOperands; i++)
+        valueSize = max(valueSize, ((const KV_RocksDB_Patch*)operands[i])->offset + operandSizes[i] - sizeof(KV_RocksDB_Patch));
+
+    char* buffer = malloc(max(valueSize, 1));
+    if(!buffer){
+        *success = 0;
         return NULL;
     }
 
-    char *path;
-    if (url->path != NULL) {
-        path = malloc(strlen(url->path) + 2);
-        path[0] = '/';
-        strcpy(&(path[1]), url->path);
-        LogActivity(H3_INFO_MSG, "INFO: Path in URI: %s\n", path);
-    } else {
-        path = strdup("/tmp/h3/rocksdb");
-        LogActivity(H3_INFO_MSG, "WARNING: No path in URI. Using default: /tmp/h3\n");
+    if(bufferSize)
+        memcpy(buffer, existingValue, bufferSize);
+
+    for(i=0; i<nOperands; i++)
+        ApplyPatch(buffer, &bufferSize, operands[i], operandSizes[i]);
+
+    *success = 1;
+    *newValueSize = bufferSize;
+    return buffer;
+}
+
+static char* PatchPartialMerge(void* state, const char* key, size_t keySize,
+                               const char* const* operands, const size_t* operandSizes, int nOperands,
+                               unsigned char* success, size_t* newValueSize) {
+    const KV_RocksDB_Patch* patch = (const KV_RocksDB_Patch*)operands[0];
+    uint64_t start = patch->offset, end = patch->offset + operandSizes[0] - sizeof(KV_RocksDB_Patch);
+    int i;
+
+    // The patches can be combined only if there are no gaps between them (e.g. sequential writes),
+    // as the gaps are to be filled with whatever the value holds there.
+    for(i=1; i<nOperands; i++){
+        patch = (const KV_RocksDB_Patch*)operands[i];
+        if(patch->offset > end || patch->offset + operandSizes[i] - sizeof(KV_RocksDB_Patch) < start){
+            *success = 0;
+            return NULL;
+        }
+        start = min(start, patch->offset);
+        end = max(end, patch->offset + operandSizes[i] - sizeof(KV_RocksDB_Patch));
     }
-    parsed_url_free(url);
 
-    // Prepare options.
+    KV_RocksDB_Patch* combined = malloc(sizeof(KV_RocksDB_Patch) + (end - start));
+    if(!combined){
+        *success = 0;
+        return NULL;
+    }
+
+    size_t combinedSize = 0;
+    for(i=0; i<nOperands; i++){
+        patch = (const KV_RocksDB_Patch*)operands[i];
+        size_t size = operandSizes[i] - sizeof(KV_RocksDB_Patch);
+        memcpy(combined->data + (patch->offset - start), patch->data, size);
+        combinedSize = max(combinedSize, patch->offset - start + size);
+    }
+    combined->offset = start;
+
+    *success = 1;
+    *newValueSize = sizeof(KV_RocksDB_Patch) + combinedSize;
+    return (char*)combined;
+}
+
+static void PatchDeleteValue(void* state, const char* value, size_t valueSize) {
+    free((void*)value);
+}
+
+static void PatchDestroy(void* state) {}
+
+static const char* PatchName(void* state) {
+    return "H3Patch";
+}
+
+static int IsOptionSet(const char* value) {
+    return value && strcmp(value, "0") && strcmp(value, "false") && strcmp(value, "off");
+}
+
+// Get the value of a family's option from the URI query, e.g. "data_compression", or else of the option for all families, e.g. "compression"
+static char* GetFamilyOption(const char* query, int family, const char* name) {
+    char familyOption[64];
+    snprintf(familyOption, sizeof(familyOption), "%s%s", FamilyPrefix[family], name);
+
+    char* value = GetQueryOption(query, familyOption);
+    return value? value : GetQueryOption(query, name);
+}
+
+static rocksdb_mergeoperator_t* CreatePatchOperator() {
+    return rocksdb_mergeoperator_create(NULL, PatchDestroy, PatchFullMerge, PatchPartialMerge, PatchDeleteValue, PatchName);
+}
+
+/*
+ * Apply the tuning options of the URI query on a family. The defaults are those H3 always used, except for smaller
+ * blocks for the metadata when they are kept apart from the (1MB) parts.
+ */
+static int SetFamilyOptions(rocksdb_options_t* options, const char* query, int family, size_t blockSize, rocksdb_cache_t* cache) {
+    char* value;
+    char familyOption[64];
+    int bloomBits = 10, compression = rocksdb_no_compression;
+    size_t writeBufferSize = 512 * __1MByte;
+
+    if((value = GetFamilyOption(query, family, "block_size"))){
+        blockSize = ParseSize(value);
+        free(value);
+    }
+
+    if((value = GetFamilyOption(query, family, "bloom_bits"))){
+        bloomBits = atoi(value);
+        free(value);
+    }
+
+    if((value = GetFamilyOption(query, family, "write_buffer"))){
+        writeBufferSize = ParseSize(value);
+        free(value);
+    }
+
+    if((value = GetFamilyOption(query, family, "compression"))){
+        for(compression = 0; CompressionName[compression] && strcmp(CompressionName[compression], value); compression++);
+        if(!CompressionName[compression]){
+            LogActivity(H3_ERROR_MSG, "RocksDB - Unknown compression %s\n", value);
+            free(value);
+            return 0;
+        }
+        free(value);
+    }
+
+    if(!blockSize || !writeBufferSize){
+        LogActivity(H3_ERROR_MSG, "RocksDB - Malformed size\n");
+        return 0;
+    }
+
+    rocksdb_block_based_table_options_t* tableOptions = rocksdb_block_based_options_create();
+    rocksdb_block_based_options_set_block_size(tableOptions, blockSize);
+    if(bloomBits > 0)
+        rocksdb_block_based_options_set_filter_policy(tableOptions, rocksdb_filterpolicy_create_bloom(bloomBits));
+
+    // A family may have a cache of its own, otherwise it shares the one for all
+    snprintf(familyOption, sizeof(familyOption), "%sblock_cache", FamilyPrefix[family]);
+    if((value = GetQueryOption(query, familyOption))){
+        rocksdb_cache_t* familyCache = rocksdb_cache_create_lru(ParseSize(value));
+        rocksdb_block_based_options_set_block_cache(tableOptions, familyCache);
+        rocksdb_cache_destroy(familyCache);
+        free(value);
+    }
+    else
+        rocksdb_block_based_options_set_block_cache(tableOptions, cache);
+
+    rocksdb_options_set_block_based_table_factory(options, tableOptions);
+    rocksdb_block_based_options_destroy(tableOptions);
+
+    rocksdb_options_set_compression(options, compression);
+    rocksdb_options_set_write_buffer_size(options, writeBufferSize);
+    return 1;
+}
+
+static rocksdb_options_t* CreateOptions() {
     rocksdb_options_t *options = rocksdb_options_create();
     rocksdb_options_set_use_fsync(options, 0);
 
-
     // Parallelism options
     int cpus = (int)sysconf(_SC_NPROCESSORS_ONLN); // Get # of online cores
     rocksdb_options_increase_parallelism(options, cpus);
@@ -66,65 +240,204 @@ KV_Handle KV_RocksDb_Init(const char* storageUri) {
 
     // General options
     long files = sysconf(_SC_OPEN_MAX); // Get the maximum number of files that a process can have open at any time.
-    rocksdb_block_based_table_options_t* tableOptions = rocksdb_block_based_options_create();
-    rocksdb_filterpolicy_t* filterPolicy = rocksdb_filterpolicy_create_bloom(10);
-    rocksdb_block_based_options_set_filter_policy(tableOptions, filterPolicy);
-    rocksdb_block_based_options_set_block_size(tableOptions, 1024 * 1024); // 1MB
     rocksdb_options_set_max_open_files(options, (int) (files * 0.9));
 
-    // Cache options
-    rocksdb_cache_t* rocksCache = rocksdb_cache_create_lru(2 * 1024 * 1024 * 1024LU); // 2GB
-    rocksdb_block_based_options_set_block_cache(tableOptions, rocksCache);
-
-    rocksdb_options_set_block_based_table_factory(options, tableOptions);
     // Flushing options
-    rocksdb_options_set_write_buffer_size(options, 512 * __1MByte );
     rocksdb_options_set_max_write_buffer_number(options, 5);
     rocksdb_options_set_min_write_buffer_number_to_merge(options, 2);
     //rocksdb_options_optimize_level_style_compaction(options, 2 * __1GByte); // Overrides options write_buffer_size & max_write_buffer_number
 
-
     // Delete logs ASAP rather than archiving them
     rocksdb_options_set_WAL_ttl_seconds(options, 0);
 	rocksdb_options_set_WAL_size_limit_MB(options, 0);
 
-    rocksdb_readoptions_t* readoptions = rocksdb_readoptions_create();
-    rocksdb_readoptions_set_verify_checksums(readoptions, 0); // Default is 0x00
+    rocksdb_options_set_compaction_style(options, rocksdb_level_compaction); //Default is 'level'
+    rocksdb_options_set_use_direct_io_for_flush_and_compaction(options, 1);
+    return options;
+}
+
+/*
+ * Besides the path, the storage URI may carry tuning options in its query, e.g. "rocksdb:///tmp/h3?block_cache=8G&compression=lz4":
+ *  - block_cache           The size of the block cache shared by the families (default 2G)
+ *  - block_size            The size of the blocks (default 1M, and 16K for the metadata family)
+ *  - bloom_bits            The bits per key of the bloom filters (default 10), 0 for none
+ *  - compression           One of none (default), snappy, zlib, bz2, lz4, lz4hc, xpress or zstd
+ *  - write_buffer          The size of the memtables (default 512M)
+ *  - wal                   Write to the Write-Ahead-Log (default off)
+ *  - rate_limit            The bytes per second allowed for flushes and compactions (default unlimited)
+ *  - max_background_jobs   The number of threads for flushes and compactions (default one per core)
+ *  - options_path          A directory with a RocksDB OPTIONS file, like the ones RocksDB keeps in databases, to take
+ *                          the options from rather than the options above (except for block_cache, wal, rate_limit
+ *                          and max_background_jobs)
+ *
+ * Parts are kept in a column family of their own, "data", apart from the metadata, so that metadata scans and lookups
+ * don't go through 1MB data blocks. Options for a single family are prefixed with its name, e.g. "data_compression=lz4"
+ * or "metadata_block_cache=512M". Databases created without the data family keep the parts along with the metadata.
+ */
+KV_Handle KV_RocksDb_Init(const char* storageUri) {
+    struct parsed_url *url = parse_url(storageUri);
+    if (url == NULL) {
+        LogActivity(H3_ERROR_MSG, "ERROR: Unrecognized storage URI\n");
+        return NULL;
+    }
+
+    char *path;
+    if (url->path != NULL) {
+        path = malloc(strlen(url->path) + 2);
+        path[0] = '/';
+        strcpy(&(path[1]), url->path);
+        LogActivity(H3_INFO_MSG, "INFO: Path in URI: %s\n", path);
+    } else {
+        path = strdup("/tmp/h3/rocksdb");
+        LogActivity(H3_INFO_MSG, "WARNING: No path in URI. Using default: /tmp/h3\n");
+    }
+
+    const char* query = url->query;
+    char* value;
+    char* err = NULL;
+    int i, nFamilies = ROCKSDB_FAMILIES;
+    rocksdb_options_t* familyOptions[ROCKSDB_FAMILIES] = {NULL, NULL};
+    rocksdb_column_family_handle_t* familyHandles[ROCKSDB_FAMILIES] = {NULL, NULL};
+    rocksdb_t* db = NULL;
+
+    size_t cacheSize = 2 * 1024 * 1024 * 1024LU; // 2GB
+    if((value = GetQueryOption(query, "block_cache"))){
+        cacheSize = ParseSize(value);
+        free(value);
+    }
+    rocksdb_cache_t* cache = rocksdb_cache_create_lru(cacheSize);
+
+    // Existing databases without the data family keep it that way
+    rocksdb_options_t* options = rocksdb_options_create();
+    size_t nExisting;
+    char** existing = rocksdb_list_column_families(options, path, &nExisting, &err);
+    rocksdb_options_destroy(options);
+    if(err){
+        free(err);  // A new database
+        err = NULL;
+    }
+    else {
+        for(i=0; i<nExisting && strcmp(existing[i], FamilyName[ROCKSDB_DATA_FAMILY]); i++);
+        if(i == nExisting)
+            nFamilies = 1;
+        rocksdb_list_column_families_destroy(existing, nExisting);
+    }
 
+    // Take the options from an OPTIONS file...
+    if((value = GetQueryOption(query, "options_path"))){
+        rocksdb_env_t* env = rocksdb_create_default_env();
+        rocksdb_options_t* loadedOptions;
+        rocksdb_options_t** loadedFamilyOptions;
+        char** loadedFamilies;
+        size_t nLoaded;
+
+        rocksdb_load_latest_options(value, env, 0, cache, &loadedOptions, &nLoaded, &loadedFamilies, &loadedFamilyOptions, &err);
+        rocksdb_env_destroy(env);
+        free(value);
+        if(err){
+            LogActivity(H3_ERROR_MSG, "RocksDB - %s\n",err);
+            free(err);
+            options = NULL;
+        }
+        else {
+            options = rocksdb_options_create_copy(loadedOptions);
+            for(i=0; i<nFamilies; i++){
+                size_t j;
+                for(j=0; j<nLoaded && strcmp(loadedFamilies[j], FamilyName[i]); j++);
+                familyOptions[i] = rocksdb_options_create_copy(j<nLoaded? loadedFamilyOptions[j] : loadedOptions);
+            }
+            rocksdb_load_latest_options_destroy(loadedOptions, loadedFamilies, loadedFamilyOptions, nLoaded);
+        }
+    }
+
+    // ...or from the URI
+    else {
+        options = CreateOptions();
+        for(i=0; i<nFamilies; i++){
+            familyOptions[i] = rocksdb_options_create_copy(options);
+            if(!SetFamilyOptions(familyOptions[i], query, i, i == ROCKSDB_DATA_FAMILY || nFamilies == 1? __1MByte : 16 * __1KByte, cache)){
+                rocksdb_options_destroy(options);
+                options = NULL;
+                break;
+            }
+        }
+    }
 
     rocksdb_writeoptions_t* writeoptions = rocksdb_writeoptions_create();
     rocksdb_writeoptions_set_sync(writeoptions, 0);	   // Default is 0x00
-    rocksdb_writeoptions_disable_WAL(writeoptions, 1); // Bypass Write-Ahead-Log
+    value = GetQueryOption(query, "wal");
+    rocksdb_writeoptions_disable_WAL(writeoptions, !IsOptionSet(value)); // Bypass Write-Ahead-Log by default
+    free(value);
 
     // Open database.
-    char* err = NULL;
-    rocksdb_options_set_compression(options, rocksdb_no_compression);
-    rocksdb_options_set_compaction_style(options, rocksdb_level_compaction); //Default is 'level'
-    rocksdb_options_set_use_direct_io_for_flush_and_compaction(options, 1);
-    rocksdb_options_set_create_if_missing(options, 1); // create the DB if it's not already present
-    rocksdb_t *db = rocksdb_open(options, path, &err);
-    if (err){
-    	LogActivity(H3_ERROR_MSG, "RocksDB - %s\n",err);
-    	free(err);
+    if(options){
+        if((value = GetQueryOption(query, "rate_limit"))){
+            rocksdb_ratelimiter_t* rateLimiter = rocksdb_ratelimiter_create(ParseSize(value), 100 * 1000, 10);
+            rocksdb_options_set_ratelimiter(options, rateLimiter);
+            rocksdb_ratelimiter_destroy(rateLimiter);
+            free(value);
+        }
+
+        if((value = GetQueryOption(query, "max_background_jobs"))){
+            rocksdb_options_set_max_background_flushes(options, -1);
+            rocksdb_options_set_max_background_compactions(options, -1);
+            rocksdb_options_set_max_background_jobs(options, atoi(value));
+            free(value);
+        }
+
+        rocksdb_options_set_create_if_missing(options, 1); // create the DB if it's not already present
+        rocksdb_options_set_create_missing_column_families(options, 1);
+        for(i=0; i<nFamilies; i++)
+            rocksdb_options_set_merge_operator(familyOptions[i], CreatePatchOperator()); // Owned by the options
+
+        db = rocksdb_open_column_families(options, path, nFamilies, FamilyName, (const rocksdb_options_t* const*)familyOptions, familyHandles, &err);
+        if (err){
+            LogActivity(H3_ERROR_MSG, "RocksDB - %s\n",err);
+            free(err);
+            rocksdb_options_destroy(options);
+            db = NULL;
+        }
+    }
+
+    for(i=0; i<ROCKSDB_FAMILIES; i++){
+        if(familyOptions[i])
+            rocksdb_options_destroy(familyOptions[i]);
+    }
+    rocksdb_cache_destroy(cache);
+    parsed_url_free(url);
+
+    if(!db){
+        rocksdb_writeoptions_destroy(writeoptions);
+        free(path);
         return NULL;
     }
 
+    rocksdb_readoptions_t* readoptions = rocksdb_readoptions_create();
+    rocksdb_readoptions_set_verify_checksums(readoptions, 0); // Default is 0x00
+
     KV_RocksDB_Handle* handle = malloc(sizeof(KV_RocksDB_Handle));
     handle->path = path;
     handle->db = db;
+    handle->options = options;
     handle->readoptions = readoptions;
     handle->writeoptions = writeoptions;
-//    g_mutex_init(&handle->lock);
+    handle->family[ROCKSDB_METADATA_FAMILY] = familyHandles[ROCKSDB_METADATA_FAMILY];
+    handle->family[ROCKSDB_DATA_FAMILY] = familyHandles[ROCKSDB_DATA_FAMILY];
     return (KV_Handle)handle;
 }
 
 void KV_RocksDb_Free(KV_Handle handle) {
     KV_RocksDB_Handle* storeHandle = (KV_RocksDB_Handle*)handle;
+    int i;
 
     rocksdb_writeoptions_destroy(storeHandle->writeoptions);
     rocksdb_readoptions_destroy(storeHandle->readoptions);
-//    rocksdb_options_destroy(storeHandle->options);			// TODO <-- sometimes we crash here !!!
+    for(i=0; i<ROCKSDB_FAMILIES; i++){
+        if(storeHandle->family[i])
+            rocksdb_column_family_handle_destroy(storeHandle->family[i]);
+    }
     rocksdb_close(storeHandle->db);
+    rocksdb_options_destroy(storeHandle->options);
 
     free(storeHandle->path);
     free(storeHandle);
@@ -138,7 +451,7 @@ KV_Status KV_RocksDb_List(KV_Handle handle, KV_Key prefix, uint8_t nTrim, KV_Key
     uint32_t nRequiredKeys = *nKeys>0?*nKeys:UINT32_MAX;
     uint32_t nMatchingKeys = 0;
 
-    rocksdb_iterator_t* iter = rocksdb_create_iterator(storeHandle->db, storeHandle->readoptions);
+    rocksdb_iterator_t* iter = rocksdb_create_iterator_cf(storeHandle->db, storeHandle->readoptions, Family(storeHandle, prefix));
     if(!iter){
     	return KV_FAILURE;
     }
@@ -150,8 +463,8 @@ KV_Status KV_RocksDb_List(KV_Handle handle, KV_Key prefix, uint8_t nTrim, KV_Key
     	size_t keySize;
     	const char* key = rocksdb_iter_key(iter, &keySize);
 
-    	// It seems the prefix doesn't work the way we expect it, that is it returns
-    	// all the entries rather than those matching the prefix.
+    	// Seeking doesn't stop at the end of the prefix, but the keys are sorted, so the
+    	// first one not matching it is past all those that do.
     	if(strncmp(key, prefix, prefixLen) == 0){
 
 			if(offset)
@@ -177,6 +490,8 @@ KV_Status KV_RocksDb_List(KV_Handle handle, KV_Key prefix, uint8_t nTrim, KV_Key
 			else
 				status = KV_CONTINUE;
     	}
+    	else
+    		break;
 
     	rocksdb_iter_next(iter);
     }
@@ -196,127 +511,133 @@ KV_Status KV_RocksDb_List(KV_Handle handle, KV_Key prefix, uint8_t nTrim, KV_Key
     return status;
 }
 
+static void CopySegment(const char* buffer, size_t bufferSize, off_t offset, KV_Value value, size_t* size) {
+	if(offset > bufferSize){
+		*size = 0;
+		return;
+	}
+
+	*size = min(bufferSize - offset, *size);
+	memcpy(value, buffer + offset, *size);
+}
+
 KV_Status KV_RocksDb_Read(KV_Handle handle, KV_Key key, off_t offset, KV_Value* value, size_t* size) {
-	KV_Status status = KV_FAILURE;
-	char *segment, *error = NULL;
+	KV_Status status = KV_SUCCESS;
+	char* error = NULL;
 	KV_RocksDB_Handle* storeHandle = (KV_RocksDB_Handle*) handle;
 
-	size_t bufferSize, segmentSize;
-	char* buffer = rocksdb_get(storeHandle->db, storeHandle->readoptions, key, strlen(key)+1, &bufferSize, &error);
-
+	// The value is pinned in the block cache (or memtable), so that only the requested segment is copied
+	rocksdb_pinnableslice_t* slice = rocksdb_get_pinned_cf(storeHandle->db, storeHandle->readoptions, Family(storeHandle, key), key, strlen(key)+1, &error);
 	if(error){
 		LogActivity(H3_ERROR_MSG, "RocksDB - %s\n",error);
 		free(error);
 		return KV_FAILURE;
 	}
 
-	if(!buffer)
+	if(!slice)
 		return KV_KEY_NOT_EXIST;
 
-	if(offset > bufferSize){
-		free(buffer);
-		*size = 0;
-		return KV_SUCCESS;
-	}
+	size_t bufferSize;
+	const char* buffer = rocksdb_pinnableslice_value(slice, &bufferSize);
 
 	if(*value == NULL){
-		if(!offset){
-			*value = (KV_Value)buffer;
-			*size = bufferSize;
-			return KV_SUCCESS;
-		}
-
-		segmentSize = bufferSize - offset;
-		if((segment = malloc(segmentSize))){
-			memcpy(segment, buffer + offset, segmentSize);
-			*value = (KV_Value)segment;
+		size_t segmentSize = offset > bufferSize? 0 : bufferSize - offset;
+		if((*value = malloc(max(segmentSize, 1)))){
 			*size = segmentSize;
-			status = KV_SUCCESS;
+			CopySegment(buffer, bufferSize, offset, *value, size);
 		}
+		else
+			status = KV_FAILURE;
 	}
-	else{
-		segmentSize = min(bufferSize - offset, *size);
-		memcpy(*value, buffer + offset, segmentSize);
-		*size = segmentSize;
-		status = KV_SUCCESS;
+	else
+		CopySegment(buffer, bufferSize, offset, *value, size);
 
-	}
-
-	free(buffer);
+	rocksdb_pinnableslice_destroy(slice);
 	return status;
 }
 
-KV_Status KV_RocksDb_Update(KV_Handle handle, KV_Key key, KV_Value value, off_t offset, size_t size) {
+KV_Status KV_RocksDb_MultiRead(KV_Handle handle, KV_Key* keys, off_t* offsets, KV_Value* values, size_t* sizes, uint32_t nKeys) {
+	KV_Status status = KV_SUCCESS;
+	KV_RocksDB_Handle* storeHandle = (KV_RocksDB_Handle*) handle;
+	uint32_t i, j, k;
+
+	size_t* keySizes = malloc(nKeys * sizeof(size_t));
+	rocksdb_pinnableslice_t** slices = malloc(nKeys * sizeof(rocksdb_pinnableslice_t*));
+	char** errors = malloc(nKeys * sizeof(char*));
+	if(!keySizes || !slices || !errors){
+		free(keySizes);
+		free(slices);
+		free(errors);
+		return KV_FAILURE;
+	}
 
-    // XXX Do this with a merge operation...
-	//     i.e. rocksdb_mergeoperator_create()
-	//          rocksdb_options_set_merge_operator() <-- Call it before rocksdb_open()
-	//          rocksdb_merge()
-	//          rocksdb_mergeoperator_destroy()
-	// Note: We can only have a single merge-operator, thus if we need more flavors we have to prepend the key
-	//       with the flavor, i.e. WRITE:, EXISTS, COPY:, RENAME:, etc
+	for(i=0; i<nKeys; i++)
+		keySizes[i] = strlen(keys[i])+1;
 
-    char* error = NULL;
-    KV_RocksDB_Handle* storeHandle = (KV_RocksDB_Handle *)handle;
+	// The values are pinned, as with single reads, so that only the requested segments are copied.
+	// Keys are looked up a family at a time, i.e. in a single call for the parts of an object.
+	for(i=0; i<nKeys; i=j){
+		rocksdb_column_family_handle_t* family = Family(storeHandle, keys[i]);
+		for(j=i+1; j<nKeys && Family(storeHandle, keys[j]) == family; j++);
 
-    // Retrieve previous data if any
-    size_t bufferSize;
-    char* buffer = rocksdb_get(storeHandle->db, storeHandle->readoptions, key, strlen(key)+1, &bufferSize, &error);
-	if(error){
-		LogActivity(H3_ERROR_MSG, "RocksDB - %s\n",error);
-		free(error);
-		return KV_FAILURE;
-	}
+		rocksdb_batched_multi_get_cf(storeHandle->db, storeHandle->readoptions, family, j-i, (const char* const*)&keys[i], &keySizes[i], &slices[i], &errors[i], 0);
 
-	// Brand new KV pair
-	if(!buffer){
-		if(offset){
-			if((value = realloc(value, offset + size))){
-				memmove(value + offset, value, size);
-				memset(value, 0, offset);
+		for(k=i; k<j; k++){
+			if(errors[k]){
+				LogActivity(H3_ERROR_MSG, "RocksDB - %s\n",errors[k]);
+				free(errors[k]);
+				status = KV_FAILURE;
+			}
+			else if(!slices[k]){
+				if(status == KV_SUCCESS)
+					status = KV_KEY_NOT_EXIST;
+			}
+			else{
+				if(status == KV_SUCCESS){
+					size_t bufferSize;
+					const char* buffer = rocksdb_pinnableslice_value(slices[k], &bufferSize);
+					CopySegment(buffer, bufferSize, offsets[k], values[k], &sizes[k]);
+				}
+				rocksdb_pinnableslice_destroy(slices[k]);
 			}
-			else
-				return KV_FAILURE;
 		}
-
-		rocksdb_put(storeHandle->db, storeHandle->writeoptions, key, strlen(key)+1, (char*)value, offset + size, &error);
-        if (error){
-        	LogActivity(H3_ERROR_MSG, "RocksDB - %s\n",error);
-        	free(error);
-            return KV_FAILURE;
-        }
 	}
 
-	// Patch buffer with user-data
-	else {
-		char* patchedBuffer = buffer;
-		if((offset + size) > bufferSize){
-			if( (patchedBuffer = realloc(buffer, offset + size)) ){
-			memset(patchedBuffer+bufferSize, 0, (offset + size) - bufferSize);
-			}
-			else
-				return KV_FAILURE;
-		}
+	free(keySizes);
+	free(slices);
+	free(errors);
+	return status;
+}
 
-		memcpy(patchedBuffer+offset, value, size);
+KV_Status KV_RocksDb_Update(KV_Handle handle, KV_Key key, KV_Value value, off_t offset, size_t size, const char* bucket) {
+    char* error = NULL;
+    KV_RocksDB_Handle* storeHandle = (KV_RocksDB_Handle *)handle;
 
-		rocksdb_put(storeHandle->db, storeHandle->writeoptions, key, strlen(key)+1, patchedBuffer, max((offset + size),bufferSize), &error);
-		free(patchedBuffer);
-		if (error){
-			LogActivity(H3_ERROR_MSG, "RocksDB - %s\n",error);
-			free(error);
-			return KV_FAILURE;
-		}
-	}
+    // Store a patch without reading the previous value; it is applied on reads and compactions.
+    // The header and the data are concatenated by RocksDB, so the data is copied once.
+    KV_RocksDB_Patch header = { .offset = offset };
+    const char* parts[] = { (const char*)&header, (const char*)value };
+    const size_t partSizes[] = { sizeof(KV_RocksDB_Patch), size };
+    size_t keySize = strlen(key)+1;
+
+    rocksdb_writebatch_t* batch = rocksdb_writebatch_create();
+    rocksdb_writebatch_mergev_cf(batch, Family(storeHandle, key), 1, (const char* const*)&key, &keySize, 2, parts, partSizes);
+    rocksdb_write(storeHandle->db, storeHandle->writeoptions, batch, &error);
+    rocksdb_writebatch_destroy(batch);
+    if (error){
+        LogActivity(H3_ERROR_MSG, "RocksDB - %s\n",error);
+        free(error);
+        return KV_FAILURE;
+    }
 
     return KV_SUCCESS;
 }
 
-KV_Status KV_RocksDb_Write(KV_Handle handle, KV_Key key, KV_Value value, size_t size) {
+KV_Status KV_RocksDb_Write(KV_Handle handle, KV_Key key, KV_Value value, size_t size, const char* bucket) {
     char* error = NULL;
     KV_RocksDB_Handle* storeHandle = (KV_RocksDB_Handle *)handle;
 
-    rocksdb_put(storeHandle->db, storeHandle->writeoptions, key, strlen(key)+1, (char*)value, size, &error);
+    rocksdb_put_cf(storeHandle->db, storeHandle->writeoptions, Family(storeHandle, key), key, strlen(key)+1, (char*)value, size, &error);
     if (error){
         LogActivity(H3_ERROR_MSG, "RocksDB - %s\n",error);
         free(error);
@@ -330,7 +651,7 @@ KV_Status KV_RocksDb_Delete(KV_Handle handle, KV_Key key) {
     KV_RocksDB_Handle* storeHandle = (KV_RocksDB_Handle *)handle;
 
     char* error = NULL;
-    rocksdb_delete(storeHandle->db, storeHandle->writeoptions, key, strlen(key)+1, &error);
+    rocksdb_delete_cf(storeHandle->db, storeHandle->writeoptions, Family(storeHandle, key), key, strlen(key)+1, &error);
     if (error){
     	LogActivity(H3_ERROR_MSG, "RocksDB - %s\n",error);
     	free(error);
@@ -341,23 +662,28 @@ KV_Status KV_RocksDb_Delete(KV_Handle handle, KV_Key key) {
 }
 
 KV_Status KV_RocksDb_Exists(KV_Handle handle, KV_Key key) {
-	KV_Status status;
-    KV_Value dummy = NULL;
-    size_t size = 0x00;
+	char* error = NULL;
+	KV_RocksDB_Handle* storeHandle = (KV_RocksDB_Handle*) handle;
 
-    if( (status = KV_RocksDb_Read(handle, key, 0, &dummy, &size)) == KV_SUCCESS){
-    	free(dummy);
-    	status = KV_KEY_EXIST;
-    }
+	rocksdb_pinnableslice_t* slice = rocksdb_get_pinned_cf(storeHandle->db, storeHandle->readoptions, Family(storeHandle, key), key, strlen(key)+1, &error);
+	if(error){
+		LogActivity(H3_ERROR_MSG, "RocksDB - %s\n",error);
+		free(error);
+		return KV_FAILURE;
+	}
 
-    return status;
+	if(!slice)
+		return KV_KEY_NOT_EXIST;
+
+	rocksdb_pinnableslice_destroy(slice);
+	return KV_KEY_EXIST;
 }
 
-KV_Status KV_RocksDb_Create(KV_Handle handle, KV_Key key, KV_Value value, size_t size) {
+KV_Status KV_RocksDb_Create(KV_Handle handle, KV_Key key, KV_Value value, size_t size, const char* bucket) {
 	KV_Status status;
 
 	if( (status = KV_RocksDb_Exists(handle, key)) == KV_KEY_NOT_EXIST){
-		 status = KV_RocksDb_Write(handle, key, value, size);
+		 status = KV_RocksDb_Write(handle, key, value, size, bucket);
 	}
 
 	return status;
@@ -369,7 +695,7 @@ KV_Status KV_RocksDb_Copy(KV_Handle handle, KV_Key src_key, KV_Key dest_key) {
 	KV_Status status;
 
 	if((status = KV_RocksDb_Read(handle, src_key, 0, &value, &size)) == KV_SUCCESS){
-		status = KV_RocksDb_Write(handle, dest_key, value, size);
+		status = KV_RocksDb_Write(handle, dest_key, value, size, NULL);
 	}
 
 	return status;
@@ -381,7 +707,7 @@ KV_Status KV_RocksDb_Move(KV_Handle handle, KV_Key src_key, KV_Key dest_key) {
 	KV_Status status;
 
 	if( (status = KV_RocksDb_Read(handle, src_key, 0, &value, &size)) == KV_SUCCESS &&
-		(status = KV_RocksDb_Write(handle, dest_key, value, size)) == KV_SUCCESS		){
+		(status = KV_RocksDb_Write(handle, dest_key, value, size, NULL)) == KV_SUCCESS		){
 		status = KV_RocksDb_Delete(handle, src_key);
 	}
 
@@ -392,14 +718,22 @@ KV_Status KV_RocksDb_Sync(KV_Handle handle) {
     return KV_SUCCESS;
 }
 
+static KV_Status KV_RocksDb_Metadata_Write(KV_Handle handle, KV_Key key, KV_Value value, size_t size) {
+	return KV_RocksDb_Write(handle, key, value, size, NULL);
+}
+
+static KV_Status KV_RocksDb_Metadata_Create(KV_Handle handle, KV_Key key, KV_Value value, size_t size) {
+	return KV_RocksDb_Create(handle, key, value, size, NULL);
+}
+
 KV_Operations operationsRocksDB = {
 	.init = KV_RocksDb_Init,
 	.free = KV_RocksDb_Free,
 	.validate_key = NULL,
 
 	.metadata_read = KV_RocksDb_Read,
-	.metadata_write = KV_RocksDb_Write,
-	.metadata_create = KV_RocksDb_Create,
+	.metadata_write = KV_RocksDb_Metadata_Write,
+	.metadata_create = KV_RocksDb_Metadata_Create,
 	.metadata_delete = KV_RocksDb_Delete,
 	.metadata_move = KV_RocksDb_Move,
 	.metadata_exists = KV_RocksDb_Exists,
@@ -407,6 +741,7 @@ KV_Operations operationsRocksDB = {
 	.list = KV_RocksDb_List,
 	.exists = KV_RocksDb_Exists,
 	.read = KV_RocksDb_Read,
+	.multi_read = KV_RocksDb_MultiRead,
 	.create = KV_RocksDb_Create,
     .update = KV_RocksDb_Update,
 	.write = KV_RocksDb_Write,
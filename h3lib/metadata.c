@@ -0,0 +1,332 @@
+// Copyright [2019] [FORTH-ICS]
+//
+// Licensed under the Apache License, Version 2.0 (the "License");
+// you may not use this file except in compliance with the License.
+// You may obtain a copy of the License at
+//
+//     http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS,
+// WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+// See the License for the specific language governing permissions and
+// limitations under the License.
+
+#include "common.h"
+#include "util.h"
+
+/*
+ * Object metadata are stored in a compact, versioned encoding rather than as a raw H3_ObjectMetadata:
+ *
+ *   magic(1) version(1) flags(1) user uuid(16) creation lastAccess lastModification lastChange mode uid gid nParts run*
+ *
+ * All integers are varints (signed ones zig-zag encoded), timestamps are pairs of seconds/nanoseconds and the user is
+ * stored as the integer carried by its id (or as a length prefixed string for ids not of the "@<n>" form).
+ * Parts are grouped in runs of equal size whose number, sub-number and offset advance by a constant step, i.e.
+ *
+ *   number subNumber offset size count [dNumber dSubNumber dOffset]
+ *
+ * so an object written sequentially takes two runs no matter its size. The encoding is self-delimiting, thus any
+ * trailing bytes left behind by a store that doesn't truncate values are ignored. Values not starting with the
+ * magic byte are legacy raw structs, whose first byte (isBad) is either 0x00 or 0x01.
+ */
+
+#define H3_METADATA_MAGIC       0xB3
+#define H3_METADATA_VERSION     1
+
+#define H3_METADATA_BAD         0x01
+#define H3_METADATA_READ_ONLY   0x02
+#define H3_METADATA_NAMED_USER  0x04
+
+#define H3_VARINT_SIZE          10
+#define H3_RUN_SIZE             (8 * H3_VARINT_SIZE)
+
+static size_t PutVarint(uint8_t* buffer, uint64_t value){
+    size_t size = 0;
+    while(value >= 0x80){
+        buffer[size++] = (uint8_t)(value | 0x80);
+        value >>= 7;
+    }
+    buffer[size++] = (uint8_t)value;
+    return size;
+}
+
+static size_t PutSigned(uint8_t* buffer, int64_t value){
+    return PutVarint(buffer, ((uint64_t)value << 1) ^ (uint64_t)(value >> 63));
+}
+
+static int GetVarint(const uint8_t** buffer, const uint8_t* end, uint64_t* value){
+    int shift;
+    *value = 0;
+    for(shift = 0; *buffer < end && shift < 64; shift += 7){
+        uint8_t byte = *(*buffer)++;
+        *value |= (uint64_t)(byte & 0x7F) << shift;
+        if(!(byte & 0x80))
+            return TRUE;
+    }
+    return FALSE;
+}
+
+static int GetSigned(const uint8_t** buffer, const uint8_t* end, int64_t* value){
+    uint64_t raw;
+    if(!GetVarint(buffer, end, &raw))
+        return FALSE;
+    *value = (int64_t)(raw >> 1) ^ -(int64_t)(raw & 1);
+    return TRUE;
+}
+
+static size_t PutTimespec(uint8_t* buffer, struct timespec* time){
+    size_t size = PutSigned(buffer, time->tv_sec);
+    return size + PutVarint(&buffer[size], time->tv_nsec);
+}
+
+static int GetTimespec(const uint8_t** buffer, const uint8_t* end, struct timespec* time){
+    int64_t sec;
+    uint64_t nsec;
+    if(!GetSigned(buffer, end, &sec) || !GetVarint(buffer, end, &nsec))
+        return FALSE;
+    time->tv_sec = sec;
+    time->tv_nsec = nsec;
+    return TRUE;
+}
+
+// Check whether next follows prev with the step of the run starting at first
+static int ContinuesRun(H3_PartMetadata* prev, H3_PartMetadata* next, H3_PartMetadata* first, int64_t dNumber, int64_t dSubNumber, int64_t dOffset){
+    return next->size == first->size                                &&
+           (int64_t)next->number - (int64_t)prev->number == dNumber &&
+           (int64_t)next->subNumber - prev->subNumber == dSubNumber &&
+           (int64_t)next->offset - prev->offset == dOffset;
+}
+
+/*
+ * Encode object metadata. Returns a newly allocated buffer, or NULL on failure.
+ */
+KV_Value EncodeObjectMetadata(H3_ObjectMetadata* objMeta, size_t* size){
+    uint8_t* buffer = malloc(3 + H3_VARINT_SIZE + sizeof(H3_UserId) + sizeof(uuid_t) + 11 * H3_VARINT_SIZE + objMeta->nParts * H3_RUN_SIZE);
+    uint8_t flags = 0;
+    size_t length = 0;
+    char* end = NULL;
+    long userId = 0;
+    uint i, j;
+
+    if(!buffer)
+        return NULL;
+
+    if(objMeta->isBad)
+        flags |= H3_METADATA_BAD;
+    if(objMeta->readOnly)
+        flags |= H3_METADATA_READ_ONLY;
+
+    // Users are expected to be of the "@<n>" form
+    if(objMeta->userId[0] == '@' && objMeta->userId[1]){
+        userId = strtol(&objMeta->userId[1], &end, 10);
+    }
+    if(!end || *end){
+        flags |= H3_METADATA_NAMED_USER;
+    }
+
+    buffer[length++] = H3_METADATA_MAGIC;
+    buffer[length++] = H3_METADATA_VERSION;
+    buffer[length++] = flags;
+
+    if(flags & H3_METADATA_NAMED_USER){
+        size_t userIdSize = strnlen(objMeta->userId, H3_USERID_SIZE);
+        length += PutVarint(&buffer[length], userIdSize);
+        memcpy(&buffer[length], objMeta->userId, userIdSize);
+        length += userIdSize;
+    }
+    else
+        length += PutSigned(&buffer[length], userId);
+
+    memcpy(&buffer[length], objMeta->uuid, sizeof(uuid_t));
+    length += sizeof(uuid_t);
+
+    length += PutTimespec(&buffer[length], &objMeta->creation);
+    length += PutTimespec(&buffer[length], &objMeta->lastAccess);
+    length += PutTimespec(&buffer[length], &objMeta->lastModification);
+    length += PutTimespec(&buffer[length], &objMeta->lastChange);
+    length += PutVarint(&buffer[length], objMeta->mode);
+    length += PutVarint(&buffer[length], objMeta->uid);
+    length += PutVarint(&buffer[length], objMeta->gid);
+    length += PutVarint(&buffer[length], objMeta->nParts);
+
+    for(i=0; i<objMeta->nParts; i=j){
+        H3_PartMetadata* first = &objMeta->part[i];
+        int64_t dNumber = 0, dSubNumber = 0, dOffset = 0;
+
+        // Extend the run as long as the parts keep the step of its first two
+        j = i + 1;
+        if(j < objMeta->nParts && objMeta->part[j].size == first->size){
+            dNumber = (int64_t)objMeta->part[j].number - (int64_t)first->number;
+            dSubNumber = (int64_t)objMeta->part[j].subNumber - first->subNumber;
+            dOffset = (int64_t)objMeta->part[j].offset - first->offset;
+            for(j++; j<objMeta->nParts && ContinuesRun(&objMeta->part[j-1], &objMeta->part[j], first, dNumber, dSubNumber, dOffset); j++);
+        }
+
+        length += PutVarint(&buffer[length], first->number);
+        length += PutSigned(&buffer[length], first->subNumber);
+        length += PutSigned(&buffer[length], first->offset);
+        length += PutVarint(&buffer[length], first->size);
+        length += PutVarint(&buffer[length], j - i);
+        if(j - i > 1){
+            length += PutSigned(&buffer[length], dNumber);
+            length += PutSigned(&buffer[length], dSubNumber);
+            length += PutSigned(&buffer[length], dOffset);
+        }
+    }
+
+    *size = length;
+    return (KV_Value)buffer;
+}
+
+/*
+ * Decode object metadata (of any version). Returns a newly allocated H3_ObjectMetadata whose part array has room for
+ * a whole number of H3_PART_BATCH_SIZE batches, or NULL if the value is malformed.
+ */
+H3_ObjectMetadata* DecodeObjectMetadata(KV_Value value, size_t valueSize, size_t* size){
+    const uint8_t* buffer = value;
+    const uint8_t* end = value + valueSize;
+    H3_ObjectMetadata* objMeta;
+    uint64_t nParts, count, unsignedValue;
+    int64_t signedValue;
+    uint i;
+
+    // Legacy raw struct
+    if(!valueSize || buffer[0] != H3_METADATA_MAGIC){
+        H3_ObjectMetadata* raw = (H3_ObjectMetadata*)value;
+        if(valueSize < sizeof(H3_ObjectMetadata) || valueSize < sizeof(H3_ObjectMetadata) + raw->nParts * sizeof(H3_PartMetadata))
+            return NULL;
+
+        uint nBatch = (raw->nParts + H3_PART_BATCH_SIZE - 1)/H3_PART_BATCH_SIZE;
+        *size = sizeof(H3_ObjectMetadata) + nBatch * H3_PART_BATCH_SIZE * sizeof(H3_PartMetadata);
+        if((objMeta = calloc(1, *size)))
+            memcpy(objMeta, raw, sizeof(H3_ObjectMetadata) + raw->nParts * sizeof(H3_PartMetadata));
+        return objMeta;
+    }
+
+    if(valueSize < 3 || buffer[1] != H3_METADATA_VERSION)
+        return NULL;
+
+    uint8_t flags = buffer[2];
+    buffer += 3;
+
+    H3_ObjectMetadata header;
+    memset(&header, 0, sizeof(H3_ObjectMetadata));
+    header.isBad = (flags & H3_METADATA_BAD) ? 1 : 0;
+    header.readOnly = (flags & H3_METADATA_READ_ONLY) ? 1 : 0;
+
+    if(flags & H3_METADATA_NAMED_USER){
+        if(!GetVarint(&buffer, end, &unsignedValue) || unsignedValue > H3_USERID_SIZE || end - buffer < unsignedValue)
+            return NULL;
+        memcpy(header.userId, buffer, unsignedValue);
+        buffer += unsignedValue;
+    }
+    else {
+        if(!GetSigned(&buffer, end, &signedValue))
+            return NULL;
+        snprintf(header.userId, H3_USERID_SIZE, "@%d", (int)signedValue);
+    }
+
+    if(end - buffer < sizeof(uuid_t))
+        return NULL;
+    memcpy(header.uuid, buffer, sizeof(uuid_t));
+    buffer += sizeof(uuid_t);
+
+    if(!GetTimespec(&buffer, end, &header.creation)         ||
+       !GetTimespec(&buffer, end, &header.lastAccess)       ||
+       !GetTimespec(&buffer, end, &header.lastModification) ||
+       !GetTimespec(&buffer, end, &header.lastChange)          )
+        return NULL;
+
+    if(!GetVarint(&buffer, end, &unsignedValue)) return NULL;
+    header.mode = unsignedValue;
+    if(!GetVarint(&buffer, end, &unsignedValue)) return NULL;
+    header.uid = unsignedValue;
+    if(!GetVarint(&buffer, end, &unsignedValue)) return NULL;
+    header.gid = unsignedValue;
+    if(!GetVarint(&buffer, end, &nParts) || nParts > UINT32_MAX) return NULL;
+
+    uint nBatch = (nParts + H3_PART_BATCH_SIZE - 1)/H3_PART_BATCH_SIZE;
+    *size = sizeof(H3_ObjectMetadata) + nBatch * H3_PART_BATCH_SIZE * sizeof(H3_PartMetadata);
+    if(!(objMeta = calloc(1, *size)))
+        return NULL;
+
+    memcpy(objMeta, &header, sizeof(H3_ObjectMetadata));
+
+    for(i=0; i<nParts; i += count){
+        H3_PartMetadata part;
+        int64_t dNumber = 0, dSubNumber = 0, dOffset = 0;
+        uint j;
+
+        if(!GetVarint(&buffer, end, &unsignedValue)) break;
+        part.number = unsignedValue;
+        if(!GetSigned(&buffer, end, &signedValue)) break;
+        part.subNumber = signedValue;
+        if(!GetSigned(&buffer, end, &signedValue)) break;
+        part.offset = signedValue;
+        if(!GetVarint(&buffer, end, &unsignedValue)) break;
+        part.size = unsignedValue;
+        if(!GetVarint(&buffer, end, &count) || !count || count > nParts - i) break;
+        if(count > 1 && (!GetSigned(&buffer, end, &dNumber) || !GetSigned(&buffer, end, &dSubNumber) || !GetSigned(&buffer, end, &dOffset))) break;
+
+        for(j=0; j<count; j++){
+            objMeta->part[i + j] = part;
+            part.number += dNumber;
+            part.subNumber += dSubNumber;
+            part.offset += dOffset;
+        }
+    }
+
+    // Truncated value
+    if(i != nParts){
+        free(objMeta);
+        return NULL;
+    }
+
+    objMeta->nParts = nParts;
+    return objMeta;
+}
+
+/*
+ * Drop-in replacements of metadata_read/metadata_write/metadata_create for object metadata.
+ * The value returned by ReadObjectMetadata() is a decoded H3_ObjectMetadata and size its allocated size.
+ */
+KV_Status ReadObjectMetadata(H3_Context* ctx, KV_Key key, KV_Value* value, size_t* size){
+    KV_Value encoded = NULL;
+    size_t encodedSize = 0;
+    KV_Status status;
+
+    if((status = ctx->operation->metadata_read(ctx->handle, key, 0, &encoded, &encodedSize)) == KV_SUCCESS){
+        if(!(*value = (KV_Value)DecodeObjectMetadata(encoded, encodedSize, size))){
+            LogActivity(H3_ERROR_MSG, "Malformed metadata for object %s\n", key);
+            status = KV_FAILURE;
+        }
+        free(encoded);
+    }
+
+    return status;
+}
+
+static KV_Status StoreObjectMetadata(H3_Context* ctx, KV_Key key, H3_ObjectMetadata* objMeta, char create){
+    KV_Status status = KV_FAILURE;
+    size_t size;
+    KV_Value value;
+
+    if((value = EncodeObjectMetadata(objMeta, &size))){
+        if(create)
+            status = ctx->operation->metadata_create(ctx->handle, key, value, size);
+        else
+            status = ctx->operation->metadata_write(ctx->handle, key, value, size);
+        free(value);
+    }
+
+    return status;
+}
+
+KV_Status WriteObjectMetadata(H3_Context* ctx, KV_Key key, H3_ObjectMetadata* objMeta){
+    return StoreObjectMetadata(ctx, key, objMeta, 0);
+}
+
+KV_Status CreateObjectMetadata(H3_Context* ctx, KV_Key key, H3_ObjectMetadata* objMeta){
+    return StoreObjectMetadata(ctx, key, objMeta, 1);
+}
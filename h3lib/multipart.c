@@ -55,6 +55,8 @@ int ComparePartMetadataByNumber(const void* a, const void* b) {
  *
  */
 H3_Status H3_CreateMultipart(H3_Handle handle, H3_Token token, H3_Name bucketName, H3_Name objectName, H3_MultipartId* multipartId){
+    H3_TIME_OPERATION(handle, H3_OP_CREATE_MULTIPART);
+
     /*
      * Multipart objects consist of a temporary object and an indirector. The temporary object is identical to an ordinary one,
      * though it follows different naming conventions so it will not involuntarily be affected by ordinary object operations.
@@ -115,7 +117,7 @@ H3_Status H3_CreateMultipart(H3_Handle handle, H3_Token token, H3_Name bucketNam
         clock_gettime(CLOCK_REALTIME, &objMeta.creation);
 
         // Upload multipart and temp object metadata
-        if((storeStatus = op->metadata_create(_handle, multiMeta.objectId, (KV_Value)&objMeta, sizeof(H3_ObjectMetadata))) == KV_SUCCESS){
+        if((storeStatus = CreateObjectMetadata(ctx, multiMeta.objectId, &objMeta)) == KV_SUCCESS){
             if( (storeStatus = op->metadata_create(_handle, *multipartId, (KV_Value)&multiMeta, sizeof(H3_MultipartMetadata))) == KV_SUCCESS){
                 status = H3_SUCCESS;
             }
@@ -151,6 +153,7 @@ H3_Status H3_CreateMultipart(H3_Handle handle, H3_Token token, H3_Name bucketNam
  *
  */
 H3_Status H3_CompleteMultipart(H3_Handle handle, H3_Token token, H3_MultipartId multipartId){
+    H3_TIME_OPERATION(handle, H3_OP_COMPLETE_MULTIPART);
 
     // Argument check.
     if(!handle || !token  || !multipartId){
@@ -182,7 +185,7 @@ H3_Status H3_CompleteMultipart(H3_Handle handle, H3_Token token, H3_MultipartId
     H3_MultipartMetadata* multiMeta = (H3_MultipartMetadata*)value;
     if(GrantMultipartAccess(userId, multiMeta)){
         value = NULL; mSize = 0;
-        if(op->metadata_read(_handle, multiMeta->objectId, 0, &value, &mSize) == KV_SUCCESS){
+        if(ReadObjectMetadata(ctx, multiMeta->objectId, &value, &mSize) == KV_SUCCESS){
             H3_ObjectMetadata* objMeta = (H3_ObjectMetadata*)value;
             if(objMeta->nParts){
 
@@ -203,9 +206,9 @@ H3_Status H3_CompleteMultipart(H3_Handle handle, H3_Token token, H3_MultipartId
 
 
                 // Create ordinary object (delete pre-existing ordinary object with same ID if any)
-                if( (kvStatus = op->metadata_create(_handle, objId, (KV_Value)objMeta, mSize)) == KV_SUCCESS  ||
+                if( (kvStatus = CreateObjectMetadata(ctx, objId, objMeta)) == KV_SUCCESS  ||
                     (kvStatus == KV_KEY_EXIST && DeleteObject(ctx, userId, objId, 0) == H3_SUCCESS &&
-                     op->metadata_create(_handle, objId, (KV_Value)objMeta, mSize) == KV_SUCCESS               )   ){
+                     CreateObjectMetadata(ctx, objId, objMeta) == KV_SUCCESS               )   ){
 
                     // Delete temporary object metadata and indirector
                     if( op->metadata_delete(_handle, multiMeta->objectId)== KV_SUCCESS &&
@@ -239,6 +242,7 @@ H3_Status H3_CompleteMultipart(H3_Handle handle, H3_Token token, H3_MultipartId
  *
  */
 H3_Status H3_AbortMultipart(H3_Handle handle, H3_Token token, H3_MultipartId multipartId){
+    H3_TIME_OPERATION(handle, H3_OP_ABORT_MULTIPART);
 
     // Argument check.
     if(!handle || !token  || !multipartId){
@@ -302,6 +306,7 @@ H3_Status H3_AbortMultipart(H3_Handle handle, H3_Token token, H3_MultipartId mul
  *
  */
 H3_Status H3_ListMultiparts(H3_Handle handle, H3_Token token, H3_Name bucketName, uint32_t offset, H3_MultipartId* multipartIdArray, uint32_t* nIds){
+    H3_TIME_OPERATION(handle, H3_OP_LIST_MULTIPARTS);
 
     // Argument check. Note a 'prefix' is not required.
     if(!handle || !token  || !bucketName || !multipartIdArray || !nIds){
@@ -379,6 +384,7 @@ H3_Status H3_ListMultiparts(H3_Handle handle, H3_Token token, H3_Name bucketName
  *
  */
 H3_Status H3_ListParts(H3_Handle handle, H3_Token token, H3_MultipartId multipartId, H3_PartInfo** partInfoArray, uint32_t* nParts){
+    H3_TIME_OPERATION(handle, H3_OP_LIST_PARTS);
 
     // Argument check.
     if(!handle || !token  || !multipartId || !partInfoArray || !nParts){
@@ -410,7 +416,7 @@ H3_Status H3_ListParts(H3_Handle handle, H3_Token token, H3_MultipartId multipar
     H3_MultipartMetadata* multiMeta = (H3_MultipartMetadata*)value;
     if(GrantMultipartAccess(userId, multiMeta)){
         value = NULL; mSize = 0;
-        if(op->metadata_read(_handle, multiMeta->objectId, 0, &value, &mSize) == KV_SUCCESS){
+        if(ReadObjectMetadata(ctx, multiMeta->objectId, &value, &mSize) == KV_SUCCESS){
 
             // Create hash table on partNumber with size as value
             H3_ObjectMetadata* objMeta = (H3_ObjectMetadata*)value;
@@ -477,7 +483,7 @@ KV_Status DeletePart(H3_Context* ctx, H3_ObjectMetadata* objMeta, uint32_t partN
 
 // The offset is necessary in case we cannot allocate a large enough buffer for the whole part and we have to do it in segments.
 // Note that in this case we do not overwrite, instead we simply append.
-KV_Status CreatePart(H3_Context* ctx, H3_ObjectMetadata* objMeta, KV_Value value, size_t size, off_t offset, uint32_t partNumber){
+KV_Status CreatePart(H3_Context* ctx, H3_Name bucketName, H3_ObjectMetadata* objMeta, KV_Value value, size_t size, off_t offset, uint32_t partNumber){
     KV_Status status = KV_SUCCESS;
     uint32_t partSubNumber = offset/H3_PART_SIZE;
     off_t inPartOffset = offset%H3_PART_SIZE;
@@ -488,7 +494,7 @@ KV_Status CreatePart(H3_Context* ctx, H3_ObjectMetadata* objMeta, KV_Value value
     	int partIndex = objMeta->nParts;
 
     	CreatePartId(partId, objMeta->uuid, partNumber, partSubNumber);
-        if( (status = ctx->operation->write(ctx->handle, partId, value, partSize)) == KV_SUCCESS){
+        if( (status = ctx->operation->write(ctx->handle, partId, value, partSize, bucketName)) == KV_SUCCESS){
 
             // Create/Update metadata entry
         	objMeta->part[partIndex].number = partNumber;
@@ -532,6 +538,7 @@ KV_Status CreatePart(H3_Context* ctx, H3_ObjectMetadata* objMeta, KV_Value value
  *
  */
 H3_Status H3_CreatePart(H3_Handle handle, H3_Token token, H3_MultipartId multipartId, uint32_t partNumber, void* data, size_t size){
+    H3_TIME_OPERATION(handle, H3_OP_CREATE_PART);
 
     // Argument check
     if(!handle || !token  || !multipartId || !data){
@@ -562,8 +569,11 @@ H3_Status H3_CreatePart(H3_Handle handle, H3_Token token, H3_MultipartId multipa
     // Make sure user has access to the multipart-object
     H3_MultipartMetadata* multiMeta = (H3_MultipartMetadata*)value;
     if(GrantMultipartAccess(userId, multiMeta)){
+        H3_BucketId bucketName; // just the name not a proper ID
+        GetBucketFromId(multiMeta->objectId, bucketName);
+
         value = NULL; mSize = 0;
-        if(op->metadata_read(_handle, multiMeta->objectId, 0, &value, &mSize) == KV_SUCCESS){
+        if(ReadObjectMetadata(ctx, multiMeta->objectId, &value, &mSize) == KV_SUCCESS){
 
             // Delete previous version of said part if any
             H3_ObjectMetadata* objMeta = (H3_ObjectMetadata*)value;
@@ -578,8 +588,8 @@ H3_Status H3_CreatePart(H3_Handle handle, H3_Token token, H3_MultipartId multipa
 
                 if(objMeta){
 					// The object has already been modified thus we need to record its state
-					kvStatus = CreatePart(ctx, objMeta, data, size, 0, partNumber);
-					if(op->metadata_write(_handle, multiMeta->objectId, (KV_Value)objMeta, objMetaSize) == KV_SUCCESS && kvStatus == KV_SUCCESS){
+					kvStatus = CreatePart(ctx, bucketName, objMeta, data, size, 0, partNumber);
+					if(WriteObjectMetadata(ctx, multiMeta->objectId, objMeta) == KV_SUCCESS && kvStatus == KV_SUCCESS){
 						status = H3_SUCCESS;
 					}
                 }
@@ -587,7 +597,7 @@ H3_Status H3_CreatePart(H3_Handle handle, H3_Token token, H3_MultipartId multipa
 
             // failed to delete all or some of the part's previous version so update the metadata
             else {
-                op->metadata_write(_handle, multiMeta->objectId, (KV_Value)objMeta, mSize);
+                WriteObjectMetadata(ctx, multiMeta->objectId, objMeta);
             }
 
             if(objMeta)
@@ -622,6 +632,7 @@ H3_Status H3_CreatePart(H3_Handle handle, H3_Token token, H3_MultipartId multipa
  *
  */
 H3_Status H3_CreatePartCopy(H3_Handle handle, H3_Token token, H3_Name objectName, off_t offset, size_t size, H3_MultipartId multipartId, uint32_t partNumber){
+    H3_TIME_OPERATION(handle, H3_OP_CREATE_PART_COPY);
 
     // Argument check.
     if(!handle || !token  || !multipartId || !objectName){
@@ -664,11 +675,11 @@ H3_Status H3_CreatePartCopy(H3_Handle handle, H3_Token token, H3_Name objectName
         GetBucketFromId(multiMeta->objectId, bucketName);
         GetObjectId(bucketName, objectName, srcObjId);
         value = NULL; mSize = 0;
-        if((kvStatus = op->metadata_read(_handle, srcObjId, 0, &value, &mSize)) == KV_SUCCESS){
+        if((kvStatus = ReadObjectMetadata(ctx, srcObjId, &value, &mSize)) == KV_SUCCESS){
             H3_ObjectMetadata* srcObjMeta = (H3_ObjectMetadata*)value;
 
             value = NULL; mSize = 0;
-            if(op->metadata_read(_handle, multiMeta->objectId, 0, &value, &mSize) == KV_SUCCESS){
+            if(ReadObjectMetadata(ctx, multiMeta->objectId, &value, &mSize) == KV_SUCCESS){
                 H3_ObjectMetadata* dstObjMeta = (H3_ObjectMetadata*)value;
                 if( DeletePart(ctx, dstObjMeta, partNumber) == KV_SUCCESS) {
 
@@ -690,7 +701,7 @@ H3_Status H3_CreatePartCopy(H3_Handle handle, H3_Token token, H3_Name objectName
 
 							size_t buffSize = min(H3_PART_SIZE, remaining);
 							if( (kvStatus = ReadData(ctx, srcObjMeta, buffer, &buffSize, srcOffset)) == KV_SUCCESS              &&
-								(kvStatus = CreatePart(ctx, dstObjMeta, buffer, buffSize, dstOffset, partNumber)) == KV_SUCCESS     ){
+								(kvStatus = CreatePart(ctx, bucketName, dstObjMeta, buffer, buffSize, dstOffset, partNumber)) == KV_SUCCESS     ){
 
 								remaining -= buffSize;
 								srcOffset += buffSize;
@@ -701,7 +712,7 @@ H3_Status H3_CreatePartCopy(H3_Handle handle, H3_Token token, H3_Name objectName
 
 						// We have to update metadata even if writing failed because we might have already deleted the previous
 						// version of the part.
-						if(op->metadata_write(_handle, multiMeta->objectId, (KV_Value)dstObjMeta, dstObjMetaSize) == KV_SUCCESS){
+						if(WriteObjectMetadata(ctx, multiMeta->objectId, dstObjMeta) == KV_SUCCESS){
 							status = H3_SUCCESS;
 						}
                     }
@@ -13,6 +13,7 @@
 // limitations under the License.
 
 #include <unistd.h>
+#include <inttypes.h>
 
 #include "common.h"
 #include "util.h"
@@ -65,6 +66,25 @@ H3_Status ValidPrefix(KV_Operations* op, char* name){
     return ValidObjectName(op, name);
 }
 
+/*
+ * Parts are kept sorted by offset and never overlap, so the part covering an offset (if any) can be located by
+ * binary search. Returns the number of parts starting at or before the offset, i.e. the index of the first part
+ * starting after it.
+ */
+uint FindPart(H3_ObjectMetadata* objMeta, off_t offset){
+    uint low = 0, high = objMeta->nParts;
+
+    while(low < high){
+        uint middle = low + (high - low)/2;
+        if(objMeta->part[middle].offset <= offset)
+            low = middle + 1;
+        else
+            high = middle;
+    }
+
+    return low;
+}
+
 uint EstimateNumOfParts(H3_ObjectMetadata* objMeta, size_t size, off_t offset){
 
 	// Required number of parts to fit this segment
@@ -74,31 +94,35 @@ uint EstimateNumOfParts(H3_ObjectMetadata* objMeta, size_t size, off_t offset){
     if(objMeta == NULL)
     	return nParts;
 
-    uint i, regionFirstPartNumber, regionLastPartNumber;
+    off_t regionStart = (offset / H3_PART_SIZE) * H3_PART_SIZE;
+    off_t regionEnd = regionStart + nParts * H3_PART_SIZE;
 
-    regionFirstPartNumber = offset / H3_PART_SIZE;
-    regionLastPartNumber = regionFirstPartNumber + nParts - 1;
+    // Overlapping parts are replaced, the rest are added
+    nParts += objMeta->nParts - (FindPart(objMeta, regionEnd - 1) - FindPart(objMeta, regionStart - 1));
 
-    for(i=0; i<objMeta->nParts; i++){
-    	uint partNumber = objMeta->part[i].offset / H3_PART_SIZE;
+    return  max(objMeta->nParts, nParts);
+}
 
-    	// Remove overlapping parts
-    	if(regionFirstPartNumber <= partNumber && partNumber <= regionLastPartNumber){
-    	}
+static KV_Status WriteSegments(H3_Context* ctx, H3_Name bucketName, KV_Key* keys, KV_Value* values, off_t* offsets, size_t* sizes, uint nSegments){
+    KV_Status status = KV_SUCCESS;
+    uint i;
 
-    	// Add non-overlapping parts
-    	else
-    		nParts++;
-    }
+    if(nSegments > 1 && ctx->operation->multi_update)
+        return ctx->operation->multi_update(ctx->handle, keys, values, offsets, sizes, nSegments, bucketName);
 
-    return  max(objMeta->nParts, nParts);
-}
+    for(i=0; status == KV_SUCCESS && i<nSegments; i++){
+        if (offsets[i] == 0 && sizes[i] == H3_PART_SIZE) {
+            status = ctx->operation->write(ctx->handle, keys[i], values[i], sizes[i], bucketName);
+        }
+        else {
+            status = ctx->operation->update(ctx->handle, keys[i], values[i], offsets[i], sizes[i], bucketName);
+        }
+    }
 
-int ComparePartMetadataByOffset(const void* partA, const void* partB) {
-    return ((H3_PartMetadata*)partA)->offset - ((H3_PartMetadata*)partB)->offset;
+    return status;
 }
 
-KV_Status WriteData(H3_Context* ctx, H3_ObjectMetadata* meta, KV_Value value, size_t size, off_t offset){
+KV_Status WriteData(H3_Context* ctx, H3_Name bucketName, H3_ObjectMetadata* meta, KV_Value value, size_t size, off_t offset){
     /*
      * Used by H3_WriteObject, H3_WriteObjectCopy. If the object exists it is overwritten rather than truncated. Parts are of max-size
      * rather than fixed size, thus they can freely increase in size up to H3_PART_SIZE provided they do not overlap with the next part.
@@ -111,102 +135,129 @@ KV_Status WriteData(H3_Context* ctx, H3_ObjectMetadata* meta, KV_Value value, si
      *
      * Therefore, when updating an object we preserve the part number/sub-number/offset of any parts we overwrite taking care to set the new
      * new size such that it doesn't overlap with the next part (if any).
+     *
+     * The parts are kept sorted by offset, thus the part to write to is found by binary search and new parts are inserted in place. Writing
+     * an object sequentially only ever touches its last part.
+     *
+     * Parts are written in batches of H3_SEGMENT_BATCH_SIZE, so that stores able to update many keys at once get them with a single call.
+     * The metadata of a batch is updated before it is written, which is fine as the object is marked bad if writing fails.
      */
 
-    uint i, partIndex, partNumber, nNewParts = 0;
+    uint partIndex, partNumber;
     int partSubNumber;
     KV_Status status = KV_SUCCESS;
-    uint segmentEnd = offset + size -1;
     size_t partSize;
 
+    H3_PartId partIds[H3_SEGMENT_BATCH_SIZE];
+    KV_Key keys[H3_SEGMENT_BATCH_SIZE];
+    KV_Value values[H3_SEGMENT_BATCH_SIZE];
+    off_t offsets[H3_SEGMENT_BATCH_SIZE];
+    size_t sizes[H3_SEGMENT_BATCH_SIZE];
+    uint nSegments = 0;
+
     while(size && status == KV_SUCCESS) {
 
         off_t partOffset, inPartOffset;
-        char overWrite = 0;
-
-        // Check for overwriting parts based on offset...
-        for(i=0; i<meta->nParts && !overWrite; i++){
-            uint partEnd = meta->part[i].offset + meta->part[i].size - 1;
-
-            // Segment starts within part
-            if(meta->part[i].offset <= offset && offset <= partEnd){
-                inPartOffset = offset - meta->part[i].offset;
-                overWrite = 1;
-            }
+        uint next = FindPart(meta, offset);
 
-            // Segment ends within part or overlaps it
-            else if( (meta->part[i].offset <= segmentEnd && segmentEnd <= partEnd) ||
-                     (offset < meta->part[i].offset && partEnd < segmentEnd) ){
-                inPartOffset = 0;
-                overWrite = 1;
-            }
-
-            // Segment appends part
-            else if(partEnd < offset && offset < (meta->part[i].offset + H3_PART_SIZE)){
-                inPartOffset = meta->part[i].size;
-                overWrite = 1;
-            }
-        }
-
-        if(overWrite){
-            partIndex = --i; // Account for the auto-increment in the overlap detection loop
+        // Segment starts within the preceding part or can be appended to it
+        if(next && offset < meta->part[next-1].offset + max(meta->part[next-1].size, H3_PART_SIZE)){
+            partIndex = next - 1;
             partNumber = meta->part[partIndex].number;
             partSubNumber = meta->part[partIndex].subNumber;
             partOffset = meta->part[partIndex].offset;
+            inPartOffset = offset - partOffset;
 
             // Check the next part for size restriction in case object was created as multipart
-            if( i < meta->nParts -1){
-                partSize = min(meta->part[i+1].offset - (inPartOffset + partOffset), size);
-            }
+            if(next < meta->nParts)
+                partSize = min(meta->part[next].offset - (inPartOffset + partOffset), size);
             else
-                partSize = min((H3_PART_SIZE - inPartOffset), size);
+                partSize = min((max(meta->part[partIndex].size, H3_PART_SIZE) - inPartOffset), size);
         }
         else {
             // if inPartOffset != 0x00 then the store-backend will left pad the value with 0x00
             // if necessary in order to make the part-offset aligned to H3_PART_SIZE.
-            partIndex = meta->nParts + nNewParts;
+            partIndex = next;
             partNumber = offset / H3_PART_SIZE;
             partSubNumber = -1;
             partOffset = partNumber * H3_PART_SIZE;
-            inPartOffset = offset % H3_PART_SIZE;
-            partSize = min((H3_PART_SIZE - inPartOffset), size);
-            nNewParts++;
-        }
+            partSize = min((H3_PART_SIZE - offset % H3_PART_SIZE), size);
 
-        H3_PartId partId;
-        CreatePartId(partId, meta->uuid, partNumber, partSubNumber);
-        if (inPartOffset == 0 && partSize == H3_PART_SIZE) {
-            status = ctx->operation->write(ctx->handle, partId, value, partSize);
+            // Parts of multipart-objects need not be aligned, so don't overlap with the previous part...
+            if(next && partOffset < meta->part[next-1].offset + meta->part[next-1].size)
+                partOffset = meta->part[next-1].offset + meta->part[next-1].size;
+            inPartOffset = offset - partOffset;
+
+            // ...nor with the next one
+            if(next < meta->nParts)
+                partSize = min(meta->part[next].offset - offset, partSize);
         }
-        else {
-            status = ctx->operation->update(ctx->handle, partId, value, inPartOffset, partSize);
+
+        CreatePartId(partIds[nSegments], meta->uuid, partNumber, partSubNumber);
+        keys[nSegments] = partIds[nSegments];
+        values[nSegments] = value;
+        offsets[nSegments] = inPartOffset;
+        sizes[nSegments] = partSize;
+        nSegments++;
+
+        // Insert a new part in place
+        if(partIndex == next){
+            memmove(&meta->part[next+1], &meta->part[next], (meta->nParts - next) * sizeof(H3_PartMetadata));
+            meta->nParts++;
+            meta->part[partIndex].size = 0;
         }
-        if(status == KV_SUCCESS){
-
-            // Create/Update metadata entry
-            meta->part[partIndex].number = partNumber;
-            meta->part[partIndex].subNumber = partSubNumber;
-            meta->part[partIndex].offset = partOffset;
-            meta->part[partIndex].size = inPartOffset + partSize;
-
-            // Advance offset
-            offset += partSize;
-            value += partSize;
-            size -= partSize;
+
+        // Create/Update metadata entry
+        meta->part[partIndex].number = partNumber;
+        meta->part[partIndex].subNumber = partSubNumber;
+        meta->part[partIndex].offset = partOffset;
+        meta->part[partIndex].size = max(meta->part[partIndex].size, inPartOffset + partSize);
+
+        // Advance offset
+        offset += partSize;
+        value += partSize;
+        size -= partSize;
+
+        if(nSegments == H3_SEGMENT_BATCH_SIZE || !size){
+            status = WriteSegments(ctx, bucketName, keys, values, offsets, sizes, nSegments);
+            nSegments = 0;
         }
     }
 
     // Update object metadata
     meta->isBad = status==KV_SUCCESS?0:1;
-    meta->nParts += nNewParts;
     clock_gettime(CLOCK_REALTIME, &meta->lastModification);
-    qsort(meta->part, meta->nParts, sizeof(H3_PartMetadata), ComparePartMetadataByOffset);
+
+    return status;
+}
+
+static KV_Status ReadSegments(H3_Context* ctx, KV_Key* keys, off_t* offsets, KV_Value* values, size_t* sizes, uint nSegments){
+    KV_Status status = KV_SUCCESS;
+    size_t required[H3_SEGMENT_BATCH_SIZE];
+    uint i;
+
+    memcpy(required, sizes, nSegments * sizeof(size_t));
+
+    if(nSegments > 1 && ctx->operation->multi_read){
+    	status = ctx->operation->multi_read(ctx->handle, keys, offsets, values, sizes, nSegments);
+    }
+    else{
+    	for(i=0; status == KV_SUCCESS && i<nSegments; i++)
+    		status = ctx->operation->read(ctx->handle, keys[i], offsets[i], &values[i], &sizes[i]);
+    }
+
+    // The parts are expected to hold the whole segment
+    for(i=0; status == KV_SUCCESS && i<nSegments; i++){
+    	if(sizes[i] != required[i])
+    		status = KV_FAILURE;
+    }
 
     return status;
 }
 
 KV_Status ReadData(H3_Context* ctx, H3_ObjectMetadata* meta, KV_Value value, size_t* size, off_t offset){
-	uint i, bufferOffset;
+	uint i, bufferOffset, nSegments = 0;
+	KV_Status status = KV_SUCCESS;
 
     // Make sure we do not try to read more than available
     memset(value, 0, *size);
@@ -215,10 +266,21 @@ KV_Status ReadData(H3_Context* ctx, H3_ObjectMetadata* meta, KV_Value value, siz
     size_t remaining = required;
     off_t segmentEnd = offset + remaining - 1;
 
-    for(i=0; i<meta->nParts && remaining; i++){
+    // Start from the part the segment starts in (or the one before it, if the segment starts in a gap)
+    i = FindPart(meta, offset);
+    if(i)
+    	i--;
+
+    // The parts are read in batches of H3_SEGMENT_BATCH_SIZE, so that stores able to read many keys at once get them with a single call
+    H3_PartId partIds[H3_SEGMENT_BATCH_SIZE];
+    KV_Key keys[H3_SEGMENT_BATCH_SIZE];
+    off_t offsets[H3_SEGMENT_BATCH_SIZE];
+    KV_Value buffers[H3_SEGMENT_BATCH_SIZE];
+    size_t sizes[H3_SEGMENT_BATCH_SIZE];
+
+    for(; status == KV_SUCCESS && i<meta->nParts && remaining && meta->part[i].offset <= segmentEnd; i++){
     	size_t readSize;
     	off_t inPartOffset, partEnd = meta->part[i].offset + meta->part[i].size -1;
-    	char contributes = 1;
 
     	// Segment starts within a part
     	if(meta->part[i].offset <= offset && offset <= partEnd){
@@ -227,31 +289,38 @@ KV_Status ReadData(H3_Context* ctx, H3_ObjectMetadata* meta, KV_Value value, siz
     		readSize = min(meta->part[i].size - inPartOffset, remaining);
     	}
 
-    	// Segment end within a part or overlaps it
-    	else if((meta->part[i].offset <= segmentEnd && segmentEnd <= partEnd)|| (offset < meta->part[i].offset && partEnd < segmentEnd )){
+    	// Part starts within the segment
+    	else if(offset < meta->part[i].offset){
     		inPartOffset = 0;
     		bufferOffset = meta->part[i].offset - offset;
-    		readSize = min(meta->part[i].size, remaining);
+    		readSize = min(meta->part[i].size, required - bufferOffset);
     	}
     	else
-    		contributes = 0;
-
+    		continue;
 
-    	if(contributes){
-    		size_t retrieved = readSize;
-    		H3_PartId partId;
-    		KV_Value buffer = &value[bufferOffset];
+    	CreatePartId(partIds[nSegments], meta->uuid, meta->part[i].number, meta->part[i].subNumber);
+    	keys[nSegments] = partIds[nSegments];
+    	offsets[nSegments] = inPartOffset;
+    	buffers[nSegments] = &value[bufferOffset];
+    	sizes[nSegments] = readSize;
+    	nSegments++;
 
-    		CreatePartId(partId, meta->uuid, meta->part[i].number, meta->part[i].subNumber);
-    		if(ctx->operation->read(ctx->handle, partId, inPartOffset, &buffer, &retrieved) != KV_SUCCESS || retrieved != readSize){
-    			*size = 0;
-    			return KV_FAILURE;
-    		}
+    	remaining -= readSize;
 
-    		remaining -= readSize;
+    	if(nSegments == H3_SEGMENT_BATCH_SIZE){
+    		status = ReadSegments(ctx, keys, offsets, buffers, sizes, nSegments);
+    		nSegments = 0;
     	}
     }
 
+    if(status == KV_SUCCESS && nSegments)
+    	status = ReadSegments(ctx, keys, offsets, buffers, sizes, nSegments);
+
+    if(status != KV_SUCCESS){
+    	*size = 0;
+    	return KV_FAILURE;
+    }
+
     *size = required;
     return KV_SUCCESS;
 }
@@ -262,8 +331,11 @@ KV_Status CopyData(H3_Context* ctx, H3_UserId userId, H3_ObjectId srcObjId, H3_O
     KV_Status status = KV_FAILURE;
     KV_Value value = NULL;
     size_t mSize = 0;
+    H3_BucketId dstBucketName; // just the name not a proper ID
+
+    GetBucketFromId(dstObjId, dstBucketName);
 
-    if( (status = op->metadata_read(_handle, srcObjId, 0, &value, &mSize)) == KV_SUCCESS){
+    if( (status = ReadObjectMetadata(ctx, srcObjId, &value, &mSize)) == KV_SUCCESS){
 
         // Make sure the user has access to the object
         H3_ObjectMetadata* srcObjMeta = (H3_ObjectMetadata*)value;
@@ -277,7 +349,7 @@ KV_Status CopyData(H3_Context* ctx, H3_UserId userId, H3_ObjectId srcObjId, H3_O
                 memcpy(dstObjMeta, srcObjMeta, mSize);
                 uuid_generate(dstObjMeta->uuid);
                 dstObjMeta->nParts = 0;
-                if((status = op->metadata_create(_handle, dstObjId, (KV_Value)dstObjMeta, mSize)) == KV_SUCCESS){
+                if((status = CreateObjectMetadata(ctx, dstObjId, dstObjMeta)) == KV_SUCCESS){
 
                     // Copy the data in parts
                     KV_Value buffer = malloc(H3_PART_SIZE);
@@ -287,7 +359,7 @@ KV_Status CopyData(H3_Context* ctx, H3_UserId userId, H3_ObjectId srcObjId, H3_O
 
                         size_t buffSize = min(H3_PART_SIZE, remaining);
                         if( (status = ReadData(ctx, srcObjMeta, buffer, &buffSize, srcOffset) == KV_SUCCESS)                    &&
-                            (status = WriteData(ctx, dstObjMeta, buffer, buffSize, dstOffset) == KV_SUCCESS)     ){
+                            (status = WriteData(ctx, dstBucketName, dstObjMeta, buffer, buffSize, dstOffset) == KV_SUCCESS)     ){
 
                             remaining -= buffSize;
                             srcOffset += buffSize;
@@ -311,6 +383,249 @@ KV_Status CopyData(H3_Context* ctx, H3_UserId userId, H3_ObjectId srcObjId, H3_O
     return status;
 }
 
+/*
+ * Retrieve the point in time a time indexed metadata refers to. For ExpiresAt this is its value whereas for
+ * ReadOnlyAfter it is the deadline it sets, i.e. the last modification plus its value. Values that are not
+ * a non-negative double (the format used by the h3controllers) are reported as -1.
+ */
+KV_Status GetTimeIndexTimestamp(H3_Context* ctx, H3_Name bucketName, H3_Name objectName, H3_ObjectMetadata* objMeta, H3_Name metadataName, double* timestamp) {
+    KV_Status storeStatus;
+    KV_Value value = NULL;
+    size_t size = 0;
+
+    H3_ObjectMetadataId objectMetaId;
+    GetObjectMetadataId(objectMetaId, bucketName, objectName, metadataName);
+
+    *timestamp = -1;
+    if ((storeStatus = ctx->operation->read(ctx->handle, objectMetaId, 0, &value, &size)) == KV_SUCCESS) {
+        if (size == sizeof(double))
+            memcpy(timestamp, value, sizeof(double));
+
+        // Also rules out NaN. Adding zero turns a -0.0 into a +0.0 so that its bit pattern sorts properly.
+        if (*timestamp >= 0) {
+            *timestamp += 0.0;
+            if (!strcmp(metadataName, H3_READ_ONLY_AFTER_METADATA))
+                *timestamp += (double)objMeta->lastModification.tv_sec + (double)objMeta->lastModification.tv_nsec / 1000000000.0;
+        }
+        else
+            *timestamp = -1;
+
+        free(value);
+    }
+
+    return storeStatus;
+}
+
+/*
+ * Insert or remove the time index entry that corresponds to the ExpiresAt or ReadOnlyAfter metadata the object currently carries.
+ */
+KV_Status UpdateTimeIndex(H3_Context* ctx, H3_UserId userId, H3_Name bucketName, H3_Name objectName, H3_ObjectMetadata* objMeta, H3_Name metadataName, char insert) {
+    KV_Handle _handle = ctx->handle;
+    KV_Operations* op = ctx->operation;
+    KV_Status storeStatus;
+    double timestamp;
+
+    if ((storeStatus = GetTimeIndexTimestamp(ctx, bucketName, objectName, objMeta, metadataName, &timestamp)) == KV_SUCCESS) {
+        if (timestamp >= 0) {
+            H3_ObjectId objId;
+            H3_TimeIndexId indexId;
+            GetObjectId(bucketName, objectName, objId);
+            GetTimeIndexId(indexId, metadataName, userId, &timestamp, objId);
+
+            if (insert)
+                storeStatus = op->metadata_write(_handle, indexId, (KV_Value)&timestamp, sizeof(double));
+            else if ((storeStatus = op->metadata_delete(_handle, indexId)) == KV_KEY_NOT_EXIST)
+                storeStatus = KV_SUCCESS;
+        }
+    }
+    // Nothing to index
+    else if (storeStatus == KV_KEY_NOT_EXIST) {
+        storeStatus = KV_SUCCESS;
+    }
+
+    return storeStatus;
+}
+
+/*
+ * Check a due entry of a time index against the object it refers to. Entries of objects that are gone (or already
+ * read-only) are dropped, whereas ReadOnlyAfter entries left behind by modifications of the object are moved to the
+ * current deadline. That is, modifications don't touch the index, which in turn holds a lower bound of the deadline.
+ *
+ * Returns 1 if the entry is due, 0 if it was removed from its position and -1 in case of an error.
+ */
+int VerifyTimeIndexEntry(H3_Context* ctx, H3_UserId userId, H3_Name metadataName, KV_Key indexId, H3_ObjectId objId, double deadline) {
+    KV_Handle _handle = ctx->handle;
+    KV_Operations* op = ctx->operation;
+    KV_Status storeStatus;
+    KV_Value value = NULL;
+    size_t mSize = 0;
+    int result = -1;
+
+    if (strcmp(metadataName, H3_READ_ONLY_AFTER_METADATA)) {
+        if ((storeStatus = op->metadata_exists(_handle, objId)) == KV_KEY_EXIST)
+            result = 1;
+        else if (storeStatus == KV_KEY_NOT_EXIST && op->metadata_delete(_handle, indexId) == KV_SUCCESS)
+            result = 0;
+    }
+    else if ((storeStatus = ReadObjectMetadata(ctx, objId, &value, &mSize)) == KV_SUCCESS) {
+        H3_ObjectMetadata* objMeta = (H3_ObjectMetadata*)value;
+        H3_ObjectId bucketName;
+        H3_Name objectName;
+        double timestamp = -1;
+
+        strncpy(bucketName, objId, sizeof(H3_ObjectId));
+        objectName = strchr(bucketName, '/');
+        *objectName++ = '\0';
+
+        if (!objMeta->readOnly && (storeStatus = GetTimeIndexTimestamp(ctx, bucketName, objectName, objMeta, metadataName, &timestamp)) != KV_SUCCESS && storeStatus != KV_KEY_NOT_EXIST) {
+            result = -1;
+        }
+        else if (timestamp >= 0 && timestamp <= deadline) {
+            result = 1;
+        }
+        else {
+            H3_TimeIndexId newIndexId;
+            if (timestamp >= 0)
+                GetTimeIndexId(newIndexId, metadataName, userId, &timestamp, objId);
+
+            if ((timestamp < 0 || op->metadata_write(_handle, newIndexId, (KV_Value)&timestamp, sizeof(double)) == KV_SUCCESS) &&
+                 op->metadata_delete(_handle, indexId) == KV_SUCCESS)
+                result = 0;
+        }
+
+        free(objMeta);
+    }
+    else if (storeStatus == KV_KEY_NOT_EXIST && op->metadata_delete(_handle, indexId) == KV_SUCCESS) {
+        result = 0;
+    }
+
+    return result;
+}
+
+/*
+ * List the object-IDs of the entries of a time index that are due, see H3_ListExpiredObjects(). The entries are listed
+ * in order of their timestamp a batch at a time, so the listing stops at the first entry that is not due, and the cost
+ * is in the due entries rather than all the ones in the index.
+ */
+H3_Status ListTimeIndex(H3_Context* ctx, H3_UserId userId, H3_Name metadataName, struct timespec* timestamp, uint32_t offset, H3_Name* objectIdArray, uint32_t* nObjects, uint32_t* nextOffset) {
+    H3_Status status = H3_FAILURE;
+    KV_Handle _handle = ctx->handle;
+    KV_Operations* op = ctx->operation;
+    KV_Status storeStatus = KV_FAILURE;
+    struct timespec now;
+
+    if (!timestamp) {
+        clock_gettime(CLOCK_REALTIME, &now);
+        timestamp = &now;
+    }
+    double deadline = (double)timestamp->tv_sec + (double)timestamp->tv_nsec / 1000000000.0;
+
+    KV_Key entries = calloc(1, KV_LIST_BUFFER_SIZE);
+    KV_Key objects = calloc(1, KV_LIST_BUFFER_SIZE);
+
+    if (entries && objects) {
+
+        H3_TimeIndexId prefix;
+        GetTimeIndexId(prefix, metadataName, userId, NULL, NULL);
+        uint8_t trim = strlen(prefix);
+
+        size_t remaining        = KV_LIST_BUFFER_SIZE;
+        uint32_t nEntries       = H3_TIME_INDEX_BATCH_SIZE;
+        uint32_t addedObjects   = 0;
+        uint32_t skipedEntries  = 0;
+        uint32_t list_offset    = offset;
+        uint32_t bufferIsFull   = FALSE;
+        uint32_t pastDeadline   = FALSE;
+
+        // List the user's index entries, i.e. <timestamp>#<bucket>/<object>
+        while (!bufferIsFull && !pastDeadline && ((storeStatus = op->list(_handle, prefix, trim, entries, list_offset, &nEntries)) == KV_CONTINUE ||
+                storeStatus == KV_SUCCESS)) {
+
+            // We get an empty list. It's ok.
+            if (!nEntries) break;
+
+            H3_Name current_entry;
+            H3_Name objId;
+            H3_TimeIndexId indexId;
+            uint32_t current_entry_index = 0;
+            uint32_t droppedEntries = 0;
+            uint64_t bits;
+            double entryTimestamp;
+            int entryNo;
+
+            for (entryNo = 0; entryNo < nEntries; ++entryNo) {
+                current_entry        = &(entries[current_entry_index]);
+                current_entry_index += strlen(current_entry);
+                while (entries[current_entry_index] == '\0')
+                    current_entry_index++;
+
+                objId = strchr(current_entry, '#');
+                if (!objId || !strchr(objId, '/') || sscanf(current_entry, "%16" SCNx64, &bits) != 1) {
+                    ++skipedEntries;
+                    continue;
+                }
+                objId++;
+                memcpy(&entryTimestamp, &bits, sizeof(double));
+                snprintf(indexId, sizeof(H3_TimeIndexId), "%s%s", prefix, current_entry);
+
+                // Neither this nor any of the following entries is due
+                if (entryTimestamp > deadline) {
+                    pastDeadline = TRUE;
+                    break;
+                }
+
+                switch (VerifyTimeIndexEntry(ctx, userId, metadataName, indexId, objId, deadline)) {
+                    case 1:
+                        // The buffer have space to host the current object
+                        if (remaining >= (strlen(objId) + 1)) {
+                            memcpy(&objects[KV_LIST_BUFFER_SIZE - remaining], objId, strlen(objId));
+                            remaining -= (strlen(objId) + 1);
+
+                            ++addedObjects;
+                        }
+                        // The buffer is full. Notify the user with a H3_CONTINUE
+                        else {
+                            bufferIsFull = TRUE;
+                        }
+                        break;
+
+                    // The entry no longer occupies a slot in the listing
+                    case 0:
+                        ++droppedEntries;
+                        break;
+
+                    default:
+                        ++skipedEntries;
+                }
+
+                if (bufferIsFull) break;
+            }
+
+            list_offset += nEntries - droppedEntries;
+            nEntries     = H3_TIME_INDEX_BATCH_SIZE;
+        }
+
+        // The list failed
+        if (storeStatus != KV_SUCCESS && storeStatus != KV_CONTINUE)
+            free(objects);
+        else {
+            *objectIdArray = objects;
+            *nObjects      = addedObjects;
+            // if next offset is presented
+            if (nextOffset)
+                *nextOffset = (skipedEntries + addedObjects + offset);
+
+            status = (bufferIsFull) ? H3_CONTINUE : H3_SUCCESS;
+        }
+    }
+    else
+        free(objects);
+
+    free(entries);
+
+    return status;
+}
+
 H3_Status PurgeObjectMetadata(H3_Context* ctx, H3_UserId userId, H3_Name bucketName, H3_Name objectName) {
     KV_Handle _handle = ctx->handle;
     KV_Operations* op = ctx->operation;
@@ -323,7 +638,7 @@ H3_Status PurgeObjectMetadata(H3_Context* ctx, H3_UserId userId, H3_Name bucketN
     GetObjectId(bucketName, objectName, objId);
 
     H3_Status status = H3_FAILURE;
-    if ((storeStatus = op->metadata_read(_handle, objId, 0, &objMetaValue, &mSize)) == KV_SUCCESS) {
+    if ((storeStatus = ReadObjectMetadata(ctx, objId, &objMetaValue, &mSize)) == KV_SUCCESS) {
         H3_ObjectMetadata* objMeta = (H3_ObjectMetadata*)objMetaValue;
         
         // Access the object
@@ -357,6 +672,7 @@ H3_Status PurgeObjectMetadata(H3_Context* ctx, H3_UserId userId, H3_Name bucketN
 
                     H3_ObjectMetadataId objMetadataId;
                     GetObjectMetadataId(objMetadataId, bucketName, objectName, current_metadata_name);
+                    if (IsTimeIndexed(current_metadata_name) && UpdateTimeIndex(ctx, userId, bucketName, objectName, objMeta, current_metadata_name, 0) != KV_SUCCESS) break;
                     if (op->delete(_handle, objMetadataId) != KV_SUCCESS) break;
                 }
                 
@@ -371,7 +687,7 @@ H3_Status PurgeObjectMetadata(H3_Context* ctx, H3_UserId userId, H3_Name bucketN
             }
             
             clock_gettime(CLOCK_REALTIME, &objMeta->lastAccess);
-            if (op->metadata_write(_handle, objId, (KV_Value)objMeta, mSize) == KV_SUCCESS && storeStatus == KV_SUCCESS) {
+            if (WriteObjectMetadata(ctx, objId, objMeta) == KV_SUCCESS && storeStatus == KV_SUCCESS) {
                 status = H3_SUCCESS;
             } else if (storeStatus == KV_KEY_TOO_LONG) {
                 status = H3_NAME_TOO_LONG;
@@ -408,13 +724,13 @@ H3_Status CopyOrMoveObjectMetadata(H3_Context* ctx, H3_UserId userId, H3_Name bu
     GetObjectId(bucketName, dstObjectName, dstObjId);
 
     H3_Status status = H3_FAILURE;
-    if ((storeStatus = op->metadata_read(_handle, srcObjId, 0, &srcObjMetaValue, &srcMetaSize)) == KV_SUCCESS) {
+    if ((storeStatus = ReadObjectMetadata(ctx, srcObjId, &srcObjMetaValue, &srcMetaSize)) == KV_SUCCESS) {
         H3_ObjectMetadata* srcObjMeta = (H3_ObjectMetadata*)srcObjMetaValue;
         
         // Access the source object
         if (GrantObjectAccess(userId, srcObjMeta)) { 
             
-            if ((storeStatus = op->metadata_read(_handle, dstObjId, 0, &dstObjMetaValue, &dstMetaSize)) == KV_SUCCESS) {
+            if ((storeStatus = ReadObjectMetadata(ctx, dstObjId, &dstObjMetaValue, &dstMetaSize)) == KV_SUCCESS) {
                 H3_ObjectMetadata* dstObjMeta = (H3_ObjectMetadata*)dstObjMetaValue;
 
                 // Access the destination object
@@ -456,8 +772,15 @@ H3_Status CopyOrMoveObjectMetadata(H3_Context* ctx, H3_UserId userId, H3_Name bu
                             GetObjectMetadataId(srcMetadataId, bucketName, srcObjectName, current_metadata_name);
                             H3_ObjectMetadataId dstMetadataId;
                             GetObjectMetadataId(dstMetadataId, bucketName, dstObjectName, current_metadata_name);
-                            
+
+                            // Keep the time indexes in sync with the ExpiresAt/ReadOnlyAfter metadata
+                            char indexed = IsTimeIndexed(current_metadata_name);
+                            if (indexed && (UpdateTimeIndex(ctx, userId, bucketName, dstObjectName, dstObjMeta, current_metadata_name, 0) != KV_SUCCESS ||
+                                            (move && UpdateTimeIndex(ctx, userId, bucketName, srcObjectName, srcObjMeta, current_metadata_name, 0) != KV_SUCCESS))) break;
+
                             if (action(_handle, srcMetadataId, dstMetadataId) != KV_SUCCESS) break;
+
+                            if (indexed && UpdateTimeIndex(ctx, userId, bucketName, dstObjectName, dstObjMeta, current_metadata_name, 1) != KV_SUCCESS) break;
                         }
 
                         // Check for error in deletion
@@ -471,7 +794,7 @@ H3_Status CopyOrMoveObjectMetadata(H3_Context* ctx, H3_UserId userId, H3_Name bu
                     }
 
                     clock_gettime(CLOCK_REALTIME, &dstObjMeta->lastAccess);
-                    if (op->metadata_write(_handle, dstObjId, (KV_Value)dstObjMeta, dstMetaSize) == KV_SUCCESS && storeStatus == KV_SUCCESS) {
+                    if (WriteObjectMetadata(ctx, dstObjId, dstObjMeta) == KV_SUCCESS && storeStatus == KV_SUCCESS) {
                         status = H3_SUCCESS;
                     }
                     free(metadata);
@@ -481,7 +804,7 @@ H3_Status CopyOrMoveObjectMetadata(H3_Context* ctx, H3_UserId userId, H3_Name bu
             } 
 
             clock_gettime(CLOCK_REALTIME, &srcObjMeta->lastAccess);
-            if (op->metadata_write(_handle, srcObjId, (KV_Value)srcObjMeta, srcMetaSize) == KV_SUCCESS && status == H3_SUCCESS) {
+            if (WriteObjectMetadata(ctx, srcObjId, srcObjMeta) == KV_SUCCESS && status == H3_SUCCESS) {
                 status = H3_SUCCESS;
             } else if (storeStatus == KV_KEY_NOT_EXIST) {
                 status = H3_NOT_EXISTS;
@@ -525,6 +848,7 @@ H3_Status CopyOrMoveObjectMetadata(H3_Context* ctx, H3_UserId userId, H3_Name bu
  *
  */
 H3_Status H3_CreateObject(H3_Handle handle, H3_Token token, H3_Name bucketName, H3_Name objectName, void* data, size_t size){
+    H3_TIME_OPERATION(handle, H3_OP_CREATE_OBJECT);
 
     // Argument check. Note we allow zero-sized objects.
     if(!handle || !token  || !bucketName || !objectName ){
@@ -576,13 +900,13 @@ H3_Status H3_CreateObject(H3_Handle handle, H3_Token token, H3_Name bucketName,
         objMeta->readOnly = 0;
 
         // Reserve object
-        if( (storeStatus = op->metadata_create(_handle, objId, (KV_Value)objMeta, objMetaSize)) == KV_SUCCESS){
+        if( (storeStatus = CreateObjectMetadata(ctx, objId, objMeta)) == KV_SUCCESS){
 
             // Write object
             clock_gettime(CLOCK_REALTIME, &objMeta->creation);
-            objMeta->isBad = WriteData(ctx, objMeta, data, size, 0) != KV_SUCCESS?1:0;
+            objMeta->isBad = WriteData(ctx, bucketName, objMeta, data, size, 0) != KV_SUCCESS?1:0;
             objMeta->lastAccess = objMeta->lastModification;
-            if( op->metadata_write(_handle, objId, (KV_Value)objMeta, objMetaSize) == KV_SUCCESS && !objMeta->isBad){
+            if( WriteObjectMetadata(ctx, objId, objMeta) == KV_SUCCESS && !objMeta->isBad){
                 status = H3_SUCCESS;
             }
         }
@@ -623,6 +947,7 @@ H3_Status H3_CreateObject(H3_Handle handle, H3_Token token, H3_Name bucketName,
  *
  */
 H3_Status H3_CreateObjectFromFile(H3_Handle handle, H3_Token token, H3_Name bucketName, H3_Name objectName, int fd, size_t size){
+    H3_TIME_OPERATION(handle, H3_OP_CREATE_OBJECT_FROM_FILE);
 
     // Argument check. Note we allow zero-sized objects.
     if(!handle || !token  || !bucketName || !objectName ){
@@ -674,14 +999,14 @@ H3_Status H3_CreateObjectFromFile(H3_Handle handle, H3_Token token, H3_Name buck
         objMeta->readOnly = 0;
 
         // Reserve object
-        if( (storeStatus = op->metadata_create(_handle, objId, (KV_Value)objMeta, objMetaSize)) == KV_SUCCESS){
+        if( (storeStatus = CreateObjectMetadata(ctx, objId, objMeta)) == KV_SUCCESS){
 
         	size_t readSize, bufferSize = min(H3_CHUNK, size);
         	KV_Value buffer = malloc(bufferSize);
 
         	if(buffer){
         		off_t offset = 0;
-    			while(size && (readSize = read(fd, buffer, bufferSize)) != -1 && readSize && (storeStatus = WriteData(ctx, objMeta, buffer, readSize, offset)) == KV_SUCCESS){
+    			while(size && (readSize = read(fd, buffer, bufferSize)) != -1 && readSize && (storeStatus = WriteData(ctx, bucketName, objMeta, buffer, readSize, offset)) == KV_SUCCESS){
     				offset += readSize;
     				size -= readSize;
     			}
@@ -691,7 +1016,7 @@ H3_Status H3_CreateObjectFromFile(H3_Handle handle, H3_Token token, H3_Name buck
                 objMeta->lastAccess = objMeta->lastModification;
                 objMeta->isBad = storeStatus != KV_SUCCESS?1:0;
 
-                if(op->metadata_write(_handle, objId, (KV_Value)objMeta, objMetaSize) == KV_SUCCESS && readSize != -1 && !objMeta->isBad){
+                if(WriteObjectMetadata(ctx, objId, objMeta) == KV_SUCCESS && readSize != -1 && !objMeta->isBad){
 					status = H3_SUCCESS;
 				}
 
@@ -731,6 +1056,7 @@ H3_Status H3_CreateObjectFromFile(H3_Handle handle, H3_Token token, H3_Name buck
  *
  */
 H3_Status H3_CreateDummyObject(H3_Handle handle, H3_Token token, H3_Name bucketName, H3_Name objectName, const void* buffer, size_t bufferSize, size_t objectSize){
+    H3_TIME_OPERATION(handle, H3_OP_CREATE_DUMMY_OBJECT);
 
     // Argument check. Note we allow zero-sized objects.
     if(!handle || !token  || !bucketName || !objectName || !buffer){
@@ -782,11 +1108,11 @@ H3_Status H3_CreateDummyObject(H3_Handle handle, H3_Token token, H3_Name bucketN
         objMeta->readOnly = 0;
 
         // Reserve object
-        if( (storeStatus = op->metadata_create(_handle, objId, (KV_Value)objMeta, objMetaSize)) == KV_SUCCESS){
+        if( (storeStatus = CreateObjectMetadata(ctx, objId, objMeta)) == KV_SUCCESS){
 
 			off_t offset = 0;
 			size_t writeSize = min(objectSize, bufferSize);
-			while(objectSize && (storeStatus = WriteData(ctx, objMeta, (KV_Value)buffer, writeSize, offset)) == KV_SUCCESS){
+			while(objectSize && (storeStatus = WriteData(ctx, bucketName, objMeta, (KV_Value)buffer, writeSize, offset)) == KV_SUCCESS){
 				offset += writeSize;
 				objectSize -= writeSize;
 				writeSize = min(objectSize, bufferSize);
@@ -797,7 +1123,7 @@ H3_Status H3_CreateDummyObject(H3_Handle handle, H3_Token token, H3_Name bucketN
 			objMeta->lastAccess = objMeta->lastModification;
 			objMeta->isBad = storeStatus != KV_SUCCESS?1:0;
 
-			if(op->metadata_write(_handle, objId, (KV_Value)objMeta, objMetaSize) == KV_SUCCESS && !objectSize && !objMeta->isBad){
+			if(WriteObjectMetadata(ctx, objId, objMeta) == KV_SUCCESS && !objectSize && !objMeta->isBad){
 				status = H3_SUCCESS;
 			}
         }
@@ -840,6 +1166,7 @@ H3_Status H3_CreateDummyObject(H3_Handle handle, H3_Token token, H3_Name bucketN
  *
  */
 H3_Status H3_ReadObject(H3_Handle handle, H3_Token token, H3_Name bucketName, H3_Name objectName, off_t offset, void** data, size_t* size){
+    H3_TIME_OPERATION(handle, H3_OP_READ_OBJECT);
 
     // Argument check
     if(!handle || !token  || !bucketName || !objectName || !data || !size ){
@@ -868,7 +1195,7 @@ H3_Status H3_ReadObject(H3_Handle handle, H3_Token token, H3_Name bucketName, H3
 
     status = H3_FAILURE;
     GetObjectId(bucketName, objectName, objId);
-    if( (storeStatus = op->metadata_read(_handle, objId, 0, &value, &mSize)) == KV_SUCCESS){
+    if( (storeStatus = ReadObjectMetadata(ctx, objId, &value, &mSize)) == KV_SUCCESS){
         H3_ObjectMetadata* objMeta = (H3_ObjectMetadata*)value;
         size_t objectSize = 0;
 
@@ -893,7 +1220,7 @@ H3_Status H3_ReadObject(H3_Handle handle, H3_Token token, H3_Name bucketName, H3
             clock_gettime(CLOCK_REALTIME, &objMeta->lastAccess);
             if(*data){
                 if( ReadData(ctx, objMeta, *data, size, offset) == KV_SUCCESS                      &&
-                    op->metadata_write(_handle, objId, (KV_Value)objMeta, mSize) == KV_SUCCESS     ){
+                    WriteObjectMetadata(ctx, objId, objMeta) == KV_SUCCESS     ){
 
                     if((objectSize - offset) > *size)
                         status = H3_CONTINUE;
@@ -937,6 +1264,7 @@ H3_Status H3_ReadObject(H3_Handle handle, H3_Token token, H3_Name bucketName, H3
  *
  */
 H3_Status H3_ReadDummyObject(H3_Handle handle, H3_Token token, H3_Name bucketName, H3_Name objectName, size_t* size){
+    H3_TIME_OPERATION(handle, H3_OP_READ_DUMMY_OBJECT);
 
     // Argument check
     if(!handle || !token  || !bucketName || !objectName || !size ){
@@ -965,7 +1293,7 @@ H3_Status H3_ReadDummyObject(H3_Handle handle, H3_Token token, H3_Name bucketNam
 
     status = H3_FAILURE;
     GetObjectId(bucketName, objectName, objId);
-    if( (storeStatus = op->metadata_read(_handle, objId, 0, &value, &mSize)) == KV_SUCCESS){
+    if( (storeStatus = ReadObjectMetadata(ctx, objId, &value, &mSize)) == KV_SUCCESS){
         H3_ObjectMetadata* objMeta = (H3_ObjectMetadata*)value;
         size_t objectSize = 0;
 
@@ -991,7 +1319,7 @@ H3_Status H3_ReadDummyObject(H3_Handle handle, H3_Token token, H3_Name bucketNam
 
             	free(buffer);
 
-            	*size = objMeta->part[objMeta->nParts-1].offset + objMeta->part[objMeta->nParts-1].size - objectSize;
+            	*size = offset;
 
             	if(!objectSize)
             		status = H3_SUCCESS;
@@ -1033,6 +1361,7 @@ H3_Status H3_ReadDummyObject(H3_Handle handle, H3_Token token, H3_Name bucketNam
  *
  */
 H3_Status H3_ReadObjectToFile(H3_Handle handle, H3_Token token, H3_Name bucketName, H3_Name objectName, off_t offset, int fd, size_t* size){
+    H3_TIME_OPERATION(handle, H3_OP_READ_OBJECT_TO_FILE);
 
     // Argument check
     if(!handle || !token  || !bucketName || !objectName || fd < 0 || !size ){
@@ -1061,7 +1390,7 @@ H3_Status H3_ReadObjectToFile(H3_Handle handle, H3_Token token, H3_Name bucketNa
 
     status = H3_FAILURE;
     GetObjectId(bucketName, objectName, objId);
-    if( (storeStatus = op->metadata_read(_handle, objId, 0, &value, &mSize)) == KV_SUCCESS){
+    if( (storeStatus = ReadObjectMetadata(ctx, objId, &value, &mSize)) == KV_SUCCESS){
         H3_ObjectMetadata* objMeta = (H3_ObjectMetadata*)value;
         size_t availableSize = 0, objectSize = 0;
 
@@ -1091,7 +1420,7 @@ H3_Status H3_ReadObjectToFile(H3_Handle handle, H3_Token token, H3_Name bucketNa
         		free(buffer);
 
         		clock_gettime(CLOCK_REALTIME, &objMeta->lastAccess);
-        		if(storeStatus == KV_SUCCESS && chunkSize != -1 && op->metadata_write(_handle, objId, (KV_Value)objMeta, mSize) == KV_SUCCESS){
+        		if(storeStatus == KV_SUCCESS && chunkSize != -1 && WriteObjectMetadata(ctx, objId, objMeta) == KV_SUCCESS){
 
         			if(*size)
         				*size -= requiredSize;
@@ -1138,6 +1467,7 @@ H3_Status H3_ReadObjectToFile(H3_Handle handle, H3_Token token, H3_Name bucketNa
  *
  */
 H3_Status H3_InfoObject(H3_Handle handle, H3_Token token, H3_Name bucketName, H3_Name objectName, H3_ObjectInfo* objectInfo){
+    H3_TIME_OPERATION(handle, H3_OP_INFO_OBJECT);
 
     // Argument check
     if(!handle || !token  || !bucketName || !objectName || !objectInfo ){
@@ -1166,7 +1496,7 @@ H3_Status H3_InfoObject(H3_Handle handle, H3_Token token, H3_Name bucketName, H3
 
     status = H3_FAILURE;
     GetObjectId(bucketName, objectName, objId);
-    if((storeStatus = op->metadata_read(_handle, objId, 0, &value, &mSize)) == KV_SUCCESS){
+    if((storeStatus = ReadObjectMetadata(ctx, objId, &value, &mSize)) == KV_SUCCESS){
 
         // Make sure user has access to the object
         H3_ObjectMetadata* objMeta = (H3_ObjectMetadata*)value;
@@ -1219,6 +1549,7 @@ H3_Status H3_InfoObject(H3_Handle handle, H3_Token token, H3_Name bucketName, H3
  *
  */
 H3_Status H3_TouchObject(H3_Handle handle, H3_Token token, H3_Name bucketName, H3_Name objectName, struct timespec *lastAccess, struct timespec *lastModification){
+    H3_TIME_OPERATION(handle, H3_OP_TOUCH_OBJECT);
 
     // Argument check
     if(!handle || !token  || !bucketName || !objectName || !lastAccess || !lastModification ){
@@ -1247,12 +1578,15 @@ H3_Status H3_TouchObject(H3_Handle handle, H3_Token token, H3_Name bucketName, H
 
     status = H3_FAILURE;
     GetObjectId(bucketName, objectName, objId);
-    if((storeStatus = op->metadata_read(_handle, objId, 0, &value, &mSize)) == KV_SUCCESS){
+    if((storeStatus = ReadObjectMetadata(ctx, objId, &value, &mSize)) == KV_SUCCESS){
 
         // Make sure user has access to the object
         H3_ObjectMetadata* objMeta = (H3_ObjectMetadata*)value;
         if(GrantObjectAccess(userId, objMeta)){
 
+            // The ReadOnlyAfter deadline follows the last modification, which may also move backwards
+            UpdateTimeIndex(ctx, userId, bucketName, objectName, objMeta, H3_READ_ONLY_AFTER_METADATA, 0);
+
             clock_gettime(CLOCK_REALTIME, &objMeta->lastChange);
             if (lastAccess == NULL)
                 objMeta->lastAccess = objMeta->lastChange;
@@ -1263,7 +1597,8 @@ H3_Status H3_TouchObject(H3_Handle handle, H3_Token token, H3_Name bucketName, H
             else
                 objMeta->lastModification = *lastModification;
 
-            if(op->metadata_write(_handle, objId, (KV_Value)objMeta, mSize) == KV_SUCCESS){
+            if(WriteObjectMetadata(ctx, objId, objMeta) == KV_SUCCESS &&
+               UpdateTimeIndex(ctx, userId, bucketName, objectName, objMeta, H3_READ_ONLY_AFTER_METADATA, 1) == KV_SUCCESS){
                 status = H3_SUCCESS;
             }
         }
@@ -1297,6 +1632,7 @@ H3_Status H3_TouchObject(H3_Handle handle, H3_Token token, H3_Name bucketName, H
  *
  */
 H3_Status H3_SetObjectAttributes(H3_Handle handle, H3_Token token, H3_Name bucketName, H3_Name objectName, H3_Attribute attrib){
+    H3_TIME_OPERATION(handle, H3_OP_SET_OBJECT_ATTRIBUTES);
 
     // Argument check
     if(!handle || !token  || !bucketName || !objectName || attrib.type >= H3_NumOfAttributes){
@@ -1325,7 +1661,7 @@ H3_Status H3_SetObjectAttributes(H3_Handle handle, H3_Token token, H3_Name bucke
 
     status = H3_FAILURE;
     GetObjectId(bucketName, objectName, objId);
-    if((storeStatus = op->metadata_read(_handle, objId, 0, &value, &mSize)) == KV_SUCCESS){
+    if((storeStatus = ReadObjectMetadata(ctx, objId, &value, &mSize)) == KV_SUCCESS){
 
         // Make sure user has access to the object
         H3_ObjectMetadata* objMeta = (H3_ObjectMetadata*)value;
@@ -1336,13 +1672,17 @@ H3_Status H3_SetObjectAttributes(H3_Handle handle, H3_Token token, H3_Name bucke
             } else if (attrib.type == H3_ATTRIBUTE_READ_ONLY) {
                 if (!objMeta->readOnly)
                     objMeta->readOnly = attrib.readOnly;
+
+                // There is no way back, so the ReadOnlyAfter deadline is of no use anymore
+                if (objMeta->readOnly)
+                    UpdateTimeIndex(ctx, userId, bucketName, objectName, objMeta, H3_READ_ONLY_AFTER_METADATA, 0);
             } else {
                 if(attrib.uid >= 0) objMeta->uid = attrib.uid;
                 if(attrib.gid >= 0) objMeta->gid = attrib.gid;
             }
 
             clock_gettime(CLOCK_REALTIME, &objMeta->lastChange);
-            if(op->metadata_write(_handle, objId, (KV_Value)objMeta, mSize) == KV_SUCCESS){
+            if(WriteObjectMetadata(ctx, objId, objMeta) == KV_SUCCESS){
                 status = H3_SUCCESS;
             }
         }
@@ -1365,7 +1705,7 @@ H3_Status DeleteObject(H3_Context* ctx, H3_UserId userId, H3_ObjectId objId, cha
     KV_Value value = NULL;
     size_t mSize = 0;
 
-    if( (storeStatus = op->metadata_read(_handle, objId, 0, &value, &mSize)) == KV_SUCCESS ){
+    if( (storeStatus = ReadObjectMetadata(ctx, objId, &value, &mSize)) == KV_SUCCESS ){
 
         // Make sure user has access to the object
         H3_ObjectMetadata* objMeta = (H3_ObjectMetadata*)value;
@@ -1395,9 +1735,9 @@ H3_Status DeleteObject(H3_Context* ctx, H3_UserId userId, H3_ObjectId objId, cha
             clock_gettime(CLOCK_REALTIME, &objMeta->lastAccess);
             if(objMeta->nParts){
                 objMeta->isBad = 1;
-                op->metadata_write(_handle, objId, (KV_Value)objMeta, mSize);
+                WriteObjectMetadata(ctx, objId, objMeta);
             }
-            else if(( truncate && op->metadata_write(_handle, objId, (KV_Value)objMeta, mSize) == KV_SUCCESS) ||
+            else if(( truncate && WriteObjectMetadata(ctx, objId, objMeta) == KV_SUCCESS) ||
                     (!truncate && storeStatus == KV_SUCCESS && op->metadata_delete(_handle, objId) == KV_SUCCESS)                                ){
                 status = H3_SUCCESS;
             }
@@ -1431,6 +1771,7 @@ H3_Status DeleteObject(H3_Context* ctx, H3_UserId userId, H3_ObjectId objId, cha
  *
  */
 H3_Status H3_DeleteObject(H3_Handle handle, H3_Token token, H3_Name bucketName, H3_Name objectName){
+    H3_TIME_OPERATION(handle, H3_OP_DELETE_OBJECT);
 
     // Argument check
     if(!handle || !token  || !bucketName || !objectName){
@@ -1476,6 +1817,8 @@ H3_Status H3_DeleteObject(H3_Handle handle, H3_Token token, H3_Name bucketName,
  *
  */
 H3_Status H3_TruncateObject(H3_Handle handle, H3_Token token, H3_Name bucketName, H3_Name objectName, size_t size){
+    H3_TIME_OPERATION(handle, H3_OP_TRUNCATE_OBJECT);
+
     // Argument check
     if(!handle || !token  || !bucketName || !objectName){
         return H3_INVALID_ARGS;
@@ -1507,7 +1850,7 @@ H3_Status H3_TruncateObject(H3_Handle handle, H3_Token token, H3_Name bucketName
     	return DeleteObject(ctx, userId, objId, 1);
 
     status = H3_FAILURE;
-    if((storeStatus = op->metadata_read(_handle, objId, 0, &value, &mSize)) == KV_SUCCESS){
+    if((storeStatus = ReadObjectMetadata(ctx, objId, &value, &mSize)) == KV_SUCCESS){
 
         // Make sure user has access to the object
         H3_ObjectMetadata* objMeta = (H3_ObjectMetadata*)value;
@@ -1536,7 +1879,7 @@ H3_Status H3_TruncateObject(H3_Handle handle, H3_Token token, H3_Name bucketName
 
 					if(buffer){
 						// Write the nulls
-						while(extra && WriteData(ctx, objMeta, buffer, writeSize, objectSize) == KV_SUCCESS){
+						while(extra && WriteData(ctx, bucketName, objMeta, buffer, writeSize, objectSize) == KV_SUCCESS){
 							objectSize += writeSize;
 							extra -= writeSize;
 							writeSize = min(H3_CHUNK, extra);
@@ -1545,7 +1888,7 @@ H3_Status H3_TruncateObject(H3_Handle handle, H3_Token token, H3_Name bucketName
 						if(extra)
 							objMeta->isBad = 1;
 
-						if(op->metadata_write(_handle, objId, (KV_Value)objMeta, objMetaSize) == KV_SUCCESS && !objMeta->isBad){
+						if(WriteObjectMetadata(ctx, objId, objMeta) == KV_SUCCESS && !objMeta->isBad){
 							status = H3_SUCCESS;
 						}
 
@@ -1580,7 +1923,7 @@ H3_Status H3_TruncateObject(H3_Handle handle, H3_Token token, H3_Name bucketName
 					objMeta->isBad = 1;
 
 				clock_gettime(CLOCK_REALTIME, &objMeta->lastModification);
-				if(op->metadata_write(_handle, objId, (KV_Value)objMeta, mSize) == KV_SUCCESS && !objMeta->isBad){
+				if(WriteObjectMetadata(ctx, objId, objMeta) == KV_SUCCESS && !objMeta->isBad){
 					status = H3_SUCCESS;
 				}
         	}
@@ -1637,7 +1980,7 @@ H3_Status MoveObject(H3_Handle handle, H3_Token token, H3_Name bucketName, H3_Na
     GetObjectId(bucketName, dstObjectName, dstObjId);
 
     status = H3_FAILURE;
-    if( (storeStatus = op->metadata_read(_handle, srcObjId, 0, &value, &srcMetaSize)) == KV_SUCCESS){
+    if( (storeStatus = ReadObjectMetadata(ctx, srcObjId, &value, &srcMetaSize)) == KV_SUCCESS){
 
         // Make sure the user has access to the source object
         H3_ObjectMetadata* srcObjMeta = (H3_ObjectMetadata*)value;
@@ -1648,7 +1991,7 @@ H3_Status MoveObject(H3_Handle handle, H3_Token token, H3_Name bucketName, H3_Na
             H3_Name tempObject = GenerateDummyObjectName();
             GetObjectId(bucketName, tempObject, tempObjectId);
             
-            switch(op->metadata_read(_handle, dstObjId, 0, &value, &dstMetaSize)){
+            switch(ReadObjectMetadata(ctx, dstObjId, &value, &dstMetaSize)){
 
                 case KV_SUCCESS:{
                     // Make sure the user has access to the destination object
@@ -1672,8 +2015,8 @@ H3_Status MoveObject(H3_Handle handle, H3_Token token, H3_Name bucketName, H3_Na
                                 break;
 
                             case MoveExchange:
-                                if(op->metadata_write(_handle, srcObjId, (KV_Value)dstObjMeta, dstMetaSize) == KV_SUCCESS &&
-                                   op->metadata_write(_handle, dstObjId, (KV_Value)srcObjMeta, srcMetaSize) == KV_SUCCESS    ){
+                                if(WriteObjectMetadata(ctx, srcObjId, dstObjMeta) == KV_SUCCESS &&
+                                   WriteObjectMetadata(ctx, dstObjId, srcObjMeta) == KV_SUCCESS    ){
                                     status = H3_SUCCESS;
                                 }
                                 break;
@@ -1736,6 +2079,8 @@ H3_Status MoveObject(H3_Handle handle, H3_Token token, H3_Name bucketName, H3_Na
  *
  */
 H3_Status H3_MoveObject(H3_Handle handle, H3_Token token, H3_Name bucketName, H3_Name srcObjectName, H3_Name dstObjectName, uint8_t noOverwrite){
+    H3_TIME_OPERATION(handle, H3_OP_MOVE_OBJECT);
+
     return MoveObject(handle, token, bucketName, srcObjectName, dstObjectName, noOverwrite?MoveNoReplace:MoveReplace);
 }
 
@@ -1760,6 +2105,8 @@ H3_Status H3_MoveObject(H3_Handle handle, H3_Token token, H3_Name bucketName, H3
  *
  */
 H3_Status H3_ExchangeObject(H3_Handle handle, H3_Token token, H3_Name bucketName, H3_Name srcObjectName, H3_Name dstObjectName){
+    H3_TIME_OPERATION(handle, H3_OP_EXCHANGE_OBJECT);
+
     return MoveObject(handle, token, bucketName, srcObjectName, dstObjectName, MoveExchange);
 }
 
@@ -1785,6 +2132,7 @@ H3_Status H3_ExchangeObject(H3_Handle handle, H3_Token token, H3_Name bucketName
  *
  */
 H3_Status H3_CopyObject(H3_Handle handle, H3_Token token, H3_Name bucketName, H3_Name srcObjectName, H3_Name dstObjectName, uint8_t noOverwrite){
+    H3_TIME_OPERATION(handle, H3_OP_COPY_OBJECT);
 
     // Argument check
     if(!handle || !token  || !bucketName || !srcObjectName || !dstObjectName){
@@ -1817,7 +2165,7 @@ H3_Status H3_CopyObject(H3_Handle handle, H3_Token token, H3_Name bucketName, H3
     GetObjectId(bucketName, dstObjectName, dstObjId);
 
     status = H3_FAILURE;
-    if( (storeStatus = op->metadata_read(_handle, srcObjId, 0, &value, &mSize)) == KV_SUCCESS){
+    if( (storeStatus = ReadObjectMetadata(ctx, srcObjId, &value, &mSize)) == KV_SUCCESS){
 
         // Make sure the user has access to the object
         H3_ObjectMetadata* srcObjMeta = (H3_ObjectMetadata*)value;
@@ -1837,7 +2185,7 @@ H3_Status H3_CopyObject(H3_Handle handle, H3_Token token, H3_Name bucketName, H3
                 // Reserve the destination object
                 uuid_generate(dstObjMeta->uuid);
                 dstObjMeta->nParts = 0;
-                if(op->metadata_create(_handle, dstObjId, (KV_Value)dstObjMeta, mSize) == KV_SUCCESS){
+                if(CreateObjectMetadata(ctx, dstObjId, dstObjMeta) == KV_SUCCESS){
 
                     // Copy the parts
                     H3_PartId srcPartId, dstPartId;
@@ -1861,8 +2209,8 @@ H3_Status H3_CopyObject(H3_Handle handle, H3_Token token, H3_Name bucketName, H3
                     // Update source metadata
                     clock_gettime(CLOCK_REALTIME, &srcObjMeta->lastAccess);
 
-                    if( op->metadata_write(_handle, dstObjId, (KV_Value)dstObjMeta, mSize)== KV_SUCCESS &&
-                        op->metadata_write(_handle, srcObjId, (KV_Value)srcObjMeta, mSize)== KV_SUCCESS && status == H3_SUCCESS){
+                    if( WriteObjectMetadata(ctx, dstObjId, dstObjMeta)== KV_SUCCESS &&
+                        WriteObjectMetadata(ctx, srcObjId, srcObjMeta)== KV_SUCCESS && status == H3_SUCCESS){
                         status = H3_SUCCESS;
                     } else {
                         status = H3_FAILURE;
@@ -1913,6 +2261,7 @@ H3_Status H3_CopyObject(H3_Handle handle, H3_Token token, H3_Name bucketName, H3
  *
  */
 H3_Status H3_ListObjects(H3_Handle handle, H3_Token token, H3_Name bucketName, H3_Name prefix, uint32_t offset, H3_Name* objectNameArray, uint32_t* nObjects){
+    H3_TIME_OPERATION(handle, H3_OP_LIST_OBJECTS);
 
     // Argument check. Note a 'prefix' is not required.
     if(!handle || !token  || !bucketName || !objectNameArray || !nObjects){
@@ -1993,6 +2342,7 @@ H3_Status H3_ListObjects(H3_Handle handle, H3_Token token, H3_Name bucketName, H
  *
  */
 H3_Status H3_ForeachObject(H3_Handle handle, H3_Token token, H3_Name bucketName, H3_Name prefix, uint32_t nObjects, uint32_t offset, h3_name_iterator_cb function, void* userData){
+    H3_TIME_OPERATION(handle, H3_OP_FOREACH_OBJECT);
 
     // Argument check. Note a 'prefix' is not required.
     if(!handle || !token  || !bucketName){
@@ -2085,6 +2435,7 @@ H3_Status H3_ForeachObject(H3_Handle handle, H3_Token token, H3_Name bucketName,
  *
  */
 H3_Status H3_WriteObject(H3_Handle handle, H3_Token token, H3_Name bucketName, H3_Name objectName, void* data, size_t size, off_t offset){
+    H3_TIME_OPERATION(handle, H3_OP_WRITE_OBJECT);
 
     LogActivity(H3_DEBUG_MSG, "Enter\n");
 
@@ -2123,7 +2474,7 @@ H3_Status H3_WriteObject(H3_Handle handle, H3_Token token, H3_Name bucketName, H
         return H3_NAME_TOO_LONG;
 
     // Get object metadata and make sure we have access
-    if((storeStatus = op->metadata_read(_handle, objId, 0, &value, &mSize)) == KV_KEY_TOO_LONG){
+    if((storeStatus = ReadObjectMetadata(ctx, objId, &value, &mSize)) == KV_KEY_TOO_LONG){
         return H3_NAME_TOO_LONG;
     }
     else if(storeStatus != KV_SUCCESS)
@@ -2143,17 +2494,17 @@ H3_Status H3_WriteObject(H3_Handle handle, H3_Token token, H3_Name bucketName, H
         if(objMeta){
 
 #ifndef DEBUG
-			if( (storeStatus = WriteData(ctx, objMeta, data, size, offset)) == KV_SUCCESS         &&
-				(storeStatus = op->metadata_write(_handle, objId, (KV_Value)objMeta, objMetaSize)) == KV_SUCCESS     ){
+			if( (storeStatus = WriteData(ctx, bucketName, objMeta, data, size, offset)) == KV_SUCCESS         &&
+				(storeStatus = WriteObjectMetadata(ctx, objId, objMeta)) == KV_SUCCESS     ){
 				status = H3_SUCCESS;
 			}
 			else if(storeStatus == KV_KEY_TOO_LONG)
 				status = H3_NAME_TOO_LONG;
 #else
-			if( (storeStatus = WriteData(ctx, objMeta, data, size, offset)) != KV_SUCCESS ){
+			if( (storeStatus = WriteData(ctx, bucketName, objMeta, data, size, offset)) != KV_SUCCESS ){
 				LogActivity(H3_ERROR_MSG, "failed to write data\n");
 			}
-			else if( (storeStatus = op->metadata_write(_handle, objId, (KV_Value)objMeta, objMetaSize)) != KV_SUCCESS){
+			else if( (storeStatus = WriteObjectMetadata(ctx, objId, objMeta)) != KV_SUCCESS){
 				LogActivity(H3_ERROR_MSG, "failed to update meta-data\n");
 			}
 
@@ -2202,6 +2553,7 @@ H3_Status H3_WriteObject(H3_Handle handle, H3_Token token, H3_Name bucketName, H
  *
  */
 H3_Status H3_WriteObjectFromFile(H3_Handle handle, H3_Token token, H3_Name bucketName, H3_Name objectName, int fd, size_t size, off_t offset){
+    H3_TIME_OPERATION(handle, H3_OP_WRITE_OBJECT_FROM_FILE);
 
     if(!handle || !token  || !bucketName || !objectName || fd < 0){
         return H3_INVALID_ARGS;
@@ -2237,7 +2589,7 @@ H3_Status H3_WriteObjectFromFile(H3_Handle handle, H3_Token token, H3_Name bucke
         return H3_NAME_TOO_LONG;
 
     // Get object metadata and make sure we have access
-    if((storeStatus = op->metadata_read(_handle, objId, 0, &value, &mSize)) == KV_KEY_TOO_LONG){
+    if((storeStatus = ReadObjectMetadata(ctx, objId, &value, &mSize)) == KV_KEY_TOO_LONG){
         return H3_NAME_TOO_LONG;
     }
     else if(storeStatus != KV_SUCCESS)
@@ -2260,12 +2612,12 @@ H3_Status H3_WriteObjectFromFile(H3_Handle handle, H3_Token token, H3_Name bucke
 			KV_Value buffer = malloc(bufferSize);
 
 			if(buffer){
-				while(size && (readSize = read(fd, buffer, bufferSize)) != -1 && readSize && (storeStatus = WriteData(ctx, objMeta, buffer, readSize, offset)) == KV_SUCCESS){
+				while(size && (readSize = read(fd, buffer, bufferSize)) != -1 && readSize && (storeStatus = WriteData(ctx, bucketName, objMeta, buffer, readSize, offset)) == KV_SUCCESS){
 					offset += readSize;
 					size -= readSize;
 				}
 
-				if(readSize != -1 && storeStatus == KV_SUCCESS && op->metadata_write(_handle, objId, (KV_Value)objMeta, objMetaSize) == KV_SUCCESS ){
+				if(readSize != -1 && storeStatus == KV_SUCCESS && WriteObjectMetadata(ctx, objId, objMeta) == KV_SUCCESS ){
 					status = H3_SUCCESS;
 				}
 
@@ -2300,6 +2652,7 @@ H3_Status H3_WriteObjectFromFile(H3_Handle handle, H3_Token token, H3_Name bucke
  *
  */
 H3_Status H3_CreateObjectCopy(H3_Handle handle, H3_Token token, H3_Name bucketName, H3_Name srcObjectName, off_t offset, size_t* size, H3_Name dstObjectName){
+    H3_TIME_OPERATION(handle, H3_OP_CREATE_OBJECT_COPY);
 
     // Argument check
     if(!handle || !token  || !bucketName || !srcObjectName || !dstObjectName){
@@ -2371,6 +2724,7 @@ H3_Status H3_CreateObjectCopy(H3_Handle handle, H3_Token token, H3_Name bucketNa
  *
  */
 H3_Status H3_WriteObjectCopy(H3_Handle handle, H3_Token token, H3_Name bucketName, H3_Name srcObjectName, off_t srcOffset, size_t* size, H3_Name dstObjectName, off_t dstOffset){
+    H3_TIME_OPERATION(handle, H3_OP_WRITE_OBJECT_COPY);
 
     // Argument check
     if(!handle || !token  || !bucketName || !srcObjectName || !dstObjectName){
@@ -2437,6 +2791,8 @@ H3_Status H3_WriteObjectCopy(H3_Handle handle, H3_Token token, H3_Name bucketNam
  *
  */
 H3_Status H3_CreateObjectMetadata(H3_Handle handle, H3_Token token, H3_Name bucketName, H3_Name objectName, H3_Name metadataName, void* data, size_t size) {
+    H3_TIME_OPERATION(handle, H3_OP_CREATE_OBJECT_METADATA);
+
     // We don't care if the size == 0.
     if (!handle || !token  || !bucketName || !objectName || !metadataName || !data) {
         return H3_INVALID_ARGS;
@@ -2468,7 +2824,7 @@ H3_Status H3_CreateObjectMetadata(H3_Handle handle, H3_Token token, H3_Name buck
     GetObjectId(bucketName, objectName, objId);
     
     status = H3_FAILURE;
-    if ((storeStatus = op->metadata_read(_handle, objId, 0, &objMetaValue, &mSize)) == KV_SUCCESS) {
+    if ((storeStatus = ReadObjectMetadata(ctx, objId, &objMetaValue, &mSize)) == KV_SUCCESS) {
         H3_ObjectMetadata* objMeta = (H3_ObjectMetadata*)objMetaValue;
 
         // Access the object
@@ -2476,20 +2832,28 @@ H3_Status H3_CreateObjectMetadata(H3_Handle handle, H3_Token token, H3_Name buck
 
             H3_ObjectMetadataId objectMetaId;
         	GetObjectMetadataId(objectMetaId, bucketName, objectName, metadataName);
-            
+            char indexed = IsTimeIndexed(metadataName);
+
+            // Drop the index entry of the value about to be replaced
+            if (indexed && (storeStatus = UpdateTimeIndex(ctx, userId, bucketName, objectName, objMeta, metadataName, 0)) != KV_SUCCESS) {
+                status = H3_FAILURE;
             //Store it if not exists
-            if ((storeStatus = op->create(_handle, objectMetaId, (KV_Value)data, size)) == KV_SUCCESS) {
+            } else if ((storeStatus = op->create(_handle, objectMetaId, (KV_Value)data, size, bucketName)) == KV_SUCCESS) {
                 status = H3_SUCCESS;
-            //Otherwise update 
+            //Otherwise replace it
             } else if (storeStatus == KV_KEY_EXIST) {
-                if ((storeStatus = op->update(_handle, objectMetaId, (KV_Value)data, 0, size)) == KV_SUCCESS) {
+                if ((storeStatus = op->write(_handle, objectMetaId, (KV_Value)data, size, bucketName)) == KV_SUCCESS) {
                     status = H3_SUCCESS;
                 }
             }
 
+            if (status == H3_SUCCESS && indexed && (storeStatus = UpdateTimeIndex(ctx, userId, bucketName, objectName, objMeta, metadataName, 1)) != KV_SUCCESS) {
+                status = H3_FAILURE;
+            }
+
             clock_gettime(CLOCK_REALTIME, &objMeta->lastAccess);
             clock_gettime(CLOCK_REALTIME, &objMeta->lastChange);
-            if (op->metadata_write(_handle, objId, (KV_Value)objMeta, mSize) == KV_SUCCESS && status == H3_SUCCESS) {
+            if (WriteObjectMetadata(ctx, objId, objMeta) == KV_SUCCESS && status == H3_SUCCESS) {
                 status = H3_SUCCESS;
             } else if (storeStatus == KV_KEY_NOT_EXIST) { 
                 status = H3_NOT_EXISTS;
@@ -2530,6 +2894,8 @@ H3_Status H3_CreateObjectMetadata(H3_Handle handle, H3_Token token, H3_Name buck
  *
  */
 H3_Status H3_ReadObjectMetadata(H3_Handle handle, H3_Token token, H3_Name bucketName, H3_Name objectName, H3_Name metadataName, void** data, size_t* size){
+    H3_TIME_OPERATION(handle, H3_OP_READ_OBJECT_METADATA);
+
     if (!handle || !token  || !bucketName || !objectName || !metadataName) {
         return H3_INVALID_ARGS;
     }
@@ -2560,7 +2926,7 @@ H3_Status H3_ReadObjectMetadata(H3_Handle handle, H3_Token token, H3_Name bucket
     GetObjectId(bucketName, objectName, objId);
 
     status = H3_FAILURE;
-    if ((storeStatus = op->metadata_read(_handle, objId, 0, &objMetaValue, &mSize)) == KV_SUCCESS) {
+    if ((storeStatus = ReadObjectMetadata(ctx, objId, &objMetaValue, &mSize)) == KV_SUCCESS) {
         H3_ObjectMetadata* objMeta = (H3_ObjectMetadata*)objMetaValue;
         
         // Access the object
@@ -2582,7 +2948,7 @@ H3_Status H3_ReadObjectMetadata(H3_Handle handle, H3_Token token, H3_Name bucket
             }
 
             clock_gettime(CLOCK_REALTIME, &objMeta->lastAccess);
-            if (op->metadata_write(_handle, objId, (KV_Value)objMeta, mSize) == KV_SUCCESS && status == H3_SUCCESS) {
+            if (WriteObjectMetadata(ctx, objId, objMeta) == KV_SUCCESS && status == H3_SUCCESS) {
                 status = H3_SUCCESS;
             } else if (storeStatus == KV_KEY_NOT_EXIST) { 
                 status = H3_NOT_EXISTS;
@@ -2621,6 +2987,8 @@ H3_Status H3_ReadObjectMetadata(H3_Handle handle, H3_Token token, H3_Name bucket
  *
  */
 H3_Status H3_DeleteObjectMetadata(H3_Handle handle, H3_Token token, H3_Name bucketName, H3_Name objectName, H3_Name metadataName) {
+    H3_TIME_OPERATION(handle, H3_OP_DELETE_OBJECT_METADATA);
+
     if (!handle || !token  || !bucketName || !objectName || !metadataName) {
         return H3_INVALID_ARGS;
     }
@@ -2651,7 +3019,7 @@ H3_Status H3_DeleteObjectMetadata(H3_Handle handle, H3_Token token, H3_Name buck
     GetObjectId(bucketName, objectName, objId);
 
     status = H3_FAILURE;
-    if ((storeStatus = op->metadata_read(_handle, objId, 0, &objMetaValue, &mSize)) == KV_SUCCESS) {
+    if ((storeStatus = ReadObjectMetadata(ctx, objId, &objMetaValue, &mSize)) == KV_SUCCESS) {
         H3_ObjectMetadata* objMeta = (H3_ObjectMetadata*)objMetaValue;
         
         // Access the object
@@ -2660,13 +3028,14 @@ H3_Status H3_DeleteObjectMetadata(H3_Handle handle, H3_Token token, H3_Name buck
             H3_ObjectMetadataId objectMetaId;
         	GetObjectMetadataId(objectMetaId, bucketName, objectName, metadataName);
             
-            // Delete it
-            if ((storeStatus = op->delete(_handle, objectMetaId)) == KV_SUCCESS) 
+            // Delete it, along with its time index entry
+            if ((!IsTimeIndexed(metadataName) || (storeStatus = UpdateTimeIndex(ctx, userId, bucketName, objectName, objMeta, metadataName, 0)) == KV_SUCCESS) &&
+                (storeStatus = op->delete(_handle, objectMetaId)) == KV_SUCCESS) 
                 status = H3_SUCCESS;
 
             clock_gettime(CLOCK_REALTIME, &objMeta->lastAccess);
             clock_gettime(CLOCK_REALTIME, &objMeta->lastChange);
-            if (op->metadata_write(_handle, objId, (KV_Value)objMeta, mSize) == KV_SUCCESS && status == H3_SUCCESS) {
+            if (WriteObjectMetadata(ctx, objId, objMeta) == KV_SUCCESS && status == H3_SUCCESS) {
                 status = H3_SUCCESS;
             } else if (storeStatus == KV_KEY_NOT_EXIST) { 
                 status = H3_NOT_EXISTS;
@@ -2703,6 +3072,8 @@ H3_Status H3_DeleteObjectMetadata(H3_Handle handle, H3_Token token, H3_Name buck
  *
  */
 H3_Status H3_CopyObjectMetadata(H3_Handle handle, H3_Token token, H3_Name bucketName, H3_Name srcObjectName, H3_Name dstObjectName) {
+    H3_TIME_OPERATION(handle, H3_OP_COPY_OBJECT_METADATA);
+
     if (!handle || !token  || !bucketName || !srcObjectName || !dstObjectName) {
         return H3_INVALID_ARGS;
     }
@@ -2746,6 +3117,8 @@ H3_Status H3_CopyObjectMetadata(H3_Handle handle, H3_Token token, H3_Name bucket
  *
  */
 H3_Status H3_MoveObjectMetadata(H3_Handle handle, H3_Token token, H3_Name bucketName, H3_Name srcObjectName, H3_Name dstObjectName) {
+    H3_TIME_OPERATION(handle, H3_OP_MOVE_OBJECT_METADATA);
+
     if (!handle || !token  || !bucketName || !srcObjectName || !dstObjectName) {
         return H3_INVALID_ARGS;
     }
@@ -2796,6 +3169,8 @@ H3_Status H3_MoveObjectMetadata(H3_Handle handle, H3_Token token, H3_Name bucket
  *
  */
 H3_Status H3_ListObjectsWithMetadata(H3_Handle handle, H3_Token token, H3_Name bucketName, H3_Name metadataName, uint32_t offset, H3_Name* objectNameArray, uint32_t* nObjects, uint32_t *nextOffset) {
+    H3_TIME_OPERATION(handle, H3_OP_LIST_OBJECTS_WITH_METADATA);
+
     if (!handle || !token  || !bucketName || !metadataName || !objectNameArray || !nObjects) {
         return H3_INVALID_ARGS;
     }
@@ -2924,3 +3299,91 @@ H3_Status H3_ListObjectsWithMetadata(H3_Handle handle, H3_Token token, H3_Name b
 
     return status;
 }
+
+/*! \brief  Retrieve the objects that are due for expiration
+ *
+ * Produce a list of the user's objects whose ExpiresAt metadata (a double holding the seconds since the Epoch)
+ * is not later than the given timestamp. Rather than visiting every object carrying the metadata, the
+ * function consults an index that is maintained whenever the ExpiresAt metadata is created, deleted, copied or moved.
+ * The entries are returned as object-IDs, i.e. "bucket/object", stored back to back as C strings thus
+ * it is the responsibility of the user to dispose the buffer. In case the internal buffer is not big enough to
+ * fit all matching entries (indicated by the operation status) the user may invoke again the function
+ * with an appropriately set offset in order to retrieve the next batch of names. Index entries referring to
+ * objects that no longer exist are silently dropped.
+ * In case of an error, the buffer will not be created.
+ *
+ * @param[in]     handle             An h3lib handle
+ * @param[in]     token              Authentication information
+ * @param[in]     timestamp          The point in time to compare against, if NULL the current time is used
+ * @param[in]     offset             The number of index entries to skip
+ * @param[inout]  objectIdArray      Pointer to a C string buffer
+ * @param[inout]  nObjects           Number of object-IDs in buffer
+ * @param[inout]  nextOffset         The number of index entries to skip in the next iteration in case of a H3_CONTINUE signal
+ *
+ * @result \b H3_SUCCESS            Operation completed successfully (no more matching entries exist)
+ * @result \b H3_CONTINUE           Operation completed successfully (there could be more matching entries)
+ * @result \b H3_FAILURE            Unable to access the index
+ * @result \b H3_INVALID_ARGS       Missing or malformed arguments
+ *
+ */
+H3_Status H3_ListExpiredObjects(H3_Handle handle, H3_Token token, struct timespec* timestamp, uint32_t offset, H3_Name* objectIdArray, uint32_t* nObjects, uint32_t* nextOffset) {
+    H3_TIME_OPERATION(handle, H3_OP_LIST_EXPIRED_OBJECTS);
+
+    if (!handle || !token || !objectIdArray || !nObjects) {
+        return H3_INVALID_ARGS;
+    }
+
+    H3_UserId userId;
+
+    // Extract userId from token
+    if (!GetUserId(token, userId)) {
+        return H3_INVALID_ARGS;
+    }
+
+    return ListTimeIndex((H3_Context*)handle, userId, H3_EXPIRES_AT_METADATA, timestamp, offset, objectIdArray, nObjects, nextOffset);
+}
+
+/*! \brief  Retrieve the objects that are due to become read only
+ *
+ * Produce a list of the user's objects whose ReadOnlyAfter deadline, that is their last modification plus the
+ * value of the ReadOnlyAfter metadata (a double holding seconds), is not later than the given timestamp. Rather than
+ * visiting every object carrying the metadata, the function consults an index that is maintained whenever the
+ * ReadOnlyAfter metadata is created, deleted, copied or moved, or the object is touched. Writes to an object don't
+ * update the index, instead the deadline of the entries found due is re-evaluated and those not due anymore are
+ * re-indexed. Objects that are already read only are dropped from the index.
+ * The entries are returned as object-IDs, i.e. "bucket/object", stored back to back as C strings thus
+ * it is the responsibility of the user to dispose the buffer. In case the internal buffer is not big enough to
+ * fit all matching entries (indicated by the operation status) the user may invoke again the function
+ * with an appropriately set offset in order to retrieve the next batch of names.
+ * In case of an error, the buffer will not be created.
+ *
+ * @param[in]     handle             An h3lib handle
+ * @param[in]     token              Authentication information
+ * @param[in]     timestamp          The point in time to compare against, if NULL the current time is used
+ * @param[in]     offset             The number of index entries to skip
+ * @param[inout]  objectIdArray      Pointer to a C string buffer
+ * @param[inout]  nObjects           Number of object-IDs in buffer
+ * @param[inout]  nextOffset         The number of index entries to skip in the next iteration in case of a H3_CONTINUE signal
+ *
+ * @result \b H3_SUCCESS            Operation completed successfully (no more matching entries exist)
+ * @result \b H3_CONTINUE           Operation completed successfully (there could be more matching entries)
+ * @result \b H3_FAILURE            Unable to access the index
+ * @result \b H3_INVALID_ARGS       Missing or malformed arguments
+ *
+ */
+H3_Status H3_ListReadOnlyDueObjects(H3_Handle handle, H3_Token token, struct timespec* timestamp, uint32_t offset, H3_Name* objectIdArray, uint32_t* nObjects, uint32_t* nextOffset) {
+    H3_TIME_OPERATION(handle, H3_OP_LIST_READ_ONLY_DUE_OBJECTS);
+
+    if (!handle || !token || !objectIdArray || !nObjects) {
+        return H3_INVALID_ARGS;
+    }
+
+    H3_UserId userId;
+
+    // Extract userId from token
+    if (!GetUserId(token, userId)) {
+        return H3_INVALID_ARGS;
+    }
+
+    return ListTimeIndex((H3_Context*)handle, userId, H3_READ_ONLY_AFTER_METADATA, timestamp, offset, objectIdArray, nObjects, nextOffset);
+}
@@ -0,0 +1,482 @@
+// Copyright [2019] [FORTH-ICS]
+//
+// Licensed under the Apache License, Version 2.0 (the "License");
+// you may not use this file except in compliance with the License.
+// You may obtain a copy of the License at
+//
+//     http://www.apache.org/licenses/LICENSE-2.0
+//
+// Unless required by applicable law or agreed to in writing, software
+// distributed under the License is distributed on an "AS IS" BASIS,
+// WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+// See the License for the specific language governing permissions and
+// limitations under the License.
+
+#include "common.h"
+#include "util.h"
+
+/*
+ * Statistics are collected, and trace events emitted, by a KV_Operations table wrapped around the store's one. Every
+ * handle gets the wrapper, so that tracing can be turned on while other threads are calling the store through it;
+ * handles that don't use either pay a clock read per store primitive, and a pointer check per API call. The counters
+ * are updated atomically, as a handle may be shared by threads (e.g. RocksDB in h3fuse). Trace events are delivered
+ * synchronously, in the thread that made the call.
+ *
+ * The bytes each API call moved are found by the difference of a per-thread counter of the bytes moved by the store
+ * primitives, before and after the call.
+ */
+
+typedef struct {
+    KV_Handle handle;
+    KV_Operations* operation;
+    H3_Context* ctx;
+    H3_Stats stats;
+}KV_StatsHandle;
+
+__thread uint64_t statsBytes = 0;
+
+static const char* const KVOperationName[] = {
+    "metadata_read", "metadata_write", "metadata_create", "metadata_delete", "metadata_move", "metadata_exists",
+    "list", "exists", "read", "create", "update", "write", "copy", "move", "delete", "sync", "multi_read", "multi_update", "unknown"
+};
+
+static const char* const OperationName[] = {
+    "ListBuckets", "ForeachBucket", "InfoBucket", "SetBucketAttributes", "CreateBucket", "DeleteBucket", "PurgeBucket",
+    "ListObjects", "ForeachObject", "InfoObject", "TouchObject", "SetObjectAttributes",
+    "CreateObject", "CreateObjectCopy", "CreateObjectFromFile", "CreateDummyObject",
+    "WriteObject", "WriteObjectCopy", "WriteObjectFromFile", "ReadObject", "ReadDummyObject", "ReadObjectToFile",
+    "CopyObject", "MoveObject", "ExchangeObject", "TruncateObject", "DeleteObject",
+    "CreateObjectMetadata", "ReadObjectMetadata", "DeleteObjectMetadata", "CopyObjectMetadata", "MoveObjectMetadata",
+    "ListObjectsWithMetadata", "ListExpiredObjects", "ListReadOnlyDueObjects",
+    "ListMultiparts", "CreateMultipart", "CompleteMultipart", "AbortMultipart", "ListParts", "CreatePart", "CreatePartCopy",
+    "unknown"
+};
+
+static uint64_t Elapsed(struct timespec* start){
+    struct timespec now;
+    clock_gettime(CLOCK_MONOTONIC, &now);
+    return (now.tv_sec - start->tv_sec) * 1000000000ULL + now.tv_nsec - start->tv_nsec;
+}
+
+static void Account(H3_OperationStats* stats, uint64_t latency, uint64_t bytes, char failed){
+    uint64_t micro = latency / 1000;
+    uint bucket = micro? min(64 - __builtin_clzll(micro), H3_STATS_HISTOGRAM_SIZE - 1) : 0;
+    uint64_t current = __atomic_load_n(&stats->maxLatency, __ATOMIC_RELAXED);
+
+    __atomic_add_fetch(&stats->count, 1, __ATOMIC_RELAXED);
+    __atomic_add_fetch(&stats->bytes, bytes, __ATOMIC_RELAXED);
+    __atomic_add_fetch(&stats->totalLatency, latency, __ATOMIC_RELAXED);
+    __atomic_add_fetch(&stats->histogram[bucket], 1, __ATOMIC_RELAXED);
+    if(failed)
+        __atomic_add_fetch(&stats->failures, 1, __ATOMIC_RELAXED);
+
+    while(latency > current && !__atomic_compare_exchange_n(&stats->maxLatency, &current, latency, 0, __ATOMIC_RELAXED, __ATOMIC_RELAXED));
+}
+
+static void AccountKV(KV_StatsHandle* handle, H3_KVOperation operation, KV_Key key, struct timespec* start, KV_Status status, uint64_t bytes){
+    H3_Context* ctx = handle->ctx;
+    H3_Tracer* tracer = __atomic_load_n(&ctx->tracer, __ATOMIC_ACQUIRE);
+    char failed = status != KV_SUCCESS && status != KV_CONTINUE;
+    uint64_t latency;
+
+    statsBytes += bytes;
+    if(!ctx->stats && !tracer)
+        return;
+
+    latency = Elapsed(start);
+    if(ctx->stats)
+        Account(&ctx->stats->kv[operation], latency, bytes, failed);
+
+    if(tracer){
+        H3_TraceEvent event = {.type = H3_TRACE_KV, .kvOperation = operation, .key = key, .bytes = bytes, .latency = latency, .failed = failed};
+        tracer->callback(&event, tracer->userData);
+    }
+}
+
+void BeginTimer(H3_Timer* timer){
+    H3_Tracer* tracer = __atomic_load_n(&timer->ctx->tracer, __ATOMIC_ACQUIRE);
+
+    if(tracer){
+        H3_TraceEvent event = {.type = H3_TRACE_CALL_START, .operation = timer->operation};
+        tracer->callback(&event, tracer->userData);
+    }
+
+    timer->bytes = statsBytes;
+    clock_gettime(CLOCK_MONOTONIC, &timer->start);
+}
+
+void EndTimer(H3_Timer* timer){
+    H3_Context* ctx = timer->ctx;
+    H3_Tracer* tracer = __atomic_load_n(&ctx->tracer, __ATOMIC_ACQUIRE);
+    uint64_t latency = Elapsed(&timer->start);
+    uint64_t bytes = statsBytes - timer->bytes;
+
+    if(ctx->stats)
+        Account(&ctx->stats->api[timer->operation], latency, bytes, 0);
+
+    if(tracer){
+        H3_TraceEvent event = {.type = H3_TRACE_CALL_END, .operation = timer->operation, .bytes = bytes, .latency = latency};
+        tracer->callback(&event, tracer->userData);
+    }
+}
+
+
+static KV_Handle KV_Stats_Init(const char* storageUri){
+    return NULL;
+}
+
+static void KV_Stats_Free(KV_Handle handle){
+    KV_StatsHandle* _handle = (KV_StatsHandle*)handle;
+    _handle->operation->free(_handle->handle);
+    free(_handle);
+}
+
+static KV_Status KV_Stats_Metadata_Read(KV_Handle handle, KV_Key key, off_t offset, KV_Value* value, size_t* size){
+    KV_StatsHandle* _handle = (KV_StatsHandle*)handle;
+    struct timespec start;
+    clock_gettime(CLOCK_MONOTONIC, &start);
+    KV_Status status = _handle->operation->metadata_read(_handle->handle, key, offset, value, size);
+    AccountKV(_handle, H3_KV_METADATA_READ, key, &start, status, status == KV_SUCCESS? *size : 0);
+    return status;
+}
+
+static KV_Status KV_Stats_Metadata_Write(KV_Handle handle, KV_Key key, KV_Value value, size_t size){
+    KV_StatsHandle* _handle = (KV_StatsHandle*)handle;
+    struct timespec start;
+    clock_gettime(CLOCK_MONOTONIC, &start);
+    KV_Status status = _handle->operation->metadata_write(_handle->handle, key, value, size);
+    AccountKV(_handle, H3_KV_METADATA_WRITE, key, &start, status, status == KV_SUCCESS? size : 0);
+    return status;
+}
+
+static KV_Status KV_Stats_Metadata_Create(KV_Handle handle, KV_Key key, KV_Value value, size_t size){
+    KV_StatsHandle* _handle = (KV_StatsHandle*)handle;
+    struct timespec start;
+    clock_gettime(CLOCK_MONOTONIC, &start);
+    KV_Status status = _handle->operation->metadata_create(_handle->handle, key, value, size);
+    AccountKV(_handle, H3_KV_METADATA_CREATE, key, &start, status, status == KV_SUCCESS? size : 0);
+    return status;
+}
+
+static KV_Status KV_Stats_Metadata_Delete(KV_Handle handle, KV_Key key){
+    KV_StatsHandle* _handle = (KV_StatsHandle*)handle;
+    struct timespec start;
+    clock_gettime(CLOCK_MONOTONIC, &start);
+    KV_Status status = _handle->operation->metadata_delete(_handle->handle, key);
+    AccountKV(_handle, H3_KV_METADATA_DELETE, key, &start, status, 0);
+    return status;
+}
+
+static KV_Status KV_Stats_Metadata_Move(KV_Handle handle, KV_Key srcKey, KV_Key dstKey){
+    KV_StatsHandle* _handle = (KV_StatsHandle*)handle;
+    struct timespec start;
+    clock_gettime(CLOCK_MONOTONIC, &start);
+    KV_Status status = _handle->operation->metadata_move(_handle->handle, srcKey, dstKey);
+    AccountKV(_handle, H3_KV_METADATA_MOVE, srcKey, &start, status, 0);
+    return status;
+}
+
+static KV_Status KV_Stats_Metadata_Exists(KV_Handle handle, KV_Key key){
+    KV_StatsHandle* _handle = (KV_StatsHandle*)handle;
+    struct timespec start;
+    clock_gettime(CLOCK_MONOTONIC, &start);
+    KV_Status status = _handle->operation->metadata_exists(_handle->handle, key);
+
+    // Not finding the key is an answer rather than a failure
+    AccountKV(_handle, H3_KV_METADATA_EXISTS, key, &start, status == KV_KEY_NOT_EXIST? KV_SUCCESS : status, 0);
+    return status;
+}
+
+static KV_Status KV_Stats_List(KV_Handle handle, KV_Key prefix, uint8_t nTrim, KV_Key key, uint32_t offset, uint32_t* nKeys){
+    KV_StatsHandle* _handle = (KV_StatsHandle*)handle;
+    struct timespec start;
+    clock_gettime(CLOCK_MONOTONIC, &start);
+    KV_Status status = _handle->operation->list(_handle->handle, prefix, nTrim, key, offset, nKeys);
+    AccountKV(_handle, H3_KV_LIST, prefix, &start, status, 0);
+    return status;
+}
+
+static KV_Status KV_Stats_Exists(KV_Handle handle, KV_Key key){
+    KV_StatsHandle* _handle = (KV_StatsHandle*)handle;
+    struct timespec start;
+    clock_gettime(CLOCK_MONOTONIC, &start);
+    KV_Status status = _handle->operation->exists(_handle->handle, key);
+    AccountKV(_handle, H3_KV_EXISTS, key, &start, status == KV_KEY_NOT_EXIST? KV_SUCCESS : status, 0);
+    return status;
+}
+
+static KV_Status KV_Stats_Read(KV_Handle handle, KV_Key key, off_t offset, KV_Value* value, size_t* size){
+    KV_StatsHandle* _handle = (KV_StatsHandle*)handle;
+    struct timespec start;
+    clock_gettime(CLOCK_MONOTONIC, &start);
+    KV_Status status = _handle->operation->read(_handle->handle, key, offset, value, size);
+    AccountKV(_handle, H3_KV_READ, key, &start, status, status == KV_SUCCESS || status == KV_CONTINUE? *size : 0);
+    return status;
+}
+
+static KV_Status KV_Stats_Multi_Read(KV_Handle handle, KV_Key* keys, off_t* offsets, KV_Value* values, size_t* sizes, uint32_t nKeys){
+    KV_StatsHandle* _handle = (KV_StatsHandle*)handle;
+    struct timespec start;
+    uint64_t bytes = 0;
+    uint32_t i;
+    clock_gettime(CLOCK_MONOTONIC, &start);
+    KV_Status status = _handle->operation->multi_read(_handle->handle, keys, offsets, values, sizes, nKeys);
+    for(i=0; status == KV_SUCCESS && i<nKeys; i++)
+        bytes += sizes[i];
+    AccountKV(_handle, H3_KV_MULTI_READ, keys[0], &start, status, bytes);
+    return status;
+}
+
+static KV_Status KV_Stats_Create(KV_Handle handle, KV_Key key, KV_Value value, size_t size, const char* bucket){
+    KV_StatsHandle* _handle = (KV_StatsHandle*)handle;
+    struct timespec start;
+    clock_gettime(CLOCK_MONOTONIC, &start);
+    KV_Status status = _handle->operation->create(_handle->handle, key, value, size, bucket);
+    AccountKV(_handle, H3_KV_CREATE, key, &start, status, status == KV_SUCCESS? size : 0);
+    return status;
+}
+
+static KV_Status KV_Stats_Update(KV_Handle handle, KV_Key key, KV_Value value, off_t offset, size_t size, const char* bucket){
+    KV_StatsHandle* _handle = (KV_StatsHandle*)handle;
+    struct timespec start;
+    clock_gettime(CLOCK_MONOTONIC, &start);
+    KV_Status status = _handle->operation->update(_handle->handle, key, value, offset, size, bucket);
+    AccountKV(_handle, H3_KV_UPDATE, key, &start, status, status == KV_SUCCESS? size : 0);
+    return status;
+}
+
+static KV_Status KV_Stats_Multi_Update(KV_Handle handle, KV_Key* keys, KV_Value* values, off_t* offsets, size_t* sizes, uint32_t nKeys, const char* bucket){
+    KV_StatsHandle* _handle = (KV_StatsHandle*)handle;
+    struct timespec start;
+    uint64_t bytes = 0;
+    uint32_t i;
+    clock_gettime(CLOCK_MONOTONIC, &start);
+    KV_Status status = _handle->operation->multi_update(_handle->handle, keys, values, offsets, sizes, nKeys, bucket);
+    for(i=0; status == KV_SUCCESS && i<nKeys; i++)
+        bytes += sizes[i];
+    AccountKV(_handle, H3_KV_MULTI_UPDATE, keys[0], &start, status, bytes);
+    return status;
+}
+
+static KV_Status KV_Stats_Write(KV_Handle handle, KV_Key key, KV_Value value, size_t size, const char* bucket){
+    KV_StatsHandle* _handle = (KV_StatsHandle*)handle;
+    struct timespec start;
+    clock_gettime(CLOCK_MONOTONIC, &start);
+    KV_Status status = _handle->operation->write(_handle->handle, key, value, size, bucket);
+    AccountKV(_handle, H3_KV_WRITE, key, &start, status, status == KV_SUCCESS? size : 0);
+    return status;
+}
+
+static KV_Status KV_Stats_Copy(KV_Handle handle, KV_Key srcKey, KV_Key dstKey){
+    KV_StatsHandle* _handle = (KV_StatsHandle*)handle;
+    struct timespec start;
+    clock_gettime(CLOCK_MONOTONIC, &start);
+    KV_Status status = _handle->operation->copy(_handle->handle, srcKey, dstKey);
+    AccountKV(_handle, H3_KV_COPY, srcKey, &start, status, 0);
+    return status;
+}
+
+static KV_Status KV_Stats_Move(KV_Handle handle, KV_Key srcKey, KV_Key dstKey){
+    KV_StatsHandle* _handle = (KV_StatsHandle*)handle;
+    struct timespec start;
+    clock_gettime(CLOCK_MONOTONIC, &start);
+    KV_Status status = _handle->operation->move(_handle->handle, srcKey, dstKey);
+    AccountKV(_handle, H3_KV_MOVE, srcKey, &start, status, 0);
+    return status;
+}
+
+static KV_Status KV_Stats_Delete(KV_Handle handle, KV_Key key){
+    KV_StatsHandle* _handle = (KV_StatsHandle*)handle;
+    struct timespec start;
+    clock_gettime(CLOCK_MONOTONIC, &start);
+    KV_Status status = _handle->operation->delete(_handle->handle, key);
+    AccountKV(_handle, H3_KV_DELETE, key, &start, status, 0);
+    return status;
+}
+
+static KV_Status KV_Stats_Sync(KV_Handle handle){
+    KV_StatsHandle* _handle = (KV_StatsHandle*)handle;
+    struct timespec start;
+    clock_gettime(CLOCK_MONOTONIC, &start);
+    KV_Status status = _handle->operation->sync(_handle->handle);
+    AccountKV(_handle, H3_KV_SYNC, NULL, &start, status, 0);
+    return status;
+}
+
+static const KV_Operations operationsStats = {
+    .init = KV_Stats_Init,
+    .free = KV_Stats_Free,
+
+    .metadata_read = KV_Stats_Metadata_Read,
+    .metadata_write = KV_Stats_Metadata_Write,
+    .metadata_create = KV_Stats_Metadata_Create,
+    .metadata_delete = KV_Stats_Metadata_Delete,
+    .metadata_move = KV_Stats_Metadata_Move,
+    .metadata_exists = KV_Stats_Metadata_Exists,
+
+    .list = KV_Stats_List,
+    .exists = KV_Stats_Exists,
+    .read = KV_Stats_Read,
+    .multi_read = KV_Stats_Multi_Read,
+    .create = KV_Stats_Create,
+    .update = KV_Stats_Update,
+    .multi_update = KV_Stats_Multi_Update,
+    .write = KV_Stats_Write,
+    .copy = KV_Stats_Copy,
+    .move = KV_Stats_Move,
+    .delete = KV_Stats_Delete,
+    .sync = KV_Stats_Sync
+};
+
+
+/*
+ * Install the statistics wrapper on a new context, and optionally start collecting statistics. The store's key
+ * validator is not a store primitive, so it is called directly rather than through the wrapper.
+ */
+int InstallStats(H3_Context* ctx, char collect){
+    KV_StatsHandle* handle;
+
+    if(!(handle = calloc(1, sizeof(KV_StatsHandle))))
+        return FALSE;
+
+    handle->handle = ctx->handle;
+    handle->operation = ctx->operation;
+    handle->ctx = ctx;
+
+    ctx->handle = handle;
+    ctx->operation = &ctx->statsOperation;
+    if(collect)
+        ctx->stats = &handle->stats;
+
+    // The wrapper table is copied into the context, so that it carries the store's validator and optional primitives (or lack of them)
+    ctx->statsOperation = operationsStats;
+    ctx->statsOperation.validate_key = handle->operation->validate_key;
+    if(!handle->operation->multi_read)
+        ctx->statsOperation.multi_read = NULL;
+    if(!handle->operation->multi_update)
+        ctx->statsOperation.multi_update = NULL;
+
+    return TRUE;
+}
+
+
+/*! \brief Retrieve the statistics of a handle
+ *
+ * Statistics are only collected if the handle was initialized with the "stats" option in the storage URI,
+ * e.g. "file:///tmp/h3?stats=1".
+ *
+ * @param[in]    handle             An h3lib handle
+ * @param[out]   stats              The statistics collected since the handle was created or last reset
+ *
+ * @result \b H3_SUCCESS            Operation completed successfully
+ * @result \b H3_FAILURE            The handle doesn't collect statistics
+ * @result \b H3_INVALID_ARGS       Missing or malformed arguments
+ *
+ */
+H3_Status H3_GetStats(H3_Handle handle, H3_Stats* stats){
+    if(!handle || !stats){
+        return H3_INVALID_ARGS;
+    }
+
+    H3_Context* ctx = (H3_Context*)handle;
+    if(!ctx->stats)
+        return H3_FAILURE;
+
+    memcpy(stats, ctx->stats, sizeof(H3_Stats));
+    return H3_SUCCESS;
+}
+
+
+/*! \brief Clear the statistics of a handle
+ *
+ * @param[in]    handle             An h3lib handle
+ *
+ * @result \b H3_SUCCESS            Operation completed successfully
+ * @result \b H3_FAILURE            The handle doesn't collect statistics
+ * @result \b H3_INVALID_ARGS       Missing or malformed arguments
+ *
+ */
+H3_Status H3_ResetStats(H3_Handle handle){
+    if(!handle){
+        return H3_INVALID_ARGS;
+    }
+
+    H3_Context* ctx = (H3_Context*)handle;
+    if(!ctx->stats)
+        return H3_FAILURE;
+
+    memset(ctx->stats, 0, sizeof(H3_Stats));
+    return H3_SUCCESS;
+}
+
+
+/*! \brief Set a function to be called on the start and end of each API call, and on the completion of each store
+ * primitive it issues
+ *
+ * The callback is called synchronously, in the thread making the API call, with an event that is only valid during
+ * the call. Store events carry the latency and status of each primitive, and end events carry the total latency and
+ * bytes moved by the call. The callback may be set while other threads are using the handle, in which case their
+ * calls in progress may still deliver events to the previous callback, with its own user data, once this returns.
+ *
+ * @param[in]    handle             An h3lib handle
+ * @param[in]    callback           The function to call, or NULL to stop tracing
+ * @param[in]    userData           User data passed to the callback
+ *
+ * @result \b H3_SUCCESS            Operation completed successfully
+ * @result \b H3_FAILURE            Out of memory
+ * @result \b H3_INVALID_ARGS       Missing or malformed arguments
+ *
+ */
+H3_Status H3_SetTraceCallback(H3_Handle handle, h3_trace_cb callback, void* userData){
+    if(!handle){
+        return H3_INVALID_ARGS;
+    }
+
+    H3_Context* ctx = (H3_Context*)handle;
+    H3_Tracer* tracer = NULL;
+
+    if(callback){
+        // The same pair set again is reused, so that turning tracing on and off doesn't use up memory
+        for(tracer = __atomic_load_n(&ctx->tracers, __ATOMIC_ACQUIRE); tracer; tracer = tracer->next){
+            if(tracer->callback == callback && tracer->userData == userData)
+                break;
+        }
+
+        if(!tracer){
+            if(!(tracer = malloc(sizeof(H3_Tracer))))
+                return H3_FAILURE;
+
+            tracer->callback = callback;
+            tracer->userData = userData;
+            tracer->next = __atomic_load_n(&ctx->tracers, __ATOMIC_ACQUIRE);
+            while(!__atomic_compare_exchange_n(&ctx->tracers, &tracer->next, tracer, 0, __ATOMIC_RELEASE, __ATOMIC_ACQUIRE));
+        }
+    }
+
+    __atomic_store_n(&ctx->tracer, tracer, __ATOMIC_RELEASE);
+    return H3_SUCCESS;
+}
+
+
+/*! \brief Name of a store primitive, as used in the statistics
+ * @param[in] operation     The store primitive
+ * @result  Null terminated string
+ */
+const char* H3_KVOperation2String(H3_KVOperation operation){
+    if(operation < 0 || operation >= H3_NumOfKVOperations)
+        return KVOperationName[H3_NumOfKVOperations];
+
+    return KVOperationName[operation];
+}
+
+
+/*! \brief Name of an API call, as used in the statistics
+ * @param[in] operation     The API call
+ * @result  Null terminated string
+ */
+const char* H3_Operation2String(H3_Operation operation){
+    if(operation < 0 || operation >= H3_NumOfOperations)
+        return OperationName[H3_NumOfOperations];
+
+    return OperationName[operation];
+}
@@ -188,8 +188,9 @@ parse_url(const char *url)
             /* End of IPv6 address. */
             tmpstr++;
             break;
-        } else if ( !bracket_flag && (':' == *tmpstr || '/' == *tmpstr) ) {
+        } else if ( !bracket_flag && (':' == *tmpstr || '/' == *tmpstr || '?' == *tmpstr || '#' == *tmpstr) ) {
             /* Port number is specified. */
+            /* FIXED: Also stop at a query or fragment without a path */
             break;
         }
         tmpstr++;
@@ -212,7 +213,8 @@ parse_url(const char *url)
         curstr++;
         /* Read port number */
         tmpstr = curstr;
-        while ( '\0' != *tmpstr && '/' != *tmpstr ) {
+        /* FIXED: Also stop at a query or fragment without a path */
+        while ( '\0' != *tmpstr && '/' != *tmpstr && '?' != *tmpstr && '#' != *tmpstr ) {
             tmpstr++;
         }
         len = tmpstr - curstr;
@@ -232,11 +234,13 @@ parse_url(const char *url)
     }
 
     /* Skip '/' */
-    if ( '/' != *curstr ) {
+    /* FIXED: The path may be missing before a query or fragment */
+    if ( '/' == *curstr ) {
+        curstr++;
+    } else if ( '?' != *curstr && '#' != *curstr ) {
         parsed_url_free(purl);
         return NULL;
     }
-    curstr++;
 
     /* Parse path */
     tmpstr = curstr;
@@ -16,6 +16,7 @@
 #include <string.h>
 #include <stdarg.h>
 #include <stdlib.h>
+#include <ctype.h>
 #include "util.h"
 
 //    http://web.theurbanpenguin.com/adding-color-to-your-output-from-c/
@@ -67,3 +68,70 @@ void* ReAllocFreeOnFail(void* buffer, size_t size){
 
 	return tmp;
 }
+
+// Find an option in a URI query of the form "name1=value1&name2&...". Options without a value are returned as "".
+// The value is copied, so the caller is expected to release it. NULL means the option is missing.
+char* GetQueryOption(const char* query, const char* name){
+	size_t length = strlen(name);
+
+	while(query && *query){
+		const char* end = query + strcspn(query, "&");
+		if(!strncmp(query, name, length) && (query + length == end || query[length] == '=')){
+			const char* value = min(query + length + 1, end);
+			char* option = malloc(end - value + 1);
+			if(option){
+				memcpy(option, value, end - value);
+				option[end - value] = '\0';
+			}
+			return option;
+		}
+
+		query = *end? end + 1 : NULL;
+	}
+
+	return NULL;
+}
+
+// Parse a size with an optional K, M, G or T suffix (powers of 1024), e.g. "8G". Malformed sizes are returned as 0.
+uint64_t ParseSize(const char* string){
+	char* suffix;
+	uint64_t size = strtoull(string, &suffix, 10);
+
+	if(suffix == string)
+		return 0;
+
+	switch(toupper(*suffix)){
+		case 'T': size *= 1024;
+		/* no break */
+		case 'G': size *= 1024;
+		/* no break */
+		case 'M': size *= 1024;
+		/* no break */
+		case 'K': size *= 1024; suffix++;
+		/* no break */
+		case '\0': break;
+		default: return 0;
+	}
+
+	return *suffix == '\0' || toupper(*suffix) == 'B'? size : 0;
+}
+
+// Part keys are '_' + UUID, optionally followed by '#' + part number, see CreatePartId(). As bucket names may
+// start with '_' too, the UUID is checked as well.
+int IsPartKey(const char* key){
+	int i;
+
+	if(key[0] != '_')
+		return 0;
+
+	for(i=1; i<=36; i++){
+		if(i == 9 || i == 14 || i == 19 || i == 24){
+			if(key[i] != '-')
+				return 0;
+		}
+		else if(!isxdigit(key[i]))
+			return 0;
+	}
+
+	return key[i] == '\0' || key[i] == '#';
+}
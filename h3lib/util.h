@@ -49,5 +49,8 @@ int64_t Compare(struct timespec* a, struct timespec* b);
 struct timespec Posterior(struct timespec* a, struct timespec* b);
 struct timespec Anterior(struct timespec* a, struct timespec* b);
 void* ReAllocFreeOnFail(void* buffer, size_t size);
+char* GetQueryOption(const char* query, const char* name);
+uint64_t ParseSize(const char* string);
+int IsPartKey(const char* key);
 
 #endif
@@ -0,0 +1,67 @@
+# Copyright [2019] [FORTH-ICS]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import pytest
+
+from urllib.parse import urlparse
+
+from pyh3lib import H3
+
+def pytest_addoption(parser):
+    parser.addoption('--storage', action='store', required=True, help="H3 storage URI")
+
+def pytest_benchmark_update_machine_info(config, machine_info):
+    # Results of different backends are kept apart by the storage type
+    storage_uri = config.getoption('--storage')
+    machine_info['h3_storage'] = urlparse(storage_uri).scheme
+    machine_info['h3_version'] = H3.VERSION
+
+@pytest.fixture(scope='module')
+def h3(request):
+    storage_uri = request.config.getoption('--storage')
+
+    assert storage_uri, 'You need to specify a storage URI with "--storage"'
+    return H3(storage_uri)
+
+@pytest.fixture
+def bucket(h3):
+    """A bucket that is emptied and removed after each benchmark."""
+
+    bucket_name = 'bench'
+    h3.create_bucket(bucket_name)
+    yield bucket_name
+
+    h3.purge_bucket(bucket_name)
+    for multipart_id in h3.list_multiparts(bucket_name):
+        h3.abort_multipart(multipart_id)
+    h3.delete_bucket(bucket_name)
+
+class Names(object):
+    """Generate unique object names, so that rounds don't collide."""
+
+    def __init__(self, prefix='o'):
+        self._prefix = prefix
+        self._count = 0
+
+    def __call__(self):
+        self._count += 1
+        return f'{self._prefix}{self._count}'
+
+@pytest.fixture
+def names():
+    return Names()
+
+def random_data(size):
+    return os.urandom(size)
@@ -0,0 +1,45 @@
+# Copyright [2019] [FORTH-ICS]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+@pytest.fixture
+def populated(h3, bucket):
+    for i in range(1000):
+        h3.create_object(bucket, f'd{i % 10}/o{i}', b'')
+    return bucket
+
+def list_all(h3, bucket_name, prefix, count):
+    offset = 0
+    while True:
+        page = h3.list_objects(bucket_name, prefix=prefix, offset=offset, count=count)
+        offset += len(page)
+        if page.done:
+            return offset
+
+@pytest.mark.parametrize('count', [10, 100, 1000])
+def test_list(benchmark, h3, populated, count):
+    """List a bucket of 1000 objects in pages."""
+
+    assert benchmark(list_all, h3, populated, '', count) == 1000
+
+def test_list_prefix(benchmark, h3, populated):
+    """List the objects under a prefix."""
+
+    assert benchmark(list_all, h3, populated, 'd1/', 100) == 100
+
+def test_list_buckets(benchmark, h3, bucket):
+    """List buckets."""
+
+    benchmark(h3.list_buckets)
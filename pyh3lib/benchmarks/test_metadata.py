@@ -0,0 +1,57 @@
+# Copyright [2019] [FORTH-ICS]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+def test_create_metadata(benchmark, h3, bucket, names):
+    """Attach metadata to an object."""
+
+    h3.create_object(bucket, 'o1', b'')
+
+    def setup():
+        return (bucket, 'o1', names(), b'value'), {}
+
+    benchmark.pedantic(h3.create_object_metadata, setup=setup, rounds=100)
+
+def test_read_metadata(benchmark, h3, bucket):
+    """Read an object's metadata."""
+
+    h3.create_object(bucket, 'o1', b'')
+    h3.create_object_metadata(bucket, 'o1', 'm1', b'value')
+
+    assert benchmark(h3.read_object_metadata, bucket, 'o1', 'm1') == b'value'
+
+def test_list_with_metadata(benchmark, h3, bucket):
+    """List the objects carrying a metadata out of 1000."""
+
+    for i in range(1000):
+        h3.create_object(bucket, f'o{i}', b'')
+        if i % 10 == 0:
+            h3.create_object_metadata(bucket, f'o{i}', 'm1', b'value')
+
+    assert len(benchmark(h3.list_objects_with_metadata, bucket, 'm1')) == 100
+
+def test_copy_metadata(benchmark, h3, bucket, names):
+    """Copy the metadata of an object to another."""
+
+    h3.create_object(bucket, 'o1', b'')
+    for i in range(10):
+        h3.create_object_metadata(bucket, 'o1', f'm{i}', b'value')
+
+    def setup():
+        object_name = names()
+        h3.create_object(bucket, object_name, b'')
+        return (bucket, 'o1', object_name), {}
+
+    benchmark.pedantic(h3.copy_object_metadata, setup=setup, rounds=50)
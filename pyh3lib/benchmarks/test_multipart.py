@@ -0,0 +1,50 @@
+# Copyright [2019] [FORTH-ICS]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+
+from conftest import random_data
+
+MEGABYTE = 1048576
+
+@pytest.mark.parametrize('parts', [4, 16])
+def test_multipart(benchmark, h3, bucket, names, parts):
+    """Upload an object in parts and complete it."""
+
+    data = random_data(MEGABYTE)
+    benchmark.extra_info['bytes'] = parts * MEGABYTE
+
+    def upload(object_name):
+        multipart_id = h3.create_multipart(bucket, object_name)
+        for i in range(parts):
+            h3.create_part(multipart_id, i, data)
+        h3.complete_multipart(multipart_id)
+
+    def setup():
+        return (names(),), {}
+
+    benchmark.pedantic(upload, setup=setup, rounds=10)
+
+def test_part_copy(benchmark, h3, bucket, names):
+    """Create parts by copying from an existing object."""
+
+    h3.create_object(bucket, 'o1', random_data(16 * MEGABYTE))
+    multipart_id = h3.create_multipart(bucket, 'o2')
+    benchmark.extra_info['bytes'] = MEGABYTE
+
+    parts = iter(range(1000))
+    def setup():
+        return ('o1', 0, MEGABYTE, multipart_id, next(parts)), {}
+
+    benchmark.pedantic(h3.create_part_copy, setup=setup, rounds=16)
@@ -0,0 +1,116 @@
+# Copyright [2019] [FORTH-ICS]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import random
+import pytest
+import itertools
+
+from conftest import random_data
+
+KILOBYTE = 1024
+MEGABYTE = 1048576
+
+@pytest.mark.parametrize('size', [4 * KILOBYTE, 64 * KILOBYTE, MEGABYTE, 16 * MEGABYTE, 64 * MEGABYTE],
+                         ids=['4K', '64K', '1M', '16M', '64M'])
+def test_create(benchmark, h3, bucket, names, size):
+    """Create objects of various sizes."""
+
+    data = random_data(size)
+    benchmark.extra_info['bytes'] = size
+
+    def setup():
+        return (bucket, names(), data), {}
+
+    benchmark.pedantic(h3.create_object, setup=setup, rounds=max(5, min(100, 64 * MEGABYTE // size // 4)))
+
+@pytest.mark.parametrize('size', [4 * KILOBYTE, MEGABYTE, 16 * MEGABYTE], ids=['4K', '1M', '16M'])
+def test_read(benchmark, h3, bucket, size):
+    """Read whole objects of various sizes."""
+
+    h3.create_object(bucket, 'o1', random_data(size))
+    benchmark.extra_info['bytes'] = size
+
+    data = benchmark(h3.read_object, bucket, 'o1')
+    assert len(data) == size
+
+@pytest.mark.parametrize('size', [4 * KILOBYTE, 128 * KILOBYTE, MEGABYTE], ids=['4K', '128K', '1M'])
+def test_read_range(benchmark, h3, bucket, size):
+    """Read ranges at random offsets of a large object."""
+
+    object_size = 64 * MEGABYTE
+    h3.create_object(bucket, 'o1', random_data(object_size))
+    benchmark.extra_info['bytes'] = size
+
+    # seeded, so that runs read the same ranges
+    offsets = random.Random(size)
+    def setup():
+        return (bucket, 'o1'), {'offset': offsets.randrange(object_size - size + 1), 'size': size}
+
+    benchmark.pedantic(h3.read_object, setup=setup, rounds=50)
+
+@pytest.mark.parametrize('size', [4 * KILOBYTE, 128 * KILOBYTE], ids=['4K', '128K'])
+def test_write_append(benchmark, h3, bucket, size):
+    """Append to an object in small writes, as h3fuse does."""
+
+    h3.create_object(bucket, 'o1', b'')
+    data = random_data(size)
+    benchmark.extra_info['bytes'] = size
+
+    offsets = iter(range(0, 1 << 40, size))
+    def setup():
+        return (bucket, 'o1', data), {'offset': next(offsets)}
+
+    benchmark.pedantic(h3.write_object, setup=setup, rounds=200)
+
+def test_info(benchmark, h3, bucket):
+    """Retrieve object information."""
+
+    h3.create_object(bucket, 'o1', random_data(16 * MEGABYTE))
+
+    benchmark(h3.info_object, bucket, 'o1')
+
+@pytest.mark.parametrize('size', [4 * KILOBYTE, 16 * MEGABYTE], ids=['4K', '16M'])
+def test_copy(benchmark, h3, bucket, names, size):
+    """Copy objects."""
+
+    h3.create_object(bucket, 'o1', random_data(size))
+    benchmark.extra_info['bytes'] = size
+
+    def setup():
+        return (bucket, 'o1', names()), {}
+
+    benchmark.pedantic(h3.copy_object, setup=setup, rounds=20)
+
+def test_move(benchmark, h3, bucket):
+    """Rename an object back and forth."""
+
+    h3.create_object(bucket, 'o1', random_data(MEGABYTE))
+
+    moves = itertools.cycle([('o1', 'o2'), ('o2', 'o1')])
+    def setup():
+        return (bucket, *next(moves)), {}
+
+    benchmark.pedantic(h3.move_object, setup=setup, rounds=100)
+
+def test_delete(benchmark, h3, bucket, names):
+    """Delete objects."""
+
+    data = random_data(MEGABYTE)
+
+    def setup():
+        object_name = names()
+        h3.create_object(bucket, object_name, data)
+        return (bucket, object_name), {}
+
+    benchmark.pedantic(h3.delete_object, setup=setup, rounds=50)
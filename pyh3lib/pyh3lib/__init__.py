@@ -1,6 +1,9 @@
 from .version import __version__
 
 from .h3 import H3List, H3Bytes, H3
+from .tracing import H3TraceEvent, OpenTelemetryHook
+from .aio import H3 as AsyncH3
+from .pool import H3Pool
 
 from .h3lib import FailureError as H3FailureError
 from .h3lib import InvalidArgsError as H3InvalidArgsError
@@ -0,0 +1,326 @@
+# Copyright [2019] [FORTH-ICS]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import asyncio
+import functools
+
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from contextvars import copy_context
+except ImportError:
+    copy_context = None
+
+from . import h3
+
+CHUNK_SIZE = 1048576
+
+class Reader(object):
+    """Read an object in chunks. Returned by :meth:`H3.reader`.
+
+    Use :meth:`read`, or iterate with ``async for`` to get the data one chunk at a time.
+    The object size is taken when reading starts, so data appended afterwards is not read.
+    """
+
+    def __init__(self, h3, bucket_name, object_name, offset=0, chunk_size=CHUNK_SIZE):
+        self._h3          = h3
+        self._bucket_name = bucket_name
+        self._object_name = object_name
+        self._offset      = offset
+        self._chunk_size  = chunk_size
+        self._size        = None
+
+    async def read(self, size=-1):
+        """Read from the object.
+
+        :param size: the size of the data to read (default is all that is left)
+        :type size: int
+        :returns: The data read, which is empty at the end of the object
+        """
+
+        if self._size is None:
+            self._size = (await self._h3.info_object(self._bucket_name, self._object_name)).size
+
+        left = max(self._size - self._offset, 0)
+        size = left if size < 0 else min(size, left)
+        if not size:
+            return b''
+
+        data = await self._h3.read_object(self._bucket_name, self._object_name, self._offset, size)
+        self._offset += len(data)
+        return bytes(data)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        data = await self.read(self._chunk_size)
+        if not data:
+            raise StopAsyncIteration
+        return data
+
+class Writer(object):
+    """Write an object sequentially. Returned by :meth:`H3.writer`.
+
+    Data is collected into chunks, each written with a single call, so :meth:`close` (or leave the
+    ``async with`` block) to write the last one. As with :meth:`pyh3lib.H3.write_object`, the object
+    is created if missing, but not truncated if it exists.
+    """
+
+    def __init__(self, h3, bucket_name, object_name, offset=0, chunk_size=CHUNK_SIZE):
+        self._h3          = h3
+        self._bucket_name = bucket_name
+        self._object_name = object_name
+        self._offset      = offset
+        self._chunk_size  = chunk_size
+        self._buffer      = bytearray()
+
+    async def write(self, data):
+        """Write to the object.
+
+        :param data: the data to write
+        :type data: bytes
+        :returns: The size of the data
+        """
+
+        self._buffer += data
+        while len(self._buffer) >= self._chunk_size:
+            await self._write(self._chunk_size)
+        return len(data)
+
+    async def flush(self):
+        """Write the data collected so far.
+
+        :returns: nothing
+        """
+
+        if self._buffer:
+            await self._write(len(self._buffer))
+
+    async def close(self):
+        """Write the last chunk.
+
+        :returns: nothing
+        """
+
+        await self.flush()
+
+    async def _write(self, size):
+        chunk = bytes(self._buffer[:size])
+        await self._h3.write_object(self._bucket_name, self._object_name, chunk, self._offset)
+        del self._buffer[:size]
+        self._offset += size
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            await self.close()
+
+class H3(object):
+    """asyncio interface to H3.
+
+    Has awaitable versions of all :class:`pyh3lib.H3` calls, with the same arguments, which run in a pool
+    of threads that share an H3 handle. ``h3lib`` is called without holding the GIL, so the threads
+    do run in parallel.
+
+    :param storage_uri: backend storage URI
+    :param user_id: user performing all actions
+    :param max_workers: the number of threads to run calls in
+    :param max_concurrency: the maximum number of calls in progress (default is one per thread)
+    :type storage_uri: string
+    :type user_id: int
+    :type max_workers: int
+    :type max_concurrency: int
+
+    Use as an asynchronous context manager, or :meth:`close` when done::
+
+        async with pyh3lib.AsyncH3('file:///tmp/h3') as h3:
+            await h3.create_bucket('b1')
+            async for name in h3.iter_objects('b1'):
+                ...
+    """
+
+    BUCKET_NAME_SIZE = h3.H3.BUCKET_NAME_SIZE
+    """Maximum bucket name size."""
+
+    OBJECT_NAME_SIZE = h3.H3.OBJECT_NAME_SIZE
+    """Maximum object name size."""
+
+    METADATA_NAME_SIZE = h3.H3.METADATA_NAME_SIZE
+    """Maximum metadata name size."""
+
+    def __init__(self, storage_uri, user_id=0, max_workers=None, max_concurrency=None):
+        self._h3              = h3.H3(storage_uri, user_id)
+        self._max_workers     = max_workers or min(32, (os.cpu_count() or 1) + 4)
+        self._max_concurrency = max_concurrency or self._max_workers
+        self._executor        = ThreadPoolExecutor(max_workers=self._max_workers)
+        self._semaphore       = None
+
+    async def _call(self, function, *args, **kwargs):
+        # Created on first use, to be bound to the running loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._max_concurrency)
+
+        # Run in the caller's context, for the trace hooks to find the current span
+        if copy_context:
+            function = functools.partial(copy_context().run, function)
+
+        async with self._semaphore:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, functools.partial(function, *args, **kwargs))
+
+    async def close(self):
+        """Wait for the calls in progress, stop the threads and free the handle.
+
+        :returns: nothing
+        """
+
+        await asyncio.get_running_loop().run_in_executor(None, self._executor.shutdown)
+        self._h3.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    def add_hook(self, hook, sample_rate=1.0):
+        """Add a trace hook, see :meth:`pyh3lib.H3.add_hook`. Hooks are called in the threads that run the calls.
+        """
+
+        self._h3.add_hook(hook, sample_rate)
+
+    def remove_hook(self, hook):
+        """Remove a trace hook, see :meth:`pyh3lib.H3.remove_hook`.
+        """
+
+        self._h3.remove_hook(hook)
+
+    def stats(self):
+        """Get the call statistics, see :meth:`pyh3lib.H3.stats`.
+        """
+
+        return self._h3.stats()
+
+    def reset_stats(self):
+        """Reset the call statistics, see :meth:`pyh3lib.H3.reset_stats`.
+        """
+
+        return self._h3.reset_stats()
+
+    async def iter_objects(self, bucket_name, prefix='', count=10000):
+        """Iterate over the objects in a bucket, fetching their names in batches.
+
+        :param bucket_name: the bucket name
+        :param prefix: list only objects starting with prefix (default is no prefix)
+        :param count: number of object names to retrieve per batch
+        :type bucket_name: string
+        :type prefix: string
+        :type count: int
+        :returns: An asynchronous iterator of object names
+        """
+
+        offset = 0
+        while True:
+            objects = await self.list_objects(bucket_name, prefix, offset, count)
+            for name in objects:
+                yield name
+            if objects.done:
+                break
+            offset += len(objects)
+
+    async def iter_objects_with_metadata(self, bucket_name, metadata_name):
+        """Iterate over the objects in a bucket that have the specified metadata.
+
+        :param bucket_name: the bucket name
+        :param metadata_name: the metadata name
+        :type bucket_name: string
+        :type metadata_name: string
+        :returns: An asynchronous iterator of object names
+        """
+
+        offset = 0
+        while True:
+            objects = await self.list_objects_with_metadata(bucket_name, metadata_name, offset)
+            for name in objects:
+                yield name
+            if objects.done:
+                break
+            offset = objects.nextOffset
+
+    async def iter_multiparts(self, bucket_name, count=10000):
+        """Iterate over the multipart IDs in a bucket.
+
+        :param bucket_name: the bucket name
+        :param count: number of multipart IDs to retrieve per batch
+        :type bucket_name: string
+        :type count: int
+        :returns: An asynchronous iterator of multipart IDs
+        """
+
+        offset = 0
+        while True:
+            multiparts = await self.list_multiparts(bucket_name, offset, count)
+            for multipart_id in multiparts:
+                yield multipart_id
+            if multiparts.done:
+                break
+            offset += len(multiparts)
+
+    def reader(self, bucket_name, object_name, offset=0, chunk_size=CHUNK_SIZE):
+        """Read an object as a stream.
+
+        :param bucket_name: the bucket name
+        :param object_name: the object name
+        :param offset: the offset in the object where reading should start
+        :param chunk_size: the size of the data read at once when iterating
+        :type bucket_name: string
+        :type object_name: string
+        :type offset: int
+        :type chunk_size: int
+        :returns: A :class:`Reader`
+        """
+
+        return Reader(self, bucket_name, object_name, offset, chunk_size)
+
+    def writer(self, bucket_name, object_name, offset=0, chunk_size=CHUNK_SIZE):
+        """Write an object as a stream.
+
+        :param bucket_name: the bucket name
+        :param object_name: the object name
+        :param offset: the offset in the object where writing should start
+        :param chunk_size: the size of the data written at once
+        :type bucket_name: string
+        :type object_name: string
+        :type offset: int
+        :type chunk_size: int
+        :returns: A :class:`Writer`
+        """
+
+        return Writer(self, bucket_name, object_name, offset, chunk_size)
+
+def _awaitable(name):
+    method = getattr(h3.H3, name)
+
+    @functools.wraps(method)
+    async def wrapper(self, *args, **kwargs):
+        return await self._call(getattr(self._h3, name), *args, **kwargs)
+
+    return wrapper
+
+for _name, _value in list(vars(h3.H3).items()):
+    if callable(_value) and not _name.startswith('_') and not hasattr(H3, _name):
+        setattr(H3, _name, _awaitable(_name))
@@ -16,8 +16,12 @@ import os
 import sys
 import argparse
 import fnmatch
+import random
+import time
 import pyh3lib
 
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
 from shutil import copyfile, copytree, ignore_patterns, move, rmtree
 from math import log
 from datetime import datetime
@@ -34,6 +38,21 @@ def sizeof(size):
 
     return '0 bytes'
 
+def parse_size(size):
+    units = {'K': 1024, 'M': 1024**2, 'G': 1024**3, 'T': 1024**4}
+    size = size.strip().upper().rstrip('B')
+    if size and size[-1] in units:
+        return int(float(size[:-1]) * units[size[-1]])
+
+    return int(size)
+
+def percentile(latencies, fraction):
+    # Nearest rank, on sorted latencies
+    if not latencies:
+        return 0.0
+
+    return latencies[min(len(latencies) - 1, int(len(latencies) * fraction))]
+
 def print_error(error):
     print(f'\033[91mERROR - {error}\033[0m')
 
@@ -415,6 +434,101 @@ def cmd_remove_object(config_path, args):
         raise
         print_error(f'Cannot delete object: {e}')
 
+def bench_worker(h3, bucket, prefix, size, count, read_ratio, buffer):
+    rng = random.Random(prefix)
+    written = []
+    results = []
+
+    # Reads need something to read from the start
+    if read_ratio > 0:
+        h3.create_dummy_object(bucket, f'{prefix}-seed', buffer, size)
+        written.append(f'{prefix}-seed')
+
+    start = time.time()
+    for i in range(count):
+        if written and rng.random() < read_ratio:
+            name = rng.choice(written)
+            before = time.perf_counter()
+            done = h3.read_dummy_object(bucket, name)
+            results.append(('read', time.perf_counter() - before, done))
+        else:
+            name = f'{prefix}-{i}'
+            before = time.perf_counter()
+            h3.create_dummy_object(bucket, name, buffer, size)
+            results.append(('write', time.perf_counter() - before, size))
+            written.append(name)
+    end = time.time()
+
+    for name in written:
+        h3.delete_object(bucket, name)
+
+    return start, end, results
+
+def bench_process(storage_uri, bucket, prefix, size, count, read_ratio, buffer_size, threads):
+    shared = pyh3lib.H3(storage_uri)
+    buffer = os.urandom(min(size, buffer_size))
+
+    def run(thread):
+        h3 = shared
+        if thread:
+            try:
+                h3 = pyh3lib.H3(storage_uri)
+            except pyh3lib.H3InvalidArgsError:
+                # Some stores (RocksDB) can only be opened once per process, but their handle is thread safe
+                pass
+        return bench_worker(h3, bucket, f'{prefix}-{thread}', size, count, read_ratio, buffer)
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        return [future.result() for future in [executor.submit(run, thread) for thread in range(threads)]]
+
+def print_bench(size, workers):
+    start = min(worker[0] for worker in workers)
+    end = max(worker[1] for worker in workers)
+    duration = max(end - start, sys.float_info.epsilon)
+
+    for op in ('write', 'read'):
+        samples = [(latency, done) for worker in workers for kind, latency, done in worker[2] if kind == op]
+        if not samples:
+            continue
+
+        latencies = sorted(latency for latency, _ in samples)
+        total = sum(done for _, done in samples)
+        print(f'{op:5} {sizeof(size):>8} {len(samples):8} ops {sizeof(total / duration):>10}/s {len(samples) / duration:10.1f} ops/s  '
+              f'p50 {percentile(latencies, 0.5) * 1000:8.3f}ms  p99 {percentile(latencies, 0.99) * 1000:8.3f}ms  p999 {percentile(latencies, 0.999) * 1000:8.3f}ms')
+
+def cmd_bench(config_path, args):
+    print_debug(args, f'command -> bench [bucket:{args.bucket}, sizes:{args.size}, count:{args.count}, threads:{args.threads}, processes:{args.processes}, read_ratio:{args.read_ratio}]')
+    bucket, object = parse_h3_path(args.bucket)
+    if not bucket or object:
+        return print_error(f'Invalid bucket name {args.bucket}')
+    if args.count < 1 or args.threads < 1 or args.processes < 1 or not 0 <= args.read_ratio <= 1:
+        return print_error(f'Invalid benchmark parameters')
+
+    try:
+        h3 = pyh3lib.H3(config_path)
+        try:
+            h3.create_bucket(bucket)
+        except pyh3lib.H3ExistsError:
+            pass
+        # Let the workers open the store, in case it can only be opened once
+        del h3
+
+        for size in args.size or [parse_size('1M')]:
+            prefix = f'bench-{os.getpid()}-{size}'
+            if args.processes == 1:
+                workers = bench_process(config_path, bucket, prefix, size, args.count, args.read_ratio, args.buffer_size, args.threads)
+            else:
+                with ProcessPoolExecutor(max_workers=args.processes) as executor:
+                    futures = [executor.submit(bench_process, config_path, bucket, f'{prefix}-{process}', size, args.count, args.read_ratio, args.buffer_size, args.threads)
+                               for process in range(args.processes)]
+                    workers = [worker for future in futures for worker in future.result()]
+            print_bench(size, workers)
+    except pyh3lib.H3InvalidArgsError:
+        print_error(f'Invalid name')
+    except Exception as e:
+        raise
+        print_error(f'Cannot run benchmark: {e}')
+
 # def cmd_create_multipart_upload(config_path, args):
 #     print_debug(args, f'command -> create_multipart_upload [bucket:{args.bucket}, key:{args.key}]')
 #     try:
@@ -582,6 +696,16 @@ def main(cmd=None):
     remove_object.add_argument('-e', '--only-show-errors', action='store_true', help='Only errors and warnings are displayed. All other output is suppressed')
     remove_object.set_defaults(func=cmd_remove_object)
 
+    bench = subprasers.add_parser('bench', help='Measures the throughput and latency of the store with generated objects')
+    bench.add_argument('bucket', help='Bucket to work in (created if missing)')
+    bench.add_argument('-s', '--size', type=parse_size, action='append', help='Object size, e.g. 4K or 16M (may be repeated, default is 1M)')
+    bench.add_argument('-n', '--count', type=int, default=100, help='Number of operations per worker and size')
+    bench.add_argument('-t', '--threads', type=int, default=1, help='Number of worker threads per process')
+    bench.add_argument('-p', '--processes', type=int, default=1, help='Number of worker processes')
+    bench.add_argument('-r', '--read-ratio', type=float, default=0.0, help='Fraction of operations that are reads (0 to 1)')
+    bench.add_argument('--buffer-size', type=parse_size, default=parse_size('1M'), help='Size of the buffer objects are generated from')
+    bench.set_defaults(func=cmd_bench)
+
     # create_multipart_upload = subprasers.add_parser('create_multipart_upload', help='Initiates a multipart upload and returns an upload ID')
     # create_multipart_upload.add_argument('-b', '--bucket', help="object's bucket", required=True)
     # create_multipart_upload.add_argument('-k', '--key', help='object', required=True)
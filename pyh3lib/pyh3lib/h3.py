@@ -13,6 +13,7 @@
 # limitations under the License.
 
 from . import h3lib
+from .tracing import Tracer, traced
 
 class H3List(list):
     """A list that has a ``done`` attribute. If ``done`` is ``False``
@@ -64,6 +65,11 @@ class H3(object, metaclass=H3Version):
     * ``rocksdb:///tmp/h3/rocksdb`` for `RocksDB <https://rocksdb.org>`_
     * ``redis://127.0.0.1:6379`` for `Redis <https://redis.io>`_
 
+    Add the ``stats`` option to any URI (like ``file:///tmp/h3?stats=1``) to collect call statistics, see :meth:`stats`.
+
+    An instance can be used by many threads, whose calls run in parallel, but some stores (like Redis) serve each
+    handle over a single connection. Use an :class:`H3Pool` to give threads a handle each.
+
     .. note::
        All functions may raise standard exceptions on internal errors, or some ``pyh3lib.*Error``
        in respect to the underlying library's return values.
@@ -83,7 +89,73 @@ class H3(object, metaclass=H3Version):
         if not self._handle:
             raise SystemError('Could not create H3 handle')
         self._user_id = user_id
+        self._tracer = Tracer(self._handle)
+
+    def close(self):
+        """Free the handle, instead of waiting for the instance to be garbage collected. The instance
+        can't be used afterwards. Calls in progress in other threads complete first, the handle is freed
+        once the last of them returns.
+
+        :returns: ``True`` if the handle was freed, ``False`` if it was already
+        """
+
+        return h3lib.close(self._handle)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def add_hook(self, hook, sample_rate=1.0):
+        """Add a trace hook, to be called with an :class:`H3TraceEvent` at the start and end of each call,
+        and for each store primitive the call issued.
+
+        A hook can be any callable, or an :class:`OpenTelemetryHook` to report the calls as spans.
+        Hooks are called synchronously, in the thread making the call.
+
+        :param hook: the hook
+        :param sample_rate: the fraction of calls to trace
+        :type hook: callable
+        :type sample_rate: float
+        :returns: nothing
+        """
+
+        self._tracer.add(hook, sample_rate)
+
+    def remove_hook(self, hook):
+        """Remove a trace hook.
 
+        :param hook: the hook
+        :type hook: callable
+        :returns: nothing
+        """
+
+        self._tracer.remove(hook)
+
+    def stats(self):
+        """Get the call statistics collected since the handle was created or last reset.
+
+        The reply has a ``kv`` and an ``api`` dictionary, with an entry for each store primitive (like ``read``
+        or ``metadata_write``) and H3 call (like ``CreateObject``) used respectively. Each entry holds the
+        ``count`` of calls, the ``failures`` (store primitives only), the ``bytes`` moved to or from the store,
+        the ``total_latency`` and ``max_latency`` in seconds, and a latency ``histogram``, where item ``i``
+        counts the calls that took less than 2^i microseconds (the last item also counts the slower ones).
+
+        :returns: A dictionary if the call was successful, ``None`` if the handle doesn't collect statistics
+        """
+
+        return h3lib.stats(self._handle)
+
+    def reset_stats(self):
+        """Clear the call statistics.
+
+        :returns: ``True`` if the call was successful, ``False`` if the handle doesn't collect statistics
+        """
+
+        return h3lib.reset_stats(self._handle)
+
+    @traced
     def list_buckets(self):
         """List all buckets.
 
@@ -92,6 +164,7 @@ class H3(object, metaclass=H3Version):
 
         return h3lib.list_buckets(self._handle, self._user_id)
 
+    @traced
     def info_bucket(self, bucket_name, get_stats=False):
         """Get bucket information.
 
@@ -123,6 +196,7 @@ class H3(object, metaclass=H3Version):
 
         return h3lib.info_bucket(self._handle, bucket_name, get_stats, self._user_id)
 
+    @traced
     def create_bucket(self, bucket_name):
         """Create a bucket.
 
@@ -133,6 +207,7 @@ class H3(object, metaclass=H3Version):
 
         return h3lib.create_bucket(self._handle, bucket_name, self._user_id)
 
+    @traced
     def delete_bucket(self, bucket_name):
         """Delete a bucket.
 
@@ -145,6 +220,7 @@ class H3(object, metaclass=H3Version):
         """
         return h3lib.delete_bucket(self._handle, bucket_name, self._user_id)
 
+    @traced
     def purge_bucket(self, bucket_name):
         """Purge a bucket.
 
@@ -154,6 +230,7 @@ class H3(object, metaclass=H3Version):
         """
         return h3lib.purge_bucket(self._handle, bucket_name, self._user_id)
 
+    @traced
     def list_objects(self, bucket_name, prefix='', offset=0, count=10000):
         """List objects in a bucket.
 
@@ -171,6 +248,7 @@ class H3(object, metaclass=H3Version):
         objects, done = h3lib.list_objects(self._handle, bucket_name, prefix, offset, count, self._user_id)
         return H3List(objects, done=done)
 
+    @traced
     def info_object(self, bucket_name, object_name):
         """Get object information.
 
@@ -195,6 +273,7 @@ class H3(object, metaclass=H3Version):
 
         return h3lib.info_object(self._handle, bucket_name, object_name, self._user_id)
 
+    @traced
     def touch_object(self, bucket_name, object_name, last_access=-1, last_modification=-1):
         """Set object access and modification times (used by h3fuse).
 
@@ -211,6 +290,7 @@ class H3(object, metaclass=H3Version):
 
         return h3lib.touch_object(self._handle, bucket_name, object_name, last_access, last_modification, self._user_id)
 
+    @traced
     def set_object_permissions(self, bucket_name, object_name, mode):
         """Set object permissions attribute (used by h3fuse).
 
@@ -225,6 +305,7 @@ class H3(object, metaclass=H3Version):
 
         return h3lib.set_object_permissions(self._handle, bucket_name, object_name, mode, self._user_id)
 
+    @traced
     def set_object_owner(self, bucket_name, object_name, uid, gid):
         """Set object owner attribute (used by h3fuse).
 
@@ -241,6 +322,7 @@ class H3(object, metaclass=H3Version):
 
         return h3lib.set_object_owner(self._handle, bucket_name, object_name, uid, gid, self._user_id)
 
+    @traced
     def make_object_read_only(self, bucket_name, object_name):
         """Set object permissions attribute (used by h3fuse).
 
@@ -253,6 +335,7 @@ class H3(object, metaclass=H3Version):
 
         return h3lib.make_object_read_only(self._handle, bucket_name, object_name, self._user_id)
 
+    @traced
     def create_object(self, bucket_name, object_name, data):
         """Create an object.
 
@@ -267,6 +350,25 @@ class H3(object, metaclass=H3Version):
 
         return h3lib.create_object(self._handle, bucket_name, object_name, data, self._user_id)
 
+    @traced
+    def create_dummy_object(self, bucket_name, object_name, data, size):
+        """Create an object of the given size by repeating a (typically smaller) buffer.
+        Used for benchmarking the store, without the cost of preparing the object's data.
+
+        :param bucket_name: the bucket name
+        :param object_name: the object name
+        :param data: the contents to repeat
+        :param size: the object size
+        :type bucket_name: string
+        :type object_name: string
+        :type data: bytes
+        :type size: int
+        :returns: ``True`` if the call was successful
+        """
+
+        return h3lib.create_dummy_object(self._handle, bucket_name, object_name, data, size, self._user_id)
+
+    @traced
     def create_object_copy(self, bucket_name, src_object_name, offset, size, dst_object_name):
         """Create an object with data from another object.
 
@@ -285,6 +387,7 @@ class H3(object, metaclass=H3Version):
 
         return h3lib.create_object_copy(self._handle, bucket_name, src_object_name, offset, size, dst_object_name, self._user_id)
 
+    @traced
     def create_object_from_file(self, bucket_name, object_name, filename):
         """Create an object with data from a file.
 
@@ -299,6 +402,7 @@ class H3(object, metaclass=H3Version):
 
         return h3lib.create_object_from_file(self._handle, bucket_name, object_name, filename, self._user_id)
 
+    @traced
     def write_object(self, bucket_name, object_name, data, offset=0):
         """Write to an object.
 
@@ -315,6 +419,7 @@ class H3(object, metaclass=H3Version):
 
         return h3lib.write_object(self._handle, bucket_name, object_name, data, offset, self._user_id)
 
+    @traced
     def write_object_copy(self, bucket_name, src_object_name, src_offset, size, dst_object_name, dst_offset):
         """Write to an object with data from another object.
 
@@ -335,6 +440,7 @@ class H3(object, metaclass=H3Version):
 
         return h3lib.write_object_copy(self._handle, bucket_name, src_object_name, src_offset, size, dst_object_name, dst_offset, self._user_id)
 
+    @traced
     def write_object_from_file(self, bucket_name, object_name, filename, offset=0):
         """Write to an object with data from a file.
 
@@ -351,6 +457,7 @@ class H3(object, metaclass=H3Version):
 
         return h3lib.write_object_from_file(self._handle, bucket_name, object_name, filename, offset, self._user_id)
 
+    @traced
     def read_object(self, bucket_name, object_name, offset=0, size=0):
         """Read from an object.
 
@@ -370,6 +477,21 @@ class H3(object, metaclass=H3Version):
             data = b''
         return H3Bytes(data, done=done)
 
+    @traced
+    def read_dummy_object(self, bucket_name, object_name):
+        """Read a whole object, discarding the data.
+        Used for benchmarking the store, without the cost of returning the object's data.
+
+        :param bucket_name: the bucket name
+        :param object_name: the object name
+        :type bucket_name: string
+        :type object_name: string
+        :returns: The bytes read if the call was successful
+        """
+
+        return h3lib.read_dummy_object(self._handle, bucket_name, object_name, self._user_id)
+
+    @traced
     def read_object_to_file(self, bucket_name, object_name, filename, offset=0, size=0):
         """Read from an object into a file.
 
@@ -389,6 +511,7 @@ class H3(object, metaclass=H3Version):
         _, done = h3lib.read_object_to_file(self._handle, bucket_name, object_name, filename, offset, size, self._user_id)
         return H3Bytes(done=done)
 
+    @traced
     def copy_object(self, bucket_name, src_object_name, dst_object_name, no_overwrite=False):
         """Copy an object to another object.
 
@@ -405,6 +528,7 @@ class H3(object, metaclass=H3Version):
 
         return h3lib.copy_object(self._handle, bucket_name, src_object_name, dst_object_name, no_overwrite, self._user_id)
 
+    @traced
     def move_object(self, bucket_name, src_object_name, dst_object_name, no_overwrite=False):
         """Move/rename an object to another object.
 
@@ -421,6 +545,7 @@ class H3(object, metaclass=H3Version):
 
         return h3lib.move_object(self._handle, bucket_name, src_object_name, dst_object_name, no_overwrite, self._user_id)
 
+    @traced
     def exchange_object(self, bucket_name, src_object_name, dst_object_name):
         """Exchange data between objects.
 
@@ -435,6 +560,7 @@ class H3(object, metaclass=H3Version):
 
         return h3lib.exchange_object(self._handle, bucket_name, src_object_name, dst_object_name, self._user_id)
 
+    @traced
     def truncate_object(self, bucket_name, object_name, size=0):
         """Read from an object.
 
@@ -449,6 +575,7 @@ class H3(object, metaclass=H3Version):
 
         return h3lib.truncate_object(self._handle, bucket_name, object_name, size, self._user_id)
 
+    @traced
     def delete_object(self, bucket_name, object_name):
         """Delete an object.
 
@@ -461,6 +588,7 @@ class H3(object, metaclass=H3Version):
 
         return h3lib.delete_object(self._handle, bucket_name, object_name, self._user_id)
 
+    @traced
     def create_object_metadata(self, bucket_name, object_name, metadata_name, metadata_value):
         """Create an object's specific metadata.
 
@@ -479,6 +607,7 @@ class H3(object, metaclass=H3Version):
 
         return h3lib.create_object_metadata(self._handle, bucket_name, object_name, metadata_name, metadata_value, self._user_id)
     
+    @traced
     def read_object_metadata(self, bucket_name, object_name, metadata_name):
         """Read an object's specific metadata.
 
@@ -496,6 +625,7 @@ class H3(object, metaclass=H3Version):
             data = b''
         return H3Bytes(data, done=done)
 
+    @traced
     def delete_object_metadata(self, bucket_name, object_name, metadata_name):
         """Delete an object's specific metadata.
 
@@ -510,6 +640,7 @@ class H3(object, metaclass=H3Version):
 
         return h3lib.delete_object_metadata(self._handle, bucket_name, object_name, metadata_name, self._user_id)
     
+    @traced
     def copy_object_metadata(self, bucket_name, src_object_name, dst_object_name):
         """Copy all the source object's metadata to the destination object.
 
@@ -524,6 +655,7 @@ class H3(object, metaclass=H3Version):
 
         return h3lib.copy_object_metadata(self._handle, bucket_name, src_object_name, dst_object_name, self._user_id)
     
+    @traced
     def move_object_metadata(self, bucket_name, src_object_name, dst_object_name):
         """Move all the source object's metadata to the destination object.
 
@@ -542,6 +674,7 @@ class H3(object, metaclass=H3Version):
 
         return h3lib.move_object_metadata(self._handle, bucket_name, src_object_name, dst_object_name, self._user_id)
     
+    @traced
     def list_objects_with_metadata(self, bucket_name, metadata_name, offset=0):
         """List all the objects with a specific metadata.
 
@@ -557,6 +690,47 @@ class H3(object, metaclass=H3Version):
         objects = h3lib.list_objects_with_metadata(self._handle, bucket_name, metadata_name, offset, self._user_id)
         return H3List(objects["objects"], done=objects["done"], nextOffset=objects["nextOffset"])
 
+    @traced
+    def list_expired_objects(self, timestamp=None, offset=0):
+        """List all the objects whose ``ExpiresAt`` metadata is due.
+
+        The ``ExpiresAt`` metadata is expected to hold a ``struct.pack('d', ...)`` timestamp.
+        The call consults an index maintained by the library, so its cost depends on the
+        number of indexed objects rather than on reading the metadata of each one.
+
+        :param timestamp: the point in time to compare against (default is now)
+        :param offset: continue list from offset (default is to start from the beginning)
+        :type timestamp: float
+        :type offset: int
+        :returns: An H3List of (bucket name, object name) tuples if the call was successful
+        """
+
+        if timestamp is None:
+            timestamp = -1
+        objects = h3lib.list_expired_objects(self._handle, timestamp, offset, self._user_id)
+        return H3List([tuple(object_id.split('/', 1)) for object_id in objects["objects"]], done=objects["done"], nextOffset=objects["nextOffset"])
+
+    @traced
+    def list_read_only_due_objects(self, timestamp=None, offset=0):
+        """List all the objects whose ``ReadOnlyAfter`` deadline has passed.
+
+        The deadline is the last modification of the object plus the seconds held by the
+        ``ReadOnlyAfter`` metadata, expected to be a ``struct.pack('d', ...)`` value. The call
+        consults an index maintained by the library and skips objects that are already read only.
+
+        :param timestamp: the point in time to compare against (default is now)
+        :param offset: continue list from offset (default is to start from the beginning)
+        :type timestamp: float
+        :type offset: int
+        :returns: An H3List of (bucket name, object name) tuples if the call was successful
+        """
+
+        if timestamp is None:
+            timestamp = -1
+        objects = h3lib.list_read_only_due_objects(self._handle, timestamp, offset, self._user_id)
+        return H3List([tuple(object_id.split('/', 1)) for object_id in objects["objects"]], done=objects["done"], nextOffset=objects["nextOffset"])
+
+    @traced
     def list_multiparts(self, bucket_name, offset=0, count=10000):
         """List all multipart IDs for a bucket.
 
@@ -572,6 +746,7 @@ class H3(object, metaclass=H3Version):
         multiparts, done = h3lib.list_multiparts(self._handle, bucket_name, offset, count, self._user_id)
         return H3List(multiparts, done=done)
 
+    @traced
     def create_multipart(self, bucket_name, object_name):
         """Create a multipart object.
 
@@ -584,6 +759,7 @@ class H3(object, metaclass=H3Version):
 
         return h3lib.create_multipart(self._handle, bucket_name, object_name, self._user_id)
 
+    @traced
     def complete_multipart(self, multipart_id):
         """Complete a multipart object (creates the actual object).
 
@@ -593,6 +769,7 @@ class H3(object, metaclass=H3Version):
         """
         return h3lib.complete_multipart(self._handle, multipart_id, self._user_id)
 
+    @traced
     def abort_multipart(self, multipart_id):
         """Abort a multipart object (deletes the multipart object).
 
@@ -603,6 +780,7 @@ class H3(object, metaclass=H3Version):
 
         return h3lib.abort_multipart(self._handle, multipart_id, self._user_id)
 
+    @traced
     def list_parts(self, multipart_id):
         """List all parts of a multipart object.
 
@@ -620,6 +798,7 @@ class H3(object, metaclass=H3Version):
 
         return h3lib.list_parts(self._handle, multipart_id, self._user_id)
 
+    @traced
     def create_part(self, multipart_id, part_number, data):
         """Create a part of a multipart object.
 
@@ -634,6 +813,7 @@ class H3(object, metaclass=H3Version):
 
         return h3lib.create_part(self._handle, multipart_id, part_number, data, self._user_id)
 
+    @traced
     def create_part_copy(self, object_name, offset, size, multipart_id, part_number):
         """Create a part of a multipart object with data from another object.
 
@@ -133,13 +133,85 @@ static PyObject *h3lib_version(PyObject *self) {
     return Py_BuildValue("s", H3_Version());
 }
 
+/*
+ * The state of a handle, kept in its capsule. Calls release the GIL, so other threads may close the handle, or replace
+ * its trace callback, while they are in progress. The calls in progress are counted (with the GIL held), so that closing
+ * frees the handle once the last of them completes, and the callback is looked up with the GIL held on each event, so
+ * that it is not released while in use.
+ */
+typedef struct {
+    H3_Handle handle;
+    PyObject *callback;     // The trace callback, if any
+    Py_ssize_t calls;       // Calls in progress
+    char closed;
+} handle_state;
+
 // Library calls
 void h3lib_free(PyObject *capsule) {
-    H3_Handle handle = (H3_Handle)PyCapsule_GetPointer(capsule, NULL);
-    if (handle == NULL)
+    handle_state *state = (handle_state *)PyCapsule_GetPointer(capsule, NULL);
+    if (state == NULL)
         return;
 
-    H3_Free(handle);
+    if (state->handle != NULL)
+        H3_Free(state->handle);
+    Py_XDECREF(state->callback);
+    PyMem_Free(state);
+}
+
+static H3_Handle get_handle(PyObject *capsule) {
+    handle_state *state = (handle_state *)PyCapsule_GetPointer(capsule, NULL);
+    if (state == NULL)
+        return NULL;
+
+    if (state->closed) {
+        PyErr_SetString(PyExc_ValueError, "the handle is closed");
+        return NULL;
+    }
+
+    return state->handle;
+}
+
+static void end_call(handle_state *state) {
+    if (--state->calls == 0 && state->closed && state->handle != NULL) {
+        H3_Free(state->handle);
+        state->handle = NULL;
+    }
+}
+
+// Run an h3lib call on the handle of a capsule without the GIL
+#define BEGIN_H3_CALL(capsule) { \
+    handle_state *_state = (handle_state *)PyCapsule_GetPointer(capsule, NULL); \
+    _state->calls++; \
+    Py_BEGIN_ALLOW_THREADS
+
+#define END_H3_CALL \
+    Py_END_ALLOW_THREADS \
+    end_call(_state); \
+}
+
+static PyObject *h3lib_close(PyObject* self, PyObject *args, PyObject *kw) {
+    PyObject *capsule = NULL;
+
+    static char *kwlist[] = {"handle", NULL};
+    if (!PyArg_ParseTupleAndKeywords(args, kw, "O", kwlist, &capsule))
+        return NULL;
+
+    handle_state *state = (handle_state *)PyCapsule_GetPointer(capsule, NULL);
+    if (state == NULL)
+        return NULL;
+
+    if (state->closed)
+        Py_RETURN_FALSE;
+
+    // Calls in progress keep the handle until they complete, but deliver no more trace events
+    state->closed = 1;
+    Py_CLEAR(state->callback);
+    if (state->calls == 0) {
+        H3_Free(state->handle);
+        state->handle = NULL;
+    }
+
+    Py_RETURN_TRUE;
 }
 
 static PyObject *h3lib_init(PyObject* self, PyObject *args, PyObject *kw) {
@@ -149,13 +221,194 @@ static PyObject *h3lib_init(PyObject* self, PyObject *args, PyObject *kw) {
     if (!PyArg_ParseTupleAndKeywords(args, kw, "s", kwlist, &storageUri))
         return NULL;
 
-    H3_Handle handle = H3_Init(storageUri);
+    H3_Handle handle;
+    Py_BEGIN_ALLOW_THREADS
+    handle = H3_Init(storageUri);
+    Py_END_ALLOW_THREADS
     if (handle == NULL) {
         PyErr_SetNone(invalid_args_status);
         return NULL;
     }
 
-    return PyCapsule_New((void *)handle, NULL, h3lib_free);
+    handle_state *state = PyMem_Calloc(1, sizeof(handle_state));
+    if (state == NULL) {
+        H3_Free(handle);
+        return PyErr_NoMemory();
+    }
+    state->handle = handle;
+
+    PyObject *capsule = PyCapsule_New((void *)state, NULL, h3lib_free);
+    if (capsule == NULL) {
+        H3_Free(handle);
+        PyMem_Free(state);
+    }
+    return capsule;
+}
+
+static PyObject *operation_stats_to_dict(H3_OperationStats *stats) {
+    PyObject *histogram = PyList_New(H3_STATS_HISTOGRAM_SIZE);
+    if (histogram == NULL)
+        return NULL;
+
+    for (int i = 0; i < H3_STATS_HISTOGRAM_SIZE; i++)
+        PyList_SET_ITEM(histogram, i, PyLong_FromUnsignedLongLong(stats->histogram[i]));
+
+    return Py_BuildValue("{s:K,s:K,s:K,s:d,s:d,s:N}",
+                         "count", (unsigned long long)stats->count,
+                         "failures", (unsigned long long)stats->failures,
+                         "bytes", (unsigned long long)stats->bytes,
+                         "total_latency", (double)stats->totalLatency / 1000000000ULL,
+                         "max_latency", (double)stats->maxLatency / 1000000000ULL,
+                         "histogram", histogram);
+}
+
+static PyObject *h3lib_stats(PyObject* self, PyObject *args, PyObject *kw) {
+    PyObject *capsule = NULL;
+
+    static char *kwlist[] = {"handle", NULL};
+    if (!PyArg_ParseTupleAndKeywords(args, kw, "O", kwlist, &capsule))
+        return NULL;
+
+    H3_Handle handle = get_handle(capsule);
+    if (handle == NULL)
+        return NULL;
+
+    H3_Stats *stats = malloc(sizeof(H3_Stats));
+    if (stats == NULL)
+        return PyErr_NoMemory();
+
+    H3_Status return_value = H3_GetStats(handle, stats);
+    if (return_value == H3_FAILURE) {
+        free(stats);
+        Py_RETURN_NONE;
+    }
+    if (did_raise_exception(return_value)) {
+        free(stats);
+        return NULL;
+    }
+
+    PyObject *kv = PyDict_New();
+    PyObject *api = PyDict_New();
+    PyObject *result = NULL;
+    if (kv == NULL || api == NULL)
+        goto done;
+
+    // Only report what was used
+    for (int i = 0; i < H3_NumOfKVOperations; i++) {
+        if (!stats->kv[i].count)
+            continue;
+        PyObject *entry = operation_stats_to_dict(&stats->kv[i]);
+        if (entry == NULL || PyDict_SetItemString(kv, H3_KVOperation2String(i), entry) < 0) {
+            Py_XDECREF(entry);
+            goto done;
+        }
+        Py_DECREF(entry);
+    }
+    for (int i = 0; i < H3_NumOfOperations; i++) {
+        if (!stats->api[i].count)
+            continue;
+        PyObject *entry = operation_stats_to_dict(&stats->api[i]);
+        if (entry == NULL || PyDict_SetItemString(api, H3_Operation2String(i), entry) < 0) {
+            Py_XDECREF(entry);
+            goto done;
+        }
+        Py_DECREF(entry);
+    }
+
+    result = Py_BuildValue("{s:O,s:O}", "kv", kv, "api", api);
+
+done:
+    Py_XDECREF(kv);
+    Py_XDECREF(api);
+    free(stats);
+    return result;
+}
+
+static PyObject *h3lib_reset_stats(PyObject* self, PyObject *args, PyObject *kw) {
+    PyObject *capsule = NULL;
+
+    static char *kwlist[] = {"handle", NULL};
+    if (!PyArg_ParseTupleAndKeywords(args, kw, "O", kwlist, &capsule))
+        return NULL;
+
+    H3_Handle handle = get_handle(capsule);
+    if (handle == NULL)
+        return NULL;
+
+    H3_Status return_value = H3_ResetStats(handle);
+    if (return_value == H3_FAILURE)
+        Py_RETURN_FALSE;
+    if (did_raise_exception(return_value))
+        return NULL;
+
+    Py_RETURN_TRUE;
+}
+
+static void trace_callback(const H3_TraceEvent *event, void *userData) {
+    // Calls may have released the GIL
+    PyGILState_STATE state = PyGILState_Ensure();
+    PyObject *callback = ((handle_state *)userData)->callback;
+    PyObject *result = NULL;
+
+    // Hold on to the callback, in case it replaces itself
+    if (callback == NULL) {
+        PyGILState_Release(state);
+        return;
+    }
+    Py_INCREF(callback);
+
+    switch (event->type) {
+        case H3_TRACE_CALL_START:
+            result = PyObject_CallFunction(callback, "ss", "start", H3_Operation2String(event->operation));
+            break;
+        case H3_TRACE_CALL_END:
+            result = PyObject_CallFunction(callback, "sszKdO", "end", H3_Operation2String(event->operation), NULL,
+                                           (unsigned long long)event->bytes, (double)event->latency / 1000000000ULL, Py_False);
+            break;
+        case H3_TRACE_KV:
+            result = PyObject_CallFunction(callback, "sszKdO", "kv", H3_KVOperation2String(event->kvOperation), event->key,
+                                           (unsigned long long)event->bytes, (double)event->latency / 1000000000ULL, (event->failed ? Py_True : Py_False));
+            break;
+    }
+
+    // There is no way to fail the call from here
+    if (result == NULL)
+        PyErr_WriteUnraisable(callback);
+    Py_XDECREF(result);
+    Py_DECREF(callback);
+
+    PyGILState_Release(state);
+}
+
+static PyObject *h3lib_set_trace_callback(PyObject* self, PyObject *args, PyObject *kw) {
+    PyObject *capsule = NULL;
+    PyObject *callback = NULL;
+
+    static char *kwlist[] = {"handle", "callback", NULL};
+    if (!PyArg_ParseTupleAndKeywords(args, kw, "OO", kwlist, &capsule, &callback))
+        return NULL;
+
+    H3_Handle handle = get_handle(capsule);
+    if (handle == NULL)
+        return NULL;
+
+    if (callback == Py_None) {
+        callback = NULL;
+    } else if (!PyCallable_Check(callback)) {
+        PyErr_SetString(PyExc_TypeError, "callback must be callable or None");
+        return NULL;
+    }
+
+    // The handle always traces to the state, which finds the callback, so that its user data never changes
+    handle_state *state = (handle_state *)PyCapsule_GetPointer(capsule, NULL);
+    if (did_raise_exception(H3_SetTraceCallback(handle, (callback ? trace_callback : NULL), state)))
+        return NULL;
+
+    // Events in progress hold their own reference to the callback they found
+    Py_XINCREF(callback);
+    Py_XSETREF(state->callback, callback);
+
+    Py_RETURN_TRUE;
 }
 
 static PyObject *h3lib_list_buckets(PyObject* self, PyObject *args, PyObject *kw) {
@@ -166,16 +419,20 @@ static PyObject *h3lib_list_buckets(PyObject* self, PyObject *args, PyObject *kw
     if (!PyArg_ParseTupleAndKeywords(args, kw, "O|I", kwlist, &capsule, &userId))
         return NULL;
 
-    H3_Handle handle = (H3_Handle)PyCapsule_GetPointer(capsule, NULL);
+    H3_Handle handle = get_handle(capsule);
     if (handle == NULL)
         return NULL;
 
     H3_Auth auth;
+    H3_Status return_value;
     H3_Name bucketNameArray = NULL;
     uint32_t nBuckets;
 
     auth.userId = userId;
-    if (did_raise_exception(H3_ListBuckets(handle, &auth, &bucketNameArray, &nBuckets)))
+    BEGIN_H3_CALL(capsule)
+    return_value = H3_ListBuckets(handle, &auth, &bucketNameArray, &nBuckets);
+    END_H3_CALL
+    if (did_raise_exception(return_value))
         return NULL;
 
     PyObject *list = PyList_New(nBuckets);
@@ -208,14 +465,18 @@ static PyObject *h3lib_info_bucket(PyObject* self, PyObject *args, PyObject *kw)
     if (!PyArg_ParseTupleAndKeywords(args, kw, "Os|bI", kwlist, &capsule, &bucketName, &getStats, &userId))
         return NULL;
 
-    H3_Handle handle = (H3_Handle)PyCapsule_GetPointer(capsule, NULL);
+    H3_Handle handle = get_handle(capsule);
     if (handle == NULL)
         return NULL;
 
     H3_Auth auth;
+    H3_Status return_value;
     H3_BucketInfo bucketInfo;
     auth.userId = userId;
-    if (did_raise_exception(H3_InfoBucket(handle, &auth, bucketName, &bucketInfo, getStats)))
+    BEGIN_H3_CALL(capsule)
+    return_value = H3_InfoBucket(handle, &auth, bucketName, &bucketInfo, getStats);
+    END_H3_CALL
+    if (did_raise_exception(return_value))
         return NULL;
 
     PyObject *bucket_stats;
@@ -268,14 +529,18 @@ static PyObject *h3lib_create_bucket(PyObject* self, PyObject *args, PyObject *k
     if (!PyArg_ParseTupleAndKeywords(args, kw, "Os|I", kwlist, &capsule, &bucketName, &userId))
         return NULL;
 
-    H3_Handle handle = (H3_Handle)PyCapsule_GetPointer(capsule, NULL);
+    H3_Handle handle = get_handle(capsule);
     if (handle == NULL)
         return NULL;
 
     H3_Auth auth;
+    H3_Status return_value;
 
     auth.userId = userId;
-    if (did_raise_exception(H3_CreateBucket(handle, &auth, bucketName)))
+    BEGIN_H3_CALL(capsule)
+    return_value = H3_CreateBucket(handle, &auth, bucketName);
+    END_H3_CALL
+    if (did_raise_exception(return_value))
         return NULL;
 
     Py_RETURN_TRUE;
@@ -290,14 +555,18 @@ static PyObject *h3lib_delete_bucket(PyObject* self, PyObject *args, PyObject *k
     if (!PyArg_ParseTupleAndKeywords(args, kw, "Os|I", kwlist, &capsule, &bucketName, &userId))
         return NULL;
 
-    H3_Handle handle = (H3_Handle)PyCapsule_GetPointer(capsule, NULL);
+    H3_Handle handle = get_handle(capsule);
     if (handle == NULL)
         return NULL;
 
     H3_Auth auth;
+    H3_Status return_value;
 
     auth.userId = userId;
-    if (did_raise_exception(H3_DeleteBucket(handle, &auth, bucketName)))
+    BEGIN_H3_CALL(capsule)
+    return_value = H3_DeleteBucket(handle, &auth, bucketName);
+    END_H3_CALL
+    if (did_raise_exception(return_value))
         return NULL;
 
     Py_RETURN_TRUE;
@@ -312,14 +581,18 @@ static PyObject *h3lib_purge_bucket(PyObject* self, PyObject *args, PyObject *kw
     if (!PyArg_ParseTupleAndKeywords(args, kw, "Os|I", kwlist, &capsule, &bucketName, &userId))
         return NULL;
 
-    H3_Handle handle = (H3_Handle)PyCapsule_GetPointer(capsule, NULL);
+    H3_Handle handle = get_handle(capsule);
     if (handle == NULL)
         return NULL;
 
     H3_Auth auth;
+    H3_Status return_value;
 
     auth.userId = userId;
-    if (did_raise_exception(H3_PurgeBucket(handle, &auth, bucketName)))
+    BEGIN_H3_CALL(capsule)
+    return_value = H3_PurgeBucket(handle, &auth, bucketName);
+    END_H3_CALL
+    if (did_raise_exception(return_value))
         return NULL;
 
     Py_RETURN_TRUE;
@@ -334,19 +607,22 @@ static PyObject *h3lib_list_objects(PyObject* self, PyObject *args, PyObject *kw
     uint32_t userId = 0;
 
     static char *kwlist[] = {"handle", "bucket_name", "prefix", "offset", "count", "user_id", NULL};
-    if (!PyArg_ParseTupleAndKeywords(args, kw, "Os|skkI", kwlist, &capsule, &bucketName, &prefix, &offset, &count, &userId))
+    if (!PyArg_ParseTupleAndKeywords(args, kw, "Os|sIII", kwlist, &capsule, &bucketName, &prefix, &offset, &count, &userId))
         return NULL;
 
-    H3_Handle handle = (H3_Handle)PyCapsule_GetPointer(capsule, NULL);
+    H3_Handle handle = get_handle(capsule);
     if (handle == NULL)
         return NULL;
 
     H3_Auth auth;
+    H3_Status return_value;
     H3_Name objectNameArray = NULL;
     uint32_t nObjects = count;
 
     auth.userId = userId;
-    H3_Status return_value = H3_ListObjects(handle, &auth, bucketName, prefix, offset, &objectNameArray, &nObjects);
+    BEGIN_H3_CALL(capsule)
+    return_value = H3_ListObjects(handle, &auth, bucketName, prefix, offset, &objectNameArray, &nObjects);
+    END_H3_CALL
     if (did_raise_exception(return_value))
         return NULL;
 
@@ -380,15 +656,19 @@ static PyObject *h3lib_info_object(PyObject* self, PyObject *args, PyObject *kw)
     if (!PyArg_ParseTupleAndKeywords(args, kw, "Oss|I", kwlist, &capsule, &bucketName, &objectName, &userId))
         return NULL;
 
-    H3_Handle handle = (H3_Handle)PyCapsule_GetPointer(capsule, NULL);
+    H3_Handle handle = get_handle(capsule);
     if (handle == NULL)
         return NULL;
 
     H3_Auth auth;
+    H3_Status return_value;
     H3_ObjectInfo objectInfo;
 
     auth.userId = userId;
-    if (did_raise_exception(H3_InfoObject(handle, &auth, bucketName, objectName, &objectInfo)))
+    BEGIN_H3_CALL(capsule)
+    return_value = H3_InfoObject(handle, &auth, bucketName, objectName, &objectInfo);
+    END_H3_CALL
+    if (did_raise_exception(return_value))
         return NULL;
 
     PyObject *object_info = PyStructSequence_New(&object_info_type);
@@ -427,11 +707,12 @@ static PyObject *h3lib_touch_object(PyObject* self, PyObject *args, PyObject *kw
     if (!PyArg_ParseTupleAndKeywords(args, kw, "Oss|ddI", kwlist, &capsule, &bucketName, &objectName, &lastAccess, &lastModification, &userId))
         return NULL;
 
-    H3_Handle handle = (H3_Handle)PyCapsule_GetPointer(capsule, NULL);
+    H3_Handle handle = get_handle(capsule);
     if (handle == NULL)
         return NULL;
 
     H3_Auth auth;
+    H3_Status return_value;
     struct timespec accessTime;
     struct timespec modificationTime;
 
@@ -444,7 +725,10 @@ static PyObject *h3lib_touch_object(PyObject* self, PyObject *args, PyObject *kw
         modificationTime.tv_sec = (long)lastModification;
         modificationTime.tv_nsec = (lastModification - modificationTime.tv_sec) * 1000000000ULL;
     }
-    if (did_raise_exception(H3_TouchObject(handle, &auth, bucketName, objectName, (lastAccess >= 0 ? &accessTime : NULL), (lastModification >= 0 ? &modificationTime : NULL))))
+    BEGIN_H3_CALL(capsule)
+    return_value = H3_TouchObject(handle, &auth, bucketName, objectName, (lastAccess >= 0 ? &accessTime : NULL), (lastModification >= 0 ? &modificationTime : NULL));
+    END_H3_CALL
+    if (did_raise_exception(return_value))
         return NULL;
 
     Py_RETURN_TRUE;
@@ -461,17 +745,21 @@ static PyObject *h3lib_set_object_permissions(PyObject* self, PyObject *args, Py
     if (!PyArg_ParseTupleAndKeywords(args, kw, "Ossi|I", kwlist, &capsule, &bucketName, &objectName, &mode, &userId))
         return NULL;
 
-    H3_Handle handle = (H3_Handle)PyCapsule_GetPointer(capsule, NULL);
+    H3_Handle handle = get_handle(capsule);
     if (handle == NULL)
         return NULL;
 
     H3_Auth auth;
+    H3_Status return_value;
     H3_Attribute attribute;
 
     auth.userId = userId;
     attribute.type = H3_ATTRIBUTE_PERMISSIONS;
     attribute.mode = mode;
-    if (did_raise_exception(H3_SetObjectAttributes(handle, &auth, bucketName, objectName, attribute)))
+    BEGIN_H3_CALL(capsule)
+    return_value = H3_SetObjectAttributes(handle, &auth, bucketName, objectName, attribute);
+    END_H3_CALL
+    if (did_raise_exception(return_value))
         return NULL;
 
     Py_RETURN_TRUE;
@@ -489,18 +777,22 @@ static PyObject *h3lib_set_object_owner(PyObject* self, PyObject *args, PyObject
     if (!PyArg_ParseTupleAndKeywords(args, kw, "Ossii|I", kwlist, &capsule, &bucketName, &objectName, &uid, &gid, &userId))
         return NULL;
 
-    H3_Handle handle = (H3_Handle)PyCapsule_GetPointer(capsule, NULL);
+    H3_Handle handle = get_handle(capsule);
     if (handle == NULL)
         return NULL;
 
     H3_Auth auth;
+    H3_Status return_value;
     H3_Attribute attribute;
 
     auth.userId = userId;
     attribute.type = H3_ATTRIBUTE_OWNER;
     attribute.uid = uid;
     attribute.gid = gid;
-    if (did_raise_exception(H3_SetObjectAttributes(handle, &auth, bucketName, objectName, attribute)))
+    BEGIN_H3_CALL(capsule)
+    return_value = H3_SetObjectAttributes(handle, &auth, bucketName, objectName, attribute);
+    END_H3_CALL
+    if (did_raise_exception(return_value))
         return NULL;
 
     Py_RETURN_TRUE;
@@ -517,17 +809,21 @@ static PyObject *h3lib_make_object_read_only(PyObject* self, PyObject *args, PyO
     if (!PyArg_ParseTupleAndKeywords(args, kw, "OssI", kwlist, &capsule, &bucketName, &objectName, &userId))
         return NULL;
 
-    H3_Handle handle = (H3_Handle)PyCapsule_GetPointer(capsule, NULL);
+    H3_Handle handle = get_handle(capsule);
     if (handle == NULL)
         return NULL;
 
     H3_Auth auth;
+    H3_Status return_value;
     H3_Attribute attribute;
 
     auth.userId = userId;
     attribute.type = H3_ATTRIBUTE_READ_ONLY;
     attribute.readOnly = 1;
-    if (did_raise_exception(H3_SetObjectAttributes(handle, &auth, bucketName, objectName, attribute)))
+    BEGIN_H3_CALL(capsule)
+    return_value = H3_SetObjectAttributes(handle, &auth, bucketName, objectName, attribute);
+    END_H3_CALL
+    if (did_raise_exception(return_value))
         return NULL;
 
     Py_RETURN_TRUE;
@@ -545,14 +841,49 @@ static PyObject *h3lib_create_object(PyObject* self, PyObject *args, PyObject *k
     if (!PyArg_ParseTupleAndKeywords(args, kw, "Ossy#|I", kwlist, &capsule, &bucketName, &objectName, &data, &size, &userId))
         return NULL;
 
-    H3_Handle handle = (H3_Handle)PyCapsule_GetPointer(capsule, NULL);
+    H3_Handle handle = get_handle(capsule);
+    if (handle == NULL)
+        return NULL;
+
+    H3_Auth auth;
+    H3_Status return_value;
+
+    auth.userId = userId;
+    BEGIN_H3_CALL(capsule)
+    return_value = H3_CreateObject(handle, &auth, bucketName, objectName, (void *)data, size);
+    END_H3_CALL
+    if (did_raise_exception(return_value))
+        return NULL;
+
+    Py_RETURN_TRUE;
+}
+
+static PyObject *h3lib_create_dummy_object(PyObject* self, PyObject *args, PyObject *kw) {
+    PyObject *capsule = NULL;
+    H3_Name bucketName;
+    H3_Name objectName;
+    const char *data;
+    size_t dataSize;
+    size_t size;
+    uint32_t userId = 0;
+
+    static char *kwlist[] = {"handle", "bucket_name", "object_name", "data", "size", "user_id", NULL};
+    if (!PyArg_ParseTupleAndKeywords(args, kw, "Ossy#k|I", kwlist, &capsule, &bucketName, &objectName, &data, &dataSize, &size, &userId))
+        return NULL;
+
+    H3_Handle handle = get_handle(capsule);
     if (handle == NULL)
         return NULL;
 
     H3_Auth auth;
+    H3_Status return_value;
 
+    // The buffer is kept alive by the args tuple, so the GIL can be dropped.
     auth.userId = userId;
-    if (did_raise_exception(H3_CreateObject(handle, &auth, bucketName, objectName, (void *)data, size)))
+    BEGIN_H3_CALL(capsule)
+    return_value = H3_CreateDummyObject(handle, &auth, bucketName, objectName, data, dataSize, size);
+    END_H3_CALL
+    if (did_raise_exception(return_value))
         return NULL;
 
     Py_RETURN_TRUE;
@@ -571,14 +902,18 @@ static PyObject *h3lib_create_object_copy(PyObject* self, PyObject *args, PyObje
     if (!PyArg_ParseTupleAndKeywords(args, kw, "Osslks|I", kwlist, &capsule, &bucketName, &srcObjectName, &offset, &size, &dstObjectName, &userId))
         return NULL;
 
-    H3_Handle handle = (H3_Handle)PyCapsule_GetPointer(capsule, NULL);
+    H3_Handle handle = get_handle(capsule);
     if (handle == NULL)
         return NULL;
 
     H3_Auth auth;
+    H3_Status return_value;
 
     auth.userId = userId;
-    if (did_raise_exception(H3_CreateObjectCopy(handle, &auth, bucketName, srcObjectName, offset, &size, dstObjectName)))
+    BEGIN_H3_CALL(capsule)
+    return_value = H3_CreateObjectCopy(handle, &auth, bucketName, srcObjectName, offset, &size, dstObjectName);
+    END_H3_CALL
+    if (did_raise_exception(return_value))
         return NULL;
 
     return Py_BuildValue("k", size);
@@ -595,11 +930,12 @@ static PyObject *h3lib_create_object_from_file(PyObject* self, PyObject *args, P
     if (!PyArg_ParseTupleAndKeywords(args, kw, "Osss|I", kwlist, &capsule, &bucketName, &objectName, &filename, &userId))
         return NULL;
 
-    H3_Handle handle = (H3_Handle)PyCapsule_GetPointer(capsule, NULL);
+    H3_Handle handle = get_handle(capsule);
     if (handle == NULL)
         return NULL;
 
     H3_Auth auth;
+    H3_Status return_value;
 
     auth.userId = userId;
 
@@ -615,7 +951,10 @@ static PyObject *h3lib_create_object_from_file(PyObject* self, PyObject *args, P
         return NULL;
     }
 
-    if (did_raise_exception(H3_CreateObjectFromFile(handle, &auth, bucketName, objectName, fd, size))) {
+    BEGIN_H3_CALL(capsule)
+    return_value = H3_CreateObjectFromFile(handle, &auth, bucketName, objectName, fd, size);
+    END_H3_CALL
+    if (did_raise_exception(return_value)) {
         close(fd);
         return NULL;
     }
@@ -637,14 +976,18 @@ static PyObject *h3lib_write_object(PyObject* self, PyObject *args, PyObject *kw
     if (!PyArg_ParseTupleAndKeywords(args, kw, "Ossy#|lI", kwlist, &capsule, &bucketName, &objectName, &data, &size, &offset, &userId))
         return NULL;
 
-    H3_Handle handle = (H3_Handle)PyCapsule_GetPointer(capsule, NULL);
+    H3_Handle handle = get_handle(capsule);
     if (handle == NULL)
         return NULL;
 
     H3_Auth auth;
+    H3_Status return_value;
 
     auth.userId = userId;
-    if (did_raise_exception(H3_WriteObject(handle, &auth, bucketName, objectName, (void *)data, size, offset)))
+    BEGIN_H3_CALL(capsule)
+    return_value = H3_WriteObject(handle, &auth, bucketName, objectName, (void *)data, size, offset);
+    END_H3_CALL
+    if (did_raise_exception(return_value))
         return NULL;
 
     Py_RETURN_TRUE;
@@ -664,14 +1007,18 @@ static PyObject *h3lib_write_object_copy(PyObject* self, PyObject *args, PyObjec
     if (!PyArg_ParseTupleAndKeywords(args, kw, "Osslksl|I", kwlist, &capsule, &bucketName, &srcObjectName, &srcOffset, &size, &dstObjectName, &dstOffset, &userId))
         return NULL;
 
-    H3_Handle handle = (H3_Handle)PyCapsule_GetPointer(capsule, NULL);
+    H3_Handle handle = get_handle(capsule);
     if (handle == NULL)
         return NULL;
 
     H3_Auth auth;
+    H3_Status return_value;
 
     auth.userId = userId;
-    if (did_raise_exception(H3_WriteObjectCopy(handle, &auth, bucketName, srcObjectName, srcOffset, &size, dstObjectName, dstOffset)))
+    BEGIN_H3_CALL(capsule)
+    return_value = H3_WriteObjectCopy(handle, &auth, bucketName, srcObjectName, srcOffset, &size, dstObjectName, dstOffset);
+    END_H3_CALL
+    if (did_raise_exception(return_value))
         return NULL;
 
     return Py_BuildValue("k", size);
@@ -689,11 +1036,12 @@ static PyObject *h3lib_write_object_from_file(PyObject* self, PyObject *args, Py
     if (!PyArg_ParseTupleAndKeywords(args, kw, "Osss|lI", kwlist, &capsule, &bucketName, &objectName, &filename, &offset, &userId))
         return NULL;
 
-    H3_Handle handle = (H3_Handle)PyCapsule_GetPointer(capsule, NULL);
+    H3_Handle handle = get_handle(capsule);
     if (handle == NULL)
         return NULL;
 
     H3_Auth auth;
+    H3_Status return_value;
 
     auth.userId = userId;
 
@@ -709,7 +1057,10 @@ static PyObject *h3lib_write_object_from_file(PyObject* self, PyObject *args, Py
         return NULL;
     }
 
-    if (did_raise_exception(H3_WriteObjectFromFile(handle, &auth, bucketName, objectName, fd, size, offset))) {
+    BEGIN_H3_CALL(capsule)
+    return_value = H3_WriteObjectFromFile(handle, &auth, bucketName, objectName, fd, size, offset);
+    END_H3_CALL
+    if (did_raise_exception(return_value)) {
         close(fd);
         return NULL;
     }
@@ -730,11 +1081,12 @@ static PyObject *h3lib_read_object(PyObject* self, PyObject *args, PyObject *kw)
     if (!PyArg_ParseTupleAndKeywords(args, kw, "Oss|lkI", kwlist, &capsule, &bucketName, &objectName, &offset, &size, &userId))
         return NULL;
 
-    H3_Handle handle = (H3_Handle)PyCapsule_GetPointer(capsule, NULL);
+    H3_Handle handle = get_handle(capsule);
     if (handle == NULL)
         return NULL;
 
     H3_Auth auth;
+    H3_Status return_value;
     void *data = NULL;
 
     // h3lib will only allocate a buffer if size = 0 AND data = NULL.
@@ -747,7 +1099,9 @@ static PyObject *h3lib_read_object(PyObject* self, PyObject *args, PyObject *kw)
     }
 
     auth.userId = userId;
-    H3_Status return_value = H3_ReadObject(handle, &auth, bucketName, objectName, offset, &data, &size);
+    BEGIN_H3_CALL(capsule)
+    return_value = H3_ReadObject(handle, &auth, bucketName, objectName, offset, &data, &size);
+    END_H3_CALL
     if (did_raise_exception(return_value))
         return NULL;
     PyObject *data_object = Py_BuildValue("y#", data, size);
@@ -757,6 +1111,34 @@ static PyObject *h3lib_read_object(PyObject* self, PyObject *args, PyObject *kw)
     return Py_BuildValue("(OO)", data_object, (return_value == H3_SUCCESS ? Py_True : Py_False));
 }
 
+static PyObject *h3lib_read_dummy_object(PyObject* self, PyObject *args, PyObject *kw) {
+    PyObject *capsule = NULL;
+    H3_Name bucketName;
+    H3_Name objectName;
+    size_t size = 0;
+    uint32_t userId = 0;
+
+    static char *kwlist[] = {"handle", "bucket_name", "object_name", "user_id", NULL};
+    if (!PyArg_ParseTupleAndKeywords(args, kw, "Oss|I", kwlist, &capsule, &bucketName, &objectName, &userId))
+        return NULL;
+
+    H3_Handle handle = get_handle(capsule);
+    if (handle == NULL)
+        return NULL;
+
+    H3_Auth auth;
+    H3_Status return_value;
+
+    auth.userId = userId;
+    BEGIN_H3_CALL(capsule)
+    return_value = H3_ReadDummyObject(handle, &auth, bucketName, objectName, &size);
+    END_H3_CALL
+    if (did_raise_exception(return_value))
+        return NULL;
+
+    return Py_BuildValue("k", size);
+}
+
 static PyObject *h3lib_read_object_to_file(PyObject* self, PyObject *args, PyObject *kw) {
     PyObject *capsule = NULL;
     H3_Name bucketName;
@@ -770,11 +1152,12 @@ static PyObject *h3lib_read_object_to_file(PyObject* self, PyObject *args, PyObj
     if (!PyArg_ParseTupleAndKeywords(args, kw, "Osss|lkI", kwlist, &capsule, &bucketName, &objectName, &filename, &offset, &size, &userId))
         return NULL;
 
-    H3_Handle handle = (H3_Handle)PyCapsule_GetPointer(capsule, NULL);
+    H3_Handle handle = get_handle(capsule);
     if (handle == NULL)
         return NULL;
 
     H3_Auth auth;
+    H3_Status return_value;
 
     auth.userId = userId;
 
@@ -784,7 +1167,9 @@ static PyObject *h3lib_read_object_to_file(PyObject* self, PyObject *args, PyObj
         return NULL;
     }
 
-    H3_Status return_value = H3_ReadObjectToFile(handle, &auth, bucketName, objectName, offset, fd, &size);
+    BEGIN_H3_CALL(capsule)
+    return_value = H3_ReadObjectToFile(handle, &auth, bucketName, objectName, offset, fd, &size);
+    END_H3_CALL
     if (did_raise_exception(return_value)) {
         close(fd);
         return NULL;
@@ -806,14 +1191,18 @@ static PyObject *h3lib_copy_object(PyObject* self, PyObject *args, PyObject *kw)
     if (!PyArg_ParseTupleAndKeywords(args, kw, "Osss|bI", kwlist, &capsule, &bucketName, &srcObjectName, &dstObjectName, &noOverwrite, &userId))
         return NULL;
 
-    H3_Handle handle = (H3_Handle)PyCapsule_GetPointer(capsule, NULL);
+    H3_Handle handle = get_handle(capsule);
     if (handle == NULL)
         return NULL;
 
     H3_Auth auth;
+    H3_Status return_value;
 
     auth.userId = userId;
-    if (did_raise_exception(H3_CopyObject(handle, &auth, bucketName, srcObjectName, dstObjectName, noOverwrite)))
+    BEGIN_H3_CALL(capsule)
+    return_value = H3_CopyObject(handle, &auth, bucketName, srcObjectName, dstObjectName, noOverwrite);
+    END_H3_CALL
+    if (did_raise_exception(return_value))
         return NULL;
 
     Py_RETURN_TRUE;
@@ -831,14 +1220,18 @@ static PyObject *h3lib_move_object(PyObject* self, PyObject *args, PyObject *kw)
     if (!PyArg_ParseTupleAndKeywords(args, kw, "Osss|bI", kwlist, &capsule, &bucketName, &srcObjectName, &dstObjectName, &noOverwrite, &userId))
         return NULL;
 
-    H3_Handle handle = (H3_Handle)PyCapsule_GetPointer(capsule, NULL);
+    H3_Handle handle = get_handle(capsule);
     if (handle == NULL)
         return NULL;
 
     H3_Auth auth;
+    H3_Status return_value;
 
     auth.userId = userId;
-    if (did_raise_exception(H3_MoveObject(handle, &auth, bucketName, srcObjectName, dstObjectName, noOverwrite)))
+    BEGIN_H3_CALL(capsule)
+    return_value = H3_MoveObject(handle, &auth, bucketName, srcObjectName, dstObjectName, noOverwrite);
+    END_H3_CALL
+    if (did_raise_exception(return_value))
         return NULL;
 
     Py_RETURN_TRUE;
@@ -855,14 +1248,18 @@ static PyObject *h3lib_exchange_object(PyObject* self, PyObject *args, PyObject
     if (!PyArg_ParseTupleAndKeywords(args, kw, "Osss|I", kwlist, &capsule, &bucketName, &srcObjectName, &dstObjectName, &userId))
         return NULL;
 
-    H3_Handle handle = (H3_Handle)PyCapsule_GetPointer(capsule, NULL);
+    H3_Handle handle = get_handle(capsule);
     if (handle == NULL)
         return NULL;
 
     H3_Auth auth;
+    H3_Status return_value;
 
     auth.userId = userId;
-    if (did_raise_exception(H3_ExchangeObject(handle, &auth, bucketName, srcObjectName, dstObjectName)))
+    BEGIN_H3_CALL(capsule)
+    return_value = H3_ExchangeObject(handle, &auth, bucketName, srcObjectName, dstObjectName);
+    END_H3_CALL
+    if (did_raise_exception(return_value))
         return NULL;
 
     Py_RETURN_TRUE;
@@ -879,14 +1276,18 @@ static PyObject *h3lib_truncate_object(PyObject* self, PyObject *args, PyObject
     if (!PyArg_ParseTupleAndKeywords(args, kw, "Oss|kI", kwlist, &capsule, &bucketName, &objectName, &size, &userId))
         return NULL;
 
-    H3_Handle handle = (H3_Handle)PyCapsule_GetPointer(capsule, NULL);
+    H3_Handle handle = get_handle(capsule);
     if (handle == NULL)
         return NULL;
 
     H3_Auth auth;
+    H3_Status return_value;
 
     auth.userId = userId;
-    if (did_raise_exception(H3_TruncateObject(handle, &auth, bucketName, objectName, size)))
+    BEGIN_H3_CALL(capsule)
+    return_value = H3_TruncateObject(handle, &auth, bucketName, objectName, size);
+    END_H3_CALL
+    if (did_raise_exception(return_value))
         return NULL;
 
     Py_RETURN_TRUE;
@@ -902,14 +1303,18 @@ static PyObject *h3lib_delete_object(PyObject* self, PyObject *args, PyObject *k
     if (!PyArg_ParseTupleAndKeywords(args, kw, "Oss|I", kwlist, &capsule, &bucketName, &objectName, &userId))
         return NULL;
 
-    H3_Handle handle = (H3_Handle)PyCapsule_GetPointer(capsule, NULL);
+    H3_Handle handle = get_handle(capsule);
     if (handle == NULL)
         return NULL;
 
     H3_Auth auth;
+    H3_Status return_value;
 
     auth.userId = userId;
-    if (did_raise_exception(H3_DeleteObject(handle, &auth, bucketName, objectName)))
+    BEGIN_H3_CALL(capsule)
+    return_value = H3_DeleteObject(handle, &auth, bucketName, objectName);
+    END_H3_CALL
+    if (did_raise_exception(return_value))
         return NULL;
 
     Py_RETURN_TRUE;
@@ -929,13 +1334,17 @@ static PyObject *h3lib_create_object_metadata(PyObject* self, PyObject *args, Py
         return NULL;
     }
 
-    H3_Handle handle = (H3_Handle)PyCapsule_GetPointer(capsule, NULL);
+    H3_Handle handle = get_handle(capsule);
     if (handle == NULL)
         return NULL;
     
     H3_Auth auth;
+    H3_Status return_value;
     auth.userId = userId;
-    if (did_raise_exception(H3_CreateObjectMetadata(handle, &auth, bucketName, objectName, metadataName, (void*)metadataValue, size)))
+    BEGIN_H3_CALL(capsule)
+    return_value = H3_CreateObjectMetadata(handle, &auth, bucketName, objectName, metadataName, (void*)metadataValue, size);
+    END_H3_CALL
+    if (did_raise_exception(return_value))
         return NULL;
 
     Py_RETURN_TRUE;
@@ -952,16 +1361,19 @@ static PyObject *h3lib_read_object_metadata(PyObject* self, PyObject *args, PyOb
     if (!PyArg_ParseTupleAndKeywords(args, kw, "OsssI", kwlist, &capsule, &bucketName, &objectName, &metadataName, &userId))
         return NULL;
 
-    H3_Handle handle = (H3_Handle)PyCapsule_GetPointer(capsule, NULL);
+    H3_Handle handle = get_handle(capsule);
     if (handle == NULL)
         return NULL;
 
     H3_Auth auth;
+    H3_Status return_value;
     void* metadataValue = NULL;
     size_t size = 0;
 
     auth.userId = userId;
-    H3_Status return_value = H3_ReadObjectMetadata(handle, &auth, bucketName, objectName, metadataName, &metadataValue, &size);
+    BEGIN_H3_CALL(capsule)
+    return_value = H3_ReadObjectMetadata(handle, &auth, bucketName, objectName, metadataName, &metadataValue, &size);
+    END_H3_CALL
     if (did_raise_exception(return_value))
         return NULL;
     PyObject *data_object = Py_BuildValue("y#", metadataValue, size);
@@ -982,14 +1394,18 @@ static PyObject *h3lib_delete_object_metadata(PyObject* self, PyObject *args, Py
     if (!PyArg_ParseTupleAndKeywords(args, kw, "Osss|I", kwlist, &capsule, &bucketName, &objectName, &metadataName, &userId))
         return NULL;
 
-    H3_Handle handle = (H3_Handle)PyCapsule_GetPointer(capsule, NULL);
+    H3_Handle handle = get_handle(capsule);
     if (handle == NULL)
         return NULL;
 
     H3_Auth auth;
+    H3_Status return_value;
 
     auth.userId = userId;
-    if (did_raise_exception(H3_DeleteObjectMetadata(handle, &auth, bucketName, objectName, metadataName)))
+    BEGIN_H3_CALL(capsule)
+    return_value = H3_DeleteObjectMetadata(handle, &auth, bucketName, objectName, metadataName);
+    END_H3_CALL
+    if (did_raise_exception(return_value))
         return NULL;
 
     Py_RETURN_TRUE;
@@ -1006,14 +1422,18 @@ static PyObject *h3lib_copy_object_metadata(PyObject* self, PyObject *args, PyOb
     if (!PyArg_ParseTupleAndKeywords(args, kw, "Osss|I", kwlist, &capsule, &bucketName, &srcObjectName, &dstObjectName, &userId))
         return NULL;
 
-    H3_Handle handle = (H3_Handle)PyCapsule_GetPointer(capsule, NULL);
+    H3_Handle handle = get_handle(capsule);
     if (handle == NULL)
         return NULL;
 
     H3_Auth auth;
+    H3_Status return_value;
 
     auth.userId = userId;
-    if (did_raise_exception(H3_CopyObjectMetadata(handle, &auth, bucketName, srcObjectName, dstObjectName)))
+    BEGIN_H3_CALL(capsule)
+    return_value = H3_CopyObjectMetadata(handle, &auth, bucketName, srcObjectName, dstObjectName);
+    END_H3_CALL
+    if (did_raise_exception(return_value))
         return NULL;
 
     Py_RETURN_TRUE;
@@ -1030,14 +1450,18 @@ static PyObject *h3lib_move_object_metadata(PyObject* self, PyObject *args, PyOb
     if (!PyArg_ParseTupleAndKeywords(args, kw, "Osss|I", kwlist, &capsule, &bucketName, &srcObjectName, &dstObjectName, &userId))
         return NULL;
 
-    H3_Handle handle = (H3_Handle)PyCapsule_GetPointer(capsule, NULL);
+    H3_Handle handle = get_handle(capsule);
     if (handle == NULL)
         return NULL;
 
     H3_Auth auth;
+    H3_Status return_value;
 
     auth.userId = userId;
-    if (did_raise_exception(H3_MoveObjectMetadata(handle, &auth, bucketName, srcObjectName, dstObjectName)))
+    BEGIN_H3_CALL(capsule)
+    return_value = H3_MoveObjectMetadata(handle, &auth, bucketName, srcObjectName, dstObjectName);
+    END_H3_CALL
+    if (did_raise_exception(return_value))
         return NULL;
 
     Py_RETURN_TRUE;
@@ -1051,20 +1475,23 @@ static PyObject *h3lib_list_objects_with_metadata(PyObject* self, PyObject *args
     uint32_t userId = 0;
 
     static char *kwlist[] = {"handle", "bucket_name", "metadata_name", "offset", "user_id", NULL};
-    if (!PyArg_ParseTupleAndKeywords(args, kw, "OsskI", kwlist, &capsule, &bucketName, &metadataName, &offset, &userId))
+    if (!PyArg_ParseTupleAndKeywords(args, kw, "OssII", kwlist, &capsule, &bucketName, &metadataName, &offset, &userId))
         return NULL;
 
-    H3_Handle handle = (H3_Handle)PyCapsule_GetPointer(capsule, NULL);
+    H3_Handle handle = get_handle(capsule);
     if (handle == NULL)
         return NULL;
 
     H3_Auth auth;
+    H3_Status return_value;
     H3_Name objectNameArray = NULL;
     uint32_t nObjects = 0;
     uint32_t nextOffset = 0;
 
     auth.userId = userId;
-    H3_Status return_value = H3_ListObjectsWithMetadata(handle, &auth, bucketName, metadataName, offset, &objectNameArray, &nObjects, &nextOffset);
+    BEGIN_H3_CALL(capsule)
+    return_value = H3_ListObjectsWithMetadata(handle, &auth, bucketName, metadataName, offset, &objectNameArray, &nObjects, &nextOffset);
+    END_H3_CALL
     if (did_raise_exception(return_value))
         return NULL;
 
@@ -1088,6 +1515,68 @@ static PyObject *h3lib_list_objects_with_metadata(PyObject* self, PyObject *args
     return Py_BuildValue("{s:O,s:O,s:k}", "objects", list, "done", (return_value == H3_SUCCESS ? Py_True : Py_False), "nextOffset", nextOffset);
 }
 
+static PyObject *list_due_objects(PyObject *args, PyObject *kw, H3_Status (*function)(H3_Handle, H3_Token, struct timespec*, uint32_t, H3_Name*, uint32_t*, uint32_t*)) {
+    PyObject *capsule = NULL;
+    double timestamp = -1;
+    uint32_t offset = 0;
+    uint32_t userId = 0;
+
+    static char *kwlist[] = {"handle", "timestamp", "offset", "user_id", NULL};
+    if (!PyArg_ParseTupleAndKeywords(args, kw, "O|dII", kwlist, &capsule, &timestamp, &offset, &userId))
+        return NULL;
+
+    H3_Handle handle = get_handle(capsule);
+    if (handle == NULL)
+        return NULL;
+
+    H3_Auth auth;
+    H3_Status return_value;
+    H3_Name objectIdArray = NULL;
+    uint32_t nObjects = 0;
+    uint32_t nextOffset = 0;
+    struct timespec deadline;
+
+    // A negative timestamp stands for "now"
+    if (timestamp >= 0) {
+        deadline.tv_sec = (time_t)timestamp;
+        deadline.tv_nsec = (long)((timestamp - deadline.tv_sec) * 1000000000);
+    }
+
+    auth.userId = userId;
+    BEGIN_H3_CALL(capsule)
+    return_value = function(handle, &auth, (timestamp >= 0 ? &deadline : NULL), offset, &objectIdArray, &nObjects, &nextOffset);
+    END_H3_CALL
+    if (did_raise_exception(return_value))
+        return NULL;
+
+    PyObject *list = PyList_New(nObjects);
+    uint32_t i;
+    H3_Name current_id;
+    uint32_t current_id_pos = 0;
+    size_t current_id_len = 0;
+    for (i = 0; i < nObjects; i ++) {
+        current_id = &(objectIdArray[current_id_pos]);
+        current_id_len = strlen(current_id);
+        current_id_pos += current_id_len;
+        while (i + 1 < nObjects && objectIdArray[current_id_pos] == '\0')
+            current_id_pos++;
+
+        PyList_SET_ITEM(list, i, Py_BuildValue("s", current_id));
+    }
+    if (objectIdArray != NULL)
+        free(objectIdArray);
+
+    return Py_BuildValue("{s:O,s:O,s:k}", "objects", list, "done", (return_value == H3_SUCCESS ? Py_True : Py_False), "nextOffset", nextOffset);
+}
+
+static PyObject *h3lib_list_expired_objects(PyObject* self, PyObject *args, PyObject *kw) {
+    return list_due_objects(args, kw, H3_ListExpiredObjects);
+}
+
+static PyObject *h3lib_list_read_only_due_objects(PyObject* self, PyObject *args, PyObject *kw) {
+    return list_due_objects(args, kw, H3_ListReadOnlyDueObjects);
+}
+
 static PyObject *h3lib_list_multiparts(PyObject* self, PyObject *args, PyObject *kw) {
     PyObject *capsule = NULL;
     H3_Name bucketName;
@@ -1096,20 +1585,22 @@ static PyObject *h3lib_list_multiparts(PyObject* self, PyObject *args, PyObject
     uint32_t userId = 0;
 
     static char *kwlist[] = {"handle", "bucket_name", "offset", "count", "user_id", NULL};
-    if (!PyArg_ParseTupleAndKeywords(args, kw, "Os|kkI", kwlist, &capsule, &bucketName, &offset, &count, &userId))
+    if (!PyArg_ParseTupleAndKeywords(args, kw, "Os|III", kwlist, &capsule, &bucketName, &offset, &count, &userId))
         return NULL;
 
-    H3_Handle handle = (H3_Handle)PyCapsule_GetPointer(capsule, NULL);
+    H3_Handle handle = get_handle(capsule);
     if (handle == NULL)
         return NULL;
 
     H3_Auth auth;
+    H3_Status return_value;
     H3_MultipartId multipartIdArray = NULL;
     uint32_t nIds = count;
 
     auth.userId = userId;
-    H3_Status return_value;
+    BEGIN_H3_CALL(capsule)
     return_value = H3_ListMultiparts(handle, &auth, bucketName, offset, &multipartIdArray, &nIds);
+    END_H3_CALL
     if (did_raise_exception(return_value))
         return NULL;
 
@@ -1143,15 +1634,19 @@ static PyObject *h3lib_create_multipart(PyObject* self, PyObject *args, PyObject
     if (!PyArg_ParseTupleAndKeywords(args, kw, "Oss|I", kwlist, &capsule, &bucketName, &objectName, &userId))
         return NULL;
 
-    H3_Handle handle = (H3_Handle)PyCapsule_GetPointer(capsule, NULL);
+    H3_Handle handle = get_handle(capsule);
     if (handle == NULL)
         return NULL;
 
     H3_Auth auth;
+    H3_Status return_value;
     H3_MultipartId multipartId;
 
     auth.userId = userId;
-    if (did_raise_exception(H3_CreateMultipart(handle, &auth, bucketName, objectName, &multipartId)))
+    BEGIN_H3_CALL(capsule)
+    return_value = H3_CreateMultipart(handle, &auth, bucketName, objectName, &multipartId);
+    END_H3_CALL
+    if (did_raise_exception(return_value))
         return NULL;
 
     return Py_BuildValue("s", multipartId);
@@ -1166,14 +1661,18 @@ static PyObject *h3lib_complete_multipart(PyObject* self, PyObject *args, PyObje
     if (!PyArg_ParseTupleAndKeywords(args, kw, "Os|I", kwlist, &capsule, &multipartId, &userId))
         return NULL;
 
-    H3_Handle handle = (H3_Handle)PyCapsule_GetPointer(capsule, NULL);
+    H3_Handle handle = get_handle(capsule);
     if (handle == NULL)
         return NULL;
 
     H3_Auth auth;
+    H3_Status return_value;
 
     auth.userId = userId;
-    if (did_raise_exception(H3_CompleteMultipart(handle, &auth, multipartId)))
+    BEGIN_H3_CALL(capsule)
+    return_value = H3_CompleteMultipart(handle, &auth, multipartId);
+    END_H3_CALL
+    if (did_raise_exception(return_value))
         return NULL;
 
     Py_RETURN_TRUE;
@@ -1188,14 +1687,18 @@ static PyObject *h3lib_abort_multipart(PyObject* self, PyObject *args, PyObject
     if (!PyArg_ParseTupleAndKeywords(args, kw, "Os|I", kwlist, &capsule, &multipartId, &userId))
         return NULL;
 
-    H3_Handle handle = (H3_Handle)PyCapsule_GetPointer(capsule, NULL);
+    H3_Handle handle = get_handle(capsule);
     if (handle == NULL)
         return NULL;
 
     H3_Auth auth;
+    H3_Status return_value;
 
     auth.userId = userId;
-    if (did_raise_exception(H3_AbortMultipart(handle, &auth, multipartId)))
+    BEGIN_H3_CALL(capsule)
+    return_value = H3_AbortMultipart(handle, &auth, multipartId);
+    END_H3_CALL
+    if (did_raise_exception(return_value))
         return NULL;
 
     Py_RETURN_TRUE;
@@ -1210,16 +1713,20 @@ static PyObject *h3lib_list_parts(PyObject* self, PyObject *args, PyObject *kw)
     if (!PyArg_ParseTupleAndKeywords(args, kw, "Os|I", kwlist, &capsule, &multipartId, &userId))
         return NULL;
 
-    H3_Handle handle = (H3_Handle)PyCapsule_GetPointer(capsule, NULL);
+    H3_Handle handle = get_handle(capsule);
     if (handle == NULL)
         return NULL;
 
     H3_Auth auth;
+    H3_Status return_value;
     H3_PartInfo *partInfoArray;
     uint32_t nParts;
 
     auth.userId = userId;
-    if (did_raise_exception(H3_ListParts(handle, &auth, multipartId, &partInfoArray, &nParts)))
+    BEGIN_H3_CALL(capsule)
+    return_value = H3_ListParts(handle, &auth, multipartId, &partInfoArray, &nParts);
+    END_H3_CALL
+    if (did_raise_exception(return_value))
         return NULL;
 
     PyObject *list = PyList_New(nParts);
@@ -1263,14 +1770,18 @@ static PyObject *h3lib_create_part(PyObject* self, PyObject *args, PyObject *kw)
     if (!PyArg_ParseTupleAndKeywords(args, kw, "OsIy#|I", kwlist, &capsule, &multipartId, &partNumber, &data, &size, &userId))
         return NULL;
 
-    H3_Handle handle = (H3_Handle)PyCapsule_GetPointer(capsule, NULL);
+    H3_Handle handle = get_handle(capsule);
     if (handle == NULL)
         return NULL;
 
     H3_Auth auth;
+    H3_Status return_value;
 
     auth.userId = userId;
-    if (did_raise_exception(H3_CreatePart(handle, &auth, multipartId, partNumber, (void *)data, size)))
+    BEGIN_H3_CALL(capsule)
+    return_value = H3_CreatePart(handle, &auth, multipartId, partNumber, (void *)data, size);
+    END_H3_CALL
+    if (did_raise_exception(return_value))
         return NULL;
 
     Py_RETURN_TRUE;
@@ -1289,14 +1800,18 @@ static PyObject *h3lib_create_part_copy(PyObject* self, PyObject *args, PyObject
     if (!PyArg_ParseTupleAndKeywords(args, kw, "OslksI|I", kwlist, &capsule, &objectName, &offset, &size, &multipartId, &partNumber, &userId))
         return NULL;
 
-    H3_Handle handle = (H3_Handle)PyCapsule_GetPointer(capsule, NULL);
+    H3_Handle handle = get_handle(capsule);
     if (handle == NULL)
         return NULL;
 
     H3_Auth auth;
+    H3_Status return_value;
 
     auth.userId = userId;
-    if (did_raise_exception(H3_CreatePartCopy(handle, &auth, objectName, offset, size, multipartId, partNumber)))
+    BEGIN_H3_CALL(capsule)
+    return_value = H3_CreatePartCopy(handle, &auth, objectName, offset, size, multipartId, partNumber);
+    END_H3_CALL
+    if (did_raise_exception(return_value))
         return NULL;
 
     Py_RETURN_TRUE;
@@ -1305,6 +1820,10 @@ static PyObject *h3lib_create_part_copy(PyObject* self, PyObject *args, PyObject
 static PyMethodDef module_functions[] = {
     {"version",                     (PyCFunction)h3lib_version,                     METH_NOARGS, NULL},
     {"init",                        (PyCFunction)h3lib_init,                        METH_VARARGS|METH_KEYWORDS, NULL},
+    {"close",                       (PyCFunction)h3lib_close,                       METH_VARARGS|METH_KEYWORDS, NULL},
+    {"stats",                       (PyCFunction)h3lib_stats,                       METH_VARARGS|METH_KEYWORDS, NULL},
+    {"reset_stats",                 (PyCFunction)h3lib_reset_stats,                 METH_VARARGS|METH_KEYWORDS, NULL},
+    {"set_trace_callback",          (PyCFunction)h3lib_set_trace_callback,          METH_VARARGS|METH_KEYWORDS, NULL},
 
     {"list_buckets",                (PyCFunction)h3lib_list_buckets,                METH_VARARGS|METH_KEYWORDS, NULL},
     {"info_bucket",                 (PyCFunction)h3lib_info_bucket,                 METH_VARARGS|METH_KEYWORDS, NULL},
@@ -1319,12 +1838,14 @@ static PyMethodDef module_functions[] = {
     {"set_object_owner",            (PyCFunction)h3lib_set_object_owner,            METH_VARARGS|METH_KEYWORDS, NULL},
     {"make_object_read_only",       (PyCFunction)h3lib_make_object_read_only,       METH_VARARGS|METH_KEYWORDS, NULL},
     {"create_object",               (PyCFunction)h3lib_create_object,               METH_VARARGS|METH_KEYWORDS, NULL},
+    {"create_dummy_object",         (PyCFunction)h3lib_create_dummy_object,         METH_VARARGS|METH_KEYWORDS, NULL},
     {"create_object_copy",          (PyCFunction)h3lib_create_object_copy,          METH_VARARGS|METH_KEYWORDS, NULL},
     {"create_object_from_file",     (PyCFunction)h3lib_create_object_from_file,     METH_VARARGS|METH_KEYWORDS, NULL},
     {"write_object",                (PyCFunction)h3lib_write_object,                METH_VARARGS|METH_KEYWORDS, NULL},
     {"write_object_copy",           (PyCFunction)h3lib_write_object_copy,           METH_VARARGS|METH_KEYWORDS, NULL},
     {"write_object_from_file",      (PyCFunction)h3lib_write_object_from_file,      METH_VARARGS|METH_KEYWORDS, NULL},
     {"read_object",                 (PyCFunction)h3lib_read_object,                 METH_VARARGS|METH_KEYWORDS, NULL},
+    {"read_dummy_object",           (PyCFunction)h3lib_read_dummy_object,           METH_VARARGS|METH_KEYWORDS, NULL},
     {"read_object_to_file",         (PyCFunction)h3lib_read_object_to_file,         METH_VARARGS|METH_KEYWORDS, NULL},
     {"copy_object",                 (PyCFunction)h3lib_copy_object,                 METH_VARARGS|METH_KEYWORDS, NULL},
     {"move_object",                 (PyCFunction)h3lib_move_object,                 METH_VARARGS|METH_KEYWORDS, NULL},
@@ -1337,6 +1858,8 @@ static PyMethodDef module_functions[] = {
     {"copy_object_metadata",        (PyCFunction)h3lib_copy_object_metadata,        METH_VARARGS|METH_KEYWORDS, NULL},
     {"move_object_metadata",        (PyCFunction)h3lib_move_object_metadata,        METH_VARARGS|METH_KEYWORDS, NULL},
     {"list_objects_with_metadata",  (PyCFunction)h3lib_list_objects_with_metadata,  METH_VARARGS|METH_KEYWORDS, NULL},
+    {"list_expired_objects",        (PyCFunction)h3lib_list_expired_objects,        METH_VARARGS|METH_KEYWORDS, NULL},
+    {"list_read_only_due_objects",  (PyCFunction)h3lib_list_read_only_due_objects,  METH_VARARGS|METH_KEYWORDS, NULL},
 
     {"list_multiparts",             (PyCFunction)h3lib_list_multiparts,             METH_VARARGS|METH_KEYWORDS, NULL},
     {"create_multipart",            (PyCFunction)h3lib_create_multipart,            METH_VARARGS|METH_KEYWORDS, NULL},
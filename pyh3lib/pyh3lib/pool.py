@@ -0,0 +1,218 @@
+# Copyright [2019] [FORTH-ICS]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import time
+import weakref
+import threading
+import contextlib
+import urllib.parse
+
+from . import h3
+from . import h3lib
+
+# Stores that lock their storage while open, so that a process can only open them once
+_EXCLUSIVE_STORES = ('rocksdb', 'kreon')
+
+class _Checkout(object):
+    def __init__(self, handle):
+        self.handle = handle
+
+class H3Pool(object):
+    """A pool of H3 handles, for threads to use a backend connection each.
+
+    Handles are created when first needed, up to ``size``, and are either checked out for a while
+    with :meth:`handle`, or kept by a thread for as long as it lives with :meth:`local`. A handle
+    that has been idle for ``check_interval`` seconds, or whose last call failed with a store error,
+    is checked before it is handed out again, and replaced if the check fails.
+
+    Stores that can only be opened once (RocksDB and Kreon) get a single handle, which is shared by all
+    threads. It is only checked, or replaced, once no thread is using it.
+
+    :param storage_uri: backend storage URI
+    :param size: the maximum number of handles
+    :param user_id: user performing all actions
+    :param timeout: the seconds to wait for a handle when all are in use (default is to wait forever)
+    :param check_interval: the idle seconds after which a handle is checked
+    :param health_check: the function to check a handle with, which raises an exception if the handle is unusable (default is to list the buckets)
+    :type storage_uri: string
+    :type size: int
+    :type user_id: int
+    :type timeout: float
+    :type check_interval: float
+    :type health_check: callable
+    """
+
+    def __init__(self, storage_uri, size=8, user_id=0, timeout=None, check_interval=30, health_check=None):
+        self._storage_uri    = storage_uri
+        self._size           = size
+        self._user_id        = user_id
+        self._timeout        = timeout
+        self._check_interval = check_interval
+        self._health_check   = health_check or (lambda handle: handle.list_buckets())
+        self._condition      = threading.Condition()
+        self._idle           = []
+        self._handles        = []
+        self._creating       = 0
+        self._shared         = urllib.parse.urlparse(storage_uri).scheme in _EXCLUSIVE_STORES
+        self._in_use         = None
+        self._users          = 0
+        self._failed         = False
+        self._closed         = False
+        self._local          = threading.local()
+
+    def _create(self):
+        handle = None
+        try:
+            handle = h3.H3(self._storage_uri, self._user_id)
+            return handle
+        finally:
+            with self._condition:
+                self._creating -= 1
+                if handle is not None:
+                    self._handles.append(handle)
+                self._condition.notify_all()
+
+    def _healthy(self, handle):
+        try:
+            self._health_check(handle)
+            return True
+        except Exception:
+            return False
+
+    def acquire(self, timeout=None):
+        """Check out a handle, to be returned with :meth:`release`.
+
+        :param timeout: the seconds to wait for a handle when all are in use (default is the pool's)
+        :type timeout: float
+        :returns: An H3 instance
+        :raises TimeoutError: if no handle became available in time
+        """
+
+        timeout = self._timeout if timeout is None else timeout
+        with self._condition:
+            if self._closed:
+                raise RuntimeError('The pool is closed')
+            size = 1 if self._shared else self._size
+            if not self._condition.wait_for(lambda: self._in_use is not None or self._idle or len(self._handles) + self._creating < size, timeout):
+                raise TimeoutError('No H3 handle available')
+            if self._in_use is not None:
+                self._users += 1
+                return self._in_use
+            if not self._idle:
+                self._creating += 1
+                handle = None
+            else:
+                handle, last_used = self._idle.pop()
+
+        if handle is None:
+            handle = self._create()
+        elif time.monotonic() - last_used >= self._check_interval and not self._healthy(handle):
+            # Free it first, as the store may not be opened twice
+            with self._condition:
+                self._handles.remove(handle)
+                self._creating += 1
+            handle.close()
+            handle = self._create()
+
+        if self._shared:
+            with self._condition:
+                self._in_use = handle
+                self._users  = 1
+                self._condition.notify_all()
+
+        return handle
+
+    def release(self, handle, failed=False):
+        """Return a handle checked out with :meth:`acquire`.
+
+        :param handle: the handle
+        :param failed: the handle is to be checked before it is used again
+        :type handle: pyh3lib.H3
+        :type failed: bool
+        :returns: nothing
+        """
+
+        with self._condition:
+            if handle is self._in_use:
+                self._users  -= 1
+                self._failed |= failed
+                if self._users:
+                    return
+
+                # The last thread using the shared handle returned it
+                failed = self._failed
+                self._in_use = None
+                self._failed = False
+
+            if self._closed:
+                self._handles.remove(handle)
+                handle.close()
+            else:
+                self._idle.append((handle, float('-inf') if failed else time.monotonic()))
+            self._condition.notify()
+
+    @contextlib.contextmanager
+    def handle(self, timeout=None):
+        """Check out a handle for the duration of a ``with`` block::
+
+            with pool.handle() as h3:
+                h3.create_object('b1', 'o1', b'...')
+
+        :param timeout: the seconds to wait for a handle when all are in use (default is the pool's)
+        :type timeout: float
+        :returns: A context manager that gives an H3 instance
+        """
+
+        handle = self.acquire(timeout)
+        failed = False
+        try:
+            yield handle
+        except h3lib.StoreError:
+            failed = True
+            raise
+        finally:
+            self.release(handle, failed)
+
+    def local(self):
+        """Get the handle of the calling thread, checking out one on the first call. The handle
+        is returned to the pool when the thread is gone.
+
+        :returns: An H3 instance
+        """
+
+        checkout = getattr(self._local, 'checkout', None)
+        if checkout is None:
+            # Thread local data is dropped when the thread exits
+            checkout = self._local.checkout = _Checkout(self.acquire())
+            weakref.finalize(checkout, self.release, checkout.handle)
+        return checkout.handle
+
+    def close(self):
+        """Free the idle handles, and the ones in use as soon as they are returned.
+
+        :returns: nothing
+        """
+
+        with self._condition:
+            self._closed = True
+            for handle, last_used in self._idle:
+                self._handles.remove(handle)
+                handle.close()
+            self._idle = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,174 @@
+# Copyright [2019] [FORTH-ICS]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import time
+import random
+import weakref
+import inspect
+import itertools
+import functools
+import threading
+
+from collections import namedtuple
+
+from . import h3lib
+
+H3TraceEvent = namedtuple('H3TraceEvent', ['phase', 'operation', 'bucket', 'object', 'key', 'bytes', 'duration', 'status', 'call'])
+H3TraceEvent.__doc__ = """An event passed to the trace hooks.
+
+``phase`` is ``'start'`` or ``'end'`` for an H3 call, with ``operation`` set to the method name (like ``'create_object'``),
+or ``'kv'`` for a store primitive issued by the call in progress, with ``operation`` set to the primitive name (like
+``'read'`` or ``'metadata_write'``) and ``key`` to the key it worked on. ``bucket`` and ``object`` are the names the call
+was made with, if any. ``bytes`` and ``duration`` (in seconds) are set on end and store events, where ``bytes`` is the
+data moved to or from the store. ``status`` is ``'ok'``, ``'failed'`` for failed primitives, or the name of the exception
+raised by the call. ``call`` is a number identifying the call all events belong to.
+"""
+
+_calls = itertools.count(1)
+
+class Tracer(object):
+    """
+    The trace hooks of an H3 handle. Store events are delivered by h3lib in the thread making the call,
+    so the calls in progress are kept per thread.
+    """
+
+    def __init__(self, handle):
+        self._handle = handle
+        self._hooks  = []
+        self._local  = threading.local()
+
+    def __bool__(self):
+        return bool(self._hooks)
+
+    def add(self, hook, sample_rate):
+        if not self._hooks:
+            # The handle keeps the callback, so it can't refer to the tracer that keeps the handle
+            ref = weakref.ref(self)
+            def store_event(*args):
+                tracer = ref()
+                if tracer is not None:
+                    tracer._store_event(*args)
+            h3lib.set_trace_callback(self._handle, store_event)
+        self._hooks.append((hook, sample_rate))
+
+    def remove(self, hook):
+        self._hooks = [(h, rate) for h, rate in self._hooks if h is not hook]
+        if not self._hooks:
+            h3lib.set_trace_callback(self._handle, None)
+
+    def call(self, operation, bucket, obj, function, *args, **kwargs):
+        hooks = [hook for hook, rate in self._hooks if rate >= 1 or random.random() < rate]
+        if not hooks:
+            return function(*args, **kwargs)
+
+        calls = self._local.__dict__.setdefault('calls', [])
+        call  = [next(_calls), hooks, 0]
+        for hook in hooks:
+            hook(H3TraceEvent('start', operation, bucket, obj, None, 0, 0.0, 'ok', call[0]))
+
+        calls.append(call)
+        status = 'ok'
+        start  = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        except Exception as e:
+            status = type(e).__name__
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            calls.pop()
+            for hook in hooks:
+                hook(H3TraceEvent('end', operation, bucket, obj, None, call[2], duration, status, call[0]))
+
+    def _store_event(self, phase, operation, key=None, nbytes=0, duration=0.0, failed=False):
+        # Primitives issued outside a traced call (i.e. one that was not sampled) are dropped
+        calls = getattr(self._local, 'calls', None)
+        if phase != 'kv' or not calls:
+            return
+
+        call = calls[-1]
+        call[2] += nbytes
+        for hook in call[1]:
+            hook(H3TraceEvent('kv', operation, None, None, key, nbytes, duration, 'failed' if failed else 'ok', call[0]))
+
+def traced(function):
+    """
+    Emit trace events around an ``H3`` method, if it has any hooks.
+    """
+
+    parameters = list(inspect.signature(function).parameters)
+
+    def argument(names, args, kwargs):
+        for name in names:
+            if name in kwargs:
+                return kwargs[name]
+            if name in parameters and parameters.index(name) < len(args):
+                return args[parameters.index(name)]
+        return None
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        tracer = args[0]._tracer
+        if not tracer:
+            return function(*args, **kwargs)
+
+        return tracer.call(function.__name__,
+                           argument(['bucket_name'], args, kwargs),
+                           argument(['object_name', 'src_object_name', 'multipart_id'], args, kwargs),
+                           function, *args, **kwargs)
+
+    return wrapper
+
+class OpenTelemetryHook(object):
+    """
+    A trace hook that reports each H3 call as an `OpenTelemetry <https://opentelemetry.io>`_ span, in the current
+    context, with a child span for each store primitive it issued. The ``opentelemetry-api`` package is required.
+
+    :param tracer: the tracer to create spans with (default is the global tracer provider's)
+    :type tracer: opentelemetry.trace.Tracer
+    """
+
+    def __init__(self, tracer=None):
+        from opentelemetry import trace, context
+
+        self._trace   = trace
+        self._context = context
+        self._tracer  = tracer or trace.get_tracer('pyh3lib')
+        self._local   = threading.local()
+
+    def _attributes(self, event):
+        attributes = {'h3.bucket': event.bucket, 'h3.object': event.object, 'h3.key': event.key}
+        return {name: value for name, value in attributes.items() if value is not None}
+
+    def __call__(self, event):
+        spans = self._local.__dict__.setdefault('spans', [])
+
+        if event.phase == 'start':
+            span = self._tracer.start_span(f'h3.{event.operation}', attributes=self._attributes(event))
+            spans.append((span, self._context.attach(self._trace.set_span_in_context(span))))
+            return
+
+        if event.phase == 'kv':
+            # Store events arrive once the primitive completed
+            end  = time.time_ns()
+            span = self._tracer.start_span(f'h3.kv.{event.operation}', start_time=end - int(event.duration * 1e9), attributes=self._attributes(event))
+        else:
+            span, token = spans.pop()
+            self._context.detach(token)
+            end = None
+
+        span.set_attribute('h3.bytes', event.bytes)
+        if event.status != 'ok':
+            span.set_status(self._trace.Status(self._trace.StatusCode.ERROR, event.status))
+        span.end(end_time=end)
@@ -19,9 +19,32 @@ from pyh3lib import H3
 def pytest_addoption(parser):
     parser.addoption('--storage', action='store', required=True, help="H3 storage URI")
 
-@pytest.fixture(scope='module')
-def h3(request):
+@pytest.fixture(scope='session')
+def storage_uri(request):
     storage_uri = request.config.getoption('--storage')
 
     assert storage_uri, 'You need to specify a storage URI with "--storage"'
+    return storage_uri
+
+@pytest.fixture(scope='module')
+def h3(storage_uri):
     return H3(storage_uri)
+
+# Function scoped, as some stores (RocksDB) can't be opened twice, so tests that open the store
+# with options of their own, or reopen it, close what they open before the next one starts.
+@pytest.fixture
+def open_h3(storage_uri):
+    """Open the store with options added to the URI query. Handles still open when the test ends are closed."""
+
+    handles = []
+
+    def open_h3(query=None):
+        uri = storage_uri
+        if query:
+            uri += ('&' if '?' in uri else '?') + query
+        handles.append(H3(uri))
+        return handles[-1]
+
+    yield open_h3
+    for handle in handles:
+        handle.close()
@@ -0,0 +1,61 @@
+# Copyright [2019] [FORTH-ICS]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+import pyh3lib
+import asyncio
+import os
+
+MEGABYTE = 1048576
+
+def test_aio(storage_uri):
+    """Call H3 from asyncio."""
+
+    async def test(h3):
+        assert await h3.list_buckets() == []
+        assert await h3.create_bucket('b1') == True
+
+        # concurrent calls
+        names = [f'o{i}' for i in range(20)]
+        assert all(await asyncio.gather(*[h3.create_object('b1', name, name.encode()) for name in names]))
+        assert sorted([name async for name in h3.iter_objects('b1', count=7)]) == sorted(names)
+        assert await h3.read_object('b1', 'o5') == b'o5'
+
+        with pytest.raises(pyh3lib.H3NotExistsError):
+            await h3.read_object('b1', 'o20')
+
+        # streams
+        data = os.urandom(3 * MEGABYTE + 100)
+        async with h3.writer('b1', 'large', chunk_size=MEGABYTE) as writer:
+            for i in range(0, len(data), 1000):
+                await writer.write(data[i:i + 1000])
+        assert (await h3.info_object('b1', 'large')).size == len(data)
+
+        chunks = [chunk async for chunk in h3.reader('b1', 'large', chunk_size=MEGABYTE)]
+        assert [len(chunk) for chunk in chunks] == [MEGABYTE] * 3 + [100]
+        assert b''.join(chunks) == data
+
+        reader = h3.reader('b1', 'large', offset=len(data) - 150)
+        assert await reader.read(100) == data[-150:-50]
+        assert await reader.read() == data[-50:]
+        assert await reader.read() == b''
+
+        await h3.purge_bucket('b1')
+        assert await h3.delete_bucket('b1') == True
+
+    async def main():
+        async with pyh3lib.AsyncH3(storage_uri, max_workers=4, max_concurrency=2) as h3:
+            await test(h3)
+
+    asyncio.run(main())
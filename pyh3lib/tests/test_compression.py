@@ -0,0 +1,196 @@
+# Copyright [2019] [FORTH-ICS]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import random
+import pytest
+import pyh3lib
+
+MEGABYTE = 1048576
+
+# Parts are compressed by a layer wrapped around any store, as set in the URI query. Without
+# compression (or lz4) built in, stores only open with part_compression=none, which still gives
+# every part a header.
+POLICIES = ['part_compression=none',
+            'part_compression=zstd',
+            'part_compression=lz4',
+            'part_compression=zstd&part_compression_level=9&part_compression_min_size=64K',
+            'part_compression=none&part_compression.b2=zstd&part_compression_min_size.b2=1K']
+
+def open_store(open_h3, query):
+    try:
+        return open_h3(query)
+    except pyh3lib.H3InvalidArgsError:
+        pytest.skip(f'Cannot open the store with {query}, h3lib may be built without the codec')
+
+def compressible(size, seed=0):
+    """Text that differs at every line, so that misplaced ranges are caught."""
+
+    lines = b''.join(b'line %08d of object %d\n' % (i, seed) for i in range(size // 20 + 1))
+    return lines[:size]
+
+def cleanup(h3, *buckets):
+    for bucket in buckets:
+        assert h3.purge_bucket(bucket) == True
+        assert h3.delete_bucket(bucket) == True
+
+    h3.close()
+
+@pytest.mark.parametrize('policy', POLICIES)
+def test_round_trip(open_h3, policy):
+    """Read objects whole and in ranges, across parts both compressed and kept raw."""
+
+    h3 = open_store(open_h3, policy)
+    assert h3.create_bucket('b1') == True
+    assert h3.create_bucket('b2') == True
+
+    objects = {'text': compressible(3 * MEGABYTE + 12345),
+               'random': os.urandom(2 * MEGABYTE + 100),
+               'small': compressible(100),
+               'mixed': compressible(MEGABYTE) + os.urandom(MEGABYTE) + compressible(MEGABYTE // 2, 1),
+               'empty': b''}
+    for bucket in ('b1', 'b2'):
+        for name, data in objects.items():
+            assert h3.create_object(bucket, name, data) == True
+
+    generator = random.Random(1)
+    for bucket in ('b1', 'b2'):
+        for name, data in objects.items():
+            assert h3.read_object(bucket, name) == data
+            if not data:
+                continue
+
+            # from the start of a part, inside a part, across parts and up to the end
+            ranges = [(0, 10), (MEGABYTE, 100), (5, MEGABYTE), (MEGABYTE - 7, 14), (len(data) - 3, 3)]
+            ranges += [(generator.randrange(len(data)), generator.randrange(1, 2 * MEGABYTE)) for i in range(10)]
+            for offset, size in ranges:
+                if offset < len(data):
+                    assert h3.read_object(bucket, name, offset=offset, size=size) == data[offset:offset + size]
+
+    h3.close()
+    h3 = open_store(open_h3, policy)
+    for bucket in ('b1', 'b2'):
+        for name, data in objects.items():
+            assert h3.read_object(bucket, name) == data
+
+    cleanup(h3, 'b1', 'b2')
+
+@pytest.mark.parametrize('policy', POLICIES)
+def test_updates(open_h3, policy):
+    """Write into parts kept raw, which are updated in place, and compressed ones, which are rewritten."""
+
+    h3 = open_store(open_h3, policy)
+    for bucket in ('b1', 'b2'):
+        assert h3.create_bucket(bucket) == True
+
+        expected = bytearray(compressible(MEGABYTE) + os.urandom(MEGABYTE) + compressible(MEGABYTE, 1))
+        assert h3.create_object(bucket, 'o1', bytes(expected)) == True
+
+        # into each part, past the end of the last one, and into the gap that leaves
+        for offset, data in [(100, b'x' * 1000), (MEGABYTE + 100, os.urandom(1000)), (2 * MEGABYTE + 100, compressible(1000, 2)),
+                             (MEGABYTE - 500, compressible(1000, 3)), (4 * MEGABYTE + 10, compressible(5000, 4))]:
+            assert h3.write_object(bucket, 'o1', data, offset=offset) == True
+            expected[len(expected):] = bytes(max(offset - len(expected), 0))
+            expected[offset:offset + len(data)] = data
+
+        assert h3.info_object(bucket, 'o1').size == len(expected)
+        assert h3.read_object(bucket, 'o1') == expected
+        assert h3.read_object(bucket, 'o1', offset=MEGABYTE - 600, size=1200) == expected[MEGABYTE - 600:MEGABYTE + 600]
+
+        # copies are written through the layer like the original
+        multipart = h3.create_multipart(bucket, 'o2')
+        h3.create_part_copy('o1', 100, 3 * MEGABYTE, multipart, 0)
+        h3.complete_multipart(multipart)
+        assert h3.read_object(bucket, 'o2') == expected[100:100 + 3 * MEGABYTE]
+
+        assert h3.truncate_object(bucket, 'o2', MEGABYTE + 10) == True
+        assert h3.read_object(bucket, 'o2') == expected[100:100 + MEGABYTE + 10]
+
+    h3.close()
+    h3 = open_store(open_h3, policy)
+    assert h3.read_object('b2', 'o1') == expected
+
+    cleanup(h3, 'b1', 'b2')
+
+def test_parts_before_compression(open_h3):
+    """Read and update parts written before compression was enabled, which have no header."""
+
+    open_store(open_h3, 'part_compression=zstd').close()
+
+    h3 = open_h3()
+    assert h3.create_bucket('b1') == True
+
+    expected = bytearray(compressible(2 * MEGABYTE))
+    assert h3.create_object('b1', 'o1', bytes(expected)) == True
+    h3.close()
+
+    h3 = open_store(open_h3, 'part_compression=zstd')
+    assert h3.read_object('b1', 'o1') == expected
+    assert h3.read_object('b1', 'o1', offset=MEGABYTE - 10, size=20) == expected[MEGABYTE - 10:MEGABYTE + 10]
+
+    assert h3.write_object('b1', 'o1', b'y' * 100, offset=MEGABYTE + 50) == True
+    expected[MEGABYTE + 50:MEGABYTE + 150] = b'y' * 100
+    assert h3.write_object('b1', 'o2', bytes(expected)) == True
+    h3.close()
+
+    h3 = open_store(open_h3, 'part_compression=none')
+    assert h3.read_object('b1', 'o1') == expected
+    assert h3.read_object('b1', 'o2') == expected
+
+    cleanup(h3, 'b1')
+
+def data_files(root):
+    for directory, _, files in os.walk(os.path.join(root, '#data')):
+        for name in files:
+            yield os.path.join(directory, name)
+
+def test_stored_parts(tmp_path):
+    """Check the header and size of the parts a filesystem store keeps, per bucket policy."""
+
+    h3 = open_store(lambda query: pyh3lib.H3(f'file://{tmp_path}?{query}'),
+                    'part_compression=none&part_compression.b2=zstd&part_compression.b3=lz4')
+    codecs = {'b1': 0, 'b2': 1, 'b3': 2}
+    data = compressible(MEGABYTE)
+
+    for bucket, codec in codecs.items():
+        assert h3.create_bucket(bucket) == True
+        assert h3.create_object(bucket, 'o1', data) == True
+
+        # the bucket's policy applies to multipart uploads and copies as well
+        multipart = h3.create_multipart(bucket, 'o2')
+        h3.create_part(multipart, 0, data)
+        h3.complete_multipart(multipart)
+        multipart = h3.create_multipart(bucket, 'o3')
+        h3.create_part_copy('o1', 0, MEGABYTE, multipart, 0)
+        h3.complete_multipart(multipart)
+
+        files = list(data_files(tmp_path))
+        assert len(files) == 3
+        for name in files:
+            with open(name, 'rb') as f:
+                header = f.read(16)
+                assert header[:4] == b'\x89H3Z'
+                assert header[4] == codec
+                assert (os.path.getsize(name) < len(data) // 4) == bool(codec)
+
+        for name in ('o1', 'o2', 'o3'):
+            assert h3.read_object(bucket, name) == data
+        assert h3.purge_bucket(bucket) == True
+
+    # random data is kept raw
+    assert h3.create_object('b2', 'o1', os.urandom(MEGABYTE)) == True
+    with open(next(data_files(tmp_path)), 'rb') as f:
+        assert f.read(16)[4] == 0
+
+    cleanup(h3, 'b1', 'b2', 'b3')
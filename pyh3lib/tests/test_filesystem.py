@@ -0,0 +1,214 @@
+# Copyright [2019] [FORTH-ICS]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import random
+import shutil
+import pytest
+import pyh3lib
+
+from concurrent.futures import ThreadPoolExecutor
+
+MEGABYTE = 1048576
+
+# Tests of how the filesystem store lays out keys, which run on stores of their own in
+# temporary directories, whatever the store given. Batches of parts go through io_uring
+# when h3lib is built with liburing, unless turned off.
+QUERIES = ['', 'uring=off']
+
+def open_store(root, query=''):
+    return pyh3lib.H3(f'file://{root}' + (f'?{query}' if query else ''))
+
+def part_files(root):
+    for directory, _, files in os.walk(root):
+        for name in files:
+            if name.startswith('_'):
+                yield os.path.relpath(os.path.join(directory, name), root)
+
+def fill(h3, bucket):
+    """Create objects of several parts, with gaps, and a multipart one. Returns their data and the number of parts."""
+
+    objects = {'o1': os.urandom(3 * MEGABYTE + 100), 'o2': os.urandom(10)}
+    for name, data in objects.items():
+        assert h3.create_object(bucket, name, data) == True
+
+    assert h3.write_object(bucket, 'o2', b'x' * 10, offset=2 * MEGABYTE) == True
+    objects['o2'] += bytes(2 * MEGABYTE - 10) + b'x' * 10
+
+    multipart = h3.create_multipart(bucket, 'o3')
+    h3.create_part(multipart, 1, b'y' * 100)
+    h3.create_part(multipart, 0, b'z' * MEGABYTE)
+    h3.complete_multipart(multipart)
+    objects['o3'] = b'z' * MEGABYTE + b'y' * 100
+
+    return objects, 4 + 2 + 2
+
+@pytest.mark.parametrize('query', QUERIES)
+def test_data_directory(tmp_path, query):
+    """Keep parts in fanout directories under "#data", apart from the metadata."""
+
+    root = tmp_path / 'h3'
+    h3 = open_store(root, query)
+    assert h3.create_bucket('b1') == True
+    objects, nParts = fill(h3, 'b1')
+
+    parts = list(part_files(root))
+    assert len(parts) == nParts
+    for part in parts:
+        directory, fanout, name = part.split('/')
+        assert directory == '#data' and fanout == name[1:3]
+        int(fanout, 16)
+
+    assert h3.list_buckets() == ['b1']
+    assert h3.list_objects('b1') == sorted(objects)
+    for name, data in objects.items():
+        assert h3.read_object('b1', name) == data
+
+    h3.close()
+    h3 = open_store(root, query)
+    for name, data in objects.items():
+        assert h3.read_object('b1', name) == data
+
+    assert h3.purge_bucket('b1') == True
+    assert list(part_files(root)) == []
+    assert h3.delete_bucket('b1') == True
+
+    h3.close()
+
+@pytest.mark.parametrize('query', QUERIES)
+def test_missing_fanout(tmp_path, query):
+    """Look parts up without making their fanout directories, which only writes do, so that stores can be read-only."""
+
+    root = tmp_path / 'h3'
+    h3 = open_store(root, query)
+    assert h3.create_bucket('b1') == True
+    objects, nParts = fill(h3, 'b1')
+    h3.close()
+
+    shutil.rmtree(root / '#data')
+    os.mkdir(root / '#data')
+
+    h3 = open_store(root, query)
+    for name in objects:
+        with pytest.raises(pyh3lib.H3FailureError):
+            h3.read_object('b1', name)
+        with pytest.raises(pyh3lib.H3FailureError):
+            h3.delete_object('b1', name)
+    assert os.listdir(root / '#data') == []
+
+    data = os.urandom(2 * MEGABYTE)
+    assert h3.create_object('b1', 'o4', data) == True
+    assert h3.read_object('b1', 'o4') == data
+    assert len(list(part_files(root))) == 2
+
+    h3.close()
+
+def test_data_path(tmp_path):
+    """Keep parts in a directory of their own, elsewhere."""
+
+    root, data_path = tmp_path / 'h3', tmp_path / 'data'
+    h3 = open_store(root, f'data_path={data_path}')
+    assert h3.create_bucket('b1') == True
+    objects, nParts = fill(h3, 'b1')
+
+    assert list(part_files(root)) == []
+    assert not os.path.exists(root / '#data')
+    assert len(list(part_files(data_path))) == nParts
+
+    h3.close()
+    h3 = open_store(root, f'data_path={data_path}')
+    for name, data in objects.items():
+        assert h3.read_object('b1', name) == data
+
+    assert h3.purge_bucket('b1') == True
+    assert list(part_files(data_path)) == []
+    assert h3.delete_bucket('b1') == True
+
+    h3.close()
+
+    with pytest.raises(pyh3lib.H3InvalidArgsError):
+        open_store(root, 'data_path=relative/data')
+
+def test_legacy_layout(tmp_path):
+    """Keep parts along with the metadata in directories from before "#data" was introduced."""
+
+    # a root with keys in it but no "#data" is taken as one from earlier versions
+    root = tmp_path / 'h3'
+    os.makedirs(root)
+    (root / 'b0').write_bytes(b'')
+
+    h3 = open_store(root)
+    assert h3.create_bucket('b1') == True
+    objects, nParts = fill(h3, 'b1')
+
+    assert not os.path.exists(root / '#data')
+    parts = list(part_files(root))
+    assert len(parts) == nParts and all('/' not in part for part in parts)
+
+    h3.close()
+    h3 = open_store(root)
+    for name, data in objects.items():
+        assert h3.read_object('b1', name) == data
+    assert h3.list_objects('b1') == sorted(objects)
+
+    assert h3.purge_bucket('b1') == True
+    assert list(part_files(root)) == []
+    assert h3.delete_bucket('b1') == True
+
+    h3.close()
+
+    # while one that has "#data" keeps using it
+    root = tmp_path / 'h3-new'
+    open_store(root).close()
+    (root / 'b0').write_bytes(b'')
+
+    h3 = open_store(root)
+    assert h3.create_bucket('b1') == True
+    objects, nParts = fill(h3, 'b1')
+    assert all(part.startswith('#data/') for part in part_files(root))
+
+    h3.close()
+
+@pytest.mark.parametrize('query', QUERIES)
+def test_batches(tmp_path, query):
+    """Read and write ranges of many parts at once, from several threads."""
+
+    h3 = open_store(tmp_path / 'h3', query)
+    assert h3.create_bucket('b1') == True
+
+    def run(i):
+        generator = random.Random(i)
+        expected = bytearray(generator.randbytes(20 * MEGABYTE + i))
+        assert h3.create_object('b1', f'o{i}', bytes(expected)) == True
+
+        for j in range(5):
+            offset = generator.randrange(len(expected) + MEGABYTE)
+            data = generator.randbytes(generator.randrange(1, 5 * MEGABYTE))
+            assert h3.write_object('b1', f'o{i}', data, offset=offset) == True
+            expected[len(expected):] = bytes(max(offset - len(expected), 0))
+            expected[offset:offset + len(data)] = data
+
+        for j in range(5):
+            offset = generator.randrange(len(expected))
+            size = generator.randrange(1, 16 * MEGABYTE)
+            assert h3.read_object('b1', f'o{i}', offset=offset, size=size) == expected[offset:offset + size]
+        return True
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        assert all(executor.map(run, range(4)))
+
+    assert h3.purge_bucket('b1') == True
+    assert h3.delete_bucket('b1') == True
+
+    h3.close()
@@ -168,4 +168,96 @@ def test_list_metadata(h3):
 
     h3.purge_bucket('b1')
 
-    assert h3.delete_bucket('b1')
\ No newline at end of file
+    assert h3.delete_bucket('b1')
+def test_expired_objects(h3):
+    """List objects whose ExpiresAt metadata is due."""
+
+    assert h3.list_buckets() == []
+
+    assert h3.create_bucket('b1')
+
+    for i in range(1, 6):
+        h3.create_object('b1', f'o{i}', b'')
+        h3.create_object_metadata('b1', f'o{i}', 'ExpiresAt', struct.pack('d', 1000.0 * i))
+
+    assert sorted(h3.list_expired_objects(2500.0)) == [('b1', 'o1'), ('b1', 'o2')]
+
+    # the index follows updates, deletions, copies and moves of the metadata
+    h3.create_object_metadata('b1', 'o1', 'ExpiresAt', struct.pack('d', 9000.0))
+    assert h3.delete_object_metadata('b1', 'o2', 'ExpiresAt')
+    assert h3.copy_object_metadata('b1', 'o3', 'o4')
+    h3.create_object('b1', 'o6', b'')
+    assert h3.move_object_metadata('b1', 'o5', 'o6')
+    assert sorted(h3.list_expired_objects(5500.0)) == [('b1', 'o3'), ('b1', 'o4'), ('b1', 'o6')]
+
+    # values that are not timestamps are not indexed, and replace longer ones whole
+    h3.create_object_metadata('b1', 'o3', 'ExpiresAt', b'')
+    h3.create_object_metadata('b1', 'o4', 'ExpiresAt', b'soon')
+    assert h3.read_object_metadata('b1', 'o4', 'ExpiresAt') == b'soon'
+    h3.create_object_metadata('b1', 'o4', 'ExpiresAt', struct.pack('d', 5000.0))
+    assert sorted(h3.list_expired_objects(5500.0)) == [('b1', 'o4'), ('b1', 'o6')]
+
+    # deleting the object removes it from the index
+    assert h3.delete_object('b1', 'o4')
+    assert h3.list_expired_objects(5500.0) == [('b1', 'o6')]
+
+    assert sorted(h3.list_expired_objects()) == [('b1', 'o1'), ('b1', 'o6')]
+
+    h3.purge_bucket('b1')
+
+    assert h3.list_expired_objects() == []
+
+    assert h3.delete_bucket('b1')
+
+def test_expired_objects_in_order(h3):
+    """List due objects among many that are not, past a batch of index entries."""
+
+    assert h3.list_buckets() == []
+
+    assert h3.create_bucket('b1')
+
+    # created in reverse, so that the order of the index doesn't follow that of the calls
+    for i in reversed(range(1100)):
+        h3.create_object('b1', f'o{i}', b'')
+        h3.create_object_metadata('b1', f'o{i}', 'ExpiresAt', struct.pack('d', 1000.0 + i))
+
+    assert h3.list_expired_objects(999.0) == []
+    assert h3.list_expired_objects(1000.0) == [('b1', 'o0')]
+    assert sorted(h3.list_expired_objects(2049.5)) == sorted(('b1', f'o{i}') for i in range(1050))
+
+    h3.purge_bucket('b1')
+
+    assert h3.delete_bucket('b1')
+
+def test_read_only_due_objects(h3):
+    """List objects whose ReadOnlyAfter deadline has passed."""
+
+    assert h3.list_buckets() == []
+
+    assert h3.create_bucket('b1')
+
+    for i in range(1, 4):
+        h3.create_object('b1', f'o{i}', b'')
+        assert h3.touch_object('b1', f'o{i}', 1000.0, 1000.0)
+        h3.create_object_metadata('b1', f'o{i}', 'ReadOnlyAfter', struct.pack('d', 100.0 * i))
+
+    assert sorted(h3.list_read_only_due_objects(1250.0)) == [('b1', 'o1'), ('b1', 'o2')]
+
+    # touching the object moves its deadline
+    assert h3.touch_object('b1', 'o1', 2000.0, 2000.0)
+    assert h3.list_read_only_due_objects(1250.0) == [('b1', 'o2')]
+
+    # writing to the object moves its deadline as well
+    assert h3.write_object('b1', 'o2', b'data')
+    assert h3.list_read_only_due_objects(1250.0) == []
+
+    # read only objects are no longer listed
+    assert sorted(h3.list_read_only_due_objects(2500.0)) == [('b1', 'o1'), ('b1', 'o3')]
+    assert h3.make_object_read_only('b1', 'o1')
+    assert h3.list_read_only_due_objects(2500.0) == [('b1', 'o3')]
+
+    h3.purge_bucket('b1')
+
+    assert h3.list_read_only_due_objects() == []
+
+    assert h3.delete_bucket('b1')
@@ -380,4 +380,238 @@ def test_empty(h3):
 
     h3.delete_object('b1', 'o1')
 
-    assert h3.delete_bucket('b1') == True
\ No newline at end of file
+    assert h3.delete_bucket('b1') == True
+def test_fragmented(h3):
+    """Write an object in many irregular pieces and read it back."""
+
+    assert h3.list_buckets() == []
+
+    assert h3.create_bucket('b1') == True
+
+    # Sequential writes of equal size, then overwrites and appends of random size.
+    expected = bytearray()
+    h3.create_object('b1', 'o1', b'')
+    for i in range(100):
+        data = os.urandom(1024)
+        assert h3.write_object('b1', 'o1', data, offset=len(expected)) == True
+        expected += data
+
+    for i in range(100):
+        offset = random.randint(0, len(expected))
+        data = os.urandom(random.randint(1, 4096))
+        assert h3.write_object('b1', 'o1', data, offset=offset) == True
+        expected[offset:offset + len(data)] = data
+
+    object_info = h3.info_object('b1', 'o1')
+    assert not object_info.is_bad
+    assert object_info.size == len(expected)
+
+    assert h3.read_object('b1', 'o1') == expected
+
+    assert h3.copy_object('b1', 'o1', 'o2') == True
+    assert h3.read_object('b1', 'o2') == expected
+
+    assert h3.purge_bucket('b1') == True
+
+    assert h3.delete_bucket('b1') == True
+
+def test_dummy(h3):
+    """Create and read objects made of a repeated buffer."""
+
+    assert h3.list_buckets() == []
+
+    assert h3.create_bucket('b1') == True
+
+    data = os.urandom(1000)
+    assert h3.create_dummy_object('b1', 'o1', data, 3 * MEGABYTE + 5) == True
+
+    with pytest.raises(pyh3lib.H3ExistsError):
+        h3.create_dummy_object('b1', 'o1', data, MEGABYTE)
+
+    object_info = h3.info_object('b1', 'o1')
+    assert not object_info.is_bad
+    assert object_info.size == 3 * MEGABYTE + 5
+
+    assert h3.read_dummy_object('b1', 'o1') == 3 * MEGABYTE + 5
+    assert h3.read_object('b1', 'o1')[:2000] == data + data
+
+    assert h3.create_dummy_object('b1', 'o2', data, 0) == True
+    assert h3.read_dummy_object('b1', 'o2') == 0
+
+    with pytest.raises(pyh3lib.H3NotExistsError):
+        h3.read_dummy_object('b1', 'o3')
+
+    assert h3.purge_bucket('b1') == True
+
+    assert h3.delete_bucket('b1') == True
+
+def test_overwrite_inside_part(h3):
+    """Overwriting the middle of a part keeps the rest of it."""
+
+    assert h3.list_buckets() == []
+
+    assert h3.create_bucket('b1') == True
+
+    expected = bytearray(os.urandom(MEGABYTE))
+    assert h3.create_object('b1', 'o1', bytes(expected)) == True
+
+    data = os.urandom(10)
+    assert h3.write_object('b1', 'o1', data, offset=1000) == True
+    expected[1000:1010] = data
+
+    assert h3.info_object('b1', 'o1').size == MEGABYTE
+    assert h3.read_object('b1', 'o1') == expected
+    assert h3.read_object('b1', 'o1', offset=MEGABYTE - 10, size=10) == expected[-10:]
+
+    assert h3.purge_bucket('b1') == True
+
+    assert h3.delete_bucket('b1') == True
+
+def test_write_into_gap(h3):
+    """Data written into a gap stays there, and doesn't land in the part after it."""
+
+    assert h3.list_buckets() == []
+
+    assert h3.create_bucket('b1') == True
+
+    first = os.urandom(MEGABYTE)
+    last = os.urandom(MEGABYTE)
+    assert h3.create_object('b1', 'o1', first) == True
+    assert h3.write_object('b1', 'o1', last, offset=5 * MEGABYTE) == True
+
+    data = os.urandom(1000)
+    assert h3.write_object('b1', 'o1', data, offset=2 * MEGABYTE + 10) == True
+
+    expected = bytearray(6 * MEGABYTE)
+    expected[:MEGABYTE] = first
+    expected[2 * MEGABYTE + 10:2 * MEGABYTE + 1010] = data
+    expected[5 * MEGABYTE:] = last
+
+    assert h3.info_object('b1', 'o1').size == 6 * MEGABYTE
+    assert h3.read_object('b1', 'o1') == expected
+    assert h3.read_object('b1', 'o1', offset=5 * MEGABYTE, size=MEGABYTE) == last
+
+    assert h3.purge_bucket('b1') == True
+
+    assert h3.delete_bucket('b1') == True
+
+def test_write_past_part_end(h3):
+    """Data written past the end of a short part keeps its offset."""
+
+    assert h3.list_buckets() == []
+
+    assert h3.create_bucket('b1') == True
+
+    first = os.urandom(100)
+    assert h3.create_object('b1', 'o1', first) == True
+
+    data = os.urandom(50)
+    assert h3.write_object('b1', 'o1', data, offset=300) == True
+    assert h3.write_object('b1', 'o1', data, offset=350) == True
+
+    expected = first + bytes(200) + data + data
+    assert h3.info_object('b1', 'o1').size == 400
+    assert h3.read_object('b1', 'o1') == expected
+    assert h3.read_object('b1', 'o1', offset=300, size=100) == data + data
+
+    assert h3.purge_bucket('b1') == True
+
+    assert h3.delete_bucket('b1') == True
+
+def test_read_across_gaps(h3):
+    """Reads spanning gaps return zeros for them and don't overrun the buffer."""
+
+    assert h3.list_buckets() == []
+
+    assert h3.create_bucket('b1') == True
+
+    pieces = [(0, os.urandom(1000)), (3 * MEGABYTE, os.urandom(1000)), (3 * MEGABYTE + 500000, os.urandom(MEGABYTE))]
+
+    h3.create_object('b1', 'o1', b'')
+    expected = bytearray()
+    for (offset, data) in pieces:
+        assert h3.write_object('b1', 'o1', data, offset=offset) == True
+        expected[len(expected):] = bytes(offset + len(data) - len(expected))
+        expected[offset:offset + len(data)] = data
+
+    assert h3.info_object('b1', 'o1').size == len(expected)
+    assert h3.read_object('b1', 'o1') == expected
+    for (offset, size) in [(500, 3 * MEGABYTE), (999, 2), (1000, 100), (2 * MEGABYTE, MEGABYTE + 200), (3 * MEGABYTE + 900, 500000), (0, len(expected) + 100)]:
+        assert h3.read_object('b1', 'o1', offset=offset, size=size) == expected[offset:offset + size]
+
+    assert h3.purge_bucket('b1') == True
+
+    assert h3.delete_bucket('b1') == True
+
+def test_write_after_multipart(h3):
+    """Writes after unaligned multipart parts don't overlap them."""
+
+    assert h3.list_buckets() == []
+
+    assert h3.create_bucket('b1') == True
+
+    parts = [os.urandom(MEGABYTE + 300), os.urandom(700), os.urandom(2 * MEGABYTE + 1)]
+
+    multipart = h3.create_multipart('b1', 'o1')
+    for (i, data) in enumerate(parts):
+        assert h3.create_part(multipart, i, data) == True
+    assert h3.complete_multipart(multipart) == True
+
+    expected = bytearray(b''.join(parts))
+    for (offset, size) in [(MEGABYTE + 100, 1000), (len(expected) - 10, MEGABYTE), (len(expected) + 5, 2 * MEGABYTE)]:
+        data = os.urandom(size)
+        assert h3.write_object('b1', 'o1', data, offset=offset) == True
+        expected[len(expected):] = bytes(max(offset - len(expected), 0))
+        expected[offset:offset + size] = data
+
+    assert h3.info_object('b1', 'o1').size == len(expected)
+    assert h3.read_object('b1', 'o1') == expected
+
+    assert h3.purge_bucket('b1') == True
+
+    assert h3.delete_bucket('b1') == True
+
+def test_read_many_parts(h3):
+    """Read objects with more parts than are read at once."""
+
+    assert h3.list_buckets() == []
+
+    assert h3.create_bucket('b1') == True
+
+    expected = os.urandom(20 * MEGABYTE + 500)
+    assert h3.create_object('b1', 'o1', expected) == True
+
+    # reads return up to 16 MB at a time
+    for (offset, size) in [(0, 16 * MEGABYTE), (MEGABYTE // 2, 16 * MEGABYTE), (4 * MEGABYTE - 1, 16 * MEGABYTE), (5 * MEGABYTE, 15 * MEGABYTE + 500)]:
+        assert h3.read_object('b1', 'o1', offset=offset, size=size) == expected[offset:offset + size]
+
+    assert h3.purge_bucket('b1') == True
+
+    assert h3.delete_bucket('b1') == True
+
+def test_list_order(h3):
+    """List objects in the order of their names, by prefix and in pages."""
+
+    assert h3.list_buckets() == []
+
+    assert h3.create_bucket('b1') == True
+
+    names = ['a/b/', 'a/b/c', 'a/b/c.d', 'a.x', 'ab', 'a-', 'b', 'z/y', 'a/b.c', 'a/b/a', 'a/c', 'a/b/e/f', 'a/b0']
+    for name in names:
+        assert h3.create_object('b1', name, b'') == True
+
+    for prefix in ['', 'a', 'a/', 'a/b', 'a/b/', 'a/b/c', 'a/b/e', 'z', 'q']:
+        expected = sorted(name for name in names if name.startswith(prefix))
+        assert h3.list_objects('b1', prefix=prefix) == expected
+
+        objects = []
+        while True:
+            page = h3.list_objects('b1', prefix=prefix, offset=len(objects), count=2)
+            objects += page
+            if page.done:
+                break
+        assert objects == expected
+
+    assert h3.purge_bucket('b1') == True
+
+    assert h3.delete_bucket('b1') == True
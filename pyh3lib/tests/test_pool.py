@@ -0,0 +1,127 @@
+# Copyright [2019] [FORTH-ICS]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+import pyh3lib
+import threading
+
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+
+@pytest.fixture
+def h3_pool(storage_uri):
+    with pyh3lib.H3Pool(storage_uri, size=2, timeout=5, check_interval=0) as pool:
+        yield pool
+
+def test_pool(h3_pool):
+    """Share handles among threads."""
+
+    pool = h3_pool
+
+    with pool.handle() as h3:
+        assert h3.create_bucket('b1') == True
+
+    def create(name):
+        with pool.handle() as h3:
+            return h3.create_object('b1', name, name.encode())
+
+    names = [f'o{i}' for i in range(20)]
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        assert all(executor.map(create, names))
+
+    # per thread handles
+    handles = set()
+    def read(name):
+        h3 = pool.local()
+        handles.add(id(h3))
+        assert h3 is pool.local()
+        return h3.read_object('b1', name)
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        assert list(executor.map(read, names)) == [name.encode() for name in names]
+    assert 1 <= len(handles) <= 2
+
+    with pool.handle() as h3:
+        h3.purge_bucket('b1')
+        assert h3.delete_bucket('b1') == True
+
+def test_pool_timeout(h3_pool):
+    """Wait for handles."""
+
+    pool = h3_pool
+
+    first = pool.acquire()
+    second = pool.acquire()
+
+    # stores that can't be opened twice share a handle
+    storage_uri = pool._storage_uri
+    assert (first is second) == (urlparse(storage_uri).scheme in ('rocksdb', 'kreon'))
+    if first is not second:
+        with pytest.raises(TimeoutError):
+            pool.acquire(timeout=0.1)
+
+    released = threading.Timer(0.1, pool.release, [first])
+    released.start()
+    with pool.handle(timeout=5) as h3:
+        assert h3.list_buckets() == []
+    released.join()
+
+    pool.release(second)
+
+def test_pool_check(storage_uri):
+    """Replace handles that fail their check."""
+
+    checks = []
+    def check(h3):
+        checks.append(h3.list_buckets())
+        raise pyh3lib.H3StoreError
+
+    with pyh3lib.H3Pool(storage_uri, size=1, check_interval=0, health_check=check) as pool:
+        with pool.handle() as h3:
+            assert h3.list_buckets() == []
+        assert checks == []
+
+        # the failed handle is freed before it is replaced
+        first = h3
+        with pool.handle() as h3:
+            assert h3.list_buckets() == []
+        assert checks == [[]]
+        assert h3 is not first
+        with pytest.raises(ValueError):
+            first.list_buckets()
+
+def test_close(storage_uri):
+    """Free handles explicitly."""
+
+    with pyh3lib.H3(storage_uri) as h3:
+        assert h3.list_buckets() == []
+    with pytest.raises(ValueError):
+        h3.list_buckets()
+    assert h3.close() == False
+
+    # the pool frees its handles when closed
+    with pyh3lib.H3Pool(storage_uri, size=2) as pool:
+        with pool.handle() as h3:
+            assert h3.list_buckets() == []
+        used = pool.acquire()
+    assert used.list_buckets() == []
+    pool.release(used)
+    with pytest.raises(ValueError):
+        h3.list_buckets()
+    with pytest.raises(ValueError):
+        used.list_buckets()
+
+    # stores that can't be opened twice can be opened again
+    with pyh3lib.H3(storage_uri) as h3:
+        assert h3.list_buckets() == []
@@ -0,0 +1,266 @@
+# Copyright [2019] [FORTH-ICS]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import time
+import random
+import pytest
+import pyh3lib
+
+from urllib.parse import urlparse, parse_qs
+from concurrent.futures import ThreadPoolExecutor
+
+MEGABYTE = 1048576
+
+# Tests of what the Redis store keeps, which look into the servers with a client of their own.
+# They are skipped with other stores.
+@pytest.fixture(autouse=True)
+def redis_only(storage_uri):
+    if urlparse(storage_uri).scheme != 'redis':
+        pytest.skip('Not a Redis store')
+
+def connect(storage_uri, server=0, db=None):
+    """Connect to a server of the store, the first one holding the metadata."""
+
+    redis = pytest.importorskip('redis')
+    url = urlparse(storage_uri)
+    host, _, port = url.netloc.split(',')[server].partition(':')
+    if db is None:
+        db = int(parse_qs(url.query).get('db', ['0'])[0])
+    return redis.Redis(host=host or '127.0.0.1', port=int(port or 6379), db=db)
+
+def count_parts(client):
+    return sum(1 for key in client.scan_iter(match='_*', count=1000))
+
+def list_all(h3, bucket, prefix='', count=10000):
+    names, offset = [], 0
+    while True:
+        batch = h3.list_objects(bucket, prefix, offset, count)
+        names += batch
+        offset += len(batch)
+        if batch.done:
+            return names
+
+def test_index_order(open_h3):
+    """List names in order and within the bounds of the prefix, from the per-bucket indexes."""
+
+    h3 = open_h3()
+    assert h3.create_bucket('b1') == True
+    assert h3.create_bucket('b10') == True
+
+    names = ['a', 'a/b', 'a/b/c', 'a0', 'ab', 'aé', 'b', 'B', 'ba', 'z' * 100]
+    shuffled = list(names)
+    random.Random(1).shuffle(shuffled)
+    for name in shuffled:
+        assert h3.create_object('b10', name, name.encode()) == True
+    assert h3.create_object('b1', 'a', b'') == True
+
+    assert list_all(h3, 'b10') == sorted(names)
+    assert list_all(h3, 'b10', 'a') == sorted(name for name in names if name.startswith('a'))
+    assert list_all(h3, 'b10', 'a/') == ['a/b', 'a/b/c']
+    assert list_all(h3, 'b10', 'b') == ['b', 'ba']
+    assert list_all(h3, 'b10', 'c') == []
+    assert list_all(h3, 'b1') == ['a']
+
+    # the index of a bucket holds its keys only, so an empty bucket can be deleted beside a full one
+    assert h3.delete_object('b1', 'a') == True
+    assert h3.delete_bucket('b1') == True
+    with pytest.raises(pyh3lib.H3NotEmptyError):
+        h3.delete_bucket('b10')
+
+    assert h3.purge_bucket('b10') == True
+    assert list_all(h3, 'b10') == []
+    assert h3.delete_bucket('b10') == True
+
+    h3.close()
+
+def test_index_paging(open_h3):
+    """Page through more keys than fit in a batch of the index."""
+
+    h3 = open_h3()
+    assert h3.create_bucket('b1') == True
+
+    names = [f'o{i}' for i in range(2500)]
+    for name in names:
+        assert h3.create_object('b1', name, b'') == True
+    names.sort()
+
+    assert list_all(h3, 'b1') == names
+    for count in (1, 999, 1000, 1001, 2499):
+        batch = h3.list_objects('b1', '', 0, count)
+        assert batch == names[:count] and batch.done == False
+    for offset in (999, 1000, 2400):
+        batch = h3.list_objects('b1', '', offset, 1000)
+        assert batch == names[offset:offset + 1000]
+    assert list_all(h3, 'b1', count=700) == names
+    assert list_all(h3, 'b1', 'o1') == [name for name in names if name.startswith('o1')]
+
+    with pytest.raises(pyh3lib.H3NotEmptyError):
+        h3.delete_bucket('b1')
+    assert h3.purge_bucket('b1') == True
+    assert h3.delete_bucket('b1') == True
+
+    h3.close()
+
+def test_index_migration(storage_uri, open_h3):
+    """Index the keys of a store from before the indexes were introduced, when it is opened."""
+
+    client = connect(storage_uri)
+    h3 = open_h3()
+    assert h3.create_bucket('b1') == True
+
+    names = [f'o{i}' for i in range(1500)] + ['d/o1', 'd/o2']
+    for name in names:
+        assert h3.create_object('b1', name, b'') == True
+    assert h3.create_object_metadata('b1', 'o1', 'm1', b'v') == True
+    h3.close()
+
+    # drop the indexes and the marker saying they are built
+    indexes = [key for key in client.scan_iter(match='%*', count=1000)]
+    assert indexes and client.exists('@index')
+    client.delete('@index', *indexes)
+
+    h3 = open_h3()
+    assert client.exists('@index')
+    assert list_all(h3, 'b1') == sorted(names)
+    assert list_all(h3, 'b1', 'd/') == ['d/o1', 'd/o2']
+    assert h3.read_object_metadata('b1', 'o1', 'm1') == b'v'
+
+    assert h3.purge_bucket('b1') == True
+    assert h3.delete_bucket('b1') == True
+
+    h3.close()
+
+def test_pool(storage_uri, open_h3):
+    """Share a handle with several connections among threads."""
+
+    # unless the store sets its own size
+    size = int(parse_qs(urlparse(storage_uri).query).get('pool', ['4'])[0])
+
+    client = connect(storage_uri)
+    connections = len(client.client_list())
+    h3 = open_h3(f'pool={size}')
+    assert len(client.client_list()) >= connections + size
+
+    assert h3.create_bucket('b1') == True
+
+    def create(i):
+        data = os.urandom(MEGABYTE + i)
+        return h3.create_object('b1', f'o{i}', data) and h3.read_object('b1', f'o{i}') == data
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        assert all(executor.map(create, range(32)))
+    assert len(list_all(h3, 'b1')) == 32
+
+    assert h3.purge_bucket('b1') == True
+    assert h3.delete_bucket('b1') == True
+
+    # the server notices closed connections in its own time
+    h3.close()
+    for i in range(50):
+        if len(client.client_list()) <= connections:
+            break
+        time.sleep(0.1)
+    assert len(client.client_list()) <= connections
+
+def test_data_db(storage_uri, open_h3):
+    """Keep parts in a logical database apart from the metadata."""
+
+    if 'data_db' in storage_uri or ',' in urlparse(storage_uri).netloc:
+        pytest.skip('The store already sets where parts go')
+
+    metadata = connect(storage_uri)
+    data = connect(storage_uri, db=15)
+    if data.dbsize():
+        pytest.skip('Logical database 15 is in use')
+
+    h3 = open_h3('data_db=15')
+    parts = count_parts(metadata)
+    assert h3.create_bucket('b1') == True
+    assert h3.create_object('b1', 'o1', os.urandom(3 * MEGABYTE)) == True
+
+    assert count_parts(data) == 3
+    assert count_parts(metadata) == parts
+    assert h3.list_objects('b1') == ['o1']
+
+    assert h3.purge_bucket('b1') == True
+    assert h3.delete_bucket('b1') == True
+    assert data.dbsize() == 0
+
+    h3.close()
+
+def test_sharding(storage_uri, open_h3):
+    """Spread parts over all servers, keeping the metadata on the first one."""
+
+    servers = urlparse(storage_uri).netloc.split(',')
+    if len(servers) < 2:
+        pytest.skip('The store has a single server, list several to spread parts over them')
+
+    data_db = parse_qs(urlparse(storage_uri).query).get('data_db')
+    clients = [connect(storage_uri, server, int(data_db[0]) if data_db else None) for server in range(len(servers))]
+    before = [count_parts(client) for client in clients]
+
+    h3 = open_h3()
+    assert h3.create_bucket('b1') == True
+    data = os.urandom(64 * MEGABYTE)
+    assert h3.create_object('b1', 'o1', data) == True
+
+    added = [count_parts(client) - count for client, count in zip(clients, before)]
+    assert sum(added) == 64
+    assert all(added)
+    assert all(client.dbsize() == count_parts(client) for client in clients[1:])
+    assert h3.read_object('b1', 'o1', offset=MEGABYTE - 10, size=16 * MEGABYTE) == data[MEGABYTE - 10:17 * MEGABYTE - 10]
+
+    assert h3.purge_bucket('b1') == True
+    assert h3.delete_bucket('b1') == True
+    assert [count_parts(client) for client in clients] == before
+
+    h3.close()
+
+def test_compression(storage_uri, open_h3):
+    """Compress parts as the policy of their bucket says, keeping a header that tells how."""
+
+    if 'data_db' in storage_uri or ',' in urlparse(storage_uri).netloc:
+        pytest.skip('The store keeps parts apart from the metadata')
+    if 'compression' in urlparse(storage_uri).query:
+        pytest.skip('The store sets its own compression')
+
+    client = connect(storage_uri)
+    h3 = open_h3('compression=none&compression.b2=zstd')
+    text = b''.join(b'line %08d\n' % i for i in range(MEGABYTE // 14))
+
+    for bucket in ('b1', 'b2'):
+        assert h3.create_bucket(bucket) == True
+        before = set(client.scan_iter(match='_*', count=1000))
+        assert h3.create_object(bucket, 'o1', text) == True
+        assert h3.read_object(bucket, 'o1') == text
+        part, = set(client.scan_iter(match='_*', count=1000)) - before
+        value = client.get(part)
+
+        if len(value) == len(text):
+            assert h3.purge_bucket(bucket) == True
+            assert h3.delete_bucket(bucket) == True
+            pytest.skip('h3lib is built without compression')
+        assert value[0] == (0 if bucket == 'b1' else 1)
+        assert (len(value) < len(text) // 4) == (bucket == 'b2')
+
+        # updates rewrite compressed parts
+        assert h3.write_object(bucket, 'o1', b'x' * 10, offset=100) == True
+        assert h3.read_object(bucket, 'o1') == text[:100] + b'x' * 10 + text[110:]
+
+    for bucket in ('b1', 'b2'):
+        assert h3.purge_bucket(bucket) == True
+        assert h3.delete_bucket(bucket) == True
+
+    h3.close()
@@ -0,0 +1,149 @@
+# Copyright [2019] [FORTH-ICS]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import pytest
+import pyh3lib
+import os
+import weakref
+import threading
+import time
+
+MEGABYTE = 1048576
+
+def test_stats(open_h3):
+    """Collect statistics."""
+
+    h3 = open_h3('stats=1')
+
+    assert h3.reset_stats() == True
+    assert h3.stats() == {'kv': {}, 'api': {}}
+
+    assert h3.create_bucket('b1') == True
+
+    data = os.urandom(3 * MEGABYTE)
+    assert h3.create_object('b1', 'o1', data) == True
+    assert h3.read_object('b1', 'o1') == data
+
+    with pytest.raises(pyh3lib.H3NotExistsError):
+        h3.read_object('b1', 'o2')
+
+    stats = h3.stats()
+    assert stats['api']['CreateBucket']['count'] == 1
+    assert stats['api']['CreateObject']['count'] == 1
+    assert stats['api']['CreateObject']['bytes'] >= len(data)
+    assert stats['api']['ReadObject']['count'] == 2
+    assert stats['api']['ReadObject']['bytes'] >= len(data)
+    assert sum(stats['kv'][op]['bytes'] for op in ('read', 'multi_read') if op in stats['kv']) == len(data)
+    assert stats['kv']['metadata_read']['failures'] >= 1
+
+    for entry in list(stats['kv'].values()) + list(stats['api'].values()):
+        assert entry['count'] == sum(entry['histogram'])
+        assert entry['max_latency'] <= entry['total_latency']
+
+    assert h3.delete_object('b1', 'o1') == True
+    assert h3.delete_bucket('b1') == True
+
+    assert h3.reset_stats() == True
+    assert h3.stats() == {'kv': {}, 'api': {}}
+
+def test_trace_free(storage_uri):
+    """Handles with hooks are freed once they are no longer used."""
+
+    h3 = pyh3lib.H3(storage_uri)
+    h3.add_hook(lambda event: None)
+    assert h3.list_buckets() == []
+
+    tracer = weakref.ref(h3._tracer)
+    del h3
+    assert tracer() is None
+
+def test_no_stats(h3):
+    """Don't collect statistics by default."""
+
+    assert h3.stats() is None
+    assert h3.reset_stats() == False
+
+def test_trace(h3):
+    """Trace calls with hooks."""
+
+    events = []
+    hook = events.append
+    h3.add_hook(hook)
+
+    try:
+        assert h3.create_bucket('b1') == True
+
+        data = os.urandom(3 * MEGABYTE)
+        assert h3.create_object('b1', 'o1', data) == True
+
+        with pytest.raises(pyh3lib.H3NotExistsError):
+            h3.read_object('b1', 'o2')
+    finally:
+        h3.remove_hook(hook)
+
+    assert [event.phase for event in events if event.phase != 'kv'] == ['start', 'end'] * 3
+    assert events[0].operation == 'create_bucket' and events[0].bucket == 'b1'
+
+    call   = next(event.call for event in events if event.operation == 'create_object')
+    create = [event for event in events if event.call == call]
+    assert create[0].phase == 'start' and create[0].object == 'o1'
+    assert create[-1].phase == 'end' and create[-1].status == 'ok' and create[-1].bytes >= len(data)
+    assert sum(event.bytes for event in create if event.phase == 'kv') == create[-1].bytes
+
+    assert events[-1].operation == 'read_object' and events[-1].status == pyh3lib.H3NotExistsError.__name__
+    assert any(event.phase == 'kv' and event.status == 'failed' for event in events if event.call == events[-1].call)
+
+    # removed hooks don't get events
+    events.clear()
+    assert h3.delete_object('b1', 'o1') == True
+    assert h3.delete_bucket('b1') == True
+    assert events == []
+
+def test_trace_threads(open_h3):
+    """Replace hooks and close the handle while other threads are calling it."""
+
+    h3 = open_h3()
+    assert h3.create_bucket('b1') == True
+
+    events = []
+    errors = []
+    def write(name):
+        try:
+            while True:
+                h3.write_object('b1', name, os.urandom(1000))
+        except ValueError:
+            pass
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write, args=(f'o{i}',)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+
+    # hooks come and go under the calls in progress
+    for i in range(200):
+        hook = lambda event: events.append(event)
+        h3.add_hook(hook)
+        time.sleep(0.001)
+        h3.remove_hook(hook)
+
+    assert h3.close() == True
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert events
+
+    h3 = open_h3()
+    assert h3.purge_bucket('b1') == True
+    assert h3.delete_bucket('b1') == True
@@ -0,0 +1,122 @@
+# Copyright [2019] [FORTH-ICS]
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import random
+import pytest
+
+MEGABYTE = 1048576
+
+# Writes into existing parts are applied as patches by some stores (RocksDB merges them on
+# reads and compactions), so the tests check them again once the store is reopened.
+
+def write(h3, expected, offset, data):
+    assert h3.write_object('b1', 'o1', data, offset=offset) == True
+    expected[len(expected):] = bytes(max(offset - len(expected), 0))
+    expected[offset:offset + len(data)] = data
+
+def check(h3, expected):
+    assert h3.info_object('b1', 'o1').size == len(expected)
+    assert h3.read_object('b1', 'o1') == expected
+    for offset in range(123, len(expected), MEGABYTE // 2):
+        assert h3.read_object('b1', 'o1', offset=offset, size=MEGABYTE // 3) == expected[offset:offset + MEGABYTE // 3]
+
+def reopen(h3, open_h3):
+    h3.close()
+    return open_h3()
+
+def cleanup(h3):
+    assert h3.purge_bucket('b1') == True
+
+    assert h3.delete_bucket('b1') == True
+
+    h3.close()
+
+def test_overlapping_updates(open_h3):
+    """Overwrite parts with many unaligned writes that overlap each other."""
+
+    h3 = open_h3()
+    assert h3.list_buckets() == []
+
+    assert h3.create_bucket('b1') == True
+
+    expected = bytearray(os.urandom(3 * MEGABYTE))
+    assert h3.create_object('b1', 'o1', bytes(expected)) == True
+
+    generator = random.Random(1)
+    for i in range(200):
+        offset = generator.randrange(len(expected) - 1)
+        write(h3, expected, offset, generator.randbytes(min(generator.randrange(1, 5000), len(expected) - offset)))
+    check(h3, expected)
+
+    h3 = reopen(h3, open_h3)
+    check(h3, expected)
+
+    cleanup(h3)
+
+def test_updates_past_end(open_h3):
+    """Write past the end of parts, so that they are padded with zeros."""
+
+    h3 = open_h3()
+    assert h3.list_buckets() == []
+
+    assert h3.create_bucket('b1') == True
+
+    expected = bytearray(os.urandom(100))
+    assert h3.create_object('b1', 'o1', bytes(expected)) == True
+
+    # into the same part, then into the padding, then past the end of the next part
+    write(h3, expected, 5000, os.urandom(100))
+    write(h3, expected, 2000, os.urandom(10))
+    write(h3, expected, MEGABYTE + 10, os.urandom(20))
+    write(h3, expected, MEGABYTE + 300000, os.urandom(MEGABYTE))
+    write(h3, expected, MEGABYTE + 1000, os.urandom(10))
+    check(h3, expected)
+
+    h3 = reopen(h3, open_h3)
+    check(h3, expected)
+
+    write(h3, expected, 9000, os.urandom(10))
+    check(h3, expected)
+
+    cleanup(h3)
+
+def test_updates_out_of_order(open_h3):
+    """Write adjacent and disjoint pieces of parts in reverse and shuffled order."""
+
+    h3 = open_h3()
+    assert h3.list_buckets() == []
+
+    assert h3.create_bucket('b1') == True
+
+    expected = bytearray(os.urandom(10))
+    assert h3.create_object('b1', 'o1', bytes(expected)) == True
+
+    # adjacent pieces from the end to the start of a part, so that later patches precede earlier ones
+    for offset in reversed(range(0, MEGABYTE, 64 * 1024)):
+        write(h3, expected, offset + 100, os.urandom(64 * 1024))
+
+    # disjoint and overlapping pieces, whose gaps keep what was there
+    offsets = [offset + 7 for offset in range(0, MEGABYTE, 10000)]
+    random.Random(2).shuffle(offsets)
+    for offset in offsets:
+        write(h3, expected, offset, os.urandom(3000))
+    for offset in offsets[:20]:
+        write(h3, expected, offset + 1500, os.urandom(9000))
+    check(h3, expected)
+
+    h3 = reopen(h3, open_h3)
+    check(h3, expected)
+
+    cleanup(h3)